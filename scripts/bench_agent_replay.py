@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Replay / teste de carga do Agent.run com provedores e tools falsos.
+
+Reexecuta conversas gravadas (journal de runs ou diretórios antigos
+runs/*/input.json) ou sintéticas através do Agent.run, com concorrência
+configurável, contra o servidor LLM falso (scripts/stub_llm_server.py) e
+tools falsas com latência configurável. Nenhuma API real é chamada: as URLs
+dos provedores apontam para o servidor local, e MOLTBOT_DIR/HOME apontam
+para um diretório temporário (journal, memória, histórico e o ledger de uso
+de tokens). Ao final, confere que nada fora dele foi alterado.
+
+Relata vazão, percentis de latência por run, contagem de status, atraso do
+event loop e locais bloqueantes (utils/loop_monitor.py) e as métricas do
+MetricsBuffer (llm_latency_ms, tool_latency_ms).
+
+Uso: na raiz do projeto,
+    python scripts/bench_agent_replay.py
+    python scripts/bench_agent_replay.py --runs 200 --concurrency 20 --llm-latency-ms 300
+    python scripts/bench_agent_replay.py --journal src/workspace/runs/journal --rate-429 0.02
+    python scripts/bench_agent_replay.py --runs-dir old_runs/ --json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT / "src", REPO_ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# Chaves falsas antes de importar o config (GROQ_API_KEY é obrigatória)
+os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+from stub_llm_server import StubConfig, StubLLMServer  # noqa: E402
+
+DEFAULT_TOOLS = ["web_search", "search_memory", "read_file", "get_weather"]
+
+SYNTHETIC_MESSAGES = [
+    "Quais EPIs são obrigatórios para trabalho em altura segundo a NR-35?",
+    "Resuma as obrigações do empregador na NR-01",
+    "Pesquise as últimas notícias sobre segurança portuária",
+    "Qual a previsão do tempo em Santos amanhã?",
+    "Explique a diferença entre PGR e PPRA",
+    "Liste os requisitos de treinamento da NR-33 para espaço confinado",
+    "O que diz a NR-29 sobre operações de carga e descarga?",
+    "Me lembre dos pontos principais da NR-10",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil nearest-rank (mesma definição do MetricsBuffer)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+# -- fontes de conversas --------------------------------------------------
+
+
+def load_journal(journal_dir: Path, limit: int) -> List[Dict[str, Any]]:
+    """Mensagens e ações gravadas no journal de runs"""
+    from workspace.runs.journal import RunJournal
+
+    journal = RunJournal(journal_dir)
+    try:
+        conversations = []
+        for run_id in journal.run_ids(limit=limit):
+            record = journal.get(run_id) or {}
+            message = record.get("input", {}).get("message")
+            if message:
+                conversations.append({"message": message, "actions": record.get("actions", [])})
+        return conversations
+    finally:
+        journal.close()
+
+
+def load_runs_dir(runs_dir: Path, limit: int) -> List[Dict[str, Any]]:
+    """Mensagens do layout antigo (runs/<run_id>/input.json)"""
+    conversations = []
+    for input_path in sorted(runs_dir.glob("*/input.json"), reverse=True)[:limit]:
+        try:
+            data = json.loads(input_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if data.get("message"):
+            conversations.append({"message": data["message"], "actions": []})
+    return conversations
+
+
+def synthetic(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"message": f"{SYNTHETIC_MESSAGES[i % len(SYNTHETIC_MESSAGES)]} (#{i})", "actions": []}
+        for i in range(count)
+    ]
+
+
+# -- agente com dependências falsas ---------------------------------------
+
+
+class _NullMemory:
+    """MemoryManager sem efeitos colaterais (não indexa as conversas do benchmark)"""
+
+    def get_relevant_memory(self, user_message: str, max_facts: int = 3) -> str:
+        return ""
+
+    def remember_interaction(self, user_message: str, assistant_response: str) -> None:
+        return None
+
+
+def build_registry(conversations: List[Dict[str, Any]], latency_ms: float):
+    """ToolRegistry com tools falsas: nomes e resultados vêm das ações gravadas"""
+    from workspace.core.tools import ToolRegistry
+
+    samples: Dict[str, Any] = {}
+    for conversation in conversations:
+        for action in conversation["actions"]:
+            samples.setdefault(action.get("tool", "?"), action.get("result"))
+    for name in DEFAULT_TOOLS:
+        samples.setdefault(name, {"success": True, "result": f"resultado sintético de {name}"})
+
+    registry = ToolRegistry()
+    for name, result in samples.items():
+        async def tool(_result=result, **kwargs):
+            await asyncio.sleep(latency_ms / 1000)
+            return _result
+
+        registry.register(name, tool, {
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": f"Tool falsa {name} (benchmark)",
+                "parameters": {
+                    "type": "object",
+                    "properties": {"query": {"type": "string"}},
+                },
+            },
+        })
+    return registry
+
+
+def build_agent(registry, work_dir: Path):
+    from workspace.core import agent as agent_module
+    from workspace.core.cache import response_cache
+    from workspace.runs import RunManager
+    from workspace.runs.policy import RunLogPolicy
+
+    agent = agent_module.Agent(registry)
+    agent.run_manager.close()
+    agent.run_manager = RunManager(work_dir / "runs", policy=RunLogPolicy())
+    agent.memory_manager = _NullMemory()
+    # Cada run deve chegar ao LLM: sem respostas em cache nem cooldown herdado
+    response_cache.clear()
+    agent_module._groq_cooldown_until = 0.0
+    return agent
+
+
+# -- execução -------------------------------------------------------------
+
+
+async def replay(
+    agent, conversations: List[Dict[str, Any]], runs: int, concurrency: int, block_ms: float
+) -> Dict:
+    from utils.loop_monitor import loop_monitor
+    from workspace.storage.metrics import metrics
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(i: int) -> None:
+        message = conversations[i % len(conversations)]["message"]
+        if runs > len(conversations):
+            message = f"{message} [replay {i}]"  # evita o cache de respostas
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                output = await agent.run(message, history=[])
+                status = "ok" if output else "vazio"
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    loop_monitor.start(threshold_ms=block_ms, interval=0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    elapsed = time.perf_counter() - start
+    await loop_monitor.stop()
+    lag = metrics.percentiles("event_loop_lag_ms")
+
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(runs / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else 0.0,
+        },
+        "statuses": statuses,
+        "loop_lag_ms": {k: lag.get(k, 0.0) for k in ("p50", "p95", "p99")},
+        "blocking_sites": [
+            {k: row[k] for k in ("site", "leaf", "count", "total_ms", "max_ms")}
+            for row in loop_monitor.report()
+        ],
+    }
+
+
+def metrics_summary() -> Dict[str, Any]:
+    from workspace.storage.metrics import metrics
+
+    summary = {}
+    for prefix in ("llm_latency_ms", "tool_latency_ms"):
+        for series, values in metrics.snapshot(prefix)["histograms"].items():
+            summary[series] = {k: round(v, 1) for k, v in values.items()}
+    return summary
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    lat, lag = report["latency_ms"], report["loop_lag_ms"]
+    print(f"\nRuns: {report['runs']} | concorrência: {report['concurrency']} "
+          f"| tempo: {report['elapsed_s']:.2f} s | vazão: {report['throughput_rps']:.2f} runs/s")
+    print(f"Latência por run (ms): p50={lat['p50']:.1f} p95={lat['p95']:.1f} "
+          f"p99={lat['p99']:.1f} média={lat['mean']:.1f}")
+    print(f"Status: {report['statuses']}")
+    print(f"Atraso do event loop (ms): p50={lag['p50']:.2f} p95={lag['p95']:.2f} p99={lag['p99']:.2f}")
+    for row in report["blocking_sites"]:
+        print(f"  bloqueio {row['site']}: {row['count']}x total={row['total_ms']:.0f}ms "
+              f"máx={row['max_ms']:.0f}ms ({row['leaf']})")
+    stub = report["stub"]
+    print(f"Stub LLM: {stub['requests']} requisições, {stub['rate_limited']} 429, "
+          f"{stub['tool_calls']} tool_calls")
+    for name, values in report["metrics"].items():
+        print(f"{name}: " + " ".join(f"{k}={v}" for k, v in values.items()))
+
+
+def isolate(work_dir: Path) -> None:
+    """Config, HOME e temporários do bot apontam para `work_dir`
+
+    Precisa rodar antes de qualquer import de src/: `config` lê MOLTBOT_DIR
+    uma vez, e o ledger de uso (`DATA_DIR/llm_usage.json`, lido por
+    `has_reached_daily_limit`), o journal, a memória e o SQLiteStore
+    (`~/.moltbot`) derivam dele ou de HOME. Sem isso o benchmark gastava a
+    cota diária do bot de produção.
+    """
+    os.environ["MOLTBOT_DIR"] = str(work_dir)
+    os.environ["MOLTBOT_TEMP"] = str(work_dir / "tmp")
+    os.environ["HOME"] = str(work_dir)
+
+
+def snapshot(roots: List[Path]) -> Dict[str, tuple]:
+    """(mtime, tamanho) dos arquivos sob `roots`, sem caches de bytecode"""
+    files = {}
+    for root in roots:
+        if not root.exists():
+            continue
+        for path in [root] if root.is_file() else root.rglob("*"):
+            if "__pycache__" in path.parts or not path.is_file():
+                continue
+            stat = path.stat()
+            files[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay/carga do Agent.run com LLM e tools falsos")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--journal", type=Path, help="diretório do journal de runs")
+    source.add_argument("--runs-dir", type=Path, help="diretório com runs/*/input.json (layout antigo)")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--tool-call-rate", type=float, default=0.5)
+    parser.add_argument("--tool-latency-ms", type=float, default=50.0)
+    parser.add_argument("--block-ms", type=float, default=50.0,
+                        help="parada do loop considerada bloqueio (amostra a pilha)")
+    parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+    args = parser.parse_args()
+
+    # Tudo que o agente grava vai para o diretório temporário; o resto é conferido
+    watched = [REPO_ROOT / "src", Path.home() / ".moltbot", Path.home() / ".assistente"]
+    before = snapshot(watched)
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_agent_"))
+    isolate(work_dir)
+    try:
+        return _run(args, work_dir, watched, before)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run(args, work_dir: Path, watched: List[Path], before: Dict[str, tuple]) -> int:
+    if args.journal:
+        conversations = load_journal(args.journal, args.runs)
+    elif args.runs_dir:
+        conversations = load_runs_dir(args.runs_dir, args.runs)
+    else:
+        conversations = synthetic(args.runs)
+    if not conversations:
+        print("Nenhuma conversa encontrada na fonte informada", file=sys.stderr)
+        return 1
+
+    server = StubLLMServer(StubConfig(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        rate_429=args.rate_429,
+        tool_call_rate=args.tool_call_rate,
+    ))
+    base_url = server.start_in_thread()
+    # Todos os provedores apontam para o servidor falso
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ["GLM_API_BASE_URL"] = f"{base_url}/v1"
+    from workspace.core import nvidia_kimi
+    nvidia_kimi.NVIDIA_BASE_URL = f"{base_url}/v1/chat/completions"
+
+    agent = build_agent(build_registry(conversations, args.tool_latency_ms), work_dir)
+    try:
+        report = asyncio.run(replay(
+            agent, conversations, args.runs, args.concurrency, args.block_ms
+        ))
+    finally:
+        agent.run_manager.close()
+        server.stop_thread()
+        from workspace.storage import llm_usage
+        llm_usage.flush()
+
+    report["stub"] = {
+        "requests": server.stats.requests,
+        "rate_limited": server.stats.rate_limited,
+        "tool_calls": server.stats.tool_calls,
+    }
+    report["metrics"] = metrics_summary()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+    after = snapshot(watched)
+    touched = sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+    if touched:
+        print("Arquivos alterados fora do diretório temporário:", file=sys.stderr)
+        for path in touched:
+            print(f"  {path}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
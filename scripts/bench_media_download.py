@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória de pico e latência do download de mídia por mensagem.
+
+Compara o caminho antigo do handler de foto (`http_pool.get` →
+`response.content` → base64) com `download_media` (streaming para buffer
+reaproveitado → base64 do memoryview). O arquivo é servido por um transporte
+httpx em memória, em pedaços de 64 KB, para isolar o custo de cópias e
+alocações do custo de rede. A memória de pico é medida com tracemalloc.
+
+Uso: na raiz do projeto,
+    python scripts/bench_media_download.py
+    python scripts/bench_media_download.py --size-mb 5 --messages 50
+"""
+import argparse
+import asyncio
+import base64
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from utils import media_buffer
+from utils.http_pool import HttpClientPool
+from utils.media_buffer import BufferPool, download_media
+
+URL = "https://api.telegram.test/file/photo.jpg"
+CHUNK = 64 * 1024
+
+
+def make_pool(payload: bytes) -> HttpClientPool:
+    def handler(request: httpx.Request) -> httpx.Response:
+        async def body():
+            for i in range(0, len(payload), CHUNK):
+                yield payload[i:i + CHUNK]
+
+        return httpx.Response(200, content=body(), headers={"content-length": str(len(payload))})
+
+    return HttpClientPool(transport=httpx.MockTransport(handler))
+
+
+async def legacy(pool: HttpClientPool, size: int) -> int:
+    response = await pool.get(URL)
+    return len(base64.b64encode(response.content).decode("utf-8"))
+
+
+async def buffered(pool: HttpClientPool, size: int, buffers: BufferPool) -> int:
+    source = SimpleNamespace(file_path=URL, file_size=size)
+    async with download_media(source, kind="photo", pool=buffers) as media:
+        return len(base64.b64encode(media.data).decode("ascii"))
+
+
+async def measure(name: str, step, messages: int) -> None:
+    latencies, peaks = [], []
+    for _ in range(messages):
+        tracemalloc.start()
+        start = time.perf_counter()
+        await step()
+        latencies.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.stop()
+    print(
+        f"{name:>10}: p50 {statistics.median(latencies):7.1f} ms | "
+        f"pico médio {statistics.mean(peaks):6.1f} MB | pico máx {max(peaks):6.1f} MB"
+    )
+
+
+async def main(size_mb: float, messages: int) -> None:
+    payload = bytes(range(256)) * int(size_mb * 1024 * 1024 / 256)
+    pool = make_pool(payload)
+    media_buffer.http_pool = pool
+    buffers = BufferPool(max_buffer_bytes=len(payload) * 2)
+    print(f"Arquivo de {len(payload) / 1024 / 1024:.1f} MB, {messages} mensagens por caminho")
+
+    await measure("antigo", lambda: legacy(pool, len(payload)), messages)
+    await measure("buffer", lambda: buffered(pool, len(payload), buffers), messages)
+    print(f"Buffers: {buffers.stats()}")
+    await pool.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.size_mb, args.messages))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do rate limiter: custo por verificação e memória por usuário.
+
+Compara a implementação antiga (lista de `datetime` refiltrada a cada
+chamada, `defaultdict` sem despejo) com o GCRA em memória e com o backend
+SQLite compartilhado. Cada cenário faz `--calls` verificações espalhadas por
+`--users` usuários; a memória retida é medida com tracemalloc.
+
+Uso: na raiz do projeto,
+    python scripts/bench_rate_limiter.py
+    python scripts/bench_rate_limiter.py --calls 200000 --users 5000 --max-requests 100
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import logging
+
+logging.disable(logging.WARNING)
+
+from security.rate_limiter import MemoryBackend, RateLimiter, SQLiteRateLimitBackend
+
+
+class LegacyRateLimiter:
+    """Implementação anterior (lista de datetimes por usuário)"""
+
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window = timedelta(seconds=window_seconds)
+        self.requests = defaultdict(list)
+
+    def is_allowed(self, user_id: int) -> bool:
+        now = datetime.now()
+        self.requests[user_id] = [t for t in self.requests[user_id] if now - t < self.window]
+        if len(self.requests[user_id]) >= self.max_requests:
+            return False
+        self.requests[user_id].append(now)
+        return True
+
+
+def _drive(limiter, calls: int, users: int) -> int:
+    allowed = 0
+    for i in range(calls):
+        allowed += limiter.is_allowed(i % users)
+    return allowed
+
+
+def run(name: str, factory, calls: int, users: int) -> None:
+    """Tempo sem tracemalloc; memória retida medida numa segunda instância"""
+    start = time.perf_counter()
+    allowed = _drive(factory(), calls, users)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    limiter = factory()
+    _drive(limiter, calls, users)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<14} {elapsed / calls * 1e6:8.2f} µs/verificação  "
+        f"aceitas={allowed:<8d} memória={retained / 1024:8.1f} KB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark do rate limiter")
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--max-requests", type=int, default=50)
+    parser.add_argument("--sqlite-calls", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{args.calls} verificações, {args.users} usuários, limite {args.max_requests}/60s")
+    run("legado", lambda: LegacyRateLimiter(args.max_requests, 60), args.calls, args.users)
+    run("gcra memória", lambda: RateLimiter(args.max_requests, 60, backend=MemoryBackend()), args.calls, args.users)
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = []
+
+        def sqlite_limiter():
+            backends.append(SQLiteRateLimitBackend(Path(tmp) / f"limits{len(backends)}.db"))
+            return RateLimiter(args.max_requests, 60, backend=backends[-1])
+
+        run("gcra sqlite", sqlite_limiter, args.sqlite_calls, args.users)
+        for backend in backends:
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
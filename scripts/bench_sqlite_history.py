@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latência do get_history com muitas linhas (padrão: 1M).
+
+Popula um banco com o schema legado (sem índice em chat_id), mede o
+get_history, abre o mesmo arquivo com SQLiteStore (que aplica as migrações:
+tipos + índice (chat_id, id)) e mede de novo.
+
+Mede dois perfis: chats ativos (a varredura reversa por id acha as 10
+mensagens logo) e um chat inativo cujas mensagens estão só no início da
+tabela, que força a varredura completa no schema legado.
+
+Uso: na raiz do projeto,
+    python scripts/bench_sqlite_history.py
+    python scripts/bench_sqlite_history.py --rows 200000 --chats 500 --queries 200
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from workspace.storage.sqlite_store import SCHEMA_VERSION, SQLiteStore
+
+LEGACY_QUERY = (
+    "SELECT role, content FROM conversations WHERE chat_id = ? ORDER BY id DESC LIMIT ?"
+)
+
+
+def populate_legacy(db_path: Path, rows: int, chats: int, batch: int = 50000) -> None:
+    """Cria o schema anterior às migrações e insere `rows` mensagens"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, "
+        "role TEXT NOT NULL, content TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute(
+        "CREATE TABLE metrics (id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL, "
+        "data TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    # Chat inativo (id = chats): poucas mensagens, todas no início da tabela
+    conn.executemany(
+        "INSERT INTO conversations (chat_id, role, content) VALUES (?, ?, ?)",
+        [(chats, "user", f"antiga {i}") for i in range(10)],
+    )
+    rng = random.Random(42)
+    for start in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO conversations (chat_id, role, content) VALUES (?, ?, ?)",
+            [
+                (
+                    rng.randrange(chats),
+                    "user" if i % 2 == 0 else "assistant",
+                    f"mensagem {i} " + "x" * 80,
+                )
+                for i in range(start, min(start + batch, rows))
+            ],
+        )
+        conn.commit()
+    conn.close()
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95, ordered[-1]
+
+
+def measure(fn, chats: int, queries: int, limit: int, chat_id=None):
+    rng = random.Random(7)
+    samples = []
+    for _ in range(queries):
+        if chat_id is None:
+            target = rng.randrange(chats)
+        else:
+            target = chat_id
+        t0 = time.perf_counter()
+        fn(target, limit)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return percentiles(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+
+        t0 = time.perf_counter()
+        populate_legacy(db_path, args.rows, args.chats)
+        print(f"Populado: {args.rows:,} linhas em {args.chats} chats ({time.perf_counter() - t0:.1f}s)")
+
+        conn = sqlite3.connect(db_path)
+        legacy_fn = lambda chat_id, limit: conn.execute(LEGACY_QUERY, (chat_id, limit)).fetchall()  # noqa: E731
+        legacy = measure(legacy_fn, args.chats, args.queries, args.limit)
+        legacy_idle = measure(legacy_fn, args.chats, args.queries, args.limit, chat_id=args.chats)
+        conn.close()
+
+        t0 = time.perf_counter()
+        store = SQLiteStore(db_path=str(db_path))
+        migration_s = time.perf_counter() - t0
+
+        store_fn = lambda chat_id, limit: store.get_history(limit=limit, chat_id=chat_id)  # noqa: E731
+        migrated = measure(store_fn, args.chats, args.queries, args.limit)
+        migrated_idle = measure(store_fn, args.chats, args.queries, args.limit, chat_id=args.chats)
+        store.close()
+
+    print(f"Migração para o schema v{SCHEMA_VERSION}: {migration_s:.1f}s")
+    print(f"{'':<36}{'p50 (ms)':>10}{'p95 (ms)':>10}{'máx (ms)':>10}")
+    rows = (
+        ("chats ativos, sem índice (legado)", legacy),
+        ("chats ativos, índice (chat_id, id)", migrated),
+        ("chat inativo, sem índice (legado)", legacy_idle),
+        ("chat inativo, índice (chat_id, id)", migrated_idle),
+    )
+    for label, (p50, p95, worst) in rows:
+        print(f"{label:<36}{p50:>10.3f}{p95:>10.3f}{worst:>10.3f}")
+    print(f"Ganho p50 (ativos): {legacy[0] / max(migrated[0], 1e-9):.0f}x")
+    print(f"Ganho p50 (inativo): {legacy_idle[0] / max(migrated_idle[0], 1e-9):.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
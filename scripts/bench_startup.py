@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização do bot: importações e tempo até o `bot_pronto`.
+
+Duas medições, cada uma num interpretador novo (cache de módulos frio no
+Python, mas com os .pyc já compilados):
+
+1. `python -X importtime -c "import bot_simple"`: tempo total de importação
+   e os módulos de primeiro nível mais caros (tempo acumulado).
+2. Tempo até o bot estar pronto sem rede: importar `bot_simple`, montar o
+   agente e o histórico (`build_components`) e a Application com os
+   handlers (`build_application`). O que falta para o `bot_pronto` real
+   (getMe e início do polling) depende da rede e fica de fora.
+
+Sai com código 1 se a mediana do passo 2 passar de `--target-ms`, para uso
+em CI. HOME e MOLTBOT_DIR apontam para um diretório temporário: o benchmark
+não toca no banco nem na memória do bot.
+
+Uso: na raiz do projeto,
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --target-ms 600 --top 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SRC = REPO_ROOT / "src"
+
+# Meta para o tempo até o bot pronto (sem rede), em ms
+TARGET_MS = 800
+
+READY_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import bot_simple
+imported = time.perf_counter()
+agent, store = bot_simple.build_components()
+bot_simple.build_application("123456:bench-startup", agent, store)
+ready = time.perf_counter()
+store.close()
+agent.run_manager.close()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "ready_ms": (ready - start) * 1000,
+}))
+"""
+
+
+def _env(home: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(HOME=home, MOLTBOT_DIR=home, PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("GROQ_API_KEY", "bench")
+    env.setdefault("TELEGRAM_TOKEN", "123456:bench-startup")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """(profundidade, acumulado_us, módulo) de cada linha do -X importtime"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+    return rows
+
+
+def import_profile(home: str) -> List[Tuple[int, int, str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot_simple"],
+        cwd=SRC, env=_env(home), capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def ready_once(home: str) -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", READY_SNIPPET],
+        cwd=SRC, env=_env(home), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do bot")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="moltbot_startup_") as home:
+        rows = import_profile(home)
+        total = next(us for depth, us, name in rows if depth == 0 and name == "bot_simple")
+        direct = sorted(
+            ((us, name) for depth, us, name in rows if depth == 1), reverse=True
+        )[: args.top]
+        print(f"import bot_simple: {total / 1000:.0f} ms (-X importtime)")
+        for us, name in direct:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+        runs = [ready_once(home) for _ in range(args.runs)]
+
+    imports = statistics.median(run["import_ms"] for run in runs)
+    ready = statistics.median(run["ready_ms"] for run in runs)
+    worst = max(run["ready_ms"] for run in runs)
+    print(f"\n{args.runs} execuções: import p50={imports:.0f} ms, "
+          f"pronto (sem rede) p50={ready:.0f} ms, máx={worst:.0f} ms, meta={args.target_ms:.0f} ms")
+    if ready > args.target_ms:
+        print("ACIMA DA META")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
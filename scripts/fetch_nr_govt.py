@@ -7,10 +7,13 @@ Uso: python scripts/fetch_nr_govt.py <nr_number>
 
 import argparse
 import asyncio
-import re
 import sys
 from pathlib import Path
-from urllib.parse import urljoin
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from utils.html_text import aiter_html_blocks, html_to_text
 
 try:
     import aiohttp
@@ -36,39 +39,47 @@ async def fetch_page(session: aiohttp.ClientSession, url: str) -> str:
         return None
 
 
-def clean_html_content(html: str) -> str:
-    """Remove tags HTML e formata o conteúdo legível."""
-    # Remove scripts e estilos
-    html = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.DOTALL | re.IGNORECASE)
-    html = re.sub(r"<style[^>]*>.*?</style>", "", html, flags=re.DOTALL | re.IGNORECASE)
-
-    # Remove comentários HTML
-    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+async def fetch_page_lines(
+    session: aiohttp.ClientSession, url: str, keep=None, limit: int = None
+) -> list:
+    """Baixa a página em streaming e devolve as linhas de texto (uma por bloco).
 
-    # Substitui tags por quebras de linha
-    html = re.sub(r"<br\s*/?>", "\n", html, flags=re.IGNORECASE)
-    html = re.sub(r"</p>", "\n\n", html)
-    html = re.sub(r"</h[1-6]>", "\n\n", html)
-    html = re.sub(r"</div>", "\n", html)
-    html = re.sub(r"</li>", "\n", html)
-    html = re.sub(r"</tr>", "\n", html)
+    O HTML nunca é materializado inteiro: cada pedaço recebido alimenta o
+    extrator, que emite blocos (títulos, itens, linhas de tabela) à medida
+    que fecham. `keep` filtra linhas durante o streaming e `limit` encerra o
+    download assim que linhas suficientes foram coletadas.
+    Retorna None se a página não puder ser obtida.
+    """
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status != 200:
+                return None
+            encoding = response.get_encoding() or "utf-8"
+            lines = []
+            async for block in aiter_html_blocks(
+                response.content.iter_chunked(65536), encoding=encoding
+            ):
+                line = block.to_text()
+                if keep is None or keep(line):
+                    lines.append(line)
+                    if limit and len(lines) >= limit:
+                        break
+            return lines
+    except Exception as e:
+        print(f"Erro ao acessar {url}: {e}")
+        return None
 
-    # Remove todas as outras tags HTML
-    html = re.sub(r"<[^>]+>", "", html)
 
-    # Decodifica entidades HTML
-    html = html.replace("&nbsp;", " ")
-    html = html.replace("&amp;", "&")
-    html = html.replace("&lt;", "<")
-    html = html.replace("&gt;", ">")
-    html = html.replace("&quot;", '"')
-    html = html.replace("&#39;", "'")
+def _is_nr_line(line: str) -> bool:
+    """Linha relevante para o conteúdo de uma NR."""
+    return len(line) > 30 and (
+        "NR" in line or "norma" in line.lower() or "segurança" in line.lower()
+    )
 
-    # Limpa formatação excessiva
-    html = re.sub(r"\n{3,}", "\n\n", html)
-    html = html.strip()
 
-    return html
+def clean_html_content(html) -> str:
+    """Remove tags HTML e formata o conteúdo legível (passada única, ver utils.html_text)."""
+    return html_to_text(html)
 
 
 async def search_nr(session: aiohttp.ClientSession, nr_number: int) -> str:
@@ -76,13 +87,13 @@ async def search_nr(session: aiohttp.ClientSession, nr_number: int) -> str:
     search_url = f"{BASE_URL}?searchudo=NR+{nr_number}"
 
     print(f"Buscando NR-{nr_number}...")
-    html = await fetch_page(session, search_url)
+    # Filtra conteúdo relevante (primeiras 100 linhas relevantes)
+    lines = await fetch_page_lines(
+        session, search_url, keep=lambda line: len(line) > 20, limit=100
+    )
 
-    if html:
-        content = clean_html_content(html)
-        # Filtra conteúdo relevante
-        lines = [line for line in content.split("\n") if line.strip() and len(line) > 20]
-        return "\n".join(lines[:100])  # Primeiras 100 linhas relevantes
+    if lines:
+        return "\n".join(lines)
 
     return None
 
@@ -101,23 +112,11 @@ async def fetch_nr(nr_number: int, output_file: str = None) -> str:
         direct_url = await get_nr_direct_url(nr_number)
         print(f"URL: {direct_url}")
 
-        html = await fetch_page(session, direct_url)
-
-        if html:
-            content = clean_html_content(html)
-
-            # Filtra conteúdo relevante sobre NR
-            lines = []
-            for line in content.split("\n"):
-                line = line.strip()
-                if (
-                    line
-                    and len(line) > 30
-                    and ("NR" in line or "norma" in line.lower() or "segurança" in line.lower())
-                ):
-                    lines.append(line)
+        # Filtra conteúdo relevante sobre NR (limita a 150 linhas)
+        lines = await fetch_page_lines(session, direct_url, keep=_is_nr_line, limit=150)
 
-            result = "\n\n".join(lines[:150])  # Limita a 150 linhas
+        if lines is not None:
+            result = "\n\n".join(lines)
 
             if output_file:
                 Path(output_file).write_text(result)
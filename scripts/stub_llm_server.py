@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Servidor LLM falso compatível com a API de chat da OpenAI/Groq (para benchmarks).
+
+Atende POST em /openai/v1/chat/completions (caminho do SDK Groq) e
+/v1/chat/completions (NVIDIA, GLM e clientes OpenAI) com:
+- latência configurável (base + jitter);
+- fração de respostas 429 (rate limit);
+- fração de respostas com tool_calls (escolhe uma das tools enviadas na
+  requisição), seguida de uma resposta final depois que a tool responde.
+
+Também atende /openai/v1/audio/transcriptions (Whisper): devolve um texto
+sintético com o nome e o tamanho do arquivo enviado, com a mesma latência.
+
+Uso isolado (na raiz do projeto):
+    python scripts/stub_llm_server.py --port 8099 --latency-ms 300 --rate-429 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8099 python ...
+
+Uso embutido (ver scripts/bench_agent_replay.py):
+    server = StubLLMServer(StubConfig(latency_ms=200))
+    base_url = server.start_in_thread()
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    rate_429: float = 0.0
+    tool_call_rate: float = 0.5
+    completion_tokens: int = 60
+    seed: Optional[int] = 1234
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    rate_limited: int = 0
+    tool_calls: int = 0
+    transcriptions: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+class StubLLMServer:
+    """Servidor aiohttp com respostas de chat sintéticas"""
+
+    def __init__(self, config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.stats = StubStats()
+        self._rng = random.Random(self.config.seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._ready = threading.Event()
+
+    # -- respostas --------------------------------------------------------
+
+    def _completion(self, body: Dict) -> Dict:
+        messages = body.get("messages") or []
+        tools = body.get("tools") or []
+        already_called = any(m.get("role") == "tool" for m in messages)
+
+        message: Dict = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+        if tools and not already_called and self._rng.random() < self.config.tool_call_rate:
+            tool = self._rng.choice(tools)["function"]
+            self.stats.tool_calls += 1
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": tool["name"], "arguments": json.dumps({"query": "stub"})},
+            }]
+            finish_reason = "tool_calls"
+        else:
+            last_user = next(
+                (m.get("content") for m in reversed(messages) if m.get("role") == "user"), ""
+            )
+            message["content"] = f"Resposta sintética para: {str(last_user)[:80]}"
+
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.config.completion_tokens,
+                "total_tokens": prompt_tokens + self.config.completion_tokens,
+            },
+        }
+
+    async def _delay_or_429(self, request: web.Request) -> Optional[web.Response]:
+        """Latência simulada; devolve a resposta 429 quando sorteada"""
+        self.stats.requests += 1
+        self.stats.by_path[request.path] = self.stats.by_path.get(request.path, 0) + 1
+
+        delay = self.config.latency_ms + self._rng.uniform(-1, 1) * self.config.jitter_ms
+        await asyncio.sleep(max(0.0, delay) / 1000)
+
+        if self._rng.random() < self.config.rate_429:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded",
+                           "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after": "0"},
+            )
+        return None
+
+    async def _handle_chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        limited = await self._delay_or_429(request)
+        return limited or web.json_response(self._completion(body))
+
+    async def _handle_transcription(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form.get("file")
+        name = getattr(upload, "filename", "audio")
+        size = len(upload.file.read()) if hasattr(upload, "file") else 0
+        limited = await self._delay_or_429(request)
+        if limited:
+            return limited
+        self.stats.transcriptions += 1
+        text = f"Transcrição sintética de {name} ({size} bytes)."
+        if form.get("response_format") == "text":
+            return web.Response(text=text, content_type="text/plain")
+        return web.json_response({"text": text})
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/openai/v1/chat/completions", self._handle_chat)
+        app.router.add_post("/v1/chat/completions", self._handle_chat)
+        app.router.add_post("/chat/completions", self._handle_chat)
+        app.router.add_post("/openai/v1/audio/transcriptions", self._handle_transcription)
+        return app
+
+    # -- ciclo de vida ----------------------------------------------------
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self._app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start_in_thread(self) -> str:
+        """Roda o servidor em outra thread (event loop próprio) e retorna a URL base"""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            self._ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        threading.Thread(target=run, name="stub-llm", daemon=True).start()
+        self._ready.wait(timeout=10)
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Servidor LLM falso (OpenAI/Groq)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--tool-call-rate", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = StubLLMServer(
+        StubConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            rate_429=args.rate_429,
+            tool_call_rate=args.tool_call_rate,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+    async def serve():
+        print(f"Stub LLM em {await server.start()}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
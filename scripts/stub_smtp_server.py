@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Servidor SMTP local mínimo para testes de entrega de lembretes.
+
+Fala o suficiente do protocolo (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT, AUTH aceita qualquer credencial) para smtplib e aiosmtplib, sem TLS.
+Guarda as mensagens recebidas em `messages` e permite simular lentidão
+(`latency_ms`) e falhas temporárias (`fail_first`: as N primeiras mensagens
+recebem 451 no MAIL FROM).
+
+Uso isolado (na raiz do projeto):
+    python scripts/stub_smtp_server.py --port 8025 --latency-ms 2000
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=false EMAIL_ADDRESS=eu@teste ...
+
+Uso embutido (no mesmo event loop):
+    server = StubSMTPServer(latency_ms=100)
+    port = await server.start()
+    ...
+    await server.stop()
+"""
+import argparse
+import asyncio
+from email import message_from_bytes, policy
+from email.message import Message
+from typing import List, Optional
+
+
+class StubSMTPServer:
+    """Servidor SMTP asyncio que registra as mensagens recebidas"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: int = 0, fail_first: int = 0):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.fail_first = fail_first
+        self.messages: List[Message] = []
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        writer.write(line.encode("ascii") + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await self._reply(writer, "220 stub ESMTP")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    return
+                command = raw.decode("ascii", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000)
+                if verb == "EHLO":
+                    await self._reply(writer, "250-stub")
+                    await self._reply(writer, "250-8BITMIME")
+                    await self._reply(writer, "250-SMTPUTF8")
+                    await self._reply(writer, "250 AUTH PLAIN LOGIN")
+                elif verb == "HELO":
+                    await self._reply(writer, "250 stub")
+                elif verb == "AUTH":
+                    await self._reply(writer, "235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    if self.rejected < self.fail_first:
+                        self.rejected += 1
+                        await self._reply(writer, "451 4.3.0 Try again later")
+                    else:
+                        await self._reply(writer, "250 OK")
+                elif verb in ("RCPT", "RSET", "NOOP"):
+                    await self._reply(writer, "250 OK")
+                elif verb == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if not line or line in (b".\r\n", b".\n"):
+                            break
+                        lines.append(line[1:] if line.startswith(b"..") else line)
+                    self.messages.append(message_from_bytes(b"".join(lines), policy=policy.default))
+                    await self._reply(writer, "250 OK queued")
+                elif verb == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    return
+                else:
+                    await self._reply(writer, "502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        """Sobe o servidor no loop atual; devolve a porta"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def _serve(args) -> None:
+    server = StubSMTPServer(args.host, args.port, args.latency_ms, args.fail_first)
+    port = await server.start()
+    print(f"SMTP stub em {args.host}:{port} (Ctrl+C para sair)")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para testes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,74 +1,98 @@
 """Setup do agente e utilitários relacionados"""
 
+import importlib.util
 import os
 import logging
-from groq import Groq
-
-try:
-    from elevenlabs import ElevenLabs, VoiceSettings
-    ELEVENLABS_AVAILABLE = True
-except ImportError:
-    ElevenLabs = None
-    VoiceSettings = None
-    ELEVENLABS_AVAILABLE = False
-
-from workspace.core.tools import ToolRegistry
-from workspace.core.agent import Agent
-from workspace.tools.web_search import web_search, WEB_SEARCH_SCHEMA
-from workspace.tools.rag_tools import (
-    rag_search,
-    save_memory,
-    RAG_SEARCH_SCHEMA,
-    SAVE_MEMORY_SCHEMA,
-)
-from workspace.tools.filesystem import (
-    read_file,
-    write_file,
-    list_directory,
-    READ_FILE_SCHEMA,
-    WRITE_FILE_SCHEMA,
-    LIST_DIRECTORY_SCHEMA,
-)
-from workspace.tools.code_tools import (
-    search_code,
-    git_status,
-    git_diff,
-    SEARCH_CODE_SCHEMA,
-    GIT_STATUS_SCHEMA,
-    GIT_DIFF_SCHEMA,
-)
-from workspace.tools.extra_tools import (
-    get_weather,
-    get_news,
-    create_reminder,
-    create_chart,
-    generate_image,
-    WEATHER_SCHEMA,
-    NEWS_SCHEMA,
-    REMINDER_SCHEMA,
-    CHART_SCHEMA,
-    IMAGE_GEN_SCHEMA,
-)
-from workspace.tools.git_manager import (
-    git_clone, 
-    git_pull, 
-    git_list_repos,
-    GIT_CLONE_SCHEMA,
-    GIT_PULL_SCHEMA,
-    GIT_LIST_REPOS_SCHEMA
-)
+
+from utils.lazy import LazyObject
+
+# Pacote opcional: verificado sem importar (o import fica para o primeiro uso)
+ELEVENLABS_AVAILABLE = importlib.util.find_spec("elevenlabs") is not None
 
 logger = logging.getLogger(__name__)
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY")) if ELEVENLABS_AVAILABLE else None
+
+def _make_groq():
+    from groq import Groq
+
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+def _make_elevenlabs():
+    if not ELEVENLABS_AVAILABLE:
+        return None
+    from elevenlabs import ElevenLabs
+
+    return ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+
+
+# Clientes construídos no primeiro uso (ou no aquecimento após o bot_pronto)
+groq_client = LazyObject(_make_groq, name="groq")
+elevenlabs_client = LazyObject(_make_elevenlabs, name="elevenlabs")
 
 
 def create_agent_no_sandbox():
-    """Cria agente com todas as ferramentas registradas"""
+    """Cria agente com todas as ferramentas registradas
+
+    Os módulos das tools são importados aqui, não na importação do
+    `agent_setup`: handlers que só precisam de `groq_client` não pagam por eles.
+    """
+    from workspace.core.tools import ToolRegistry
+    from workspace.core.tool_cache import CachePolicy
+    from workspace.core.agent import Agent
+    from workspace.tools.web_search import web_search, WEB_SEARCH_SCHEMA
+    from workspace.tools.rag_tools import (
+        rag_search,
+        save_memory,
+        RAG_SEARCH_SCHEMA,
+        SAVE_MEMORY_SCHEMA,
+    )
+    from workspace.tools.filesystem import (
+        read_file,
+        write_file,
+        list_directory,
+        READ_FILE_SCHEMA,
+        WRITE_FILE_SCHEMA,
+        LIST_DIRECTORY_SCHEMA,
+    )
+    from workspace.tools.code_tools import (
+        search_code,
+        git_status,
+        git_diff,
+        SEARCH_CODE_SCHEMA,
+        GIT_STATUS_SCHEMA,
+        GIT_DIFF_SCHEMA,
+    )
+    from workspace.tools.extra_tools import (
+        get_weather,
+        get_news,
+        create_reminder,
+        create_chart,
+        generate_image,
+        WEATHER_SCHEMA,
+        NEWS_SCHEMA,
+        REMINDER_SCHEMA,
+        CHART_SCHEMA,
+        IMAGE_GEN_SCHEMA,
+    )
+    from workspace.tools.git_manager import (
+        git_clone,
+        git_pull,
+        git_list_repos,
+        GIT_CLONE_SCHEMA,
+        GIT_PULL_SCHEMA,
+        GIT_LIST_REPOS_SCHEMA,
+    )
+
     registry = ToolRegistry()
-    registry.register("web_search", web_search, WEB_SEARCH_SCHEMA)
-    registry.register("rag_search", rag_search, RAG_SEARCH_SCHEMA)
+    # Dados externos: cache por tool (stale-while-revalidate e cache negativo curto)
+    # e coalescência de chamadas simultâneas idênticas
+    registry.register(
+        "web_search", web_search, WEB_SEARCH_SCHEMA,
+        cache=CachePolicy(ttl=600, stale_ttl=1800, negative_ttl=30),
+        coalesce=True,
+    )
+    registry.register("rag_search", rag_search, RAG_SEARCH_SCHEMA, coalesce=True)
     registry.register("save_memory", save_memory, SAVE_MEMORY_SCHEMA)
     registry.register("search_code", search_code, SEARCH_CODE_SCHEMA)
     registry.register("read_file", read_file, READ_FILE_SCHEMA)
@@ -77,8 +101,16 @@ def create_agent_no_sandbox():
     registry.register("git_status", git_status, GIT_STATUS_SCHEMA)
     registry.register("git_diff", git_diff, GIT_DIFF_SCHEMA)
     # Ferramentas extras (apenas as confiáveis)
-    registry.register("get_weather", get_weather, WEATHER_SCHEMA)
-    registry.register("get_news", get_news, NEWS_SCHEMA)
+    registry.register(
+        "get_weather", get_weather, WEATHER_SCHEMA,
+        cache=CachePolicy(ttl=600, stale_ttl=1800, negative_ttl=60),
+        coalesce=True,
+    )
+    registry.register(
+        "get_news", get_news, NEWS_SCHEMA,
+        cache=CachePolicy(ttl=900, stale_ttl=1800, negative_ttl=60),
+        coalesce=True,
+    )
     registry.register("create_reminder", create_reminder, REMINDER_SCHEMA)
     registry.register("create_chart", create_chart, CHART_SCHEMA)
     registry.register("generate_image", generate_image, IMAGE_GEN_SCHEMA)
@@ -97,6 +129,8 @@ def text_to_speech(text: str) -> bytes:
         logger.debug("ElevenLabs não disponível (pacote não instalado ou API key não configurada)")
         return None
     try:
+        from elevenlabs import VoiceSettings
+
         # Força português no texto
         text_pt = f"[pt-BR] {text}"
 
@@ -5,6 +5,11 @@ import logging
 import sys
 import signal
 import asyncio
+import time
+
+# Referência para o tempo até o bot_pronto (scripts/bench_startup.py)
+_BOOT = time.perf_counter()
+
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente
@@ -23,12 +28,22 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
-from workspace.storage.sqlite_store import SQLiteStore
+from utils.cpu_pool import cpu_pool
+from utils.http_pool import http_pool
+from utils.loop_monitor import loop_monitor
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore, SQLiteStore
 
 # Imports dos módulos criados
 from workspace.core.agent import Agent
-from agent_setup import create_agent_no_sandbox
-from commands import start, make_clear_handler, make_status_handler, lembretes_handler
+from agent_setup import create_agent_no_sandbox, groq_client
+from commands import (
+    start,
+    make_clear_handler,
+    make_status_handler,
+    make_stats_handler,
+    lembretes_handler,
+)
 from handlers import (
     handle_message,
     handle_photo,
@@ -54,86 +69,83 @@ logger.info(
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("telegram").setLevel(logging.WARNING)
 
-# Inicializa componentes globais
-agent = create_agent_no_sandbox()
-store = SQLiteStore()
 
-
-def make_message_handler(agent: Agent, store: SQLiteStore):
+def make_message_handler(agent: Agent, store: AsyncSQLiteStore):
     """Factory para criar handler de mensagem com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_message(update, context, agent, store)
+        with metrics.timer("handler_latency_ms", handler="message"):
+            return await handle_message(update, context, agent, store)
 
     return handler
 
 
-def make_photo_handler(store: SQLiteStore):
+def make_photo_handler(store: AsyncSQLiteStore):
     """Factory para criar handler de foto com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_photo(update, context, store)
+        with metrics.timer("handler_latency_ms", handler="photo"):
+            return await handle_photo(update, context, store)
 
     return handler
 
 
-def make_video_handler(store: SQLiteStore):
+def make_video_handler(store: AsyncSQLiteStore):
     """Factory para criar handler de vídeo com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_video(update, context, store)
+        with metrics.timer("handler_latency_ms", handler="video"):
+            return await handle_video(update, context, store)
 
     return handler
 
 
-def make_voice_handler(agent: Agent, store: SQLiteStore):
+def make_voice_handler(agent: Agent, store: AsyncSQLiteStore):
     """Factory para criar handler de voz com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_voice(update, context, agent, store)
+        with metrics.timer("handler_latency_ms", handler="voice"):
+            return await handle_voice(update, context, agent, store)
 
     return handler
 
 
-def make_audio_handler(agent: Agent, store: SQLiteStore):
+def make_audio_handler(agent: Agent, store: AsyncSQLiteStore):
     """Factory para criar handler de áudio com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_audio(update, context, agent, store)
+        with metrics.timer("handler_latency_ms", handler="audio"):
+            return await handle_audio(update, context, agent, store)
 
     return handler
 
 
-def make_document_handler(agent: Agent, store: SQLiteStore):
+def make_document_handler(agent: Agent, store: AsyncSQLiteStore):
     """Factory para criar handler de documento com dependências injetadas"""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-        return await handle_document(update, context, agent, store)
+        with metrics.timer("handler_latency_ms", handler="document"):
+            return await handle_document(update, context, agent, store)
 
     return handler
 
 
-async def main():
-    """Função principal do bot"""
-    token = os.getenv("TELEGRAM_TOKEN")
-    if not token:
-        raise ValueError("TELEGRAM_TOKEN não configurado!")
+def build_components():
+    """Agente (com as tools) e histórico; os componentes pesados ficam para o warm_up"""
+    agent = create_agent_no_sandbox()
+    store = AsyncSQLiteStore(SQLiteStore(retain_per_chat=config.CHAT_RETENTION_MESSAGES))
+    return agent, store
 
-    logger.info("boot_iniciando_bot")
 
-    # Inicia monitoramento de lembretes como task asyncio (não thread)
-    from workspace.tools.reminder_notifier import notifier
-
-    reminder_task = asyncio.create_task(notifier.start_monitoring())
-    logger.info("lembretes_iniciados canal=email+telegram")
-
-    # Configura handlers
+def build_application(token: str, agent: Agent, store: AsyncSQLiteStore) -> Application:
+    """Application do PTB com todos os handlers (sem acesso à rede)"""
     app = Application.builder().token(token).build()
 
     # Comandos
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("clear", make_clear_handler(store)))
     app.add_handler(CommandHandler("status", make_status_handler(agent)))
+    app.add_handler(CommandHandler("stats", make_stats_handler(agent)))
     app.add_handler(CommandHandler("lembretes", lembretes_handler))
 
     # Handlers de mídia
@@ -145,13 +157,62 @@ async def main():
     app.add_handler(
         MessageHandler(filters.TEXT & ~filters.COMMAND, make_message_handler(agent, store))
     )
+    return app
+
+
+async def warm_up(agent: Agent) -> None:
+    """Aquecimento em segundo plano, depois que o bot já recebe mensagens
+
+    Sobe os workers de CPU (forkserver, então as threads que o bot já tem
+    não são copiadas) e constrói os clientes Groq e o Hippocampus (ChromaDB +
+    SentenceTransformer), que antes atrasavam o bot_pronto. Uma mensagem que
+    chegue antes disso constrói o que precisar no primeiro uso.
+    """
+    start = time.perf_counter()
+    try:
+        # Workers primeiro: são os que mais demoram a subir (imports pesados)
+        await cpu_pool.start()
+        await asyncio.to_thread(groq_client.warm)
+        await asyncio.to_thread(agent.warm_up)
+    except Exception as e:
+        logger.warning("aquecimento_falhou error=%s", e)
+        return
+    logger.info("aquecimento_concluido ms=%.0f", (time.perf_counter() - start) * 1000)
+
+
+async def main():
+    """Função principal do bot"""
+    token = os.getenv("TELEGRAM_TOKEN")
+    if not token:
+        raise ValueError("TELEGRAM_TOKEN não configurado!")
+
+    logger.info("boot_iniciando_bot")
+    agent, store = build_components()
+
+    # Inicia monitoramento de lembretes como task asyncio (não thread)
+    from workspace.tools.reminder_notifier import notifier
+
+    reminder_task = asyncio.create_task(notifier.start_monitoring())
+    logger.info("lembretes_iniciados canal=email+telegram")
+
+    # Métricas ficam em memória e são gravadas em lote no SQLite periodicamente
+    metrics.start(store)
+
+    # Atraso do event loop e locais de chamadas bloqueantes (relatório em /stats)
+    if config.LOOP_BLOCK_THRESHOLD_MS > 0:
+        loop_monitor.start(threshold_ms=config.LOOP_BLOCK_THRESHOLD_MS)
+
+    # Configura handlers
+    app = build_application(token, agent, store)
 
     # Inicializa e inicia o bot
     await app.initialize()
     await app.start()
     await app.updater.start_polling(allowed_updates=Update.ALL_TYPES)
 
-    logger.info("bot_pronto status=aguardando_mensagens")
+    logger.info("bot_pronto status=aguardando_mensagens startup_ms=%.0f",
+                (time.perf_counter() - _BOOT) * 1000)
+    warm_task = asyncio.create_task(warm_up(agent))
 
     # Aguarda sinal de parada
     stop_event = asyncio.Event()
@@ -167,11 +228,12 @@ async def main():
 
     # Cleanup: ordem obrigatória (PTB v20) – parar updater antes de stop/shutdown
     logger.info("🧹 Limpando recursos...")
-    reminder_task.cancel()
-    try:
-        await reminder_task
-    except asyncio.CancelledError:
-        pass
+    for task in (warm_task, reminder_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
 
     if app.updater and app.updater.running:
         try:
@@ -187,6 +249,19 @@ async def main():
             logger.warning("Shutdown com updater ainda ativo: %s", e)
         else:
             raise
+
+    await loop_monitor.stop()
+    for row in loop_monitor.report():
+        logger.info("loop_bloqueio_resumo site=%s vezes=%d total_ms=%.0f",
+                    row["site"], row["count"], row["total_ms"])
+
+    await http_pool.aclose()
+    cpu_pool.shutdown()
+
+    # Grava as métricas restantes, aguarda escritas pendentes e fecha a conexão
+    await metrics.stop()
+    store.close()
+    agent.run_manager.close()
     logger.info("👋 Bot finalizado")
 
 
@@ -1,11 +1,15 @@
-"""Comandos do bot Telegram (/start, /clear, /status, /lembretes)"""
+"""Comandos do bot Telegram (/start, /clear, /status, /stats, /lembretes)"""
 
+import asyncio
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from utils.cpu_pool import cpu_pool
+from utils.loop_monitor import loop_monitor
 from workspace.core.agent import Agent
-from workspace.storage.sqlite_store import SQLiteStore
+from workspace.storage.media_cache import media_cache
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from workspace.tools.reminder_notifier import notifier
 
 logger = logging.getLogger(__name__)
@@ -29,12 +33,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-def make_clear_handler(store: SQLiteStore):
+def make_clear_handler(store: AsyncSQLiteStore):
     """Factory para criar handler de /clear: limpa apenas o histórico deste chat."""
 
     async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.effective_chat.id
-        store.clear_history(chat_id=chat_id)
+        await store.clear_history(chat_id=chat_id)
         await update.message.reply_text("✅ Histórico deste chat limpo!")
 
     return handler
@@ -52,10 +56,75 @@ def make_status_handler(agent: Agent):
     return handler
 
 
+def _format_stats(analytics, days: int = 7) -> str:
+    """Resumo das execuções dos últimos dias a partir do RunAnalytics"""
+    lines = [f"📊 **Estatísticas ({days} dias)**\n"]
+
+    durations = analytics.duration_percentiles_by_status(days=days)
+    if not durations:
+        lines.append("Nenhuma execução registrada no período.")
+        return "\n".join(lines)
+
+    lines.append("⏱️ *p95 da duração por dia/status:*")
+    for row in durations[-10:]:
+        lines.append(f"• {row['day']} {row['status']}: {row['p'] / 1000:.1f}s ({row['runs']} runs)")
+
+    tokens = analytics.tokens_by_provider(days=days)
+    if tokens:
+        lines.append("\n🔤 *Tokens por provedor:*")
+        for row in tokens:
+            total = (row["tokens_input"] or 0) + (row["tokens_output"] or 0)
+            lines.append(f"• {row['provider']}: {total:,} ({row['runs']} runs)")
+
+    tools = analytics.top_tools_by_latency(days=days, limit=5)
+    if tools:
+        lines.append("\n🛠️ *Tools mais lentas:*")
+        for row in tools:
+            avg = f"{row['avg_ms']:.0f}ms" if row["avg_ms"] is not None else "n/d"
+            lines.append(f"• {row['tool']}: média {avg}, {row['calls']} chamadas, {row['errors']} erros")
+
+    return "\n".join(lines)
+
+
+def make_stats_handler(agent: Agent):
+    """Factory para criar handler de /stats (consultas no RunAnalytics do agent)"""
+
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            text = await asyncio.to_thread(_format_stats, agent.run_manager.analytics)
+            caches = agent.tools.cache_stats()
+            if caches:
+                text += "\n\n🗃️ *Cache das tools:*\n" + "\n".join(
+                    f"• {name}: {row['hit_rate']:.0%} hits ({row['miss']} misses, {row['size']} itens)"
+                    for name, row in caches.items()
+                )
+            pool = cpu_pool.stats()
+            if pool["done"] or pool["rejected"] or pool["errors"]:
+                text += (
+                    f"\n\n⚙️ *Pool de CPU:* {pool['done']} tarefas, {pool['pending']} em andamento, "
+                    f"{pool['rejected']} recusadas, {pool['timeouts']} timeouts"
+                )
+            media = await asyncio.to_thread(media_cache.stats)
+            if media["entries"]:
+                text += (
+                    f"\n\n🎞️ *Cache de mídia:* {media['entries']} análises, "
+                    f"{media['bytes'] / 1024 / 1024:.1f} MB"
+                )
+            blocking = loop_monitor.format_report()
+            if blocking:
+                text += "\n\n🐢 *Event loop:*\n" + blocking
+        except Exception as e:
+            logger.error("Erro ao gerar estatísticas: %s", e)
+            text = "❌ Não foi possível gerar as estatísticas agora."
+        await update.message.reply_text(text)
+
+    return handler
+
+
 async def lembretes_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler do comando /lembretes: lista lembretes pendentes."""
     try:
-        pending = notifier.list_pending_reminders()
+        pending = await asyncio.to_thread(notifier.list_pending_reminders)
         if not pending:
             await update.message.reply_text(
                 "📅 **Lembretes**\n\n"
@@ -3,7 +3,7 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 
 @dataclass(frozen=True)
@@ -53,6 +53,48 @@ class Config:
         """Quantidade de mensagens no histórico enviado ao modelo. Menor = mais rápido (ex.: 8). Padrão 10."""
         return int(os.getenv("CHAT_HISTORY_LIMIT", "10"))
 
+    @property
+    def CHAT_RETENTION_MESSAGES(self) -> int:
+        """Mensagens mantidas por chat na tabela quente do SQLite; as mais antigas vão para o arquivo comprimido. 0 = sem limite. Padrão 1000."""
+        try:
+            return int(os.getenv("CHAT_RETENTION_MESSAGES", "1000"))
+        except ValueError:
+            return 1000
+
+    # Log de auditoria dos runs (workspace/runs/policy.py)
+    @property
+    def RUN_LOG_MODE(self) -> str:
+        """full (padrão; amostra só sob carga), sample (sempre amostra) ou off (sem ações)."""
+        mode = os.getenv("RUN_LOG_MODE", "full").strip().lower()
+        return mode if mode in ("full", "sample", "off") else "full"
+
+    @property
+    def RUN_LOG_SAMPLE_RATE(self) -> float:
+        try:
+            return min(1.0, max(0.0, float(os.getenv("RUN_LOG_SAMPLE_RATE", "0.1"))))
+        except ValueError:
+            return 0.1
+
+    @property
+    def RUN_LOG_RESULT_MAX_CHARS(self) -> int:
+        """Tamanho máximo do resultado de tool gravado no journal (o excedente vai comprimido)."""
+        try:
+            return int(os.getenv("RUN_LOG_RESULT_MAX_CHARS", "4000"))
+        except ValueError:
+            return 4000
+
+    @property
+    def RUN_LOG_COMPRESS(self) -> bool:
+        return os.getenv("RUN_LOG_COMPRESS", "1").strip().lower() not in ("0", "false", "no")
+
+    @property
+    def LOOP_BLOCK_THRESHOLD_MS(self) -> float:
+        """Parada do event loop (ms) a partir da qual a pilha é amostrada (utils/loop_monitor.py). 0 = desliga. Padrão 100."""
+        try:
+            return float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+        except ValueError:
+            return 100.0
+
     # ElevenLabs
     ELEVENLABS_VOICE_ID: str = "ErXwobaYiN019PkySvjV"  # Antoni - voz masculina
     ELEVENLABS_MODEL: str = "eleven_multilingual_v2"
@@ -69,9 +111,15 @@ class Config:
 
     # Rate Limiting
     RATE_LIMIT_MESSAGES: int = 20  # mensagens por minuto
-    RATE_LIMIT_MEDIA: int = 5  # mídia por minuto
+    RATE_LIMIT_MEDIA: int = 5  # mídia por minuto (vídeo e documento contam 2)
     RATE_LIMIT_YOUTUBE: int = 3  # YouTube por 5 minutos
 
+    @property
+    def RATE_LIMIT_DB(self) -> Optional[Path]:
+        """SQLite para limites compartilhados entre processos do bot. Vazio (padrão): em memória."""
+        path = os.getenv("RATE_LIMIT_DB", "").strip()
+        return Path(path).expanduser() if path else None
+
     # Security
     @property
     def ALLOWED_USERS(self) -> List[int]:
@@ -94,6 +142,19 @@ class Config:
         # Arquivo de lembretes persistente em DATA_DIR
         return self.DATA_DIR / "reminders.json"
 
+    @property
+    def REMINDERS_DB(self) -> Path:
+        # Lembretes em SQLite (o reminders.json antigo é importado uma vez)
+        return self.DATA_DIR / "reminders.db"
+
+    @property
+    def REMINDER_CATCHUP_HOURS(self) -> float:
+        """Lembretes vencidos há mais que isso (bot parado) não são enviados. Padrão 24."""
+        try:
+            return max(0.0, float(os.getenv("REMINDER_CATCHUP_HOURS", "24")))
+        except ValueError:
+            return 24.0
+
     # Timezone
     TIMEZONE: str = "America/Sao_Paulo"
 
@@ -124,6 +185,96 @@ class Config:
         except ValueError:
             return 0
 
+    # Coalescência de chamadas idênticas simultâneas (workspace/core/single_flight.py)
+    @property
+    def SINGLE_FLIGHT_WINDOW_SECONDS(self) -> float:
+        """Por quanto tempo após terminar o resultado ainda é compartilhado. 0 = só chamadas em andamento. Padrão 1."""
+        try:
+            return max(0.0, float(os.getenv("SINGLE_FLIGHT_WINDOW_SECONDS", "1")))
+        except ValueError:
+            return 1.0
+
+    @property
+    def LLM_COALESCE_MAX_TEMPERATURE(self) -> float:
+        """Chamadas ao LLM com temperatura até este valor são coalescidas (determinísticas). -1 = desliga. Padrão 0.
+
+        O Agent chama o LLM com temperatura 0.7, então com o padrão a coalescência
+        do LlmRouter fica desligada para as conversas; subir para 0.7 a liga
+        (respostas amostradas passam a ser compartilhadas entre pedidos idênticos).
+        """
+        try:
+            return float(os.getenv("LLM_COALESCE_MAX_TEMPERATURE", "0"))
+        except ValueError:
+            return 0.0
+
+    # Pool de processos para CPU pesado (utils/cpu_pool.py)
+    @property
+    def CPU_POOL_WORKERS(self) -> int:
+        """Processos do pool. Padrão: min(2, núcleos)."""
+        default = min(2, os.cpu_count() or 1)
+        try:
+            return max(1, int(os.getenv("CPU_POOL_WORKERS", str(default))))
+        except ValueError:
+            return default
+
+    @property
+    def CPU_POOL_MAX_PENDING(self) -> int:
+        """Tarefas em execução + fila antes de recusar novas. Padrão 8."""
+        try:
+            return int(os.getenv("CPU_POOL_MAX_PENDING", "8"))
+        except ValueError:
+            return 8
+
+    @property
+    def CPU_POOL_TASK_TIMEOUT(self) -> float:
+        """Tempo máximo (s) de uma tarefa; ao estourar o pool é reciclado. Padrão 120."""
+        try:
+            return float(os.getenv("CPU_POOL_TASK_TIMEOUT", "120"))
+        except ValueError:
+            return 120.0
+
+    @property
+    def CPU_POOL_MEMORY_MB(self) -> int:
+        """Memória virtual adicional permitida por worker (MB). 0 = sem limite. Padrão 2048."""
+        try:
+            return int(os.getenv("CPU_POOL_MEMORY_MB", "2048"))
+        except ValueError:
+            return 2048
+
+    # Cache de análises de mídia (workspace/storage/media_cache.py)
+    @property
+    def MEDIA_CACHE_MAX_MB(self) -> int:
+        """Tamanho máximo do cache em disco (MB); os menos usados são apagados. Padrão 50."""
+        try:
+            return max(1, int(os.getenv("MEDIA_CACHE_MAX_MB", "50")))
+        except ValueError:
+            return 50
+
+    # Download de mídia em memória (utils/media_buffer.py)
+    @property
+    def MEDIA_MEMORY_MAX_MB(self) -> int:
+        """Acima deste tamanho (MB) o download vai para arquivo temporário. Padrão 10."""
+        try:
+            return max(1, int(os.getenv("MEDIA_MEMORY_MAX_MB", "10")))
+        except ValueError:
+            return 10
+
+    @property
+    def VISION_MAX_SIDE(self) -> int:
+        """Maior lado (px) das imagens enviadas ao modelo de visão. Padrão 1280."""
+        try:
+            return max(256, int(os.getenv("VISION_MAX_SIDE", "1280")))
+        except ValueError:
+            return 1280
+
+    @property
+    def VISION_JPEG_QUALITY(self) -> int:
+        """Qualidade do JPEG reencodado para o modelo de visão (utils/image_prep.py). Padrão 80."""
+        try:
+            return min(95, max(30, int(os.getenv("VISION_JPEG_QUALITY", "80"))))
+        except ValueError:
+            return 80
+
 
 # Instância global de configuração
 config = Config()
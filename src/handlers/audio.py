@@ -1,15 +1,19 @@
 """Handler para arquivos de áudio"""
 
-import os
+import asyncio
 import logging
+import time
+from pathlib import Path
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from security.auth import require_auth
+from security.rate_limiter import check_rate_limit, media_limiter
+from utils.media_buffer import download_media
 from workspace.core.agent import Agent
-from workspace.storage.sqlite_store import SQLiteStore
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from agent_setup import groq_client
-from config.settings import config
 
 logger = logging.getLogger(__name__)
 
@@ -19,42 +23,44 @@ async def handle_audio(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     agent: Agent,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
     """Handler para arquivos de áudio"""
     logger.info("Arquivo de áudio recebido")
 
+    limited = check_rate_limit(update.effective_user.id, "audio", media_limiter)
+    if limited:
+        await update.message.reply_text(limited)
+        return
+
     await update.message.chat.send_action("typing")
 
     chat_id = update.effective_chat.id
+    start = time.perf_counter()
 
     try:
-        # Download do áudio
+        # Download do áudio (em memória) e transcrição com Groq Whisper
         audio = update.message.audio
         audio_file_obj = await audio.get_file()
-        audio_path = str(config.TEMP_DIR / f"moltbot_audio_{audio.file_id}.mp3")
-        await audio_file_obj.download_to_drive(audio_path)
-
-        # Transcreve com Groq Whisper
-        with open(audio_path, "rb") as audio_file:
-            transcription = groq_client.audio.transcriptions.create(
-                file=audio_file, model="whisper-large-v3-turbo", response_format="text"
+        filename = audio.file_name or "audio.mp3"
+        async with download_media(audio_file_obj, kind="audio", suffix=Path(filename).suffix) as media:
+            transcription = await asyncio.to_thread(
+                groq_client.audio.transcriptions.create,
+                file=media.upload(filename),
+                model="whisper-large-v3-turbo",
+                response_format="text",
             )
 
-        store.add_message("user", f"[ÁUDIO] {transcription}", chat_id=chat_id)
-
-        history = store.get_history(limit=10, chat_id=chat_id)
+        history = await store.get_history(limit=10, chat_id=chat_id)
         response = await agent.run(transcription, history)
 
-        store.add_message("assistant", response, chat_id=chat_id)
+        await store.add_turn(f"[ÁUDIO] {transcription}", response, chat_id=chat_id)
 
         # Responde
         await update.message.reply_text(
             f'🎵 Você disse:\n"{transcription}"\n\n{response}'
         )
-
-        # Limpa arquivo
-        os.unlink(audio_path)
+        metrics.observe("media_handler_ms", (time.perf_counter() - start) * 1000, kind="audio")
 
     except Exception as e:
         logger.error(f"Erro ao processar áudio: {e}", exc_info=True)
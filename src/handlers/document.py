@@ -1,14 +1,16 @@
 """Handler para documentos (OCR, Excel, Word, etc)"""
 
-import os
 import logging
+from pathlib import Path
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from security.auth import require_auth
+from security.rate_limiter import check_rate_limit, media_limiter
 from workspace.core.agent import Agent
-from workspace.storage.sqlite_store import SQLiteStore
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from config.settings import config
+from utils.cpu_pool import PoolSaturated, cpu_pool
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +20,20 @@ async def handle_document(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     agent: Agent,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
     """Handler para documentos (OCR, Excel, Word, etc)"""
     logger.info("Documento recebido")
 
+    limited = check_rate_limit(update.effective_user.id, "document", media_limiter)
+    if limited:
+        await update.message.reply_text(limited)
+        return
+
     await update.message.chat.send_action("typing")
 
     chat_id = update.effective_chat.id
+    doc_path = None
 
     try:
         document = update.message.document
@@ -38,62 +46,11 @@ async def handle_document(
 
         # Processa baseado no tipo
         if file_name.endswith(".xlsx") or file_name.endswith(".xls"):
-            # Excel
-            import pandas as pd
-
-            df = pd.read_excel(doc_path)
-
-            # Limpeza e preparação profissional
-            # Remove colunas completamente vazias
-            df = df.dropna(axis=1, how="all")
-
-            # Remove linhas completamente vazias
-            df = df.dropna(axis=0, how="all")
+            # Excel: perfil em uma passada, fora do event loop
+            from utils.table_profiler import format_profile, profile_table
 
-            # Preenche NaN com valores apropriados
-            for col in df.columns:
-                if df[col].dtype == "object":
-                    df[col] = df[col].fillna("-")
-                else:
-                    df[col] = df[col].fillna(0)
-
-            # Identifica tipos de colunas
-            numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-            text_cols = df.select_dtypes(include=["object"]).columns.tolist()
-            date_cols = df.select_dtypes(include=["datetime"]).columns.tolist()
-
-            # Prepara análise profissional
-            data_summary = f"""📊 ANÁLISE DE PLANILHA EXCEL
-
-📁 Arquivo: {file_name}
-📐 Dimensões: {df.shape[0]} linhas × {df.shape[1]} colunas
-
-📋 ESTRUTURA:
-• Colunas numéricas: {", ".join(numeric_cols) if numeric_cols else "Nenhuma"}
-• Colunas de texto: {", ".join(text_cols) if text_cols else "Nenhuma"}
-• Colunas de data: {", ".join(date_cols) if date_cols else "Nenhuma"}
-
-📊 AMOSTRA DOS DADOS (primeiras 8 linhas):
-{df.head(8).to_markdown(index=False)}
-"""
-
-            # Adiciona estatísticas apenas se houver colunas numéricas
-            if numeric_cols:
-                stats = df[numeric_cols].describe().round(2)
-                data_summary += (
-                    f"\n\n📈 ESTATÍSTICAS (colunas numéricas):\n{stats.to_markdown()}"
-                )
-
-            # Adiciona informações de valores únicos para colunas de texto
-            if text_cols and len(text_cols) <= 5:
-                data_summary += "\n\n🔍 VALORES ÚNICOS (colunas de texto):"
-                for col in text_cols[:3]:  # Máximo 3 colunas
-                    unique_count = df[col].nunique()
-                    if unique_count <= 10:
-                        values = df[col].value_counts().head(5)
-                        data_summary += f"\n• {col}: {values.to_dict()}"
-                    else:
-                        data_summary += f"\n• {col}: {unique_count} valores únicos"
+            profile = await cpu_pool.run(profile_table, doc_path)
+            data_summary = format_profile(profile, file_name, "PLANILHA EXCEL")
 
             await update.message.reply_text("📊 Analisando planilha com IA...")
 
@@ -113,44 +70,14 @@ Use formatação clara com emojis e organize em seções."""
             response = await agent.run(prompt, history)
 
             await update.message.reply_text(response[:4000])
-            store.add_message("user", f"[EXCEL] {file_name}", chat_id=chat_id)
-            store.add_message("assistant", response, chat_id=chat_id)
+            await store.add_turn(f"[EXCEL] {file_name}", response, chat_id=chat_id)
 
         elif file_name.endswith(".csv"):
-            # CSV
-            import pandas as pd
-
-            df = pd.read_csv(doc_path)
+            # CSV: leitura em blocos, memória constante
+            from utils.table_profiler import format_profile, profile_table
 
-            # Limpeza profissional
-            df = df.dropna(axis=1, how="all")
-            df = df.dropna(axis=0, how="all")
-
-            for col in df.columns:
-                if df[col].dtype == "object":
-                    df[col] = df[col].fillna("-")
-                else:
-                    df[col] = df[col].fillna(0)
-
-            numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-            text_cols = df.select_dtypes(include=["object"]).columns.tolist()
-
-            data_summary = f"""📊 ANÁLISE DE ARQUIVO CSV
-
-📁 Arquivo: {file_name}
-📐 Dimensões: {df.shape[0]} linhas × {df.shape[1]} colunas
-
-📋 ESTRUTURA:
-• Colunas numéricas: {", ".join(numeric_cols) if numeric_cols else "Nenhuma"}
-• Colunas de texto: {", ".join(text_cols) if text_cols else "Nenhuma"}
-
-📊 AMOSTRA DOS DADOS:
-{df.head(8).to_markdown(index=False)}
-"""
-
-            if numeric_cols:
-                stats = df[numeric_cols].describe().round(2)
-                data_summary += f"\n\n📈 ESTATÍSTICAS:\n{stats.to_markdown()}"
+            profile = await cpu_pool.run(profile_table, doc_path)
+            data_summary = format_profile(profile, file_name, "ARQUIVO CSV")
 
             await update.message.reply_text("📊 Analisando CSV com IA...")
 
@@ -168,8 +95,7 @@ Use formatação clara com emojis."""
 
             response = await agent.run(prompt, [])
             await update.message.reply_text(response[:4000])
-            store.add_message("user", f"[CSV] {file_name}", chat_id=chat_id)
-            store.add_message("assistant", response, chat_id=chat_id)
+            await store.add_turn(f"[CSV] {file_name}", response, chat_id=chat_id)
 
         elif file_name.endswith(".docx"):
             # Word
@@ -186,7 +112,7 @@ Use formatação clara com emojis."""
             preview += f"**Conteúdo:**\n{text[:3500]}"
 
             await update.message.reply_text(preview[:4000])
-            store.add_message("user", f"[WORD] {file_name}: {len(text)} caracteres", chat_id=chat_id)
+            await store.add_message("user", f"[WORD] {file_name}: {len(text)} caracteres", chat_id=chat_id)
 
         elif file_name.endswith(".md"):
             # Markdown
@@ -198,7 +124,7 @@ Use formatação clara com emojis."""
             preview += f"**Conteúdo:**\n{text[:3500]}"
 
             await update.message.reply_text(preview[:4000])
-            store.add_message("user", f"[MARKDOWN] {file_name}", chat_id=chat_id)
+            await store.add_message("user", f"[MARKDOWN] {file_name}", chat_id=chat_id)
 
         elif mime_type and mime_type.startswith("image/"):
             # Imagem - OCR
@@ -229,9 +155,13 @@ Use formatação clara com emojis."""
                 "• Imagens (para OCR)"
             )
 
-        # Limpa arquivo
-        os.unlink(doc_path)
-
+    except PoolSaturated:
+        logger.warning("documento_recusado motivo=cpu_pool_cheio")
+        await update.message.reply_text("⏳ Muitos arquivos em processamento agora. Tente novamente em instantes.")
     except Exception as e:
         logger.error(f"Erro ao processar documento: {e}", exc_info=True)
         await update.message.reply_text("Ocorreu um erro ao processar o documento. Tente novamente.")
+    finally:
+        # Limpa arquivo (também quando o pool recusa ou o processamento falha)
+        if doc_path:
+            Path(doc_path).unlink(missing_ok=True)
@@ -4,6 +4,7 @@ import os
 import re
 import logging
 import glob
+import time
 from datetime import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
@@ -12,8 +13,10 @@ import pytz
 
 from config.settings import config
 from security.auth import require_auth
+from security.rate_limiter import check_rate_limit, youtube_limiter
 from workspace.core.agent import Agent
-from workspace.storage.sqlite_store import SQLiteStore
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from agent_setup import text_to_speech, groq_client
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,29 @@ _DATETIME_PATTERN = re.compile(
 )
 
 
+# Intervalo mínimo entre edições da mensagem de progresso (limite do Telegram)
+_PROGRESS_EDIT_SECONDS = 2.0
+
+
+def _youtube_progress(status_message):
+    """Callback que mostra cada trecho transcrito editando a mensagem de status"""
+    last_edit = 0.0
+
+    async def on_partial(done: int, total: int, text: str) -> None:
+        nonlocal last_edit
+        now = time.monotonic()
+        if done < total and now - last_edit < _PROGRESS_EDIT_SECONDS:
+            return
+        last_edit = now
+        excerpt = text if len(text) <= 300 else "…" + text[-300:]
+        await status_message.edit_text(
+            f"🎧 Transcrevendo: {done}/{total} trechos\n\n{excerpt}"
+            + ("\n\n📝 Gerando resumo..." if done == total else "")
+        )
+
+    return on_partial
+
+
 def _is_simple_datetime_question(text: str) -> bool:
     """True se a mensagem pede apenas data e/ou hora (máx. 60 caracteres)."""
     t = (text or "").strip()
@@ -45,7 +71,7 @@ async def handle_message(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     agent: Agent,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
     """Handler para mensagens de texto"""
     user_message = update.message.text
@@ -65,7 +91,12 @@ async def handle_message(
 
     # Detecta link do YouTube
     if "youtube.com" in user_message or "youtu.be" in user_message:
-        await update.message.reply_text(
+        limited = check_rate_limit(user_id, "youtube", youtube_limiter)
+        if limited:
+            await update.message.reply_text(limited)
+            return
+
+        status = await update.message.reply_text(
             "🎬 Analisando vídeo do YouTube... Isso pode levar alguns minutos."
         )
 
@@ -81,7 +112,9 @@ async def handle_message(
             youtube_url = match.group(1) if match else user_message
 
             analyzer = YouTubeAnalyzer()
-            result = await analyzer.analyze_youtube_video(youtube_url)
+            result = await analyzer.analyze_youtube_video(
+                youtube_url, on_partial=_youtube_progress(status)
+            )
 
             await update.message.reply_text(result)
             return
@@ -95,20 +128,19 @@ async def handle_message(
     # Perguntas só de data/hora: resposta direta, sem agente (economiza tokens e evita tools)
     if _is_simple_datetime_question(user_message):
         reply = _format_datetime_reply()
-        store.add_message("user", user_message, chat_id=chat_id)
-        store.add_message("assistant", reply, chat_id=chat_id)
+        await store.add_turn(user_message, reply, chat_id=chat_id)
         await update.message.reply_text(reply)
         return
 
     await update.message.chat.send_action("typing")
 
     try:
-        history = store.get_history(limit=config.CHAT_HISTORY_LIMIT, chat_id=chat_id)
+        history = await store.get_history(limit=config.CHAT_HISTORY_LIMIT, chat_id=chat_id)
         response = await agent.run(user_message, history, user_id=update.effective_user.id)
 
-        store.add_message("user", user_message, chat_id=chat_id)
-        store.add_message("assistant", response, chat_id=chat_id)
-        store.log_metric("message_processed", {"length": len(user_message)})
+        # Pergunta e resposta em um único commit; a métrica vai para o buffer em memória
+        await store.add_turn(user_message, response, chat_id=chat_id)
+        metrics.event("message_processed", {"length": len(user_message)})
 
         # Verifica se há imagem de gráfico para enviar
         if "create_chart" in user_message.lower() or "gráfico" in user_message.lower():
@@ -1,67 +1,127 @@
 """Handler para fotos"""
 
+import asyncio
 import base64
 import logging
-import requests
-from telegram import Update
+import time
+from typing import Sequence
+
+from telegram import PhotoSize, Update
 from telegram.ext import ContextTypes
 
+from config.settings import config
 from security.auth import require_auth
-from workspace.storage.sqlite_store import SQLiteStore
+from security.rate_limiter import check_rate_limit, media_limiter
+from utils.image_prep import prepare_for_vision
+from utils.media_buffer import download_media
+from workspace.storage.media_cache import (
+    content_key,
+    file_content_key,
+    media_cache,
+    telegram_key,
+    variant,
+)
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from agent_setup import groq_client
 
 logger = logging.getLogger(__name__)
 
 
+def _pick_photo(sizes: Sequence[PhotoSize], max_side: int) -> PhotoSize:
+    """Menor PhotoSize com o maior lado >= max_side (ou a maior disponível)
+
+    O Telegram já guarda versões reduzidas da foto: baixar a que basta evita
+    transferir e reduzir a original.
+    """
+    for size in sorted(sizes, key=lambda s: s.width * s.height):
+        if max(size.width, size.height) >= max_side:
+            return size
+    return max(sizes, key=lambda s: s.width * s.height)
+
+
 @require_auth
 async def handle_photo(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
     """Handler para fotos"""
     logger.info("Foto recebida")
 
+    limited = check_rate_limit(update.effective_user.id, "photo", media_limiter)
+    if limited:
+        await update.message.reply_text(limited)
+        return
+
     await update.message.chat.send_action("typing")
+    start = time.perf_counter()
 
     try:
-        # Pega a foto de maior resolução
-        photo = update.message.photo[-1]
-        photo_file = await photo.get_file()
-        photo_url = photo_file.file_path
+        # Menor tamanho que ainda cobre a resolução útil do modelo de visão
+        photo = _pick_photo(update.message.photo, config.VISION_MAX_SIDE)
 
         # Pega caption se houver
         caption = update.message.caption or "Descreva esta imagem em detalhes"
+        wanted = variant(caption)
+
+        # Foto reencaminhada (mesmo file_unique_id) e mesmo pedido: sem download
+        unique_key = telegram_key(photo.file_unique_id)
+        cached = (await media_cache.get(unique_key) or {}).get("summaries", {})
+        if wanted in cached:
+            await store.add_turn(f"[IMAGEM] {caption}", cached[wanted])
+            await update.message.reply_text(cached[wanted])
+            return
+
+        photo_file = await photo.get_file()
 
         # Usa Groq Vision diretamente (mais rápido e confiável)
-        logger.info(f"Baixando imagem de: {photo_url}")
-        img_response = requests.get(photo_url, timeout=10)
-        img_data = base64.b64encode(img_response.content).decode("utf-8")
+        async with download_media(photo_file, kind="photo", suffix=".jpg") as media:
+            # Mesmo conteúdo enviado de novo (outro file_unique_id)
+            hash_key = content_key(media.data) if media.in_memory else file_content_key(media.path)
+            entry = await media_cache.get(hash_key) or {"summaries": {}}
+            if wanted in entry["summaries"]:
+                response = entry["summaries"][wanted]
+                await media_cache.put(unique_key, entry)
+                await store.add_turn(f"[IMAGEM] {caption}", response)
+                await update.message.reply_text(response)
+                return
+
+            (jpeg,) = await prepare_for_vision([media.view()], source="photo")
+
+        img_data = base64.b64encode(jpeg).decode("ascii")
+        metrics.observe("media_upload_bytes", len(img_data), kind="photo")
 
         logger.info("Analisando com Groq Vision...")
-        vision_response = groq_client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": caption},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{img_data}"},
-                        },
-                    ],
-                }
-            ],
-            temperature=0.5,
-            max_completion_tokens=512,
-        )
+        with metrics.timer("vision_latency_ms", source="photo"):
+            vision_response = await asyncio.to_thread(
+                groq_client.chat.completions.create,
+                model="meta-llama/llama-4-scout-17b-16e-instruct",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": caption},
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": f"data:image/jpeg;base64,{img_data}"},
+                            },
+                        ],
+                    }
+                ],
+                temperature=0.5,
+                max_completion_tokens=512,
+            )
         response = vision_response.choices[0].message.content
 
-        store.add_message("user", f"[IMAGEM] {caption}")
-        store.add_message("assistant", response)
+        entry["summaries"][wanted] = response
+        await media_cache.put(hash_key, entry)
+        await media_cache.put(unique_key, entry)
+
+        await store.add_turn(f"[IMAGEM] {caption}", response)
 
         await update.message.reply_text(response)
+        metrics.observe("media_handler_ms", (time.perf_counter() - start) * 1000, kind="photo")
         logger.info("Imagem analisada com sucesso")
 
     except Exception as e:
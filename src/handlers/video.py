@@ -1,92 +1,130 @@
 """Handler para vídeos"""
 
+import asyncio
 import base64
 import logging
+from pathlib import Path
+from typing import Optional
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from security.auth import require_auth
-from security import secure_files, SafeSubprocessExecutor
-from workspace.storage.sqlite_store import SQLiteStore
+from security.rate_limiter import check_rate_limit, media_limiter
+from security import secure_files
+from utils.image_prep import prepare_for_vision
+from utils.media_pipeline import demux_video
+from workspace.storage.media_cache import media_cache, telegram_key, variant
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from agent_setup import groq_client
 
 logger = logging.getLogger(__name__)
 
 
+def _describe_frame(frame: bytes, caption: str) -> str:
+    image_data = base64.b64encode(frame).decode("utf-8")
+    with metrics.timer("vision_latency_ms", source="video"):
+        vision_response = groq_client.chat.completions.create(
+            model="meta-llama/llama-4-scout-17b-16e-instruct",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": f"Descreva esta imagem em detalhes: {caption}"},
+                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}},
+                    ],
+                }
+            ],
+            temperature=0.5,
+            max_completion_tokens=512,
+        )
+    return vision_response.choices[0].message.content
+
+
+def _transcribe(audio_path: Optional[Path]) -> Optional[str]:
+    """Transcrição do áudio; "" sem faixa de áudio, None se o Whisper falhar"""
+    if audio_path is None:
+        return ""
+    try:
+        with open(audio_path, "rb") as audio_file:
+            return groq_client.audio.transcriptions.create(
+                file=audio_file,
+                model="whisper-large-v3-turbo",
+                response_format="text",
+            )
+    except Exception as ae:
+        logger.warning(f"Transcrição de áudio falhou: {ae}")
+        return None
+
+
 @require_auth
 async def handle_video(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
-    """Handler para vídeos (SecureFileManager + SafeSubprocessExecutor)"""
+    """Handler para vídeos (SecureFileManager + ffmpeg em passada única)"""
     logger.info("Vídeo recebido")
 
+    limited = check_rate_limit(update.effective_user.id, "video", media_limiter)
+    if limited:
+        await update.message.reply_text(limited)
+        return
+
     await update.message.chat.send_action("typing")
 
     try:
         video = update.message.video
-        video_file = await video.get_file()
         caption = update.message.caption or "Descreva o que você vê"
+        wanted = variant(caption)
+
+        # Vídeo reencaminhado (mesmo file_unique_id) e mesmo pedido: sem download
+        cache_key = telegram_key(video.file_unique_id)
+        entry = await media_cache.get(cache_key) or {}
+        summaries = entry.setdefault("summaries", {})
+        if wanted in summaries:
+            await store.add_turn(f"[VÍDEO] {caption}", summaries[wanted])
+            await update.message.reply_text(summaries[wanted])
+            return
+
+        video_file = await video.get_file()
 
         with secure_files.temp_file(suffix=".mp4") as video_path:
             await video_file.download_to_drive(str(video_path))
-            with secure_files.temp_file(suffix=".jpg") as frame_path:
-                success_frame, _, err_frame = await SafeSubprocessExecutor.run(
-                    ["ffmpeg", "-i", str(video_path), "-vframes", "1", "-q:v", "2", str(frame_path)],
-                    timeout=30,
-                )
-                if not success_frame:
-                    logger.warning(f"FFmpeg frame: {err_frame}")
+            with secure_files.temp_directory() as work_dir:
+                # Uma passada do ffmpeg: primeiro keyframe (stdout) + áudio sem reencode
+                media = await demux_video(video_path, work_dir)
+                if media.frame is None:
                     raise RuntimeError("Falha ao extrair frame")
 
-                with secure_files.temp_file(suffix=".mp3") as audio_path:
-                    success_audio, _, _ = await SafeSubprocessExecutor.run(
-                        ["ffmpeg", "-i", str(video_path), "-vn", "-acodec", "mp3", str(audio_path)],
-                        timeout=30,
-                    )
-                    has_audio = success_audio and audio_path.stat().st_size > 1000
-
-                    with open(frame_path, "rb") as f:
-                        image_data = base64.b64encode(f.read()).decode("utf-8")
-
-                    vision_response = groq_client.chat.completions.create(
-                        model="meta-llama/llama-4-scout-17b-16e-instruct",
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": [
-                                    {"type": "text", "text": f"Descreva esta imagem em detalhes: {caption}"},
-                                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}},
-                                ],
-                            }
-                        ],
-                        temperature=0.5,
-                        max_completion_tokens=512,
-                    )
-                    visual_analysis = vision_response.choices[0].message.content
-
-                    audio_transcription = ""
-                    if has_audio:
-                        try:
-                            with open(audio_path, "rb") as audio_file:
-                                transcription = groq_client.audio.transcriptions.create(
-                                    file=audio_file,
-                                    model="whisper-large-v3-turbo",
-                                    response_format="text",
-                                )
-                                audio_transcription = transcription
-                        except Exception as ae:
-                            logger.debug(f"Transcrição de áudio falhou: {ae}")
-
-                    response_parts = ["🎬 Vídeo analisado:\n", f"📸 {visual_analysis}"]
-                    if audio_transcription and len(audio_transcription.strip()) > 5:
-                        response_parts.append(f'\n\n🎤 Áudio: "{audio_transcription.strip()}"')
-                    result = "\n".join(response_parts)
-
-                    store.add_message("user", f"[VÍDEO] {caption}")
-                    store.add_message("assistant", result)
-                    await update.message.reply_text(result)
+                async def describe() -> str:
+                    (frame,) = await prepare_for_vision([media.frame], source="video")
+                    return await asyncio.to_thread(_describe_frame, frame, caption)
+
+                # Visão e transcrição em paralelo (clientes síncronos em threads);
+                # a transcrição não depende da legenda e é reaproveitada do cache
+                cached_transcript = entry.get("transcript")
+                visual_analysis, audio_transcription = await asyncio.gather(
+                    describe(),
+                    asyncio.to_thread(_transcribe, None if cached_transcript is not None else media.audio_path),
+                )
+                if cached_transcript is not None:
+                    audio_transcription = cached_transcript
+
+                response_parts = ["🎬 Vídeo analisado:\n", f"📸 {visual_analysis}"]
+                if audio_transcription and len(audio_transcription.strip()) > 5:
+                    response_parts.append(f'\n\n🎤 Áudio: "{audio_transcription.strip()}"')
+                result = "\n".join(response_parts)
+
+                # Falha do Whisper não vai para o cache: a próxima vez tenta de novo
+                if audio_transcription is not None:
+                    entry["transcript"] = audio_transcription
+                    summaries[wanted] = result
+                    await media_cache.put(cache_key, entry)
+
+                await store.add_turn(f"[VÍDEO] {caption}", result)
+                await update.message.reply_text(result)
 
     except Exception as e:
         logger.error(f"Erro ao processar vídeo: {e}", exc_info=True)
@@ -1,15 +1,18 @@
 """Handler para mensagens de voz"""
 
-import os
+import asyncio
 import logging
+import time
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from security.auth import require_auth
+from security.rate_limiter import check_rate_limit, media_limiter
+from utils.media_buffer import download_media
 from workspace.core.agent import Agent
-from workspace.storage.sqlite_store import SQLiteStore
+from workspace.storage.metrics import metrics
+from workspace.storage.sqlite_store import AsyncSQLiteStore
 from agent_setup import groq_client
-from config.settings import config
 
 logger = logging.getLogger(__name__)
 
@@ -19,42 +22,43 @@ async def handle_voice(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     agent: Agent,
-    store: SQLiteStore,
+    store: AsyncSQLiteStore,
 ):
     """Handler para mensagens de voz"""
     logger.info("Áudio de voz recebido")
 
+    limited = check_rate_limit(update.effective_user.id, "voice", media_limiter)
+    if limited:
+        await update.message.reply_text(limited)
+        return
+
     await update.message.chat.send_action("typing")
 
     chat_id = update.effective_chat.id
+    start = time.perf_counter()
 
     try:
-        # Download do áudio
+        # Download do áudio (em memória) e transcrição com Groq Whisper
         voice = update.message.voice
         voice_file = await voice.get_file()
-        voice_path = str(config.TEMP_DIR / f"moltbot_voice_{voice.file_id}.ogg")
-        await voice_file.download_to_drive(voice_path)
-
-        # Transcreve com Groq Whisper
-        with open(voice_path, "rb") as audio_file:
-            transcription = groq_client.audio.transcriptions.create(
-                file=audio_file, model="whisper-large-v3-turbo", response_format="text"
+        async with download_media(voice_file, kind="voice", suffix=".ogg") as media:
+            transcription = await asyncio.to_thread(
+                groq_client.audio.transcriptions.create,
+                file=media.upload("voice.ogg"),
+                model="whisper-large-v3-turbo",
+                response_format="text",
             )
 
-        store.add_message("user", f"[ÁUDIO] {transcription}", chat_id=chat_id)
-
-        history = store.get_history(limit=10, chat_id=chat_id)
+        history = await store.get_history(limit=10, chat_id=chat_id)
         response = await agent.run(transcription, history)
 
-        store.add_message("assistant", response, chat_id=chat_id)
+        await store.add_turn(f"[ÁUDIO] {transcription}", response, chat_id=chat_id)
 
         # Responde com transcrição + resposta
         await update.message.reply_text(
             f'🎤 Você disse:\n"{transcription}"\n\n{response}'
         )
-
-        # Limpa arquivo
-        os.unlink(voice_path)
+        metrics.observe("media_handler_ms", (time.perf_counter() - start) * 1000, kind="voice")
 
     except Exception as e:
         logger.error(f"Erro ao processar áudio: {e}", exc_info=True)
@@ -33,28 +33,42 @@ class SafeSubprocessExecutor:
         Returns:
             Tuple[bool, str, str]: (success, stdout, stderr)
         """
-        if not cmd or not isinstance(cmd, list):
-            return False, "", "Comando inválido: deve ser uma lista não vazia"
+        valid, reason = cls.validate_command(cmd)
+        if not valid:
+            return False, "", reason
 
-        command = cmd[0]
-        if command not in cls.ALLOWED_COMMANDS:
-            return False, "", f"Comando não permitido: {command}"
+        success, stdout, stderr = await cls._execute(cmd, timeout, cwd, env)
+        stdout_str = stdout.decode("utf-8", errors="replace") if stdout else ""
+        return success, stdout_str, stderr
 
-        # Valida argumentos para prevenir injection
-        dangerous_patterns = [";", "&&", "||", "`", "$", "|", ">", "<", "&"]
-        for i, arg in enumerate(cmd[1:], start=1):
-            arg_str = str(arg)
-            for pattern in dangerous_patterns:
-                if pattern in arg_str:
-                    logger.warning(
-                        f"Padrão perigoso detectado no argumento {i}: {pattern}"
-                    )
-                    return (
-                        False,
-                        "",
-                        f"Argumento suspeito detectado no argumento {i}: {arg_str[:50]}",
-                    )
+    @classmethod
+    async def run_bytes(
+        cls,
+        cmd: List[str],
+        timeout: Optional[int] = None,
+        cwd: Optional[str] = None,
+        env: Optional[dict] = None,
+    ) -> Tuple[bool, bytes, str]:
+        """
+        Igual a `run`, mas devolve stdout bruto (ex.: frames do ffmpeg em pipe:1)
+
+        Returns:
+            Tuple[bool, bytes, str]: (success, stdout, stderr)
+        """
+        valid, reason = cls.validate_command(cmd)
+        if not valid:
+            return False, b"", reason
+        return await cls._execute(cmd, timeout, cwd, env)
 
+    @classmethod
+    async def _execute(
+        cls,
+        cmd: List[str],
+        timeout: Optional[int],
+        cwd: Optional[str],
+        env: Optional[dict],
+    ) -> Tuple[bool, bytes, str]:
+        command = cmd[0]
         # Prepara o timeout
         exec_timeout = timeout or cls.TIMEOUT_SECONDS
 
@@ -82,10 +96,8 @@ class SafeSubprocessExecutor:
                     await proc.wait()
                 except Exception:
                     pass
-                return False, "", f"Timeout na execução ({exec_timeout}s)"
+                return False, b"", f"Timeout na execução ({exec_timeout}s)"
 
-            # Decodifica saída
-            stdout_str = stdout.decode("utf-8", errors="replace") if stdout else ""
             stderr_str = stderr.decode("utf-8", errors="replace") if stderr else ""
 
             # Verifica código de retorno
@@ -102,13 +114,13 @@ class SafeSubprocessExecutor:
                     f"Comando falhou com código {proc.returncode}: {command}"
                 )
 
-            return success, stdout_str, stderr_str
+            return success, stdout or b"", stderr_str
 
         except asyncio.TimeoutError:
-            return False, "", "Timeout na execução"
+            return False, b"", "Timeout na execução"
         except Exception as e:
             logger.error(f"Erro ao executar comando {command}: {e}")
-            return False, "", str(e)
+            return False, b"", str(e)
 
     @classmethod
     def validate_command(cls, cmd: List[str]) -> Tuple[bool, str]:
@@ -125,7 +137,8 @@ class SafeSubprocessExecutor:
             arg_str = str(arg)
             for pattern in dangerous_patterns:
                 if pattern in arg_str:
-                    return False, f"Argumento suspeito: {arg_str[:50]}"
+                    logger.warning(f"Padrão perigoso detectado no argumento: {pattern}")
+                    return False, f"Argumento suspeito detectado: {arg_str[:50]}"
 
         return True, "OK"
 
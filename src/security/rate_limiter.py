@@ -1,48 +1,281 @@
-"""Rate limiting para prevenir abuso"""
-from collections import defaultdict
-from datetime import datetime, timedelta
+"""Rate limiting para prevenir abuso (GCRA)
+
+Cada chave guarda um único float, o TAT (theoretical arrival time): o
+instante em que o "balde" do usuário estaria vazio de novo. Uma requisição
+de custo `c` avança o TAT em `c * window / max_requests` e é aceita se o TAT
+resultante não passar de `agora + window`. Equivale a um token bucket com
+capacidade `max_requests` reabastecido continuamente, com verificação O(1)
+(antes: lista de `datetime` refiltrada a cada chamada e nunca apagada).
+
+- Relógio monotônico no backend em memória (ajuste de hora do sistema não
+  libera nem bloqueia ninguém).
+- Chaves ociosas (TAT no passado = balde cheio) são removidas ao longo do
+  uso; `max_keys` limita a memória mesmo sob muitos usuários distintos.
+- Três limites por usuário: mensagens (`message_limiter`), mídia
+  (`media_limiter`) e YouTube (`youtube_limiter`, janela de 5 min); cada
+  handler passa o seu para `check_rate_limit`.
+- Custos por tipo, na unidade do limiter que os cobra: cada limiter recebe a
+  sua tabela (`MEDIA_COSTS`, `YOUTUBE_COSTS`); `COSTS` é a tabela de quem não
+  passa nenhuma (o `message_limiter`). Um vídeo consome mais do limite de
+  mídia que uma foto. Tipo fora da tabela custa 1; um custo acima de
+  `max_requests` é reduzido a ele na construção (uma requisição desse tipo
+  sempre cabe num balde cheio).
+- `SQLiteRateLimitBackend` (ativado por `RATE_LIMIT_DB`) compartilha os
+  limites entre processos do bot na mesma máquina. Usa o relógio de parede,
+  porque o monotônico recomeça a cada boot; o TAT é limitado a
+  `agora + window`, então um ajuste de relógio bloqueia no máximo uma janela.
+
+Uso:
+    error = check_rate_limit(user_id, "youtube", youtube_limiter)
+    if error:
+        await update.message.reply_text(error)
+        return
+"""
+
+from __future__ import annotations
+
 import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from config.settings import config
+from workspace.storage.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Tabela padrão, para limiters criados sem `costs` (mensagem de texto = 1)
+COSTS: Dict[str, float] = {
+    "message": 1.0,
+}
+# Custos no limite de mídia (RATE_LIMIT_MEDIA itens por minuto)
+MEDIA_COSTS: Dict[str, float] = {
+    "voice": 1.0,
+    "audio": 1.0,
+    "photo": 1.0,
+    "document": 2.0,  # OCR, planilhas e PDFs no pool de CPU
+    "video": 2.0,
+}
+# Custos no limite de YouTube (RATE_LIMIT_YOUTUBE análises por 5 min)
+YOUTUBE_COSTS: Dict[str, float] = {
+    "youtube": 1.0,
+}
+
+# Chaves mantidas no backend em memória
+MAX_KEYS = 10_000
+# Intervalo entre limpezas de chaves ociosas no SQLite (segundos)
+SQLITE_EVICT_INTERVAL = 60.0
+
+
+def _clamp(tat: float, now: float, tolerance: float) -> float:
+    """TAT no intervalo [agora, agora + tolerância] (relógio que voltou não bloqueia mais que isso)"""
+    return min(max(tat, now), now + tolerance)
+
+
+def _gcra(tat: float, now: float, increment: float, tolerance: float) -> Tuple[bool, float]:
+    """(aceita, novo TAT); recusada mantém o TAT (limitado por `_clamp`)"""
+    tat = _clamp(tat, now, tolerance)
+    new_tat = tat + increment
+    if new_tat - now > tolerance + 1e-9:
+        return False, tat
+    return True, new_tat
+
+
+class MemoryBackend:
+    """TATs em memória do processo (OrderedDict por último uso)"""
+
+    def __init__(self, max_keys: int = MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def acquire(self, key: str, increment: float, tolerance: float) -> Tuple[bool, float, float]:
+        """(aceita, TAT, agora)"""
+        now = self.clock()
+        with self._lock:
+            stored = self._tat.get(key, now)
+            allowed, tat = _gcra(stored, now, increment, tolerance)
+            if allowed or tat < stored:
+                self._tat[key] = tat
+                self._tat.move_to_end(key)
+                self._evict(now)
+        return allowed, tat, now
+
+    def peek(self, key: str) -> Tuple[float, float]:
+        """(TAT, agora) sem consumir"""
+        now = self.clock()
+        with self._lock:
+            return self._tat.get(key, now), now
+
+    def _evict(self, now: float) -> None:
+        # Menos usadas primeiro: sai enquanto a mais antiga estiver ociosa ou
+        # o dicionário passar do limite (O(1) amortizado: cada chave sai uma vez)
+        while self._tat:
+            key, tat = next(iter(self._tat.items()))
+            if tat > now and len(self._tat) <= self.max_keys:
+                break
+            del self._tat[key]
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class SQLiteRateLimitBackend:
+    """TATs em SQLite (WAL), compartilhados entre processos
+
+    A conexão é aberta no primeiro uso. Cada verificação é uma transação
+    curta com trava de escrita (BEGIN IMMEDIATE): dois processos não aceitam
+    a mesma "vaga".
+    """
+
+    def __init__(self, db_path: str, clock: Callable[[], float] = time.time):
+        self.db_path = os.path.expanduser(str(db_path))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._next_evict = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+                )
+            self._conn = conn
+        return self._conn
+
+    def acquire(self, key: str, increment: float, tolerance: float) -> Tuple[bool, float, float]:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                now = self.clock()
+                row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                stored = row[0] if row else now
+                allowed, tat = _gcra(stored, now, increment, tolerance)
+                if allowed or tat < stored:
+                    conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, tat),
+                    )
+                if now >= self._next_evict:
+                    conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                    self._next_evict = now + SQLITE_EVICT_INTERVAL
+        return allowed, tat, now
+
+    def peek(self, key: str) -> Tuple[float, float]:
+        with self._lock:
+            row = self._connect().execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            now = self.clock()
+        return (row[0] if row else now), now
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
 class RateLimiter:
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+    """Até `max_requests` unidades de custo por `window_seconds` (com rajada)"""
+
+    def __init__(
+        self,
+        max_requests: int = 10,
+        window_seconds: float = 60,
+        name: str = "default",
+        backend=None,
+        costs: Optional[Dict[str, float]] = None,
+    ):
+        if max_requests < 1:
+            raise ValueError(f"rate limiter {name}: max_requests deve ser >= 1 (recebido {max_requests})")
         self.max_requests = max_requests
-        self.window = timedelta(seconds=window_seconds)
-        self.requests = defaultdict(list)
-    
-    def is_allowed(self, user_id: int) -> bool:
-        """Verifica se usuário pode fazer requisição"""
-        now = datetime.now()
-        
-        # Remove requisições antigas
-        self.requests[user_id] = [
-            req_time for req_time in self.requests[user_id]
-            if now - req_time < self.window
-        ]
-        
-        # Verifica limite
-        if len(self.requests[user_id]) >= self.max_requests:
-            logger.warning(
-                f"Rate limit excedido: user_id={user_id}, "
-                f"requests={len(self.requests[user_id])}"
-            )
-            return False
-        
-        # Registra requisição
-        self.requests[user_id].append(now)
-        return True
-    
+        self.window = float(window_seconds)
+        self.name = name
+        self.interval = self.window / max_requests
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.costs: Dict[str, float] = {}
+        for kind, cost in (COSTS if costs is None else costs).items():
+            if cost > max_requests:
+                logger.warning("rate_limit_custo_reduzido limiter=%s tipo=%s custo=%s max=%d",
+                               name, kind, cost, max_requests)
+                cost = float(max_requests)
+            self.costs[kind] = cost
+
+    def cost(self, kind: str) -> float:
+        """Custo de um tipo de requisição neste limiter (1 se desconhecido)"""
+        return self.costs.get(kind, 1.0)
+
+    def _key(self, user_id) -> str:
+        return f"{self.name}:{user_id}"
+
+    def is_allowed(self, user_id: int, cost: float = 1.0) -> bool:
+        """Verifica e consome `cost` do limite do usuário"""
+        allowed, _, _ = self.backend.acquire(self._key(user_id), cost * self.interval, self.window)
+        if not allowed:
+            metrics.incr("rate_limited", limiter=self.name)
+            logger.warning("rate_limit_excedido limiter=%s user_id=%s custo=%s", self.name, user_id, cost)
+        return allowed
+
     def get_remaining(self, user_id: int) -> int:
-        """Retorna número de requisições restantes"""
-        now = datetime.now()
-        self.requests[user_id] = [
-            req_time for req_time in self.requests[user_id]
-            if now - req_time < self.window
-        ]
-        return max(0, self.max_requests - len(self.requests[user_id]))
-
-# Instâncias globais
-message_limiter = RateLimiter(max_requests=20, window_seconds=60)
-media_limiter = RateLimiter(max_requests=5, window_seconds=60)
-youtube_limiter = RateLimiter(max_requests=3, window_seconds=300)  # 3 por 5min
+        """Unidades de custo disponíveis agora"""
+        tat, now = self.backend.peek(self._key(user_id))
+        available = (now + self.window - _clamp(tat, now, self.window)) / self.interval
+        return max(0, min(self.max_requests, math.floor(available + 1e-9)))
+
+    def retry_after(self, user_id: int, cost: float = 1.0) -> float:
+        """Segundos até uma requisição de custo `cost` ser aceita"""
+        tat, now = self.backend.peek(self._key(user_id))
+        return max(0.0, _clamp(tat, now, self.window) + cost * self.interval - now - self.window)
+
+
+def _default_backend():
+    path = config.RATE_LIMIT_DB
+    return SQLiteRateLimitBackend(path) if path else None
+
+
+# Instâncias globais (backend SQLite compartilhado se RATE_LIMIT_DB estiver definido)
+_shared_backend = _default_backend()
+message_limiter = RateLimiter(config.RATE_LIMIT_MESSAGES, 60, name="message", backend=_shared_backend)
+media_limiter = RateLimiter(
+    config.RATE_LIMIT_MEDIA, 60, name="media", backend=_shared_backend, costs=MEDIA_COSTS
+)
+youtube_limiter = RateLimiter(
+    config.RATE_LIMIT_YOUTUBE, 300, name="youtube", backend=_shared_backend, costs=YOUTUBE_COSTS
+)  # 3 por 5min
+
+
+def check_rate_limit(user_id: int, kind: str = "message", limiter: Optional[RateLimiter] = None) -> Optional[str]:
+    """None se permitido; senão a mensagem para o usuário (custo de `limiter.cost(kind)`)"""
+    limiter = limiter or message_limiter
+    cost = limiter.cost(kind)
+    if limiter.is_allowed(user_id, cost=cost):
+        return None
+    wait = math.ceil(limiter.retry_after(user_id, cost))
+    return f"⏱️ Muitas requisições. Aguarde {wait}s e tente novamente."
+
+
+__all__ = [
+    "COSTS",
+    "MEDIA_COSTS",
+    "MemoryBackend",
+    "RateLimiter",
+    "SQLiteRateLimitBackend",
+    "YOUTUBE_COSTS",
+    "check_rate_limit",
+    "media_limiter",
+    "message_limiter",
+    "youtube_limiter",
+]
@@ -0,0 +1,239 @@
+"""Pool de processos para trabalho pesado de CPU (OCR, gráficos, planilhas)
+
+pytesseract, renderização do matplotlib e perfil de planilhas com pandas
+rodam em processos separados, sem travar o event loop (e as outras
+conversas) enquanto um upload pesado é processado.
+
+- Workers "quentes": cada processo já importa pandas, matplotlib (Agg) e PIL
+  ao iniciar; `start()` sobe todos no aquecimento em segundo plano, logo
+  depois do bot_pronto (uma tarefa que chegue antes sobe o pool na hora).
+- Limite de memória por worker (RLIMIT_AS, só em Unix; margem sobre o
+  tamanho do worker ao iniciar): um arquivo gigante derruba o próprio
+  worker, não o bot.
+- Timeout por tarefa: o processo não pode ser interrompido no meio, então o
+  pool inteiro é reciclado (workers encerrados e recriados na próxima tarefa).
+- Fila limitada: com `max_pending` tarefas em andamento/na fila, novas
+  submissões são recusadas com `PoolSaturated` em vez de acumular.
+
+Métricas: `cpu_pool_queue_depth`, `cpu_pool_task_ms{task=...}`,
+`cpu_pool_rejected{task=...}`, `cpu_pool_timeouts{task=...}`,
+`cpu_pool_errors{task=...}`.
+
+Funções e argumentos enviados ao pool precisam ser pickláveis (funções de
+módulo, não closures).
+
+Uso:
+    from utils.cpu_pool import cpu_pool
+
+    profile = await cpu_pool.run(profile_table, doc_path, timeout=120)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import importlib
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from config.settings import config
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Workers (processos) simultâneos
+MAX_WORKERS = 2
+# Tarefas em execução + na fila antes de recusar novas
+MAX_PENDING = 8
+# Tempo máximo de uma tarefa (segundos)
+TASK_TIMEOUT_SECONDS = 120.0
+# Memória virtual adicional permitida por worker (MB); 0 = sem limite
+MEMORY_LIMIT_MB = 2048
+# Módulos importados ao subir cada worker
+WARM_MODULES = ("pandas", "matplotlib.pyplot", "PIL.Image")
+
+
+class PoolSaturated(RuntimeError):
+    """Fila do pool cheia: tarefa recusada"""
+
+
+def _virtual_size() -> int:
+    """Memória virtual atual do processo em bytes (0 se indisponível)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _init_worker(sys_path: Sequence[str], memory_limit_mb: int, modules: Sequence[str]) -> None:
+    """Inicialização de cada worker: caminhos, limite de memória e imports"""
+    for path in reversed(sys_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    # Bibliotecas numéricas com uma thread por worker (o paralelismo é o pool)
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, "1")
+    if memory_limit_mb > 0:
+        try:
+            import resource
+
+            # Limite relativo ao tamanho do worker já inicializado
+            limit = _virtual_size() + memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning("cpu_pool_limite_memoria_indisponivel error=%s", e)
+    for module in modules:
+        try:
+            if module.startswith("matplotlib"):
+                import matplotlib
+
+                matplotlib.use("Agg")
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class CpuPool:
+    """ProcessPoolExecutor gerenciado: workers quentes, timeout e fila limitada"""
+
+    def __init__(
+        self,
+        max_workers: int = MAX_WORKERS,
+        max_pending: int = MAX_PENDING,
+        timeout: float = TASK_TIMEOUT_SECONDS,
+        memory_limit_mb: int = MEMORY_LIMIT_MB,
+        warm_modules: Sequence[str] = WARM_MODULES,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.warm_modules = tuple(warm_modules)
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._counts = {"done": 0, "rejected": 0, "timeouts": 0, "errors": 0, "recycled": 0}
+
+    # -- executor ---------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Nunca fork: o bot já tem threads (executor do SQLite, journal,
+            # watchdog, notifier) e `_recycle` recria o pool no meio da execução;
+            # um fork copiaria locks presos por elas. O forkserver nasce limpo e
+            # importar bot_simple não tem efeitos (tudo é montado em main())
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_worker,
+                initargs=(list(sys.path), self.memory_limit_mb, self.warm_modules),
+            )
+        return self._executor
+
+    def _recycle(self, reason: str) -> None:
+        """Encerra os workers atuais; a próxima tarefa sobe um pool novo"""
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        self._counts["recycled"] += 1
+        logger.warning("cpu_pool_reciclado motivo=%s", reason)
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+    async def start(self) -> None:
+        """Sobe os workers e faz os imports pesados antes do primeiro uso"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        start = time.perf_counter()
+        pids = await asyncio.gather(
+            *[loop.run_in_executor(executor, _ping) for _ in range(self.max_workers)]
+        )
+        logger.info("cpu_pool_iniciado workers=%d ms=%.0f",
+                    len(set(pids)), (time.perf_counter() - start) * 1000)
+
+    # -- tarefas ----------------------------------------------------------
+
+    async def run(
+        self,
+        function: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Executa `function(*args, **kwargs)` em um worker e aguarda o resultado
+
+        Levanta `PoolSaturated` se a fila estiver cheia, `asyncio.TimeoutError`
+        se passar do timeout (o pool é reciclado) e relança exceções da tarefa.
+        """
+        task = name or getattr(function, "__name__", "task")
+        if self.pending >= self.max_pending:
+            self._counts["rejected"] += 1
+            metrics.incr("cpu_pool_rejected", task=task)
+            raise PoolSaturated(f"Pool de CPU ocupado ({self.pending} tarefas)")
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        self.pending += 1
+        metrics.observe("cpu_pool_queue_depth", self.pending)
+        start = time.perf_counter()
+        try:
+            future = loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+            result = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._counts["timeouts"] += 1
+            metrics.incr("cpu_pool_timeouts", task=task)
+            if self._executor is executor:
+                self._recycle(f"timeout task={task}")
+            raise
+        except BrokenProcessPool:
+            # Worker morreu (limite de memória, crash nativo): recria na próxima
+            self._counts["errors"] += 1
+            metrics.incr("cpu_pool_errors", task=task)
+            if self._executor is executor:
+                self._recycle(f"worker_morto task={task}")
+            raise
+        except Exception:
+            self._counts["errors"] += 1
+            metrics.incr("cpu_pool_errors", task=task)
+            raise
+        finally:
+            self.pending -= 1
+            metrics.observe("cpu_pool_task_ms", (time.perf_counter() - start) * 1000, task=task)
+        self._counts["done"] += 1
+        return result
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.max_workers, "pending": self.pending, **self._counts}
+
+
+# Instância global (compartilhada por handlers e tools)
+cpu_pool = CpuPool(
+    max_workers=config.CPU_POOL_WORKERS,
+    max_pending=config.CPU_POOL_MAX_PENDING,
+    timeout=config.CPU_POOL_TASK_TIMEOUT,
+    memory_limit_mb=config.CPU_POOL_MEMORY_MB,
+)
+
+
+__all__ = ["CpuPool", "PoolSaturated", "cpu_pool"]
@@ -0,0 +1,326 @@
+"""Extração de texto de HTML em passada única (streaming)
+
+Substitui as várias passadas de `re.sub` sobre o documento inteiro por um
+único `html.parser.HTMLParser` alimentado incrementalmente. Os blocos
+estruturados (títulos, itens de lista, linhas de tabela, parágrafos) são
+emitidos por um gerador assim que fecham, então a memória fica limitada ao
+bloco corrente e ao trecho ainda não processado pelo parser.
+
+Uso:
+    from utils.html_text import iter_html_blocks, chunk_blocks
+
+    for block in iter_html_blocks(response.iter_content(65536)):
+        print(block.kind, block.text)
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from collections import deque
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Deque, Iterable, Iterator, List, Optional, Union
+
+# Conteúdo descartado por completo (inclusive o texto interno)
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+
+# Elementos que podem aparecer no <head>; qualquer outro (ou o <body>) encerra o
+# <head> mesmo sem o </head>, como fazem os navegadores
+_HEAD_TAGS = {"title", "meta", "link", "base", "style", "script", "noscript", "template"}
+
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+# Tags que encerram o bloco de texto corrente
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+    "blockquote", "pre", "ul", "ol", "dl", "dt", "dd", "table", "thead", "tbody",
+    "tfoot", "form", "fieldset", "figure", "figcaption", "address", "hr",
+}
+
+_CELL_TAGS = {"td", "th"}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Limite de caracteres por bloco (protege contra páginas com um único <div> gigante)
+DEFAULT_MAX_BLOCK_CHARS = 20000
+
+
+@dataclass
+class HtmlBlock:
+    """Bloco de texto extraído do HTML"""
+
+    kind: str  # heading, list_item, table_row, paragraph
+    text: str
+    level: int = 0  # nível do título (1-6) quando kind == "heading"
+
+    def to_text(self) -> str:
+        """Renderiza o bloco como texto simples"""
+        if self.kind == "list_item":
+            return f"- {self.text}"
+        return self.text
+
+
+class _BlockParser(HTMLParser):
+    """HTMLParser que acumula texto e fecha blocos nas tags estruturais"""
+
+    def __init__(self, max_block_chars: int = DEFAULT_MAX_BLOCK_CHARS):
+        # convert_charrefs=True decodifica &nbsp;, &amp; etc. sem passada extra
+        super().__init__(convert_charrefs=True)
+        self.max_block_chars = max_block_chars
+        self.blocks: Deque[HtmlBlock] = deque()
+        self._parts: List[str] = []
+        self._size = 0
+        self._skip_depth = 0
+        # <head> também é descartado, mas termina em </head> ou no primeiro
+        # elemento do corpo (páginas sem o </head> não perdem o texto todo)
+        self._in_head = False
+        self._kind = "paragraph"
+        self._level = 0
+        self._cells: Optional[List[str]] = None
+
+    # -- acumulação -------------------------------------------------------
+
+    def _flush(self) -> None:
+        text = _WHITESPACE_RE.sub(" ", "".join(self._parts)).strip()
+        self._parts = []
+        self._size = 0
+        if text:
+            if self._cells is not None:
+                self._cells.append(text)
+            else:
+                self.blocks.append(HtmlBlock(self._kind, text, self._level))
+        if self._cells is None:
+            self._kind = "paragraph"
+            self._level = 0
+
+    def _start_block(self, kind: str, level: int = 0) -> None:
+        self._flush()
+        self._kind = kind
+        self._level = level
+
+    def _flush_row(self) -> None:
+        self._flush()
+        cells, self._cells = self._cells, None
+        if cells:
+            self.blocks.append(HtmlBlock("table_row", " | ".join(cells)))
+        self._kind = "paragraph"
+
+    # -- callbacks do HTMLParser ------------------------------------------
+
+    @property
+    def _skipping(self) -> bool:
+        return bool(self._skip_depth) or self._in_head
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "head":
+            self._in_head = True
+            return
+        if self._in_head and tag not in _HEAD_TAGS:
+            self._in_head = False
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skipping:
+            return
+        if tag in _HEADING_TAGS:
+            self._start_block("heading", int(tag[1]))
+        elif tag == "li":
+            self._start_block("list_item")
+        elif tag == "tr":
+            self._flush_row()
+            self._cells = []
+        elif tag in _CELL_TAGS:
+            self._flush()
+        elif tag == "br":
+            self._line_break()
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if self._in_head and tag not in _HEAD_TAGS:
+            self._in_head = False
+        if self._skipping:
+            return
+        if tag == "br":
+            self._line_break()
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def _line_break(self) -> None:
+        # <br> fora de tabela quebra o bloco (mantém o tipo); dentro de célula vira espaço
+        if self._cells is not None:
+            self._parts.append(" ")
+            return
+        kind, level = self._kind, self._level
+        self._flush()
+        self._kind, self._level = kind, level
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+            return
+        if tag in _SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+            return
+        if self._skipping:
+            return
+        if tag == "tr" or (tag == "table" and self._cells is not None):
+            self._flush_row()
+        elif tag in _CELL_TAGS:
+            self._flush()
+        elif tag in _HEADING_TAGS or tag == "li" or tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._skipping or not data:
+            return
+        while self._size + len(data) > self.max_block_chars:
+            # Bloco grande demais: emite até o limite (em fronteira de palavra)
+            # e continua no mesmo tipo de bloco
+            room = max(self.max_block_chars - self._size, 1)
+            cut = data.rfind(" ", 0, room)
+            if cut <= 0:
+                cut = room
+            self._parts.append(data[:cut])
+            data = data[cut:]
+            kind, level = self._kind, self._level
+            self._flush()
+            self._kind, self._level = kind, level
+        self._parts.append(data)
+        self._size += len(data)
+
+    def finish(self) -> None:
+        self.close()
+        if self._cells is not None:
+            self._flush_row()
+        else:
+            self._flush()
+
+
+# Tamanho dos pedaços entregues ao parser quando a entrada é uma string inteira
+_FEED_SIZE = 65536
+
+
+def _slices(data: Union[str, bytes], size: int = _FEED_SIZE) -> Iterator[Union[str, bytes]]:
+    """Fatia a entrada para que o consumidor possa parar antes do fim do documento"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def iter_html_blocks(
+    source: Union[str, bytes, Iterable[Union[str, bytes]]],
+    encoding: str = "utf-8",
+    max_block_chars: int = DEFAULT_MAX_BLOCK_CHARS,
+) -> Iterator[HtmlBlock]:
+    """
+    Extrai blocos de texto de HTML em uma única passada
+
+    Args:
+        source: HTML completo (str/bytes) ou iterável de pedaços (ex.: iter_content)
+        encoding: Encoding usado para decodificar pedaços em bytes
+        max_block_chars: Tamanho máximo de um bloco antes de ser emitido
+
+    Yields:
+        HtmlBlock na ordem do documento
+    """
+    if isinstance(source, (str, bytes)):
+        source = _slices(source)
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = _BlockParser(max_block_chars=max_block_chars)
+
+    for chunk in source:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            parser.feed(chunk)
+        while parser.blocks:
+            yield parser.blocks.popleft()
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        parser.feed(tail)
+    parser.finish()
+    while parser.blocks:
+        yield parser.blocks.popleft()
+
+
+async def aiter_html_blocks(
+    source,
+    encoding: str = "utf-8",
+    max_block_chars: int = DEFAULT_MAX_BLOCK_CHARS,
+):
+    """Versão assíncrona de iter_html_blocks para streams async (aiohttp/httpx)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = _BlockParser(max_block_chars=max_block_chars)
+
+    async for chunk in source:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            parser.feed(chunk)
+        while parser.blocks:
+            yield parser.blocks.popleft()
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        parser.feed(tail)
+    parser.finish()
+    while parser.blocks:
+        yield parser.blocks.popleft()
+
+
+def chunk_blocks(
+    blocks: Iterable[HtmlBlock], max_chars: int = 1500
+) -> Iterator[dict]:
+    """
+    Agrupa blocos em chunks para indexação (RAG), respeitando títulos
+
+    Cada título inicia um novo chunk; blocos subsequentes são agregados até
+    `max_chars`. O título corrente é repetido como `section` em cada chunk.
+
+    Yields:
+        dict com "section" e "text"
+    """
+    section = ""
+    parts: List[str] = []
+    size = 0
+
+    for block in blocks:
+        if block.kind == "heading":
+            if parts:
+                yield {"section": section, "text": "\n".join(parts)}
+            section = block.text
+            parts, size = [block.text], len(block.text)
+            continue
+
+        line = block.to_text()
+        if parts and size + len(line) + 1 > max_chars:
+            yield {"section": section, "text": "\n".join(parts)}
+            parts, size = [], 0
+        parts.append(line)
+        size += len(line) + 1
+
+    if parts:
+        yield {"section": section, "text": "\n".join(parts)}
+
+
+def html_to_text(source: Union[str, bytes, Iterable[Union[str, bytes]]]) -> str:
+    """Converte HTML em texto legível (um bloco por linha, títulos separados)"""
+    lines: List[str] = []
+    for block in iter_html_blocks(source):
+        if block.kind == "heading" and lines:
+            lines.append("")
+        lines.append(block.to_text())
+    return "\n".join(lines)
+
+
+__all__ = [
+    "HtmlBlock",
+    "iter_html_blocks",
+    "aiter_html_blocks",
+    "chunk_blocks",
+    "html_to_text",
+]
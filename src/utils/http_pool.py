@@ -0,0 +1,207 @@
+"""Pool de clientes HTTP assíncronos compartilhado pelas tools e handlers
+
+Um único `httpx.AsyncClient` por event loop, com keep-alive (DNS/TCP/TLS
+reaproveitados entre chamadas), limite global e por host de conexões
+simultâneas, HTTP/2 quando o pacote `h2` está instalado, timeouts
+unificados e retry com backoff (`utils.retry.retry_with_backoff`) para
+erros de transporte e respostas 429/5xx transitórias.
+
+Cada requisição registra `http_latency_ms{host=...}` e, em falha,
+`http_errors{host=...}` no MetricsBuffer.
+
+Uso:
+    from utils.http_pool import http_pool
+
+    response = await http_pool.get("https://api.exemplo.com/x", params={"q": "nr-35"})
+    data = response.json()
+
+    async with http_pool.stream("GET", url) as response:
+        async for chunk in response.aiter_bytes():
+            ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from utils.retry import retry_with_backoff
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Conexões simultâneas no pool inteiro / por host
+MAX_CONNECTIONS = 100
+MAX_PER_HOST = 10
+# Conexões ociosas mantidas abertas (keep-alive)
+MAX_KEEPALIVE = 20
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+# Timeouts padrão (total por operação / conexão)
+TIMEOUT_SECONDS = 30.0
+CONNECT_TIMEOUT_SECONDS = 5.0
+# Tentativas para erros de transporte e status transitórios
+MAX_RETRIES = 3
+RETRY_INITIAL_DELAY = 0.5
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+USER_AGENT = "MoltBot/1.0"
+
+
+class _RetryableStatus(Exception):
+    """Resposta com status transitório (dispara nova tentativa)"""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class HttpClientPool:
+    """Cliente HTTP assíncrono compartilhado (um por event loop)"""
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_per_host: int = MAX_PER_HOST,
+        timeout: float = TIMEOUT_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_SECONDS)
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    # -- cliente ----------------------------------------------------------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            # Conexões pertencem ao loop em que foram abertas: novo loop, novo cliente
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=MAX_KEEPALIVE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT},
+                follow_redirects=True,
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._host_slots = {}
+        return self._client
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
+
+    # -- requisições ------------------------------------------------------
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: int = MAX_RETRIES,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Executa a requisição com limite por host, métricas e retry
+
+        Status transitórios (429/502/503/504) são repetidos; se persistirem,
+        a última resposta é devolvida normalmente. Erros de transporte são
+        relançados após a última tentativa.
+        """
+        client = self._get_client()
+        host = httpx.URL(url).host or "?"
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, CONNECT_TIMEOUT_SECONDS))
+
+        @retry_with_backoff(
+            max_retries=max(1, retries),
+            initial_delay=RETRY_INITIAL_DELAY,
+            exceptions=(httpx.TransportError, _RetryableStatus),
+        )
+        async def send() -> httpx.Response:
+            async with self._slot(host):
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    metrics.incr("http_errors", host=host)
+                    raise
+                finally:
+                    metrics.observe("http_latency_ms", (time.perf_counter() - start) * 1000, host=host)
+            if response.status_code in RETRY_STATUSES:
+                metrics.incr("http_errors", host=host)
+                raise _RetryableStatus(response)
+            return response
+
+        try:
+            return await send()
+        except _RetryableStatus as e:
+            logger.warning("http_status_transitorio host=%s status=%s", host, e.response.status_code)
+            return e.response
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[httpx.Response]:
+        """Resposta com o corpo lido sob demanda (`aiter_bytes`), sem retry
+
+        Para downloads de mídia: o corpo não é carregado inteiro em memória.
+        O slot do host fica ocupado até o bloco `async with` terminar.
+        """
+        client = self._get_client()
+        host = httpx.URL(url).host or "?"
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, CONNECT_TIMEOUT_SECONDS))
+        async with self._slot(host):
+            start = time.perf_counter()
+            try:
+                async with client.stream(method, url, **kwargs) as response:
+                    yield response
+            except httpx.TransportError:
+                metrics.incr("http_errors", host=host)
+                raise
+            finally:
+                metrics.observe("http_latency_ms", (time.perf_counter() - start) * 1000, host=host)
+
+    async def aclose(self) -> None:
+        """Fecha as conexões abertas (chamar no shutdown, no mesmo loop)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._host_slots = {}
+
+
+# Instância global (compartilhada por tools e handlers)
+http_pool = HttpClientPool()
+
+
+__all__ = ["HttpClientPool", "http_pool"]
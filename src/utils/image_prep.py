@@ -0,0 +1,102 @@
+"""Pré-processamento de imagens antes do envio ao modelo de visão
+
+Fotos, frames de vídeo (`-q:v 2`) e frames do YouTube eram enviados ao
+llama-4-scout como JPEG em tamanho original: o upload (base64) e a latência
+do provedor crescem com o payload, e o modelo não aproveita resolução acima
+de ~1280 px no maior lado. Aqui cada imagem é:
+
+- girada conforme a orientação EXIF e reduzida para o maior lado
+  `config.VISION_MAX_SIDE` (padrão 1280);
+- reencodada em JPEG com `config.VISION_JPEG_QUALITY` (padrão 80), sem
+  EXIF/ICC/comentários;
+- mantida como veio se o resultado ficar maior (imagem já pequena e bem
+  comprimida) ou se não puder ser lida.
+
+O trabalho roda no pool de processos (`cpu_pool`), uma tarefa por lote de
+imagens. Sem PIL, com o pool cheio ou em erro, as originais seguem.
+
+Métricas para ajuste: `vision_image_bytes{source,stage=before|after}`,
+`vision_prep_ms{source}` e `vision_latency_ms{source}` (medida por quem chama
+o modelo, com `metrics.timer`).
+
+Uso:
+    (jpeg,) = await prepare_for_vision([photo_bytes], source="photo")
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import logging
+import time
+from typing import List, Sequence, Union
+
+from config.settings import config
+from utils.cpu_pool import cpu_pool
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Maior lado padrão e qualidade do JPEG reencodado
+MAX_SIDE = 1280
+JPEG_QUALITY = 80
+
+_HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+
+def prepare_image(data: bytes, max_side: int = MAX_SIDE, quality: int = JPEG_QUALITY) -> bytes:
+    """JPEG reduzido e sem metadados; a original se não compensar ou não puder ser lida"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return data
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEG: decodifica já reduzido (escala na DCT), sem montar a imagem cheia
+            img.draft("RGB", (max_side, max_side))
+            oriented = ImageOps.exif_transpose(img)
+            rgb = oriented.convert("RGB")
+        rgb.thumbnail((max_side, max_side), Image.LANCZOS)
+        out = io.BytesIO()
+        # Sem exif=/icc_profile=: os metadados não são copiados
+        rgb.save(out, "JPEG", quality=quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.debug("vision_prep_imagem_ignorada error=%s", e)
+        return data
+    prepared = out.getvalue()
+    return prepared if len(prepared) < len(data) else data
+
+
+def prepare_images(images: Sequence[bytes], max_side: int = MAX_SIDE, quality: int = JPEG_QUALITY) -> List[bytes]:
+    """`prepare_image` em lote (uma tarefa do pool de processos)"""
+    return [prepare_image(data, max_side, quality) for data in images]
+
+
+async def prepare_for_vision(images: Sequence[Union[bytes, memoryview]], source: str) -> List[bytes]:
+    """Prepara as imagens no pool de processos; devolve as originais em falha"""
+    originals = [bytes(data) for data in images]
+    before = sum(len(data) for data in originals)
+    start = time.perf_counter()
+    prepared = originals
+    if _HAS_PIL and originals:
+        try:
+            prepared = await cpu_pool.run(
+                prepare_images,
+                originals,
+                config.VISION_MAX_SIDE,
+                config.VISION_JPEG_QUALITY,
+                name="prepare_images",
+            )
+        except Exception as e:
+            logger.warning("vision_prep_falhou source=%s error=%s", source, e)
+    after = sum(len(data) for data in prepared)
+
+    metrics.observe("vision_prep_ms", (time.perf_counter() - start) * 1000, source=source)
+    metrics.observe("vision_image_bytes", before, source=source, stage="before")
+    metrics.observe("vision_image_bytes", after, source=source, stage="after")
+    logger.info("vision_prep source=%s imagens=%d antes=%d depois=%d", source, len(prepared), before, after)
+    return prepared
+
+
+__all__ = ["JPEG_QUALITY", "MAX_SIDE", "prepare_for_vision", "prepare_image", "prepare_images"]
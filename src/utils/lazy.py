@@ -0,0 +1,74 @@
+"""Objetos construídos no primeiro uso (clientes de API e componentes pesados)
+
+Importar `groq`/`elevenlabs` e montar os clientes (httpx, contexto TLS)
+custava dezenas de ms na importação do `bot_simple`, antes mesmo de o bot
+receber a primeira mensagem. `LazyObject` guarda só a fábrica: o objeto real
+é criado (uma vez, protegido por lock) no primeiro acesso a um atributo, e
+quem importou `groq_client` continua usando `groq_client.chat...` sem mudar.
+
+`warm()` força a construção fora do caminho crítico (aquecimento em segundo
+plano depois que o bot começa a receber mensagens).
+
+Uso:
+    groq_client = LazyObject(_make_groq, name="groq")
+    groq_client.audio.transcriptions.create(...)   # constrói aqui
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_UNSET = object()
+
+
+class LazyObject(Generic[T]):
+    """Proxy que constrói o objeto com `factory()` no primeiro acesso"""
+
+    __slots__ = ("_factory", "_name", "_value", "_lock")
+
+    def __init__(self, factory: Callable[[], T], name: Optional[str] = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "lazy"))
+        object.__setattr__(self, "_value", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def warm(self) -> T:
+        """Objeto real (construído agora se ainda não foi)"""
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                value = self._value
+                if value is _UNSET:
+                    start = time.perf_counter()
+                    value = self._factory()
+                    object.__setattr__(self, "_value", value)
+                    logger.info("lazy_construido nome=%s ms=%.0f", self._name,
+                                (time.perf_counter() - start) * 1000)
+        return value
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.warm(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self.warm(), attr, value)
+
+    def __bool__(self) -> bool:
+        return bool(self.warm())
+
+    def __repr__(self) -> str:
+        state = "carregado" if self.loaded else "pendente"
+        return f"<LazyObject {self._name} {state}>"
+
+
+__all__ = ["LazyObject"]
@@ -0,0 +1,237 @@
+"""Monitor do event loop: atraso contínuo e detecção de chamadas bloqueantes
+
+Duas peças trabalham juntas:
+- uma task no próprio loop acorda a cada `interval` e mede quanto passou do
+  previsto (`event_loop_lag_ms` no MetricsBuffer);
+- uma thread watchdog confere o último batimento dessa task; se o loop ficar
+  parado mais que `threshold_ms`, captura a pilha da thread do loop
+  (`sys._current_frames`) e atribui o bloqueio ao trecho do projeto que está
+  executando (ex.: `handlers/photo.py:42 handle_photo`).
+
+Os locais culpados viram o contador `event_loop_blocked{site=...}` e um
+relatório (`report` / `format_report`) ordenado pelo tempo total bloqueado.
+
+Uso:
+    from utils.loop_monitor import loop_monitor
+
+    loop_monitor.start(threshold_ms=100)   # com o loop rodando
+    ...
+    print(loop_monitor.format_report())
+    await loop_monitor.stop()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Raiz dos módulos do projeto (src/): frames fora dela são bibliotecas
+SRC_ROOT = Path(__file__).resolve().parent.parent
+
+# Intervalo do batimento no loop
+INTERVAL_SECONDS = 0.05
+# Parada mínima do loop para ser considerada bloqueio
+THRESHOLD_MS = 100.0
+# Locais distintos mantidos no relatório
+MAX_SITES = 200
+# Frames guardados na pilha de exemplo de cada local
+STACK_DEPTH = 12
+
+
+@dataclass
+class BlockingSite:
+    """Um trecho de código flagrado bloqueando o loop"""
+
+    site: str
+    leaf: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "leaf": self.leaf,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "stack": self.stack,
+        }
+
+
+def _describe(frame: traceback.FrameSummary) -> str:
+    path = Path(frame.filename)
+    try:
+        path = path.resolve().relative_to(SRC_ROOT)
+    except ValueError:
+        path = Path(path.name)
+    return f"{path}:{frame.lineno} {frame.name}"
+
+
+def _in_project(frame: traceback.FrameSummary) -> bool:
+    try:
+        Path(frame.filename).resolve().relative_to(SRC_ROOT)
+    except ValueError:
+        return False
+    return not frame.filename.endswith("loop_monitor.py")
+
+
+class LoopMonitor:
+    """Mede o atraso do event loop e amostra a pilha quando ele bloqueia"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites: Dict[str, BlockingSite] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = 0.0
+        # Local capturado pelo watchdog no bloqueio em andamento
+        self._episode_beat = 0.0
+        self._episode_site: Optional[str] = None
+        self.interval = INTERVAL_SECONDS
+        self.threshold_ms = THRESHOLD_MS
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, threshold_ms: float = THRESHOLD_MS, interval: float = INTERVAL_SECONDS) -> None:
+        """Inicia batimento e watchdog (chamar com o event loop rodando)"""
+        if self.running:
+            return
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._beat_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("loop_monitor_iniciado threshold_ms=%.0f interval_ms=%.0f",
+                    threshold_ms, interval * 1000)
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    # -- batimento (no loop) ----------------------------------------------
+
+    async def _beat_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, loop.time() - expected) * 1000
+            self._last_beat = time.monotonic()
+            metrics.observe("event_loop_lag_ms", lag_ms)
+            if lag_ms >= self.threshold_ms:
+                self._close_episode(lag_ms)
+
+    def _close_episode(self, lag_ms: float) -> None:
+        """Atribui a duração medida do bloqueio ao local capturado pelo watchdog"""
+        with self._lock:
+            name = self._episode_site
+            self._episode_site = None
+            site = self._sites.get(name) if name else None
+            if site is not None:
+                site.total_ms += lag_ms
+                site.max_ms = max(site.max_ms, lag_ms)
+        if name:
+            logger.warning("event_loop_bloqueado site=%s ms=%.0f", name, lag_ms)
+        else:
+            logger.warning("event_loop_atrasado ms=%.0f", lag_ms)
+
+    # -- watchdog (thread) ------------------------------------------------
+
+    def _watch(self) -> None:
+        check = min(self.interval, self.threshold_ms / 1000 / 2)
+        while not self._stop.wait(check):
+            beat = self._last_beat
+            stalled_ms = (time.monotonic() - beat) * 1000
+            if stalled_ms < self.threshold_ms + self.interval * 1000:
+                continue
+            if self._episode_beat == beat:
+                continue  # bloqueio já amostrado
+            self._episode_beat = beat
+            self._sample()
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        if not stack:
+            return
+        project = [f for f in stack if _in_project(f)]
+        name = _describe(project[-1]) if project else _describe(stack[-1])
+        leaf = _describe(stack[-1])
+        with self._lock:
+            site = self._sites.get(name)
+            if site is None:
+                if len(self._sites) >= MAX_SITES:
+                    return
+                site = self._sites[name] = BlockingSite(
+                    site=name, leaf=leaf, stack=[_describe(f) for f in stack[-STACK_DEPTH:]]
+                )
+            site.count += 1
+            self._episode_site = name
+        metrics.incr("event_loop_blocked", site=name)
+
+    # -- relatório --------------------------------------------------------
+
+    def report(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Locais que mais bloquearam o loop (por tempo total)"""
+        with self._lock:
+            sites = sorted(self._sites.values(), key=lambda s: (s.total_ms, s.count), reverse=True)
+            return [s.to_dict() for s in sites[:limit]]
+
+    def format_report(self, limit: int = 5) -> str:
+        lag = metrics.percentiles("event_loop_lag_ms")
+        lines = []
+        if lag:
+            lines.append(
+                f"Atraso do loop: p50 {lag['p50']:.0f}ms, p99 {lag['p99']:.0f}ms"
+            )
+        for row in self.report(limit):
+            lines.append(
+                f"• {row['site']}: {row['count']}x, total {row['total_ms']:.0f}ms, "
+                f"máx {row['max_ms']:.0f}ms ({row['leaf']})"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+            self._episode_site = None
+
+
+# Instância global (um event loop por processo)
+loop_monitor = LoopMonitor()
+
+
+__all__ = ["LoopMonitor", "BlockingSite", "loop_monitor"]
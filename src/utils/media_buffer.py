@@ -0,0 +1,282 @@
+"""Download de mídia do Telegram para buffers em memória reaproveitáveis
+
+Os handlers de foto, voz e áudio recebiam o arquivo inteiro como `bytes`
+(`response.content` / `download_to_drive`) e faziam mais cópias em seguida
+(base64, reabertura do arquivo para o Whisper). Aqui o corpo é lido em
+streaming (`http_pool.stream`) direto para um `bytearray` do `BufferPool`, e
+os consumidores recebem `memoryview`s desse buffer:
+
+- `base64.b64encode`, `hashlib` e PIL aceitam o `memoryview` sem copiar;
+- `MemoryReader` expõe o buffer como arquivo: o multipart do Groq/httpx lê
+  em blocos, sem montar outro `bytes` com o arquivo inteiro;
+- arquivos acima de `config.MEDIA_MEMORY_MAX_MB` (pelo `file_size` ou por
+  crescerem além disso durante o download) vão para `config.TEMP_DIR`.
+
+Os buffers voltam para o pool ao sair do `async with` e são reaproveitados
+pelas próximas mensagens, sem realocar a cada foto.
+
+Métricas: `media_download_ms{kind,where}`, `media_bytes{kind}` e
+`media_buffer_bytes` (memória ocupada pelos buffers em uso, por download).
+
+Uso:
+    telegram_file = await update.message.voice.get_file()
+    async with download_media(telegram_file, kind="voice", suffix=".ogg") as media:
+        text = groq_client.audio.transcriptions.create(file=media.upload("voice.ogg"), ...)
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, List, Optional, Tuple
+
+from config.settings import config
+from utils.http_pool import http_pool
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Buffers livres mantidos no pool
+MAX_BUFFERS = 4
+# Capacidade inicial quando o tamanho do arquivo é desconhecido
+INITIAL_CAPACITY = 256 * 1024
+# Timeout do download (segundos)
+DOWNLOAD_TIMEOUT_SECONDS = 60.0
+
+
+class MemoryReader(io.RawIOBase):
+    """Arquivo somente leitura sobre um memoryview (sem copiar o conteúdo)"""
+
+    def __init__(self, data: memoryview, name: str = "upload"):
+        super().__init__()
+        self._data = data
+        self._pos = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), len(self._data) - self._pos)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._data[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._data)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+class BufferPool:
+    """bytearrays reaproveitados entre downloads (capacidade = len do buffer)"""
+
+    def __init__(self, max_buffers: int = MAX_BUFFERS, max_buffer_bytes: Optional[int] = None):
+        self.max_buffers = max_buffers
+        self._max_buffer_bytes = max_buffer_bytes
+        self._free: List[bytearray] = []
+        self.in_use = 0
+        self.peak = 0
+        self.reused = 0
+        self.allocated = 0
+
+    @property
+    def max_buffer_bytes(self) -> int:
+        return self._max_buffer_bytes or config.MEDIA_MEMORY_MAX_MB * 1024 * 1024
+
+    def _track(self, delta: int) -> None:
+        self.in_use += delta
+        self.peak = max(self.peak, self.in_use)
+
+    def acquire(self, size: int = 0) -> bytearray:
+        """Buffer livre com pelo menos `size` bytes (o menor que servir) ou um novo
+
+        `size=0` (tamanho desconhecido): o maior buffer livre, que cresce
+        durante o download se precisar.
+        """
+        if size <= 0:
+            fits = self._free
+            pick = max
+        else:
+            fits = [buf for buf in self._free if len(buf) >= size]
+            pick = min
+        if fits:
+            buf = pick(fits, key=len)
+            self._free.remove(buf)
+            self.reused += 1
+        else:
+            buf = bytearray(size if size > 0 else INITIAL_CAPACITY)
+            self.allocated += 1
+        self._track(len(buf))
+        return buf
+
+    def grow(self, buf: bytearray, size: int) -> bytearray:
+        """Aumenta a capacidade para `size` (novo buffer se o atual estiver exportado)"""
+        extra = size - len(buf)
+        if extra <= 0:
+            return buf
+        try:
+            buf.extend(bytes(extra))
+        except BufferError:
+            # Um memoryview antigo ainda segura o buffer: copia para um novo
+            grown = bytearray(size)
+            grown[:len(buf)] = buf
+            self._track(-len(buf))
+            self._track(size)
+            return grown
+        self._track(extra)
+        return buf
+
+    def release(self, buf: bytearray) -> None:
+        self._track(-len(buf))
+        if len(buf) <= self.max_buffer_bytes and len(self._free) < self.max_buffers:
+            self._free.append(buf)
+
+    def stats(self) -> dict:
+        return {
+            "free": len(self._free),
+            "in_use_bytes": self.in_use,
+            "peak_bytes": self.peak,
+            "reused": self.reused,
+            "allocated": self.allocated,
+        }
+
+
+@dataclass
+class DownloadedMedia:
+    """Arquivo baixado: em memória (`data`) ou em disco (`path`)"""
+
+    size: int
+    data: Optional[memoryview] = None
+    path: Optional[Path] = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def open(self, name: str = "upload") -> BinaryIO:
+        if self.data is not None:
+            return MemoryReader(self.data, name)
+        return open(self.path, "rb")
+
+    def upload(self, filename: str) -> Tuple[str, BinaryIO]:
+        """Tupla (nome, arquivo) aceita pelos clientes Groq/httpx em `file=`"""
+        return (filename, self.open(filename))
+
+    def view(self) -> memoryview:
+        """Conteúdo como memoryview (lê o arquivo se o download foi para disco)"""
+        if self.data is not None:
+            return self.data
+        return memoryview(self.path.read_bytes())
+
+
+# Instância global (compartilhada pelos handlers de mídia)
+buffer_pool = BufferPool()
+
+
+@asynccontextmanager
+async def download_media(
+    source: Any,
+    *,
+    kind: str,
+    suffix: str = "",
+    memory_limit: Optional[int] = None,
+    pool: Optional[BufferPool] = None,
+) -> AsyncIterator[DownloadedMedia]:
+    """Baixa um `telegram.File` (ou objeto com `file_path`/`file_size`)
+
+    O conteúdo só é válido dentro do bloco: ao sair, o buffer volta para o
+    pool e o arquivo temporário (se houver) é apagado.
+    """
+    pool = pool or buffer_pool
+    limit = memory_limit if memory_limit is not None else config.MEDIA_MEMORY_MAX_MB * 1024 * 1024
+    url = getattr(source, "file_path", None)
+    if not url:
+        raise RuntimeError("Arquivo sem file_path: não é possível baixar")
+    if not url.startswith(("http://", "https://")):
+        # Bot API local: o arquivo já está no disco
+        path = Path(url)
+        yield DownloadedMedia(size=path.stat().st_size, path=path)
+        return
+
+    start = time.perf_counter()
+    buf: Optional[bytearray] = None
+    spill: Optional[BinaryIO] = None
+    tmp_path: Optional[Path] = None
+    view: Optional[memoryview] = None
+    size = 0
+    try:
+        async with http_pool.stream("GET", url, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+            response.raise_for_status()
+            expected = getattr(source, "file_size", None) or int(response.headers.get("content-length", 0))
+
+            def to_disk() -> BinaryIO:
+                nonlocal tmp_path
+                config.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+                fd, name = tempfile.mkstemp(dir=config.TEMP_DIR, prefix=f"moltbot_{kind}_", suffix=suffix)
+                tmp_path = Path(name)
+                return os.fdopen(fd, "wb")
+
+            if expected > limit:
+                spill = to_disk()
+            else:
+                buf = pool.acquire(expected)
+
+            async for chunk in response.aiter_bytes():
+                end = size + len(chunk)
+                if buf is not None and end > limit:
+                    # Maior que o anunciado: o restante vai para disco
+                    spill = to_disk()
+                    with memoryview(buf) as written:
+                        spill.write(written[:size])
+                    pool.release(buf)
+                    buf = None
+                if buf is not None:
+                    if end > len(buf):
+                        buf = pool.grow(buf, min(limit, max(end, 2 * len(buf))))
+                    buf[size:end] = chunk
+                else:
+                    spill.write(chunk)
+                size = end
+        if spill is not None:
+            spill.close()
+            spill = None
+
+        where = "memory" if buf is not None else "disk"
+        metrics.observe("media_download_ms", (time.perf_counter() - start) * 1000, kind=kind, where=where)
+        metrics.observe("media_bytes", size, kind=kind)
+        metrics.observe("media_buffer_bytes", pool.in_use)
+        logger.info("media_baixada kind=%s bytes=%d destino=%s", kind, size, where)
+
+        if buf is not None:
+            view = memoryview(buf)[:size]
+        yield DownloadedMedia(size=size, data=view, path=tmp_path)
+    finally:
+        if view is not None:
+            try:
+                view.release()
+            except BufferError:
+                pass  # consumidor ainda segura o conteúdo; `grow` copia se preciso
+        if spill is not None:
+            spill.close()
+        if buf is not None:
+            pool.release(buf)
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+
+
+__all__ = ["BufferPool", "DownloadedMedia", "MemoryReader", "buffer_pool", "download_media"]
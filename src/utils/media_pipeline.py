@@ -0,0 +1,348 @@
+"""Extração de frame e áudio de vídeos em uma única passada do ffmpeg
+
+Antes eram duas execuções do ffmpeg sobre o mesmo arquivo (uma para o
+primeiro frame, outra reencodando a trilha inteira em mp3). Agora:
+- `probe` lê só os cabeçalhos (ffprobe) para saber se há vídeo/áudio e o
+  codec do áudio;
+- `demux_video` roda o ffmpeg uma vez: o primeiro keyframe sai em JPEG pelo
+  stdout (pipe:1, sem arquivo temporário) e o áudio é copiado sem reencode
+  para um contêiner que o Whisper aceita (aac→m4a, mp3, opus/vorbis→ogg,
+  flac). Codecs fora dessa lista viram WAV 16 kHz mono (decodificação
+  simples, sem encoder com perdas);
+- `extract_keyframes` amostra frames por mudança de cena: decodifica só os
+  keyframes, seleciona os que diferem do anterior (`select=gt(scene,x)`),
+  garante ao menos um frame a cada `max_gap` segundos de cena parada e
+  devolve os JPEGs (com o instante de cada um) lidos do stdout;
+- `split_on_silence` corta uma trilha de áudio em trechos de ~2 minutos nos
+  silêncios mais próximos (`silencedetect`), com cópia de stream (segment
+  muxer, sem reencode), para transcrição em paralelo.
+
+Uso:
+    with secure_files.temp_directory() as work_dir:
+        media = await demux_video(video_path, work_dir)
+        media.frame        # bytes JPEG ou None
+        media.audio_path   # Path do áudio ou None
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from security.executor import SafeSubprocessExecutor
+
+logger = logging.getLogger(__name__)
+
+# Codecs de áudio copiados sem reencode -> extensão aceita pelo Whisper
+WHISPER_PASSTHROUGH = {
+    "aac": ".m4a",
+    "mp3": ".mp3",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "flac": ".flac",
+}
+# Timeout do ffmpeg/ffprobe (segundos)
+DEMUX_TIMEOUT_SECONDS = 60
+PROBE_TIMEOUT_SECONDS = 15
+KEYFRAMES_TIMEOUT_SECONDS = 120
+# Seleção de frames por cena: diferença mínima entre keyframes (0-1) e
+# intervalo máximo sem frame (segundos) em trechos sem cortes
+SCENE_THRESHOLD = 0.3
+SCENE_MAX_GAP_SECONDS = 30.0
+# Frames devolvidos no máximo (distribuídos pelo vídeo) e largura em pixels
+MAX_KEYFRAMES = 30
+KEYFRAME_WIDTH = 512
+
+# Corte de áudio: duração alvo dos trechos (s), ruído máximo e duração
+# mínima (s) considerados silêncio
+CHUNK_TARGET_SECONDS = 120.0
+SILENCE_NOISE_DB = -30
+SILENCE_MIN_SECONDS = 0.5
+
+_JPEG_START = b"\xff\xd8"
+_JPEG_END = b"\xff\xd9"
+_PTS_TIME = re.compile(r"pts_time:\s*([0-9.]+)")
+_SILENCE = re.compile(r"silence_(start|end):\s*(-?[0-9.]+)")
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):([0-9.]+)")
+
+
+@dataclass
+class MediaStreams:
+    """Streams presentes no arquivo (via ffprobe)"""
+
+    has_video: bool = False
+    audio_codec: Optional[str] = None
+
+
+@dataclass
+class Keyframe:
+    """Frame selecionado: instante no vídeo (segundos) e JPEG"""
+
+    timestamp: float
+    jpeg: bytes
+
+
+@dataclass
+class DemuxedMedia:
+    """Resultado da passada única: frame JPEG em memória e áudio em disco"""
+
+    frame: Optional[bytes] = None
+    audio_path: Optional[Path] = None
+
+
+def parse_probe(output: str) -> MediaStreams:
+    """Interpreta a saída JSON do ffprobe (`-show_entries stream=...`)"""
+    streams = MediaStreams()
+    try:
+        entries = json.loads(output or "{}").get("streams", [])
+    except json.JSONDecodeError:
+        return streams
+    for entry in entries:
+        kind = entry.get("codec_type")
+        if kind == "video" and entry.get("disposition", {}).get("attached_pic") != 1:
+            streams.has_video = True
+        elif kind == "audio" and streams.audio_codec is None:
+            streams.audio_codec = entry.get("codec_name") or "unknown"
+    return streams
+
+
+async def probe(video_path: Path) -> MediaStreams:
+    success, out, err = await SafeSubprocessExecutor.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "stream=codec_type,codec_name:stream_disposition=attached_pic",
+            "-of", "json", str(video_path),
+        ],
+        timeout=PROBE_TIMEOUT_SECONDS,
+    )
+    if not success:
+        logger.warning("ffprobe_falhou error=%s", err[:200])
+        return MediaStreams()
+    return parse_probe(out)
+
+
+def audio_output(audio_codec: str, work_dir: Path) -> Tuple[Path, List[str]]:
+    """(caminho, argumentos de codec) do áudio para o Whisper"""
+    extension = WHISPER_PASSTHROUGH.get(audio_codec)
+    if extension:
+        return work_dir / f"audio{extension}", ["-c:a", "copy"]
+    return work_dir / "audio.wav", ["-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le"]
+
+
+def build_demux_command(
+    video_path: Path, streams: MediaStreams, audio_path: Optional[Path], audio_args: List[str]
+) -> List[str]:
+    """Comando ffmpeg com as duas saídas (frame no stdout, áudio em arquivo)"""
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    if streams.has_video:
+        # Decodifica só keyframes: o primeiro basta e evita decodificar o resto
+        cmd += ["-skip_frame", "nokey"]
+    cmd += ["-i", str(video_path)]
+    if streams.has_video:
+        cmd += ["-map", "0:v:0", "-frames:v", "1", "-q:v", "2", "-c:v", "mjpeg", "-f", "image2pipe", "pipe:1"]
+    if audio_path is not None:
+        cmd += ["-map", "0:a:0", "-vn", *audio_args, str(audio_path)]
+    return cmd
+
+
+async def demux_video(
+    video_path: Path, work_dir: Path, timeout: int = DEMUX_TIMEOUT_SECONDS
+) -> DemuxedMedia:
+    """Extrai o primeiro frame e a trilha de áudio em uma única execução do ffmpeg"""
+    streams = await probe(video_path)
+    if not streams.has_video and streams.audio_codec is None:
+        raise RuntimeError("Arquivo sem streams de vídeo ou áudio")
+
+    audio_path: Optional[Path] = None
+    audio_args: List[str] = []
+    if streams.audio_codec is not None:
+        audio_path, audio_args = audio_output(streams.audio_codec, Path(work_dir))
+
+    cmd = build_demux_command(video_path, streams, audio_path, audio_args)
+    success, frame, err = await SafeSubprocessExecutor.run_bytes(cmd, timeout=timeout)
+    if not success:
+        logger.warning("ffmpeg_demux_falhou error=%s", err[:200])
+        raise RuntimeError("Falha ao extrair frame/áudio do vídeo")
+
+    has_audio = audio_path is not None and audio_path.exists() and audio_path.stat().st_size > 1000
+    return DemuxedMedia(frame=frame or None, audio_path=audio_path if has_audio else None)
+
+
+
+def split_jpeg_stream(data: bytes) -> List[bytes]:
+    """Separa a sequência de JPEGs do image2pipe (marcadores SOI/EOI)"""
+    frames = []
+    start = data.find(_JPEG_START)
+    while start != -1:
+        # EOI seguido do SOI do próximo frame (ou fim do fluxo)
+        end = data.find(_JPEG_END + _JPEG_START, start + 2)
+        if end == -1:
+            frame = data[start:]
+            if frame.endswith(_JPEG_END):
+                frames.append(frame)
+            break
+        frames.append(data[start : end + 2])
+        start = end + 2
+    return frames
+
+
+def parse_frame_times(stderr: str) -> List[float]:
+    """Instantes (pts_time) dos frames emitidos, a partir do filtro showinfo"""
+    return [float(m.group(1)) for m in _PTS_TIME.finditer(stderr or "")]
+
+
+def build_keyframe_command(
+    video_path: Path,
+    threshold: float = SCENE_THRESHOLD,
+    max_gap: float = SCENE_MAX_GAP_SECONDS,
+    width: int = KEYFRAME_WIDTH,
+) -> List[str]:
+    """ffmpeg que decodifica só keyframes e emite os de mudança de cena"""
+    select = f"isnan(prev_selected_t)+gt(scene,{threshold})+gte(t-prev_selected_t,{max_gap})"
+    return [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "info",
+        "-skip_frame", "nokey", "-i", str(video_path), "-an",
+        "-vf", f"scale={width}:-2,select='{select}',showinfo",
+        "-vsync", "vfr", "-q:v", "5", "-c:v", "mjpeg", "-f", "image2pipe", "pipe:1",
+    ]
+
+
+def spread(items: list, limit: int) -> list:
+    """Até `limit` itens distribuídos uniformemente (mantém primeiro e último)"""
+    if len(items) <= limit:
+        return list(items)
+    if limit <= 1:
+        return items[:limit]
+    step = (len(items) - 1) / (limit - 1)
+    return [items[round(i * step)] for i in range(limit)]
+
+
+async def extract_keyframes(
+    video_path: Path,
+    threshold: float = SCENE_THRESHOLD,
+    max_frames: int = MAX_KEYFRAMES,
+    max_gap: float = SCENE_MAX_GAP_SECONDS,
+    timeout: int = KEYFRAMES_TIMEOUT_SECONDS,
+) -> List[Keyframe]:
+    """Frames de mudança de cena, lidos do stdout do ffmpeg (sem arquivos)"""
+    cmd = build_keyframe_command(video_path, threshold, max_gap)
+    success, data, err = await SafeSubprocessExecutor.run_bytes(cmd, timeout=timeout)
+    if not success:
+        logger.warning("ffmpeg_keyframes_falhou error=%s", err[-200:])
+        return []
+    jpegs = split_jpeg_stream(data)
+    times = parse_frame_times(err)
+    if len(times) != len(jpegs):
+        times = [float(i) for i in range(len(jpegs))]
+    frames = []
+    for timestamp, jpeg in zip(times, jpegs):
+        # Keyframes idênticos (tela estática reencodada) não acrescentam nada
+        if frames and frames[-1].jpeg == jpeg:
+            continue
+        frames.append(Keyframe(timestamp, jpeg))
+    logger.info("keyframes_extraidos total=%d usados=%d", len(frames), min(len(frames), max_frames))
+    return spread(frames, max_frames)
+
+
+
+def parse_silences(stderr: str) -> List[Tuple[float, float]]:
+    """Intervalos (início, fim) de silêncio relatados pelo filtro silencedetect"""
+    silences = []
+    start: Optional[float] = None
+    for kind, value in _SILENCE.findall(stderr or ""):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+def parse_duration(stderr: str) -> Optional[float]:
+    match = _DURATION.search(stderr or "")
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def plan_cuts(
+    silences: List[Tuple[float, float]], duration: float, target: float = CHUNK_TARGET_SECONDS
+) -> List[float]:
+    """Pontos de corte perto de cada `target` segundos, no meio de um silêncio
+
+    Sem silêncio entre 0,5× e 1,5× do alvo, corta no próprio alvo. O último
+    trecho pode ter até 1,5× o alvo (evita um resto minúsculo).
+    """
+    pauses = [(start + end) / 2 for start, end in silences]
+    cuts: List[float] = []
+    last = 0.0
+    while duration - last > target * 1.5:
+        wanted = last + target
+        window = [p for p in pauses if last + target * 0.5 <= p <= last + target * 1.5]
+        cut = min(window, key=lambda p: abs(p - wanted)) if window else wanted
+        cuts.append(round(cut, 3))
+        last = cut
+    return cuts
+
+
+async def split_on_silence(
+    audio_path: Path, out_dir: Path, target: float = CHUNK_TARGET_SECONDS
+) -> List[Path]:
+    """Corta o áudio nos silêncios em trechos de ~`target` segundos (sem reencode)"""
+    success, _, err = await SafeSubprocessExecutor.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "info", "-i", str(audio_path),
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+            "-vn", "-f", "null", "-",
+        ],
+        timeout=KEYFRAMES_TIMEOUT_SECONDS,
+    )
+    duration = parse_duration(err) if success else None
+    if duration is None:
+        logger.warning("silencedetect_falhou error=%s", err[-200:])
+        return [audio_path]
+    cuts = plan_cuts(parse_silences(err), duration, target)
+    if not cuts:
+        return [audio_path]
+
+    pattern = Path(out_dir) / f"chunk_%03d{audio_path.suffix}"
+    success, _, err = await SafeSubprocessExecutor.run(
+        [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", str(audio_path),
+            "-vn", "-c", "copy", "-f", "segment", "-reset_timestamps", "1",
+            "-segment_times", ",".join(f"{c:.3f}" for c in cuts), str(pattern),
+        ],
+        timeout=KEYFRAMES_TIMEOUT_SECONDS,
+    )
+    chunks = sorted(Path(out_dir).glob(f"chunk_*{audio_path.suffix}"))
+    if not success or not chunks:
+        logger.warning("corte_audio_falhou error=%s", err[-200:])
+        return [audio_path]
+    logger.info("audio_cortado duracao_s=%.0f trechos=%d", duration, len(chunks))
+    return chunks
+
+
+__all__ = [
+    "DemuxedMedia",
+    "Keyframe",
+    "MediaStreams",
+    "WHISPER_PASSTHROUGH",
+    "build_demux_command",
+    "build_keyframe_command",
+    "demux_video",
+    "extract_keyframes",
+    "parse_duration",
+    "parse_frame_times",
+    "parse_probe",
+    "parse_silences",
+    "plan_cuts",
+    "probe",
+    "split_jpeg_stream",
+    "split_on_silence",
+    "spread",
+]
@@ -0,0 +1,341 @@
+"""Perfil de planilhas (CSV/XLSX) em uma única passada e memória constante
+
+Lê CSV em blocos (`pandas.read_csv(chunksize=...)`) e XLSX linha a linha no
+modo somente-leitura do openpyxl, sem carregar o arquivo inteiro. Para cada
+coluna mantém estatísticas incrementais:
+- contagem, nulos, média e desvio padrão (combinação de momentos por bloco);
+- mínimo/máximo;
+- quantis aproximados a partir de uma amostra uniforme de tamanho fixo
+  (bottom-k por chave aleatória);
+- valores mais frequentes (Misra-Gries) e distintos exatos até um limite.
+
+Linhas e colunas totalmente vazias são ignoradas; estatísticas numéricas
+consideram só valores preenchidos (nulos são contados à parte). O resultado
+é um dict simples (picklável) para rodar em processo separado e ser
+formatado no processo do bot com `format_profile`.
+
+Uso:
+    profile = profile_table("/tmp/vendas.csv")
+    print(format_profile(profile, "vendas.csv"))
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Linhas por bloco lido
+CHUNK_ROWS = 50_000
+# Tamanho da amostra usada nos quantis
+SAMPLE_SIZE = 4096
+# Contadores mantidos no top-k (Misra-Gries) e valores reportados
+TOP_K_CAPACITY = 64
+TOP_K = 5
+# Distintos contados exatamente até este limite
+DISTINCT_LIMIT = 1000
+# Linhas guardadas para a amostra exibida
+PREVIEW_ROWS = 8
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _looks_textual(values: pd.Series, probe: int = 64) -> bool:
+    """Amostra do início do bloco tem valor não numérico?"""
+    head = values.iloc[:probe]
+    return bool(pd.to_numeric(head, errors="coerce").isna().any())
+
+
+class _ColumnStats:
+    """Estatísticas incrementais de uma coluna"""
+
+    def __init__(self, name: str, rng: np.random.Generator):
+        self.name = name
+        self._rng = rng
+        self.non_null = 0
+        self.nulls = 0
+        self.text_values = 0
+        self.dates = 0
+        self.date_min = None
+        self.date_max = None
+        # Momentos dos valores numéricos
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sample = np.empty(0)
+        self._sample_keys = np.empty(0)
+        # Frequências
+        self._top: Dict[str, int] = {}
+        self._distinct: Optional[set] = set()
+
+    # -- atualização por bloco --------------------------------------------
+
+    def update(self, series: pd.Series) -> None:
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+        self.non_null += len(values)
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            self.dates += len(values)
+            low, high = values.min(), values.max()
+            self.date_min = low if self.date_min is None else min(self.date_min, low)
+            self.date_max = high if self.date_max is None else max(self.date_max, high)
+            return
+
+        if pd.api.types.is_bool_dtype(values):
+            numeric = None
+        elif pd.api.types.is_numeric_dtype(values):
+            numeric = values
+        elif self.text_values or _looks_textual(values):
+            # Coluna já é de texto: converter o bloco inteiro seria custo perdido
+            numeric = None
+        else:
+            # object/str com números (ex.: colunas mistas entre blocos)
+            numeric = pd.to_numeric(values, errors="coerce").dropna()
+
+        if numeric is None:
+            self.text_values += len(values)
+        else:
+            self.text_values += len(values) - len(numeric)
+            if not numeric.empty:
+                self._update_numeric(numeric.to_numpy(dtype=float))
+        # Frequências só interessam a colunas de texto (as numéricas têm quantis)
+        if self.text_values:
+            self._update_counts(values)
+
+    def _update_numeric(self, array: np.ndarray) -> None:
+        array = array[np.isfinite(array)]
+        if not array.size:
+            return
+        # Combinação de (n, média, M2) de dois grupos (Chan et al.)
+        n_b = array.size
+        mean_b = float(array.mean())
+        m2_b = float(((array - mean_b) ** 2).sum())
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.n * n_b / n
+        self.n = n
+        self.min = min(self.min, float(array.min()))
+        self.max = max(self.max, float(array.max()))
+
+        # Amostra uniforme: mantém os SAMPLE_SIZE valores com as menores chaves
+        keys = self._rng.random(array.size)
+        values = np.concatenate([self._sample, array])
+        keys = np.concatenate([self._sample_keys, keys])
+        if values.size > SAMPLE_SIZE:
+            keep = np.argpartition(keys, SAMPLE_SIZE)[:SAMPLE_SIZE]
+            values, keys = values[keep], keys[keep]
+        self._sample, self._sample_keys = values, keys
+
+    def _update_counts(self, values: pd.Series) -> None:
+        counts = values.value_counts()
+        if self._distinct is not None:
+            self._distinct.update(counts.index)
+            if len(self._distinct) > DISTINCT_LIMIT:
+                self._distinct = None
+        # Misra-Gries: resumo do bloco (os maiores, descontado o excedente)
+        # combinado com o acumulado e reduzido de novo à capacidade
+        if len(counts) > TOP_K_CAPACITY:
+            counts = counts.iloc[:TOP_K_CAPACITY] - counts.iloc[TOP_K_CAPACITY]
+        top = self._top
+        for value, count in counts.items():
+            if count > 0:
+                top[value] = top.get(value, 0) + int(count)
+        if len(top) > TOP_K_CAPACITY:
+            threshold = sorted(top.values(), reverse=True)[TOP_K_CAPACITY]
+            self._top = {v: c - threshold for v, c in top.items() if c > threshold}
+
+    # -- resultado --------------------------------------------------------
+
+    @property
+    def kind(self) -> str:
+        if self.dates and self.dates == self.non_null:
+            return "date"
+        if self.n and self.text_values == 0:
+            return "numeric"
+        return "text"
+
+    def result(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "name": self.name,
+            "kind": self.kind,
+            "count": self.non_null,
+            "nulls": self.nulls,
+        }
+        if self.kind != "numeric":
+            result["distinct"] = len(self._distinct) if self._distinct is not None else None
+        if self.kind == "numeric":
+            std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+            sample = np.sort(self._sample)
+            result.update(
+                mean=self.mean,
+                std=std,
+                min=self.min,
+                max=self.max,
+                quantiles={q: float(np.quantile(sample, q)) for q in QUANTILES},
+            )
+        elif self.kind == "date":
+            result.update(min=str(self.date_min), max=str(self.date_max))
+        top = sorted(self._top.items(), key=lambda item: item[1], reverse=True)[:TOP_K]
+        result["top"] = [(str(value), count) for value, count in top]
+        return result
+
+
+# -- leitura em blocos ----------------------------------------------------
+
+
+def _csv_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # Planilhas exportadas em pt-BR costumam usar ';' como separador
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline()
+    sep = ";" if header.count(";") > header.count(",") else ","
+    yield from pd.read_csv(path, sep=sep, chunksize=chunk_rows, encoding_errors="replace")
+
+
+def _xlsx_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)
+        ]
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row[: len(columns)])
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _xls_chunks(path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # Formato binário antigo: sem leitura incremental, processa em fatias
+    frame = pd.read_excel(path)
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start : start + chunk_rows]
+
+
+def iter_chunks(path: Path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return _csv_chunks(Path(path), chunk_rows)
+    if suffix in (".xlsx", ".xlsm"):
+        return _xlsx_chunks(Path(path), chunk_rows)
+    if suffix == ".xls":
+        return _xls_chunks(Path(path), chunk_rows)
+    raise ValueError(f"Formato não suportado: {suffix}")
+
+
+def profile_table(path: str, chunk_rows: int = CHUNK_ROWS, seed: int = 0) -> Dict[str, Any]:
+    """Perfil completo de uma planilha em uma passada"""
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, _ColumnStats] = {}
+    rows = 0
+    preview: List[Dict[str, Any]] = []
+
+    for chunk in iter_chunks(Path(path), chunk_rows):
+        chunk = chunk.dropna(axis=0, how="all")
+        if chunk.empty:
+            continue
+        rows += len(chunk)
+        for name in chunk.columns:
+            stats = columns.get(str(name))
+            if stats is None:
+                stats = columns[str(name)] = _ColumnStats(str(name), rng)
+            stats.update(chunk[name])
+        if len(preview) < PREVIEW_ROWS:
+            head = chunk.head(PREVIEW_ROWS - len(preview))
+            preview.extend(head.astype(object).where(head.notna(), None).to_dict("records"))
+
+    results = [stats.result() for stats in columns.values() if stats.non_null]
+    kept = {r["name"] for r in results}
+    return {
+        "rows": rows,
+        "columns": results,
+        "preview": [{k: v for k, v in row.items() if str(k) in kept} for row in preview],
+    }
+
+
+# -- formatação -----------------------------------------------------------
+
+
+def _fmt(value: Any) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value).replace("|", "/").replace("\n", " ")[:40]
+
+
+def _markdown_table(headers: List[str], rows: List[List[Any]]) -> str:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join(_fmt(v) for v in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def format_profile(profile: Dict[str, Any], file_name: str, title: str = "PLANILHA") -> str:
+    """Resumo textual do perfil (entrada do prompt de análise)"""
+    columns = profile["columns"]
+    by_kind = {kind: [c["name"] for c in columns if c["kind"] == kind] for kind in ("numeric", "text", "date")}
+    names = [c["name"] for c in columns]
+
+    text = f"""📊 ANÁLISE DE {title}
+
+📁 Arquivo: {file_name}
+📐 Dimensões: {profile["rows"]} linhas × {len(columns)} colunas
+
+📋 ESTRUTURA:
+• Colunas numéricas: {", ".join(by_kind["numeric"]) or "Nenhuma"}
+• Colunas de texto: {", ".join(by_kind["text"]) or "Nenhuma"}
+• Colunas de data: {", ".join(by_kind["date"]) or "Nenhuma"}
+
+📊 AMOSTRA DOS DADOS (primeiras {len(profile["preview"])} linhas):
+{_markdown_table(names, [[row.get(n) for n in names] for row in profile["preview"]])}
+"""
+
+    numeric = [c for c in columns if c["kind"] == "numeric"]
+    if numeric:
+        headers = ["", *[c["name"] for c in numeric]]
+        rows = [
+            ["count", *[c["count"] for c in numeric]],
+            ["nulos", *[c["nulls"] for c in numeric]],
+            ["mean", *[c["mean"] for c in numeric]],
+            ["std", *[c["std"] for c in numeric]],
+            ["min", *[c["min"] for c in numeric]],
+            *[[f"{int(q * 100)}%", *[c["quantiles"][q] for c in numeric]] for q in QUANTILES],
+            ["max", *[c["max"] for c in numeric]],
+        ]
+        text += f"\n\n📈 ESTATÍSTICAS (colunas numéricas):\n{_markdown_table(headers, rows)}"
+
+    texts = [c for c in columns if c["kind"] == "text"]
+    if texts:
+        text += "\n\n🔍 VALORES MAIS FREQUENTES (colunas de texto):"
+        for column in texts[:5]:
+            distinct = column["distinct"]
+            distinct_text = f"{distinct} valores únicos" if distinct is not None else f"mais de {DISTINCT_LIMIT} valores únicos"
+            top = ", ".join(f"{value} ({count})" for value, count in column["top"])
+            text += f"\n• {column['name']}: {distinct_text}; {top}"
+
+    dates = [c for c in columns if c["kind"] == "date"]
+    for column in dates:
+        text += f"\n📅 {column['name']}: {column['min']} a {column['max']}"
+    return text
+
+
+__all__ = ["profile_table", "format_profile", "iter_chunks"]
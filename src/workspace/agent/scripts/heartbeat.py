@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 """heartbeat.py - Atualiza CURRENT_STATE.md periodicamente Autor: Gemini CLI-Cursor Mode Data: 2026-02-04 Versao: 1.0.0 """
 
-import json
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 import sys
@@ -74,37 +73,31 @@ class StateHeartbeat:
         return state
 
     def _get_recent_runs(self, hours: int = 24) -> List[Dict]:
-        """Lista runs dos ultimos N horas"""
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        runs = []
-
-        runs_dir = self.workspace_dir / "runs"
-        if not runs_dir.exists():
-            return runs
-
-        for run_dir in sorted(runs_dir.iterdir(), reverse=True):
-            if not run_dir.is_dir():
-                continue
-
-            try:
-                ts_str = run_dir.name[:19]
-                ts = datetime.fromisoformat(ts_str.replace('Z', '+00:00').replace('+00:00', ''))
-            except:
-                continue
-
-            if ts < cutoff:
-                break
-
-            metrics_file = run_dir / "metrics.json"
-            metrics = json.loads(metrics_file.read_text()) if metrics_file.exists() else {}
-
-            runs.append({
-                'dir': str(run_dir),
-                'timestamp': ts.isoformat(),
-                'status': metrics.get('status', 'unknown')
-            })
-
-        return runs
+        """Lista runs dos ultimos N horas (consulta indexada no RunAnalytics)"""
+        db_path = self.workspace_dir / "runs" / "journal" / "analytics.db"
+        if not db_path.exists():
+            return []
+
+        # Executado como script: garante src/ no path para importar workspace.*
+        src_dir = str(self.workspace_dir.parent)
+        if src_dir not in sys.path:
+            sys.path.insert(0, src_dir)
+        from workspace.runs.analytics import RunAnalytics
+
+        analytics = RunAnalytics(db_path)
+        try:
+            rows = analytics.recent_runs(hours=hours)
+        finally:
+            analytics.close()
+
+        return [
+            {
+                'run_id': row['run_id'],
+                'timestamp': datetime.utcfromtimestamp(row['ts']).isoformat(),
+                'status': row['status'],
+            }
+            for row in rows
+        ]
 
     def _estimate_context_usage(self) -> Dict:
         """Estima tokens no contexto atual"""
@@ -1,19 +1,69 @@
-"""Core - Inicialização do agente com todas as ferramentas"""
-from .tools import ToolRegistry
-from .agent import Agent
-from workspace.tools.web_search import web_search, WEB_SEARCH_SCHEMA
-from workspace.tools.rag_tools import rag_search, save_memory, RAG_SEARCH_SCHEMA, SAVE_MEMORY_SCHEMA
-# Sandbox causa segfault com docker, comentado temporariamente
-# from workspace.core.sandbox import execute_code, EXECUTE_CODE_SCHEMA
-from workspace.tools.filesystem import read_file, write_file, list_directory, READ_FILE_SCHEMA, WRITE_FILE_SCHEMA, LIST_DIRECTORY_SCHEMA
-from workspace.tools.code_tools import search_code, git_status, git_diff, SEARCH_CODE_SCHEMA, GIT_STATUS_SCHEMA, GIT_DIFF_SCHEMA
-
-def create_agent() -> Agent:
+"""Core - Inicialização do agente com todas as ferramentas
+
+Os nomes abaixo são resolvidos no primeiro acesso (PEP 562): importar um
+submódulo leve (`workspace.core.tool_cache`, `workspace.core.tools`) não
+carrega mais o agente, o MemoryManager e as tools junto com o pacote.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agent import Agent
+
+_EXPORTS = {
+    "ToolRegistry": ".tools",
+    "CachePolicy": ".tool_cache",
+    "Agent": ".agent",
+    "web_search": "workspace.tools.web_search",
+    "WEB_SEARCH_SCHEMA": "workspace.tools.web_search",
+    "rag_search": "workspace.tools.rag_tools",
+    "save_memory": "workspace.tools.rag_tools",
+    "RAG_SEARCH_SCHEMA": "workspace.tools.rag_tools",
+    "SAVE_MEMORY_SCHEMA": "workspace.tools.rag_tools",
+    # Sandbox causa segfault com docker, comentado temporariamente
+    # "execute_code": ".sandbox", "EXECUTE_CODE_SCHEMA": ".sandbox",
+    "read_file": "workspace.tools.filesystem",
+    "write_file": "workspace.tools.filesystem",
+    "list_directory": "workspace.tools.filesystem",
+    "READ_FILE_SCHEMA": "workspace.tools.filesystem",
+    "WRITE_FILE_SCHEMA": "workspace.tools.filesystem",
+    "LIST_DIRECTORY_SCHEMA": "workspace.tools.filesystem",
+    "search_code": "workspace.tools.code_tools",
+    "git_status": "workspace.tools.code_tools",
+    "git_diff": "workspace.tools.code_tools",
+    "SEARCH_CODE_SCHEMA": "workspace.tools.code_tools",
+    "GIT_STATUS_SCHEMA": "workspace.tools.code_tools",
+    "GIT_DIFF_SCHEMA": "workspace.tools.code_tools",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def create_agent() -> "Agent":
+    from .tools import ToolRegistry
+    from .tool_cache import CachePolicy
+    from .agent import Agent
+    from workspace.tools.web_search import web_search, WEB_SEARCH_SCHEMA
+    from workspace.tools.rag_tools import rag_search, save_memory, RAG_SEARCH_SCHEMA, SAVE_MEMORY_SCHEMA
+    from workspace.tools.filesystem import read_file, write_file, list_directory, READ_FILE_SCHEMA, WRITE_FILE_SCHEMA, LIST_DIRECTORY_SCHEMA
+    from workspace.tools.code_tools import search_code, git_status, git_diff, SEARCH_CODE_SCHEMA, GIT_STATUS_SCHEMA, GIT_DIFF_SCHEMA
+
     registry = ToolRegistry()
     
     # Web e memória
-    registry.register("web_search", web_search, WEB_SEARCH_SCHEMA)
-    registry.register("rag_search", rag_search, RAG_SEARCH_SCHEMA)
+    registry.register(
+        "web_search", web_search, WEB_SEARCH_SCHEMA,
+        cache=CachePolicy(ttl=600, stale_ttl=1800, negative_ttl=30),
+        coalesce=True,
+    )
+    registry.register("rag_search", rag_search, RAG_SEARCH_SCHEMA, coalesce=True)
     registry.register("save_memory", save_memory, SAVE_MEMORY_SCHEMA)
     
     # Código
@@ -6,19 +6,20 @@ import json
 import logging
 import time
 import asyncio
-import requests
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
 from config.settings import config
-from security.rate_limiter import message_limiter
+from security.rate_limiter import check_rate_limit
 from workspace.core.llm_router import LlmRouter
 from .tools import ToolRegistry
 from .cache import response_cache, memory_cache, should_cache_query
 
 # Import run management
 from workspace.runs import RunManager, RunMetrics
+from workspace.storage.metrics import metrics as metrics_buffer
 
 # Import memory management
 from workspace.memory.memory_manager import MemoryManager
@@ -41,7 +42,31 @@ class Agent:
         self.llm_router = LlmRouter.from_env()
         self.system_prompt = self._load_context_pack()
         self.run_manager = RunManager()
-        self.memory_manager = MemoryManager()
+        self._memory_manager: Optional[MemoryManager] = None
+        self._memory_manager_lock = threading.Lock()
+
+    @property
+    def memory_manager(self) -> MemoryManager:
+        """MemoryManager criado no primeiro uso (FactStore + Hippocampus)"""
+        if self._memory_manager is None:
+            # Aquecimento e primeira mensagem podem chegar juntos: um só MemoryManager
+            with self._memory_manager_lock:
+                if self._memory_manager is None:
+                    self._memory_manager = MemoryManager()
+        return self._memory_manager
+
+    @memory_manager.setter
+    def memory_manager(self, manager: MemoryManager) -> None:
+        self._memory_manager = manager
+
+    def warm_up(self) -> None:
+        """Constrói o que ficou para o primeiro uso (bloqueante: rodar em thread)
+
+        Chamado em segundo plano depois do `bot_pronto`, para que a primeira
+        mensagem não pague pelo cliente Groq nem pelo Hippocampus.
+        """
+        self.llm_router.groq_client.client.warm()
+        self.memory_manager.warm_up()
 
     def _load_context_pack(self) -> str:
         """Carrega CONTEXT_PACK.md ou compila se necessario"""
@@ -216,18 +241,16 @@ class Agent:
         # Inicializa metricas
         start_time = time.time()
         tools_used = 0
-        run_dir = None
+        run_id = None
         status = "success"
         error_msg = None
         output_text = ""
 
         # Rate limiting check
         if user_id:
-            if not message_limiter.is_allowed(user_id):
-                remaining = message_limiter.get_remaining(user_id)
-                return (
-                    f"⏱️ Muitas requisições. Aguarde um momento. Requisições restantes: {remaining}"
-                )
+            limited = check_rate_limit(user_id, "message")
+            if limited:
+                return limited
 
         if len(history) <= 2 and should_cache_query(user_message):
             cached_response = response_cache.get(user_message)
@@ -243,20 +266,20 @@ class Agent:
 
         # Cria run no inicio
         try:
-            run_dir = self.run_manager.create_run(
+            run_id = self.run_manager.create_run(
                 user_message=user_message,
                 user_id=user_id,
                 image_url=image_url,
             )
             logger.info(
                 "run_criado id=%s user_id=%s len=%d",
-                run_dir.name,
+                run_id,
                 user_id,
                 len(user_message or ""),
             )
         except Exception as e:
             logger.error(f"Erro ao criar run: {e}")
-            run_dir = None
+            run_id = None
 
         # Recupera memoria relevante
         memory_context = self.memory_manager.get_relevant_memory(user_message, max_facts=3)
@@ -289,13 +312,13 @@ class Agent:
                 status = "partial"
                 output_text = "Resposta interrompida por segurança. Tente uma pergunta mais direta."
                 self._finalize_run(
-                    run_dir, output_text, user_message, start_time, tools_used, status, messages
+                    run_id, output_text, user_message, start_time, tools_used, status, messages
                 )
                 return output_text
 
             logger.info(
                 "agent_iteracao run=%s iter=%d/%d tools_usados=%d",
-                run_dir.name if run_dir else None,
+                run_id,
                 iteration,
                 safety_cap,
                 tools_used,
@@ -322,7 +345,7 @@ class Agent:
                                 user_id,
                             )
                             self._finalize_run(
-                                run_dir,
+                                run_id,
                                 kimi_content,
                                 user_message,
                                 start_time,
@@ -353,7 +376,7 @@ class Agent:
                                     user_id,
                                 )
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     glm_content,
                                     user_message,
                                     start_time,
@@ -385,7 +408,7 @@ class Agent:
                         "Tente novamente amanhã ou faça uma pergunta coberta pelas memórias salvas."
                     )
                     self._finalize_run(
-                        run_dir,
+                        run_id,
                         limit_msg,
                         user_message,
                         start_time,
@@ -435,7 +458,7 @@ class Agent:
                                         user_id,
                                     )
                                     self._finalize_run(
-                                        run_dir,
+                                        run_id,
                                         kimi_content,
                                         user_message,
                                         start_time,
@@ -468,7 +491,7 @@ class Agent:
                                     user_id,
                                 )
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     glm_content,
                                     user_message,
                                     start_time,
@@ -553,7 +576,7 @@ class Agent:
                                         note = "⚠️ APIs de IA temporariamente indisponíveis. Encontrei informação relevante.\n\n"
 
                                     self._finalize_run(
-                                        run_dir,
+                                        run_id,
                                         note + raw,
                                         user_message,
                                         start_time,
@@ -604,7 +627,7 @@ class Agent:
                                     len(results),
                                 )
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     web_response,
                                     user_message,
                                     start_time,
@@ -651,7 +674,7 @@ class Agent:
                                     len(results),
                                 )
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     web_response,
                                     user_message,
                                     start_time,
@@ -690,7 +713,7 @@ class Agent:
                                         len(result.get("content", "")),
                                     )
                                     self._finalize_run(
-                                        run_dir,
+                                        run_id,
                                         msg,
                                         user_message,
                                         start_time,
@@ -725,7 +748,7 @@ class Agent:
                                     "factstore_fallback user_id=%s chars=%s", user_id, len(body)
                                 )
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     note + body,
                                     user_message,
                                     start_time,
@@ -740,7 +763,7 @@ class Agent:
                                 body = "\n".join(lines)
                                 note = "API temporariamente indisponível. Enquanto isso, eis o que tenho na memória:\n\n"
                                 self._finalize_run(
-                                    run_dir,
+                                    run_id,
                                     note + body,
                                     user_message,
                                     start_time,
@@ -753,7 +776,7 @@ class Agent:
                             logger.debug("fallback_memoria_ignorado error=%s", mem_e)
 
                     self._finalize_run(
-                        run_dir,
+                        run_id,
                         rate_msg,
                         user_message,
                         start_time,
@@ -787,7 +810,7 @@ class Agent:
                         if not output_text:
                             output_text = "Não consegui processar com ferramentas; tente reformular a pergunta."
                         self._finalize_run(
-                            run_dir,
+                            run_id,
                             output_text,
                             user_message,
                             start_time,
@@ -830,7 +853,7 @@ class Agent:
                                         )
                                         if kimi_content:
                                             self._finalize_run(
-                                                run_dir,
+                                                run_id,
                                                 kimi_content,
                                                 user_message,
                                                 start_time,
@@ -860,7 +883,7 @@ class Agent:
                                     )
                                     if glm_content:
                                         self._finalize_run(
-                                            run_dir,
+                                            run_id,
                                             glm_content,
                                             user_message,
                                             start_time,
@@ -885,7 +908,7 @@ class Agent:
                                         body = mem.replace("Fatos relevantes:\n", "").strip()
                                         note = "Com base na memória (API temporariamente indisponível):\n\n"
                                         self._finalize_run(
-                                            run_dir,
+                                            run_id,
                                             note + body,
                                             user_message,
                                             start_time,
@@ -901,7 +924,7 @@ class Agent:
                                         body = "\n".join(f"- {f.content}" for f in recent)
                                         note = "API temporariamente indisponível. Enquanto isso, eis o que tenho na memória:\n\n"
                                         self._finalize_run(
-                                            run_dir,
+                                            run_id,
                                             note + body,
                                             user_message,
                                             start_time,
@@ -932,7 +955,7 @@ class Agent:
                                                 len(result.get("content", "")),
                                             )
                                             self._finalize_run(
-                                                run_dir,
+                                                run_id,
                                                 msg,
                                                 user_message,
                                                 start_time,
@@ -947,7 +970,7 @@ class Agent:
                                         )
                                 rate_msg += " Perguntas que exigem leitura de arquivos não podem ser atendidas enquanto a API estiver indisponível."
                             self._finalize_run(
-                                run_dir,
+                                run_id,
                                 rate_msg,
                                 user_message,
                                 start_time,
@@ -958,7 +981,7 @@ class Agent:
                             return rate_msg
                         fallback_text = "Desculpe, tive um problema ao processar sua solicitação. Tente novamente."
                         self._finalize_run(
-                            run_dir,
+                            run_id,
                             fallback_text,
                             user_message,
                             start_time,
@@ -979,12 +1002,15 @@ class Agent:
                 if embedded_tool:
                     tool_name, tool_args = embedded_tool
                     try:
+                        tool_start = time.perf_counter()
                         result = await self.tools.execute(tool_name, tool_args)
+                        tool_ms = (time.perf_counter() - tool_start) * 1000
                         tools_used += 1
-                        if run_dir:
+                        if run_id:
                             try:
                                 self.run_manager.log_action(
-                                    run_dir, tool_name, tool_args, result, tools_used
+                                    run_id, tool_name, tool_args, result, tools_used,
+                                    duration_ms=tool_ms,
                                 )
                             except Exception as e:
                                 logger.error("Erro ao logar acao: %s", e)
@@ -999,7 +1025,7 @@ class Agent:
                         logger.warning("Execução de tool embutida falhou: %s", e)
                 status = "success"
                 self._finalize_run(
-                    run_dir, output_text, user_message, start_time, tools_used, status, messages
+                    run_id, output_text, user_message, start_time, tools_used, status, messages
                 )
                 if should_cache_query(user_message):
                     response_cache.set(user_message, output_text)
@@ -1042,16 +1068,19 @@ class Agent:
                 logger.info(f"Executando: {tool_name}({tool_args})")
                 tools_used += 1
 
+                tool_start = time.perf_counter()
                 result = await self.tools.execute(tool_name, tool_args)
+                tool_ms = (time.perf_counter() - tool_start) * 1000
 
-                if run_dir:
+                if run_id:
                     try:
                         self.run_manager.log_action(
-                            run_dir=run_dir,
+                            run_id=run_id,
                             tool_name=tool_name,
                             tool_args=tool_args,
                             result=result,
                             iteration=tools_used,
+                            duration_ms=tool_ms,
                         )
                     except Exception as e:
                         logger.error(f"Erro ao logar acao: {e}")
@@ -1078,10 +1107,10 @@ class Agent:
                 )
 
     def _finalize_run(
-        self, run_dir, output_text, user_message, start_time, tools_used, status, messages
+        self, run_id, output_text, user_message, start_time, tools_used, status, messages
     ):
         """Salva output e metrics no final do run"""
-        if not run_dir:
+        if not run_id:
             return
 
         try:
@@ -1101,8 +1130,22 @@ class Agent:
                 // 4
             )
 
+            provider: Optional[str] = None
+            if status in (
+                "success",
+                "fallback_no_tools",
+                "rate_limit",
+                "rate_limit_rag_fallback",
+                "daily_limit_groq",
+            ):
+                provider = "groq"
+            elif status == "fallback_kimi":
+                provider = "nvidia"
+            elif status == "fallback_glm":
+                provider = "glm"
+
             # Salvar output
-            self.run_manager.save_output(run_dir, output_text)
+            self.run_manager.save_output(run_id, output_text)
 
             # Salvar metrics
             metrics = RunMetrics(
@@ -1113,27 +1156,17 @@ class Agent:
                 iterations=len([m for m in messages if m.get("role") == "assistant"]),
                 tools_used=tools_used,
                 status=status,
+                provider=provider,
             )
-            self.run_manager.save_metrics(run_dir, metrics)
+            self.run_manager.save_metrics(run_id, metrics)
+            metrics_buffer.observe("run_duration_ms", duration, status=status)
+            metrics_buffer.incr("runs", status=status)
 
             # Atualizar uso diário por provedor (aproximação suficiente para uso pessoal)
             from workspace.storage import llm_usage
 
-            provider: Optional[str] = None
-            if status in (
-                "success",
-                "fallback_no_tools",
-                "rate_limit",
-                "rate_limit_rag_fallback",
-                "daily_limit_groq",
-            ):
-                provider = "groq"
-            elif status == "fallback_kimi":
-                provider = "nvidia"
-            elif status == "fallback_glm":
-                provider = "glm"
-
             if provider:
+                metrics_buffer.incr("llm_tokens", tokens_input + tokens_output, provider=provider)
                 try:
                     llm_usage.add_usage(provider, tokens_input, tokens_output)
                 except Exception as usage_err:
@@ -1142,7 +1175,7 @@ class Agent:
         except Exception as e:
             logger.error(f"Erro ao salvar run/metrics ou uso de tokens: {e}")
 
-        logger.info(f"Run finalizado: {run_dir.name} ({status}, {tools_used} tools)")
+        logger.info(f"Run finalizado: {run_id} ({status}, {tools_used} tools)")
 
         try:
             self.memory_manager.remember_interaction(user_message, output_text)
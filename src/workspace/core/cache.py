@@ -3,9 +3,11 @@ Sistema de cache inteligente para o bot.
 
 Implementa cache LRU (Least Recently Used) para:
 - Respostas de perguntas frequentes
-- Resultados de web_search
 - Dados de memória
 
+Resultados de tools (web_search, clima, notícias, geocoding) usam o cache
+por tool de `tool_cache.py`.
+
 Uso:
     from cache import cache
 
@@ -139,9 +141,6 @@ class LRUCache:
 # Cache de respostas (5 min TTL)
 response_cache = LRUCache(max_size=50, default_ttl=300)
 
-# Cache de web_search (10 min TTL)
-web_search_cache = LRUCache(max_size=30, default_ttl=600)
-
 # Cache de memória (2 min TTL - mais curto pois muda frequentemente)
 memory_cache = LRUCache(max_size=20, default_ttl=120)
 
@@ -150,7 +149,6 @@ def get_cache_stats() -> Dict[str, Dict[str, Any]]:
     """Retorna estatísticas de todos os caches."""
     return {
         "responses": response_cache.get_stats(),
-        "web_search": web_search_cache.get_stats(),
         "memory": memory_cache.get_stats(),
     }
 
@@ -159,7 +157,6 @@ def cleanup_all_caches() -> Dict[str, int]:
     """Limpa caches expirados e retorna quantos foram removidos."""
     return {
         "responses": response_cache.cleanup_expired(),
-        "web_search": web_search_cache.cleanup_expired(),
         "memory": memory_cache.cleanup_expired(),
     }
 
@@ -210,7 +207,6 @@ def should_cache_query(query: str) -> bool:
 # Exporta instâncias principais
 __all__ = [
     "response_cache",
-    "web_search_cache",
     "memory_cache",
     "get_cache_stats",
     "cleanup_all_caches",
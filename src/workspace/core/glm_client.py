@@ -5,7 +5,7 @@ import time
 import logging
 from typing import List, Dict, Optional
 
-import requests
+from workspace.storage.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +26,9 @@ def _make_request_with_retry(
     timeout: float,
 ) -> Optional[str]:
     """Faz a requisição com retry e backoff exponencial."""
+    # Só usado no fallback: fora da importação do agente
+    import requests
+
     url = (base_url or os.getenv("GLM_API_BASE_URL") or DEFAULT_GLM_BASE).rstrip("/")
     if not url.endswith("/chat/completions"):
         url = f"{url}/chat/completions"
@@ -113,12 +116,16 @@ def chat_completion_sync(
 
     model = model or os.getenv("GLM_MODEL", DEFAULT_GLM_MODEL)
 
-    return _make_request_with_retry(
-        api_key=api_key,
-        messages=messages,
-        base_url=base_url,
-        model=model,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        timeout=timeout,
-    )
+    with metrics.timer("llm_latency_ms", provider="glm"):
+        content = _make_request_with_retry(
+            api_key=api_key,
+            messages=messages,
+            base_url=base_url,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+        )
+    if not content:
+        metrics.incr("llm_errors", provider="glm")
+    return content
@@ -9,14 +9,18 @@ from __future__ import annotations
 
 import os
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-
-from groq import Groq
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from config.settings import config
+from utils.lazy import LazyObject
 from utils.retry import retry_with_backoff_sync
 from workspace.storage.llm_usage import has_reached_daily_limit
+from workspace.storage.metrics import metrics
+from .single_flight import ThreadSingleFlight, make_key
+
+if TYPE_CHECKING:
+    from groq import Groq
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +94,11 @@ class LlmRouter:
     """
 
     groq_client: GroqChatClient
+    # Requisições determinísticas idênticas e simultâneas compartilham uma chamada
+    _flight: ThreadSingleFlight = field(
+        default_factory=lambda: ThreadSingleFlight("llm", window=config.SINGLE_FLIGHT_WINDOW_SECONDS),
+        repr=False,
+    )
 
     @classmethod
     def from_env(cls) -> "LlmRouter":
@@ -97,7 +106,14 @@ class LlmRouter:
         groq_api_key = os.getenv("GROQ_API_KEY")
         if not groq_api_key:
             logger.warning("GROQ_API_KEY não configurada – chamadas ao LLM irão falhar")
-        client = Groq(api_key=groq_api_key)
+
+        def make_client() -> Groq:
+            from groq import Groq
+
+            return Groq(api_key=groq_api_key)
+
+        # Pacote e cliente só no primeiro uso (o import do groq leva ~100 ms)
+        client = LazyObject(make_client, name="groq_router")
 
         # Preferir modelo configurado em settings; cair para default histórico se ausente
         model_name = getattr(config, "GROQ_MODEL_CHAT", "llama-3.3-70b-versatile")
@@ -116,6 +132,10 @@ class LlmRouter:
 
         Por enquanto apenas delega para o Groq, mas já aceita `user_id` para
         futura implementação de quotas por usuário/provedor.
+
+        Chamadas idênticas simultâneas só são coalescidas com `temperature` até
+        `LLM_COALESCE_MAX_TEMPERATURE` (padrão 0). O Agent usa 0.7: por padrão
+        esse caminho fica desligado para as conversas.
         """
         # Limite diário opcional por provedor (Groq)
         daily_limit = config.LLM_GROQ_DAILY_LIMIT_TOKENS
@@ -123,11 +143,22 @@ class LlmRouter:
             # Exceção específica tratada em Agent.run
             raise RuntimeError("LLM_GROQ_DAILY_LIMIT_REACHED")
 
-        return self.groq_client.chat(
-            messages=messages,
-            tools=tools,
-            tool_choice=tool_choice,
-            max_tokens=max_tokens,
-            temperature=temperature,
-        )
+        def call():
+            try:
+                with metrics.timer("llm_latency_ms", provider="groq"):
+                    return self.groq_client.chat(
+                        messages=messages,
+                        tools=tools,
+                        tool_choice=tool_choice,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    )
+            except Exception:
+                metrics.incr("llm_errors", provider="groq")
+                raise
+
+        if temperature > config.LLM_COALESCE_MAX_TEMPERATURE:
+            return call()
+        key = make_key(self.groq_client.model, messages, tools, tool_choice, max_tokens, temperature)
+        return self._flight.do(key, "groq", call)
 
@@ -5,7 +5,7 @@ import time
 import os
 from typing import List, Dict, Optional
 
-import requests
+from workspace.storage.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,9 @@ def _make_request(
     timeout: float,
 ) -> Optional[str]:
     """Executa a requisição HTTP."""
+    # Só usado no fallback: fora da importação do agente
+    import requests
+
     for attempt in range(MAX_RETRIES + 1):
         try:
             response = requests.post(url, headers=headers, json=payload, timeout=timeout)
@@ -79,10 +82,12 @@ def chat_completion_sync(
             "temperature": temperature,
             "stream": False,
         }
-        res = _make_request(MOONSHOT_BASE_URL, headers, payload, timeout)
+        with metrics.timer("llm_latency_ms", provider="moonshot"):
+            res = _make_request(MOONSHOT_BASE_URL, headers, payload, timeout)
         if res:
             return res
         else:
+            metrics.incr("llm_errors", provider="moonshot")
             logger.warning("Falha na Moonshot API. Tentando fallback para NVIDIA...")
 
     # 2. TENTATIVA NVIDIA (Fallback)
@@ -104,5 +109,9 @@ def chat_completion_sync(
         "stream": False,
         "chat_template_kwargs": {"thinking": thinking},
     }
-    
-    return _make_request(NVIDIA_BASE_URL, headers, payload, timeout)
+
+    with metrics.timer("llm_latency_ms", provider="nvidia"):
+        res = _make_request(NVIDIA_BASE_URL, headers, payload, timeout)
+    if not res:
+        metrics.incr("llm_errors", provider="nvidia")
+    return res
@@ -0,0 +1,121 @@
+"""Coalescência de chamadas idênticas em andamento (single-flight)
+
+Quando várias conversas disparam a mesma chamada ao mesmo tempo (mesma tool
+com os mesmos argumentos normalizados, mesma requisição determinística ao
+LLM), só a primeira vai ao upstream; as demais aguardam o mesmo resultado.
+Opcionalmente, o resultado continua compartilhado por `window` segundos após
+terminar, absorvendo rajadas que chegam logo depois.
+
+- `SingleFlight`: para corrotinas (ToolRegistry.execute). A chamada roda em
+  uma task própria; cancelar quem a iniciou não cancela os demais.
+- `ThreadSingleFlight`: para código síncrono executado em threads do
+  executor (LlmRouter.chat). Só vale para temperatura até
+  `LLM_COALESCE_MAX_TEMPERATURE` (padrão 0), então não cobre as conversas
+  do Agent (0.7) sem mudar essa configuração.
+
+Chamadas deduplicadas são contadas em `coalesced_calls{scope=...,target=...}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from workspace.storage.metrics import metrics
+
+
+def make_key(*parts: Any) -> str:
+    """Chave estável (sha1 do JSON ordenado) para argumentos arbitrários"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Compartilha a execução de corrotinas com a mesma chave"""
+
+    def __init__(self, scope: str, window: float = 0.0):
+        self.scope = scope
+        self.window = window
+        self.coalesced = 0
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, name: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.coalesced += 1
+            metrics.incr("coalesced_calls", scope=self.scope, target=name)
+        else:
+            task = loop.create_task(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if not task.cancelled():
+            task.exception()  # marca como lida (quem aguardava pode ter sido cancelado)
+        if self.window > 0 and not task.cancelled() and task.exception() is None:
+            task.get_loop().call_later(self.window, self._forget, key, task)
+        else:
+            self._forget(key, task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+class ThreadSingleFlight:
+    """Compartilha a execução de funções síncronas chamadas de várias threads"""
+
+    def __init__(self, scope: str, window: float = 0.0):
+        self.scope = scope
+        self.window = window
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        # chave -> (future, instante de término; None enquanto em andamento)
+        self._calls: Dict[Hashable, Tuple[Future, Optional[float]]] = {}
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            key for key, (_, done_at) in self._calls.items()
+            if done_at is not None and now - done_at > self.window
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def do(self, key: Hashable, name: str, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._prune(time.monotonic())
+            entry = self._calls.get(key)
+            if entry is not None:
+                self.coalesced += 1
+                future = entry[0]
+            else:
+                future = Future()
+                self._calls[key] = (future, None)
+        if entry is not None:
+            metrics.incr("coalesced_calls", scope=self.scope, target=name)
+            return future.result()
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                self._calls.pop(key, None)
+            raise
+        future.set_result(result)
+        with self._lock:
+            if self.window > 0:
+                self._calls[key] = (future, time.monotonic())
+            else:
+                self._calls.pop(key, None)
+        return result
+
+
+__all__ = ["SingleFlight", "ThreadSingleFlight", "make_key"]
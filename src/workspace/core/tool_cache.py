@@ -0,0 +1,190 @@
+"""Cache de resultados de tools que consultam dados externos
+
+Cada tool (ou função auxiliar, como o geocoding) ganha um cache próprio
+com política declarativa:
+- `ttl`: validade do resultado (None = permanente enquanto o processo vive);
+- `stale_ttl`: janela após o `ttl` em que o valor antigo ainda é servido
+  enquanto um refresh roda em segundo plano (stale-while-revalidate);
+- `negative_ttl`: validade de resultados negativos (`success: False`,
+  cidade não encontrada...), bem menor para não prender erros;
+- normalização dos argumentos: strings sem diferença de caixa/espaços geram
+  a mesma chave ("São Paulo " == "são paulo").
+
+Uso:
+    registry.register("get_weather", get_weather, WEATHER_SCHEMA,
+                      cache=CachePolicy(ttl=600, stale_ttl=1800))
+
+    @cached(CachePolicy(ttl=None))           # fora do registry
+    async def geocode(city): ...
+
+Hits/misses por tool vão para `stats()` e para o contador
+`tool_cache{tool=...,result=hit|stale|negative|miss}` do MetricsBuffer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 256
+
+
+def normalize_value(value: Any) -> Any:
+    """Normaliza strings (Unicode NFC, caixa e espaços) recursivamente"""
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).casefold().split())
+    if isinstance(value, dict):
+        return {k: normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+
+def is_error_result(result: Any) -> bool:
+    """Convenção das tools: dict com `success: False` é resultado negativo"""
+    return isinstance(result, dict) and result.get("success") is False
+
+
+@dataclass
+class CachePolicy:
+    """Política de cache de uma tool"""
+
+    ttl: Optional[float] = 300.0
+    stale_ttl: float = 0.0
+    negative_ttl: float = 30.0
+    max_entries: int = MAX_ENTRIES
+    normalize: Callable[[Any], Any] = normalize_value
+    is_negative: Callable[[Any], bool] = is_error_result
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+    negative: bool
+
+
+class ToolCache:
+    """Cache LRU de uma tool, chaveado pelos argumentos normalizados"""
+
+    def __init__(self, name: str, policy: CachePolicy):
+        self.name = name
+        self.policy = policy
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._counts = {"hit": 0, "stale": 0, "negative": 0, "miss": 0}
+
+    def key(self, kwargs: Dict[str, Any]) -> str:
+        normalized = self.policy.normalize(kwargs)
+        return json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _count(self, result: str) -> None:
+        self._counts[result] += 1
+        metrics.incr("tool_cache", tool=self.name, result=result)
+
+    def _lookup(self, key: str, now: float) -> Tuple[Optional[_Entry], bool]:
+        """(entrada utilizável, vencida); None se ausente ou fora da janela stale"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        age = now - entry.stored_at
+        if entry.negative:
+            return (entry, False) if age < self.policy.negative_ttl else (None, False)
+        if self.policy.ttl is None or age < self.policy.ttl:
+            return entry, False
+        if age < self.policy.ttl + self.policy.stale_ttl:
+            return entry, True
+        return None, False
+
+    def _store(self, key: str, value: Any) -> None:
+        negative = self.policy.is_negative(value)
+        if negative and self.policy.negative_ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = _Entry(value, time.monotonic(), negative)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.policy.max_entries:
+            self._entries.popitem(last=False)
+
+    async def call(self, function: Callable[..., Awaitable[Any]], kwargs: Dict[str, Any]) -> Any:
+        key = self.key(kwargs)
+        entry, stale = self._lookup(key, time.monotonic())
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if stale:
+                self._count("stale")
+                self._revalidate(key, function, kwargs)
+            else:
+                self._count("negative" if entry.negative else "hit")
+            return entry.value
+
+        self._count("miss")
+        value = await function(**kwargs)
+        self._store(key, value)
+        return value
+
+    def _revalidate(self, key: str, function: Callable[..., Awaitable[Any]], kwargs: Dict[str, Any]) -> None:
+        """Atualiza a entrada em segundo plano (um refresh por chave)"""
+        if key in self._refreshing:
+            return
+
+        async def refresh() -> None:
+            try:
+                value = await function(**kwargs)
+                if not self.policy.is_negative(value):
+                    self._store(key, value)  # erro no refresh mantém o valor antigo
+            except Exception as e:
+                logger.warning("tool_cache_refresh_falhou tool=%s error=%s", self.name, e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def invalidate(self, **kwargs: Any) -> bool:
+        return self._entries.pop(self.key(kwargs), None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self._counts.values())
+        served = lookups - self._counts["miss"]
+        return {
+            "size": len(self._entries),
+            **self._counts,
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+        }
+
+
+def cached(policy: Optional[CachePolicy] = None, name: Optional[str] = None):
+    """Decorator: cacheia uma função async (argumentos nomeados ou posicionais)"""
+
+    def decorator(function: Callable[..., Awaitable[Any]]):
+        cache = ToolCache(name or function.__name__, policy or CachePolicy())
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return await cache.call(function, dict(bound.arguments))
+
+        wrapper.tool_cache = cache
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["CachePolicy", "ToolCache", "cached", "normalize_value", "is_error_result"]
@@ -1,17 +1,39 @@
 """Tool Registry - Sistema de registro e execução de ferramentas"""
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, Optional
 import json
 import logging
 
+from config.settings import config
+from workspace.storage.metrics import metrics
+from .single_flight import SingleFlight, make_key
+from .tool_cache import CachePolicy, cached, normalize_value
+
 logger = logging.getLogger(__name__)
 
 class ToolRegistry:
     def __init__(self):
         self.tools: Dict[str, Dict] = {}
+        self._flight = SingleFlight("tool", window=config.SINGLE_FLIGHT_WINDOW_SECONDS)
     
-    def register(self, name: str, function: Callable, schema: Dict):
-        self.tools[name] = {"function": function, "schema": schema}
-        logger.info("tool_registrada name=%s", name)
+    def register(
+        self,
+        name: str,
+        function: Callable,
+        schema: Dict,
+        cache: Optional[CachePolicy] = None,
+        coalesce: bool = False,
+    ):
+        """Registra uma tool
+
+        Args:
+            cache: política de cache dos resultados (ver tool_cache.py)
+            coalesce: chamadas simultâneas com os mesmos argumentos compartilham
+                uma execução (apenas tools somente-leitura)
+        """
+        if cache is not None:
+            function = cached(cache, name=name)(function)
+        self.tools[name] = {"function": function, "schema": schema, "coalesce": coalesce}
+        logger.info("tool_registrada name=%s cache=%s coalesce=%s", name, cache is not None, coalesce)
     
     def get_schemas(self) -> list:
         return [tool["schema"] for tool in self.tools.values()]
@@ -19,14 +41,30 @@ class ToolRegistry:
     async def execute(self, name: str, args: Dict) -> Any:
         if name not in self.tools:
             raise ValueError(f"Ferramenta '{name}' não encontrada")
-        
+
+        if self.tools[name]["coalesce"]:
+            key = (name, make_key(normalize_value(args)))
+            return await self._flight.do(key, name, lambda: self._execute(name, args))
+        return await self._execute(name, args)
+
+    async def _execute(self, name: str, args: Dict) -> Any:
         try:
-            result = await self.tools[name]["function"](**args)
+            with metrics.timer("tool_latency_ms", tool=name):
+                result = await self.tools[name]["function"](**args)
             logger.info("tool_executada name=%s", name)
             return result
         except Exception as e:
             logger.error("erro_ao_executar_tool name=%s error=%s", name, e)
+            metrics.incr("tool_errors", tool=name)
             return {"success": False, "error": str(e)}
     
     def list_tools(self) -> list:
         return list(self.tools.keys())
+
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hits/misses do cache de cada tool registrada com `cache=`"""
+        return {
+            name: tool["function"].tool_cache.stats()
+            for name, tool in self.tools.items()
+            if hasattr(tool["function"], "tool_cache")
+        }
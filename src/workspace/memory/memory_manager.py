@@ -6,15 +6,11 @@ Integra FactStore com extração automática de fatos das conversas.
 import json
 import re
 import logging
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from workspace.memory.fact_store import FactStore, Fact
-try:
-    from features.hippocampus.client import HippocampusClient, MemoryType
-except ImportError:
-    HippocampusClient = None
-    logger.warning("HippocampusClient não disponível (import failed)")
 
 
 logger = logging.getLogger(__name__)
@@ -34,13 +30,11 @@ class MemoryManager:
         # FactStore
         self.fact_store = FactStore(self.memory_dir)
 
-        # Hippocampus (Lite)
-        self.hippocampus = None
-        if HippocampusClient:
-            try:
-                self.hippocampus = HippocampusClient(str(self.memory_dir / "hippocampus"))
-            except Exception as e:
-                logger.error(f"Falha ao iniciar Hippocampus: {e}")
+        # Hippocampus (Lite): ChromaDB + SentenceTransformer só no primeiro uso
+        # (ou no aquecimento em segundo plano), não na criação do agente
+        self._hippocampus = None
+        self._hippocampus_loaded = False
+        self._hippocampus_lock = threading.Lock()
         
         # Padrões para extração de fatos
         self.fact_patterns = [
@@ -61,6 +55,32 @@ class MemoryManager:
             r"authorization:\s+\S+",
         ]
     
+    @property
+    def hippocampus(self):
+        """HippocampusClient (None se indisponível), criado no primeiro acesso"""
+        if not self._hippocampus_loaded:
+            with self._hippocampus_lock:
+                if not self._hippocampus_loaded:
+                    try:
+                        from features.hippocampus.client import HippocampusClient
+
+                        self._hippocampus = HippocampusClient(str(self.memory_dir / "hippocampus"))
+                    except ImportError as e:
+                        logger.warning("HippocampusClient não disponível (import failed): %s", e)
+                    except Exception as e:
+                        logger.error(f"Falha ao iniciar Hippocampus: {e}")
+                    self._hippocampus_loaded = True
+        return self._hippocampus
+
+    @hippocampus.setter
+    def hippocampus(self, client) -> None:
+        self._hippocampus = client
+        self._hippocampus_loaded = True
+
+    def warm_up(self) -> None:
+        """Carrega o Hippocampus agora (chamado em segundo plano após o bot_pronto)"""
+        self.hippocampus
+
     def _contains_sensitive_data(self, content: str) -> bool:
         """Verifica se o conteúdo contém dados sensíveis que não devem ser armazenados"""
         content_lower = content.lower()
@@ -206,6 +226,8 @@ class MemoryManager:
         # Salva no Hippocampus (Episodic Stream)
         if self.hippocampus:
             try:
+                from features.hippocampus.types import MemoryType
+
                 # 1. O que o usuário disse
                 self.hippocampus.remember(
                     content=f"User: {user_message}",
@@ -1,14 +1,26 @@
 """Runs Module - Camada 1: Execucoes Imutaveis
 
-Cada run é um diretório em runs/YYYY-MM-DDTHHMMSSZ_run_XXX/
-com estrutura de arquivos auditável.
+Cada run é um registro imutável no journal append-only em
+runs/journal/ (ver `journal.py`). O layout antigo de diretórios
+(runs/YYYY-MM-DDTHHMMSSZ_run_XXX/ com input.json, actions.log, output.md e
+metrics.json) pode ser gerado sob demanda com `workspace.runs.export`.
 """
 
+import threading
+import time
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-import json
+
+from .analytics import RunAnalytics
+from .journal import RunJournal
+from .policy import RunLogPolicy
+
+# Runs abertos mantidos em memória; além disso (ou após a idade máxima) o
+# mais antigo é gravado como "abandoned" (run que nunca chegou ao save_metrics)
+MAX_ACTIVE_RUNS = 256
+ACTIVE_RUN_MAX_AGE_SECONDS = 3600.0
 
 
 @dataclass
@@ -22,6 +34,7 @@ class RunMetrics:
     tools_used: int = 0
     status: str = "unknown"  # success, error, partial
     error_message: Optional[str] = None
+    provider: Optional[str] = None  # groq, nvidia, glm
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -36,100 +49,167 @@ class RunData:
     """Dados completos de uma execução"""
     run_id: str
     input_data: Dict[str, Any]
-    actions: list
-    output_text: str
-    metrics: RunMetrics
+    actions: list = field(default_factory=list)
+    output_text: str = ""
+    metrics: Optional[RunMetrics] = None
+    actions_skipped: int = 0  # ações não gravadas pela política (amostragem/off)
+    started: float = field(default_factory=time.monotonic, repr=False)  # não vai ao journal
+
+    def to_record(self) -> Dict[str, Any]:
+        """Registro gravado no journal"""
+        return {
+            "run_id": self.run_id,
+            "input": self.input_data,
+            "actions": self.actions,
+            "output": self.output_text,
+            "metrics": self.metrics.to_dict() if self.metrics else None,
+            "actions_skipped": self.actions_skipped,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "RunData":
+        metrics = record.get("metrics")
+        return cls(
+            run_id=record["run_id"],
+            input_data=record.get("input", {}),
+            actions=record.get("actions", []),
+            output_text=record.get("output") or "",
+            metrics=RunMetrics.from_dict(metrics) if metrics else None,
+            actions_skipped=record.get("actions_skipped", 0),
+        )
 
 
 class RunManager:
-    """Gerenciador de execuções em runs/"""
+    """Gerenciador de execuções: acumula o run em memória e grava um único
+    registro no journal quando as métricas são salvas (fim do run)."""
 
-    def __init__(self, runs_dir: Path = None):
+    def __init__(self, runs_dir: Path = None, policy: Optional[RunLogPolicy] = None):
         if runs_dir is None:
             from config import config
             runs_dir = config.WORKSPACE_DIR / "runs"
         self.runs_dir = Path(runs_dir)
-        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        self.policy = policy or RunLogPolicy.from_config()
+        self.journal = RunJournal(
+            self.runs_dir / "journal",
+            queue_max=self.policy.queue_max,
+            prepare=self._compact_record,
+        )
+        self.analytics = RunAnalytics(self.journal.journal_dir / "analytics.db")
+        if self.analytics.count() < len(self.journal):
+            # Primeira abertura (ou store apagado): reindexa o histórico do journal
+            self.analytics.record_batch(self.journal.iter_records())
+        self.journal.add_listener(self.analytics.record_batch)
         self._run_counter = 0
+        self._active: Dict[str, RunData] = {}
+        self._lock = threading.Lock()
 
     def create_run(self, user_message: str, user_id: Optional[int] = None,
-                   image_url: Optional[str] = None) -> Path:
-        """Cria um novo diretório de run"""
+                   image_url: Optional[str] = None) -> str:
+        """Inicia um run (sem I/O) e retorna seu run_id"""
         timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H%M%SZ')
-        self._run_counter += 1
-        run_id = f"{timestamp}_run_{self._run_counter:03d}"
-
-        run_dir = self.runs_dir / run_id
-        run_dir.mkdir(parents=True, exist_ok=True)
-
-        # Salva input.json
-        input_data = {
-            "timestamp": timestamp,
-            "user_id": user_id,
-            "message": user_message,
-            "image_url": image_url,
-            "run_id": run_id
-        }
-        (run_dir / "input.json").write_text(
-            json.dumps(input_data, indent=2, ensure_ascii=False),
-            encoding='utf-8'
-        )
-
-        # Cria actions.log vazio
-        (run_dir / "actions.log").write_text(
-            f"# Actions Log - {run_id}\n# Timestamp: {timestamp}\n\n",
-            encoding='utf-8'
-        )
-
-        return run_dir
-
-    def log_action(self, run_dir: Path, tool_name: str, tool_args: Dict,
-                   result: Dict, iteration: int):
-        """Loga uma ação no actions.log"""
-        actions_path = run_dir / "actions.log"
-
-        log_entry = f"""\n## Iteration {iteration}
-### Tool: {tool_name}
-**Args:**```json
-{json.dumps(tool_args, indent=2, ensure_ascii=False)}
-```
-**Result:**```json
-{json.dumps(result, indent=2, ensure_ascii=False)}
-```
----
-"""
-        with open(actions_path, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
-
-    def save_output(self, run_dir: Path, output_text: str):
-        """Salva o output final"""
-        output_path = run_dir / "output.md"
-        output_path.write_text(
-            f"# Output\n\n{output_text}\n",
-            encoding='utf-8'
-        )
-
-    def save_metrics(self, run_dir: Path, metrics: RunMetrics):
-        """Salva métricas em metrics.json"""
-        metrics_path = run_dir / "metrics.json"
-        metrics_path.write_text(
-            json.dumps(metrics.to_dict(), indent=2, ensure_ascii=False),
-            encoding='utf-8'
-        )
-
-    def get_latest_runs(self, limit: int = 10) -> list:
-        """Retorna os runs mais recentes"""
-        if not self.runs_dir.exists():
-            return []
-
-        run_dirs = sorted(
-            [d for d in self.runs_dir.iterdir() if d.is_dir()],
-            reverse=True
-        )
-        return run_dirs[:limit]
+        with self._lock:
+            self._run_counter += 1
+            run_id = f"{timestamp}_run_{self._run_counter:03d}"
+            stale = self._evict_stale()
+            self._active[run_id] = RunData(
+                run_id=run_id,
+                input_data={
+                    "timestamp": timestamp,
+                    "user_id": user_id,
+                    "message": user_message,
+                    "image_url": image_url,
+                    "run_id": run_id,
+                },
+            )
+        for run in stale:
+            self._append_open(run, "abandoned")
+        return run_id
+
+    def _evict_stale(self) -> List[RunData]:
+        """Remove os runs abertos velhos demais ou além do limite (chamar com o lock)"""
+        stale = []
+        deadline = time.monotonic() - ACTIVE_RUN_MAX_AGE_SECONDS
+        # Ordem de inserção = ordem de criação: o mais antigo vem primeiro
+        while self._active:
+            run_id, run = next(iter(self._active.items()))
+            if run.started > deadline and len(self._active) < MAX_ACTIVE_RUNS:
+                break
+            stale.append(self._active.pop(run_id))
+        return stale
+
+    def _append_open(self, run: RunData, status: str) -> None:
+        """Grava um run que não chegou ao save_metrics, com métricas mínimas"""
+        if run.metrics is None:
+            run.metrics = RunMetrics(
+                timestamp=datetime.utcnow().isoformat() + "Z",
+                duration_ms=(time.monotonic() - run.started) * 1000,
+                iterations=len(run.actions),
+                tools_used=len(run.actions),
+                status=status,
+            )
+        self.journal.append(run.to_record())
+
+    def log_action(self, run_id: str, tool_name: str, tool_args: Dict,
+                   result: Dict, iteration: int, duration_ms: Optional[float] = None):
+        """Registra uma ação do run (em memória; sujeito à política de amostragem)"""
+        run = self._active.get(run_id)
+        if run is None:
+            return
+        if not self.policy.keep_action(self.journal.backlog):
+            run.actions_skipped += 1
+            return
+        run.actions.append({
+            "iteration": iteration,
+            "tool": tool_name,
+            "args": tool_args,
+            "result": result,
+            "duration_ms": duration_ms,
+        })
+
+    def save_output(self, run_id: str, output_text: str):
+        """Registra o output final"""
+        run = self._active.get(run_id)
+        if run is not None:
+            run.output_text = output_text
+
+    def save_metrics(self, run_id: str, metrics: RunMetrics):
+        """Registra as métricas e envia o run completo ao journal"""
+        with self._lock:
+            run = self._active.pop(run_id, None)
+        if run is None:
+            return
+        run.metrics = metrics
+        self.journal.append(run.to_record())
+
+    def _compact_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Limita/comprime os resultados das ações (roda na thread do journal)"""
+        for action in record.get("actions", []):
+            action["result"] = self.policy.compact_result(action.get("result"))
+        return record
+
+    def get_run(self, run_id: str) -> Optional[RunData]:
+        """Lê um run finalizado do journal"""
+        record = self.journal.get(run_id)
+        return RunData.from_record(record) if record else None
+
+    def get_latest_runs(self, limit: int = 10) -> List[str]:
+        """Retorna os run_ids mais recentes (pelo índice do journal)"""
+        return self.journal.run_ids(limit=limit)
+
+    def close(self):
+        """Grava os runs ainda abertos (status partial) e fecha o journal"""
+        with self._lock:
+            pending = list(self._active.values())
+            self._active.clear()
+        for run in pending:
+            self._append_open(run, "partial")
+        self.journal.close()
+        self.analytics.close()
 
 
 __all__ = [
+    "RunAnalytics",
+    "RunJournal",
     "RunMetrics",
     "RunData",
     "RunManager",
@@ -0,0 +1,194 @@
+"""Run Analytics - consultas agregadas sobre o histórico de runs
+
+Tabelas estreitas no SQLite (uma linha por run e uma por chamada de tool),
+particionadas por dia via índices compostos que começam pela coluna `day`:
+as consultas filtram um intervalo de dias e leem apenas o trecho do índice
+correspondente, sem tocar os runs fora da janela. Percentis são calculados
+no próprio SQLite com funções de janela.
+
+O `RunManager` alimenta este store a partir da thread de escrita do journal;
+o heartbeat e o comando /stats apenas consultam.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id TEXT PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    status TEXT NOT NULL,
+    provider TEXT,
+    duration_ms REAL NOT NULL,
+    tokens_input INTEGER NOT NULL,
+    tokens_output INTEGER NOT NULL,
+    iterations INTEGER NOT NULL,
+    tools_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_metrics_day_status_duration
+    ON run_metrics (day, status, duration_ms);
+CREATE INDEX IF NOT EXISTS idx_run_metrics_day_provider
+    ON run_metrics (day, provider, tokens_input, tokens_output);
+CREATE INDEX IF NOT EXISTS idx_run_metrics_ts ON run_metrics (ts);
+
+CREATE TABLE IF NOT EXISTS tool_calls (
+    run_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    latency_ms REAL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_day_tool_latency
+    ON tool_calls (day, tool, latency_ms);
+"""
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Timestamp do run (YYYY-MM-DDTHHMMSSZ) em UTC"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+def _since_day(days: int, today: Optional[date] = None) -> str:
+    return ((today or datetime.now(timezone.utc).date()) - timedelta(days=days - 1)).isoformat()
+
+
+class RunAnalytics:
+    """Store de métricas de runs para consultas agregadas"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn as conn:
+            conn.executescript(_SCHEMA)
+
+    # -- escrita ----------------------------------------------------------
+
+    def record_batch(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Indexa registros do journal (idempotente por run_id)"""
+        with self._lock, self._conn as conn:
+            for record in records:
+                metrics = record.get("metrics") or {}
+                started = _parse_timestamp(record.get("input", {}).get("timestamp"))
+                day = started.date().isoformat()
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO run_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record["run_id"],
+                        int(started.timestamp()),
+                        day,
+                        metrics.get("status", "unknown"),
+                        metrics.get("provider"),
+                        float(metrics.get("duration_ms", 0.0)),
+                        int(metrics.get("tokens_input", 0)),
+                        int(metrics.get("tokens_output", 0)),
+                        int(metrics.get("iterations", 0)),
+                        int(metrics.get("tools_used", 0)),
+                    ),
+                )
+                if not cursor.rowcount:
+                    continue  # run já indexado (reindexação a partir do journal)
+                conn.executemany(
+                    "INSERT INTO tool_calls VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            record["run_id"],
+                            day,
+                            action.get("tool", "?"),
+                            action.get("duration_ms"),
+                            int(not (isinstance(action.get("result"), dict)
+                                     and action["result"].get("success") is False)),
+                        )
+                        for action in record.get("actions", [])
+                    ],
+                )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM run_metrics").fetchone()[0]
+
+    # -- consultas --------------------------------------------------------
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def duration_percentiles_by_status(
+        self, days: int = 7, q: float = 0.95, today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Percentil `q` da duração por status e por dia (janela dos últimos `days` dias)"""
+        return self._query(
+            """
+            SELECT day, status, cnt AS runs, duration_ms AS p
+            FROM (
+                SELECT day, status, duration_ms,
+                       ROW_NUMBER() OVER (PARTITION BY day, status ORDER BY duration_ms) AS rn,
+                       COUNT(*) OVER (PARTITION BY day, status) AS cnt
+                FROM run_metrics
+                WHERE day >= ?
+            )
+            WHERE rn >= cnt * ? AND rn - 1 < cnt * ?  -- nearest-rank
+            ORDER BY day, status
+            """,
+            (_since_day(days, today), q, q),
+        )
+
+    def tokens_by_provider(self, days: int = 7, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Tokens por provedor nos últimos `days` dias"""
+        return self._query(
+            """
+            SELECT COALESCE(provider, 'desconhecido') AS provider, COUNT(*) AS runs,
+                   SUM(tokens_input) AS tokens_input, SUM(tokens_output) AS tokens_output
+            FROM run_metrics
+            WHERE day >= ?
+            GROUP BY provider
+            ORDER BY SUM(tokens_input) + SUM(tokens_output) DESC
+            """,
+            (_since_day(days, today),),
+        )
+
+    def top_tools_by_latency(
+        self, days: int = 7, limit: int = 10, today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Tools com maior latência média nos últimos `days` dias"""
+        return self._query(
+            """
+            SELECT tool, COUNT(*) AS calls, ROUND(AVG(latency_ms), 1) AS avg_ms,
+                   ROUND(MAX(latency_ms), 1) AS max_ms, SUM(1 - success) AS errors
+            FROM tool_calls
+            WHERE day >= ?
+            GROUP BY tool
+            ORDER BY avg_ms IS NULL, avg_ms DESC
+            LIMIT ?
+            """,
+            (_since_day(days, today), limit),
+        )
+
+    def recent_runs(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Runs das últimas `hours` horas, do mais recente ao mais antigo"""
+        cutoff = int((datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp())
+        return self._query(
+            "SELECT run_id, ts, status FROM run_metrics WHERE ts >= ? ORDER BY ts DESC",
+            (cutoff,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["RunAnalytics"]
@@ -0,0 +1,89 @@
+"""Exportador de compatibilidade: journal -> layout antigo de diretórios
+
+Renderiza, sob demanda, um run do journal no formato anterior
+(runs/<run_id>/input.json, actions.log, output.md, metrics.json).
+
+Uso: PYTHONPATH=src python -m workspace.runs.export <run_id>... [--all] [--dest DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .journal import RunJournal
+from .policy import expand_result
+
+
+def render_actions_log(run_id: str, timestamp: str, actions: List[Dict[str, Any]]) -> str:
+    """Reproduz o actions.log em Markdown gravado pelo RunManager antigo"""
+    parts = [f"# Actions Log - {run_id}\n# Timestamp: {timestamp}\n\n"]
+    for action in actions:
+        parts.append(f"""\n## Iteration {action.get("iteration")}
+### Tool: {action.get("tool")}
+**Args:**```json
+{json.dumps(action.get("args"), indent=2, ensure_ascii=False)}
+```
+**Result:**```json
+{json.dumps(expand_result(action.get("result")), indent=2, ensure_ascii=False)}
+```
+---
+""")
+    return "".join(parts)
+
+
+def export_run(record: Dict[str, Any], dest_dir: Path) -> Path:
+    """Grava um registro do journal como diretório no layout antigo"""
+    run_id = record["run_id"]
+    input_data = record.get("input", {})
+    run_dir = Path(dest_dir) / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    (run_dir / "input.json").write_text(
+        json.dumps(input_data, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    (run_dir / "actions.log").write_text(
+        render_actions_log(run_id, input_data.get("timestamp", ""), record.get("actions", [])),
+        encoding="utf-8",
+    )
+    if record.get("output") is not None:
+        (run_dir / "output.md").write_text(f"# Output\n\n{record['output']}\n", encoding="utf-8")
+    if record.get("metrics") is not None:
+        (run_dir / "metrics.json").write_text(
+            json.dumps(record["metrics"], indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+    return run_dir
+
+
+def main(argv: List[str] = None) -> int:
+    from config import config
+
+    parser = argparse.ArgumentParser(description="Exporta runs do journal no layout de diretórios")
+    parser.add_argument("run_ids", nargs="*", help="run_ids a exportar")
+    parser.add_argument("--all", action="store_true", help="exporta todos os runs")
+    parser.add_argument("--journal", type=Path, default=config.WORKSPACE_DIR / "runs" / "journal")
+    parser.add_argument("--dest", type=Path, default=Path("runs_export"))
+    args = parser.parse_args(argv)
+
+    journal = RunJournal(args.journal)
+    try:
+        if args.all:
+            records = journal.iter_records()
+        else:
+            records = (journal.get(run_id) for run_id in args.run_ids)
+        count = 0
+        for record in records:
+            if record is None:
+                continue
+            print(export_run(record, args.dest))
+            count += 1
+    finally:
+        journal.close()
+    return 0 if count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
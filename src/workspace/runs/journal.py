@@ -0,0 +1,350 @@
+"""Run Journal - log append-only de execuções em segmentos rotacionados
+
+Substitui o diretório por run (input.json, actions.log, output.md,
+metrics.json) por um único registro por run, anexado ao segmento corrente:
+
+    journal/segment-000001.log   [u32 big-endian: tamanho][JSON compacto UTF-8]...
+    journal/index.tsv            run_id \\t timestamp \\t segmento \\t offset
+
+As escritas passam por uma fila limitada e são feitas por uma thread
+dedicada, que agrupa os registros pendentes em uma única escrita + flush.
+`append` nunca bloqueia. Acima de `queue_max` registros pendentes só a lista
+de ações é descartada (contada em `actions_skipped`), preservando o resumo do
+run (input, output, métricas) do qual dependem o analytics e o /stats. A fila
+tem limite rígido de `2 * queue_max`: se a thread de escrita travar (disco
+lento), registros além dele são descartados inteiros e contados em
+`run_journal_dropped`, para a memória não crescer sem limite. O índice é
+carregado em memória na abertura (e reconstruído a partir dos segmentos se
+estiver ausente ou atrasado após uma queda).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+# Tamanho a partir do qual um novo segmento é aberto
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+# Registros gravados por escrita da thread
+WRITE_BATCH = 64
+
+_STOP = object()
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:06d}.log"
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """Serializa um registro: prefixo de tamanho + JSON compacto"""
+    payload = json.dumps(
+        record, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _scan(
+    path: Path, offset: int = 0, skip_corrupt: bool = False
+) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """Percorre (início, fim, registro) de um segmento; para em registro truncado
+
+    Um registro completo com JSON inválido encerra a varredura, ou é pulado
+    (com aviso) se `skip_corrupt`: o prefixo de tamanho diz onde começa o próximo.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            (size,) = _HEADER.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+            end = offset + _HEADER.size + size
+            try:
+                record = json.loads(payload.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                if not skip_corrupt:
+                    return
+                logger.warning("run_journal_registro_corrompido segmento=%s offset=%d", path.name, offset)
+                offset = end
+                continue
+            yield offset, end, record
+            offset = end
+
+
+def iter_segment(path: Path, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Percorre (offset, registro) de um segmento a partir de `offset` (pula corrompidos)"""
+    for start, _, record in _scan(path, offset, skip_corrupt=True):
+        yield start, record
+
+
+class RunJournal:
+    """Journal append-only de runs com índice por run_id e timestamp"""
+
+    def __init__(
+        self,
+        journal_dir: Path,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        queue_max: int = 0,
+        prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.index_path = self.journal_dir / "index.tsv"
+
+        self._lock = threading.Lock()
+        # run_id -> (timestamp, segmento, offset); a ordem de inserção é a do journal
+        self._index: Dict[str, Tuple[str, int, int]] = {}
+        self._load_index()
+
+        self._segment, self._file = self._open_segment()
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+
+        # Chamados na thread de escrita com cada lote já gravado
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+        # Transformação aplicada na thread de escrita antes de serializar
+        self._prepare = prepare
+        # Registros gravados sem as ações / descartados inteiros (fila no limite)
+        self.shed = 0
+        self.dropped = 0
+
+        # Acima de `queue_max` as ações são descartadas; o dobro é o limite rígido
+        self.queue_max = queue_max
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_max * 2)
+        self._writer = threading.Thread(target=self._write_loop, name="run-journal", daemon=True)
+        self._writer.start()
+
+    # -- abertura / recuperação -------------------------------------------
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for path in self.journal_dir.glob("segment-*.log"):
+            try:
+                numbers.append(int(path.stem.split("-", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _load_index(self) -> None:
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4:
+                        continue
+                    run_id, timestamp, segment, offset = parts
+                    try:
+                        self._index[run_id] = (timestamp, int(segment), int(offset))
+                    except ValueError:
+                        continue
+
+        # Registros gravados após a última linha do índice (queda entre as escritas)
+        last = max(self._index.values(), key=lambda e: (e[1], e[2]), default=None)
+        missing: List[str] = []
+        for segment in self._segments():
+            if last is not None and segment < last[1]:
+                continue
+            start = last[2] if last is not None and segment == last[1] else 0
+            path = self.journal_dir / _segment_name(segment)
+            good = start
+            for offset, end, record in _scan(path, start, skip_corrupt=True):
+                good = end
+                run_id = record.get("run_id")
+                if run_id and run_id not in self._index:
+                    timestamp = record.get("input", {}).get("timestamp", "")
+                    self._index[run_id] = (timestamp, segment, offset)
+                    missing.append(f"{run_id}\t{timestamp}\t{segment}\t{offset}\n")
+            if path.stat().st_size > good:
+                # Registro incompleto no fim do segmento: descarta para os próximos appends
+                logger.warning("run_journal_registro_truncado segmento=%s offset=%d", path.name, good)
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+
+        if missing:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(missing))
+            logger.info("run_journal_indice_recuperado registros=%d", len(missing))
+
+    def _open_segment(self):
+        numbers = self._segments()
+        number = numbers[-1] if numbers else 1
+        path = self.journal_dir / _segment_name(number)
+        if path.exists() and path.stat().st_size >= self.segment_max_bytes:
+            number += 1
+            path = self.journal_dir / _segment_name(number)
+        return number, open(path, "ab")
+
+    # -- escrita ----------------------------------------------------------
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """Registra um consumidor dos lotes gravados (ex.: RunAnalytics.record_batch)"""
+        self._listeners.append(listener)
+
+    @property
+    def backlog(self) -> float:
+        """Ocupação da fila até `queue_max` (0-1; sempre 0 se a fila é ilimitada)"""
+        if not self.queue_max:
+            return 0.0
+        return min(1.0, self._queue.qsize() / self.queue_max)
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Enfileira um registro (deve conter run_id); nunca bloqueia
+
+        Returns:
+            False se a fila estava cheia: as ações do registro foram descartadas
+            (acima de `queue_max`) ou o registro inteiro (no limite rígido)
+        """
+        full = bool(self.queue_max) and self._queue.qsize() >= self.queue_max
+        if full:
+            record = self._shed_actions(record)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.incr("run_journal_dropped")
+            logger.error("run_journal_registro_descartado run_id=%s descartados=%d",
+                         record.get("run_id"), self.dropped)
+        return not full
+
+    def _shed_actions(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Cópia do registro sem a lista de ações (contadas em actions_skipped)"""
+        actions = record.get("actions") or []
+        self.shed += 1
+        metrics.incr("run_journal_actions_shed")
+        logger.warning("run_journal_fila_cheia run_id=%s acoes_descartadas=%d registros=%d",
+                       record.get("run_id"), len(actions), self.shed)
+        if not actions:
+            return record
+        return {
+            **record,
+            "actions": [],
+            "actions_skipped": record.get("actions_skipped", 0) + len(actions),
+        }
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(r is _STOP for r in batch)
+            records = [r for r in batch if r is not _STOP]
+            try:
+                if records:
+                    self._write_batch(records)
+            except Exception as e:
+                logger.error("run_journal_erro_escrita registros=%d error=%s", len(records), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        entries = []
+        if self._prepare is not None:
+            records = [self._prepare(record) for record in records]
+        for record in records:
+            if self._file.tell() >= self.segment_max_bytes:
+                self._rotate()
+            offset = self._file.tell()
+            self._file.write(encode_record(record))
+            timestamp = record.get("input", {}).get("timestamp", "")
+            entries.append((record["run_id"], timestamp, self._segment, offset))
+        # Um flush por lote; o índice só aponta para dados já entregues ao SO
+        self._file.flush()
+
+        with self._lock:
+            for run_id, timestamp, segment, offset in entries:
+                self._index[run_id] = (timestamp, segment, offset)
+        self._index_file.write("".join(f"{r}\t{t}\t{s}\t{o}\n" for r, t, s, o in entries))
+        self._index_file.flush()
+
+        for listener in self._listeners:
+            try:
+                listener(records)
+            except Exception as e:
+                logger.error("run_journal_erro_listener error=%s", e)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._segment += 1
+        self._file = open(self.journal_dir / _segment_name(self._segment), "ab")
+
+    def flush(self) -> None:
+        """Bloqueia até todos os registros enfileirados estarem no disco"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Grava o que falta e fecha os arquivos"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._file.close()
+        self._index_file.close()
+
+    # -- leitura ----------------------------------------------------------
+
+    def __contains__(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Lê o registro de um run pelo índice (um seek + uma leitura)"""
+        with self._lock:
+            entry = self._index.get(run_id)
+        if entry is None:
+            return None
+        _, segment, offset = entry
+        path = self.journal_dir / _segment_name(segment)
+        for _, _, record in _scan(path, offset):
+            return record
+        return None
+
+    def run_ids(
+        self, since: Optional[str] = None, until: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[str]:
+        """run_ids do mais recente para o mais antigo, filtrados por timestamp"""
+        with self._lock:
+            items = list(self._index.items())
+        result = []
+        for run_id, (timestamp, _, _) in reversed(items):
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp > until:
+                continue
+            result.append(run_id)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Percorre todos os registros em ordem de gravação (varredura sequencial)"""
+        for segment in self._segments():
+            for _, record in iter_segment(self.journal_dir / _segment_name(segment)):
+                yield record
+
+
+__all__ = ["RunJournal", "encode_record", "iter_segment", "SEGMENT_MAX_BYTES"]
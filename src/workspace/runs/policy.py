@@ -0,0 +1,81 @@
+"""Política de gravação das ações de um run no journal
+
+Controla quanto do log de auditoria é mantido: tamanho máximo do resultado
+de cada tool, compressão opcional do resultado completo e amostragem das
+ações quando o journal está sob carga (ou sempre, no modo `sample`).
+A compactação roda na thread de escrita do journal, nunca no event loop.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import random
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict
+
+# Modos de log de ações
+MODE_FULL = "full"      # grava todas (amostra apenas sob carga)
+MODE_SAMPLE = "sample"  # grava uma fração `sample_rate`
+MODE_OFF = "off"        # não grava ações (o run continua no journal)
+
+
+@dataclass
+class RunLogPolicy:
+    """Limites do log de ações"""
+
+    mode: str = MODE_FULL
+    sample_rate: float = 0.1
+    result_max_chars: int = 4000
+    compress: bool = True
+    compressed_max_bytes: int = 256 * 1024
+    queue_max: int = 1000
+    high_water: float = 0.8  # fração da fila a partir da qual amostra ações
+
+    @classmethod
+    def from_config(cls) -> "RunLogPolicy":
+        from config import config
+
+        return cls(
+            mode=config.RUN_LOG_MODE,
+            sample_rate=config.RUN_LOG_SAMPLE_RATE,
+            result_max_chars=config.RUN_LOG_RESULT_MAX_CHARS,
+            compress=config.RUN_LOG_COMPRESS,
+        )
+
+    def keep_action(self, backlog: float) -> bool:
+        """Decide se a ação entra no log; `backlog` é a ocupação da fila (0-1)"""
+        if self.mode == MODE_OFF:
+            return False
+        if self.mode == MODE_SAMPLE or backlog >= self.high_water:
+            return random.random() < self.sample_rate
+        return True
+
+    def compact_result(self, result: Any) -> Any:
+        """Limita o resultado a `result_max_chars`; o completo vai comprimido (opcional)"""
+        text = json.dumps(result, ensure_ascii=False, default=str)
+        if len(text) <= self.result_max_chars:
+            return result
+
+        compact: Dict[str, Any] = {
+            "_truncated": True,
+            "size": len(text),
+            "preview": text[: self.result_max_chars],
+        }
+        if self.compress:
+            packed = zlib.compress(text.encode("utf-8"), 6)
+            if len(packed) <= self.compressed_max_bytes:
+                compact["zlib_b64"] = base64.b64encode(packed).decode("ascii")
+        return compact
+
+
+def expand_result(result: Any) -> Any:
+    """Inverso de `compact_result` quando o resultado completo foi comprimido"""
+    if isinstance(result, dict) and result.get("_truncated") and "zlib_b64" in result:
+        text = zlib.decompress(base64.b64decode(result["zlib_b64"])).decode("utf-8")
+        return json.loads(text)
+    return result
+
+
+__all__ = ["RunLogPolicy", "expand_result", "MODE_FULL", "MODE_SAMPLE", "MODE_OFF"]
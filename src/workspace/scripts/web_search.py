@@ -4,10 +4,16 @@ Web Search Tool - Busca web com Playwright
 """
 
 from playwright.sync_api import sync_playwright
+from pathlib import Path
 import json
 import sys
 import os
 
+# Permite rodar como script (python workspace/scripts/web_search.py) com src/ no path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils.html_text import iter_html_blocks, chunk_blocks
+
 BROWSERLESS_ENDPOINT = os.getenv("BROWSERLESS_ENDPOINT", "ws://moltbot-browser:3000")
 
 def search_web(query, num_results=5):
@@ -47,7 +53,17 @@ def search_web(query, num_results=5):
     
     return {"query": query, "results": results}
 
-def fetch_page(url):
+def _limited_blocks(html, max_chars):
+    """Gera blocos do HTML até somar max_chars (interrompe o parser cedo)"""
+    total = 0
+    for block in iter_html_blocks(html):
+        yield block
+        total += len(block.text) + 1
+        if total >= max_chars:
+            break
+
+
+def fetch_page(url, max_chars=5000):
     """Extrai conteúdo de uma página"""
     with sync_playwright() as p:
         try:
@@ -56,20 +72,25 @@ def fetch_page(url):
             
             page.goto(url, wait_until="networkidle", timeout=30000)
             
-            # Extrai texto principal
-            content = page.evaluate('''() => {
+            # HTML do conteúdo principal; o texto é extraído em passada única
+            html = page.evaluate('''() => {
                 const article = document.querySelector('article') || document.querySelector('main') || document.body;
-                return article.innerText;
+                return article.outerHTML;
             }''')
             
             title = page.title()
             
             browser.close()
             
+            # Chunks por seção (prontos para indexação) limitados a max_chars
+            chunks = list(chunk_blocks(_limited_blocks(html, max_chars)))
+            content = "\n\n".join(chunk["text"] for chunk in chunks)
+            
             return {
                 "url": url,
                 "title": title,
-                "content": content[:5000]  # Limita tamanho
+                "content": content[:max_chars],  # Limita tamanho
+                "chunks": chunks,
             }
             
         except Exception as e:
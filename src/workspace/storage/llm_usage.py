@@ -1,29 +1,61 @@
-"""Registro simples de uso diário de tokens por provedor de LLM.
+"""Registro de uso diário de tokens por provedor de LLM.
 
-Implementação leve baseada em arquivo JSON em `config.DATA_DIR`, adequada
-para uso pessoal (um usuário, uma máquina).
+O uso fica em um ledger em memória (`UsageLedger`); consultas de quota são
+lookups em dict, sem tocar o disco. As somas pendentes são persistidas em
+write-behind (timer de `WRITE_BEHIND_SECONDS` e no encerramento do processo)
+no arquivo JSON em `config.DATA_DIR`:
+
+- a escrita é atômica (arquivo temporário + `os.replace`);
+- um lock de arquivo (`fcntl.flock`) serializa processos concorrentes, e cada
+  flush relê o arquivo e soma apenas os deltas locais, então nenhum processo
+  sobrescreve o uso registrado por outro;
+- dias mais antigos que `RETENTION_DAYS` são consolidados em totais mensais
+  (chave `YYYY-MM`).
 """
 
 from __future__ import annotations
 
+import atexit
+import copy
 import json
-from dataclasses import dataclass
-from datetime import date
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 from config.settings import config
 
+logger = logging.getLogger(__name__)
+
+# Atraso máximo entre registrar uso e persistir no arquivo
+WRITE_BEHIND_SECONDS = 5.0
+# Dias mantidos com granularidade diária; os anteriores viram totais mensais
+RETENTION_DAYS = 90
+
+UsageData = Dict[str, Dict[str, Dict[str, int]]]
+
 
 def _usage_file() -> Path:
-    """Retorna o caminho do arquivo de uso."""
-    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    """Retorna o caminho do arquivo de uso (o diretório é criado no flush)."""
     return config.DATA_DIR / "llm_usage.json"
 
 
-def _load() -> Dict[str, Dict[str, Dict[str, int]]]:
+def _today_key() -> str:
+    """Chave de data no formato YYYY-MM-DD (UTC simples é suficiente para uso pessoal)."""
+    return date.today().isoformat()
+
+
+def _read(path: Path) -> UsageData:
     """Carrega o arquivo de uso ou retorna estrutura vazia."""
-    path = _usage_file()
     if not path.exists():
         return {}
     try:
@@ -34,17 +66,172 @@ def _load() -> Dict[str, Dict[str, Dict[str, int]]]:
         return {}
 
 
-def _save(data: Dict[str, Dict[str, Dict[str, int]]]) -> None:
-    """Persiste o arquivo de uso."""
-    path = _usage_file()
+def _write_atomic(path: Path, data: UsageData) -> None:
+    """Grava em arquivo temporário no mesmo diretório e troca com os.replace."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
-def _today_key() -> str:
-    """Chave de data no formato YYYY-MM-DD (UTC simples é suficiente para uso pessoal)."""
-    return date.today().isoformat()
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Lock exclusivo entre processos (arquivo .lock ao lado do ledger)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _merge(target: UsageData, deltas: UsageData) -> None:
+    """Soma `deltas` em `target` (provider -> período -> contadores)."""
+    for provider, periods in deltas.items():
+        prov = target.setdefault(provider, {})
+        for period, counts in periods.items():
+            entry = prov.setdefault(period, {"input_tokens": 0, "output_tokens": 0})
+            entry["input_tokens"] = int(entry.get("input_tokens", 0)) + counts["input_tokens"]
+            entry["output_tokens"] = int(entry.get("output_tokens", 0)) + counts["output_tokens"]
+
+
+def _rollup(data: UsageData, today: Optional[date] = None) -> None:
+    """Consolida dias além de RETENTION_DAYS em totais mensais (YYYY-MM)."""
+    cutoff = ((today or date.today()) - timedelta(days=RETENTION_DAYS)).isoformat()
+    for provider, periods in data.items():
+        old_days = [p for p in periods if len(p) == 10 and p < cutoff]
+        if not old_days:
+            continue
+        monthly: UsageData = {provider: {}}
+        for day in old_days:
+            counts = periods.pop(day)
+            _merge(
+                monthly,
+                {provider: {day[:7]: {
+                    "input_tokens": int(counts.get("input_tokens", 0)),
+                    "output_tokens": int(counts.get("output_tokens", 0)),
+                }}},
+            )
+        _merge(data, monthly)
+
+
+class UsageLedger:
+    """Uso de tokens em memória com persistência write-behind em um arquivo JSON."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._data: Optional[UsageData] = None
+        self._pending: UsageData = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def _loaded(self) -> UsageData:
+        # Chamado com self._lock; só a primeira consulta lê o disco
+        if self._data is None:
+            self._data = _read(self.path)
+        return self._data
+
+    def add(self, provider: str, input_tokens: int, output_tokens: int) -> None:
+        delta = {provider: {_today_key(): {
+            "input_tokens": int(input_tokens),
+            "output_tokens": int(output_tokens),
+        }}}
+        with self._lock:
+            _merge(self._loaded(), delta)
+            _merge(self._pending, delta)
+            if self._timer is None:
+                self._timer = threading.Timer(WRITE_BEHIND_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def get(self, provider: str, day: Optional[str] = None) -> Tuple[int, int]:
+        with self._lock:
+            entry = self._loaded().get(provider, {}).get(day or _today_key(), {})
+            return int(entry.get("input_tokens", 0)), int(entry.get("output_tokens", 0))
+
+    def discard(self) -> None:
+        """Descarta o estado em memória e os deltas ainda não persistidos."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._data = None
+            self._pending = {}
+
+    def flush(self) -> None:
+        """Persiste os deltas pendentes (relê o arquivo sob lock e soma)."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return
+
+            try:
+                with _file_lock(self.path):
+                    disk = _read(self.path)
+                    _merge(disk, pending)
+                    _rollup(disk)
+                    _write_atomic(self.path, disk)
+            except OSError as e:
+                logger.error("Erro ao persistir uso de tokens: %s", e)
+                with self._lock:
+                    _merge(self._pending, pending)
+                return
+
+            # Memória passa a refletir o arquivo (inclui uso de outros processos)
+            # mais o que foi registrado durante o flush
+            with self._lock:
+                data = copy.deepcopy(disk)
+                _merge(data, self._pending)
+                self._data = data
+
+
+_ledgers: Dict[Path, UsageLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def _ledger() -> UsageLedger:
+    path = _usage_file()
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = _ledgers[path] = UsageLedger(path)
+        return ledger
+
+
+@atexit.register
+def flush() -> None:
+    """Persiste imediatamente o uso pendente de todos os ledgers."""
+    with _ledgers_lock:
+        ledgers = list(_ledgers.values())
+    for ledger in ledgers:
+        ledger.flush()
+
+
+def reset_cache() -> None:
+    """Descarta os ledgers em memória (o próximo acesso relê o arquivo)."""
+    with _ledgers_lock:
+        ledgers = list(_ledgers.values())
+        _ledgers.clear()
+    for ledger in ledgers:
+        ledger.discard()
 
 
 def add_usage(provider: str, input_tokens: int, output_tokens: int) -> None:
@@ -53,28 +240,14 @@ def add_usage(provider: str, input_tokens: int, output_tokens: int) -> None:
         return
     if input_tokens < 0 or output_tokens < 0:
         return
-
-    data = _load()
-    day = _today_key()
-
-    prov = data.setdefault(provider, {})
-    entry = prov.setdefault(day, {"input_tokens": 0, "output_tokens": 0})
-
-    entry["input_tokens"] += int(input_tokens)
-    entry["output_tokens"] += int(output_tokens)
-
-    _save(data)
+    _ledger().add(provider, input_tokens, output_tokens)
 
 
 def get_usage(provider: str) -> Tuple[int, int]:
     """Retorna (input_tokens, output_tokens) consumidos hoje por um provedor."""
     if not provider:
         return (0, 0)
-    data = _load()
-    day = _today_key()
-    prov = data.get(provider, {})
-    entry = prov.get(day, {})
-    return int(entry.get("input_tokens", 0)), int(entry.get("output_tokens", 0))
+    return _ledger().get(provider)
 
 
 def has_reached_daily_limit(provider: str, daily_limit_tokens: int) -> bool:
@@ -87,4 +260,3 @@ def has_reached_daily_limit(provider: str, daily_limit_tokens: int) -> bool:
     used_input, used_output = get_usage(provider)
     total = used_input + used_output
     return total >= int(daily_limit_tokens)
-
@@ -0,0 +1,228 @@
+"""Cache de análises de mídia endereçado por conteúdo
+
+Guarda transcrições, descrições de frames e resumos finais para que o mesmo
+vídeo do YouTube, a mesma foto/vídeo reencaminhado no Telegram ou o mesmo
+arquivo enviado de novo sejam respondidos na hora, sem baixar nada.
+
+Chaves (`media_key`):
+- `yt:<id do vídeo>`: ID normalizado a partir de qualquer formato de URL
+  (watch?v=, youtu.be/, shorts/, embed/), sem parâmetros;
+- `tg:<file_unique_id>`: identificador estável do Telegram (o mesmo arquivo
+  reencaminhado mantém o `file_unique_id`);
+- `sha256:<hash>`: hash dos bytes, para o mesmo conteúdo com outro ID.
+
+Cada entrada é um arquivo JSON em `config.DATA_DIR/media_cache` (escrita
+atômica: temporário + `os.replace`). O mtime do arquivo marca o último uso;
+quando o total passa de `max_bytes`, os menos usados recentemente são
+apagados (LRU por tamanho em disco).
+
+Uso:
+    key = youtube_key(url)
+    entry = await media_cache.get(key) or {}
+    ...
+    await media_cache.put(key, {"transcript": text, "summaries": {...}})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import config
+from workspace.storage.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo do cache em disco
+MAX_BYTES = 50 * 1024 * 1024
+
+_YOUTUBE_ID = re.compile(r"^[\w-]{11}$")
+
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """ID de 11 caracteres do vídeo em qualquer formato de URL do YouTube"""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    if host.endswith("youtu.be"):
+        candidate = parsed.path.strip("/").split("/")[0]
+    elif host.endswith("youtube.com"):
+        parts = [p for p in parsed.path.split("/") if p]
+        if parts and parts[0] in ("shorts", "embed", "live", "v") and len(parts) > 1:
+            candidate = parts[1]
+        else:
+            candidate = parse_qs(parsed.query).get("v", [""])[0]
+    else:
+        return None
+    return candidate if _YOUTUBE_ID.match(candidate) else None
+
+
+def youtube_key(url: str) -> Optional[str]:
+    video_id = youtube_video_id(url)
+    return f"yt:{video_id}" if video_id else None
+
+
+def telegram_key(file_unique_id: str) -> str:
+    return f"tg:{file_unique_id}"
+
+
+def content_key(data: Union[bytes, memoryview]) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+def file_content_key(path: Path, block_size: int = 1 << 20) -> str:
+    """`content_key` de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def variant(text: Optional[str]) -> str:
+    """Sufixo curto para resultados que dependem do pedido (prompt/legenda)"""
+    normalized = " ".join((text or "").casefold().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+class MediaCache:
+    """Entradas JSON em disco com despejo LRU por tamanho total"""
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = MAX_BYTES):
+        self._directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # arquivo -> (tamanho, último uso); carregado na primeira operação
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+        self._total = 0
+
+    @property
+    def directory(self) -> Path:
+        return self._directory or config.DATA_DIR / "media_cache"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        if self._index is None:
+            self._index = {}
+            if self.directory.exists():
+                for path in self.directory.glob("*.json"):
+                    stat = path.stat()
+                    self._index[path.name] = (stat.st_size, stat.st_mtime)
+            self._total = sum(size for size, _ in self._index.values())
+        return self._index
+
+    # -- operações síncronas (chamadas em thread pelos wrappers async) -----
+
+    def get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        with self._lock:
+            index = self._load_index()
+            if path.name not in index:
+                return None
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("media_cache_entrada_invalida key=%s error=%s", key, e)
+                self._remove(path)
+                return None
+            now = time.time()
+            os.utime(path, (now, now))
+            index[path.name] = (index[path.name][0], now)
+        return entry.get("value")
+
+    def put_sync(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._path(key)
+        payload = json.dumps({"key": key, "value": value}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            index = self._load_index()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp, path)
+            except OSError:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+            old_size = index.get(path.name, (0, 0.0))[0]
+            index[path.name] = (len(payload), time.time())
+            self._total += len(payload) - old_size
+            self._evict()
+
+    def _remove(self, path: Path) -> None:
+        size = self._index.pop(path.name, (0, 0.0))[0] if self._index is not None else 0
+        self._total -= size
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        if self._total <= self.max_bytes:
+            return
+        evicted = 0
+        for name, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            self._remove(self.directory / name)
+            evicted += 1
+        logger.info("media_cache_despejo entradas=%d bytes=%d", evicted, self._total)
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in list(self._load_index()):
+                self._remove(self.directory / name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._load_index()), "bytes": self._total}
+
+    # -- API assíncrona ---------------------------------------------------
+
+    async def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not key:
+            return None
+        kind = key.split(":", 1)[0]
+        try:
+            value = await asyncio.to_thread(self.get_sync, key)
+        except OSError as e:
+            logger.warning("media_cache_leitura_falhou key=%s error=%s", key, e)
+            value = None
+        metrics.incr("media_cache", kind=kind, result="hit" if value is not None else "miss")
+        return value
+
+    async def put(self, key: Optional[str], value: Dict[str, Any]) -> None:
+        if not key:
+            return
+        try:
+            await asyncio.to_thread(self.put_sync, key, value)
+        except OSError as e:
+            logger.warning("media_cache_escrita_falhou key=%s error=%s", key, e)
+
+
+# Instância global (limite configurável em MEDIA_CACHE_MAX_MB)
+media_cache = MediaCache(max_bytes=config.MEDIA_CACHE_MAX_MB * 1024 * 1024)
+
+
+__all__ = [
+    "MediaCache",
+    "content_key",
+    "file_content_key",
+    "media_cache",
+    "telegram_key",
+    "variant",
+    "youtube_key",
+    "youtube_video_id",
+]
@@ -0,0 +1,229 @@
+"""Buffer de métricas em memória com flush em lote para o SQLite.
+
+Contadores, histogramas e eventos são acumulados em memória (custo de um
+lock + operação em dict/deque, sem I/O) e gravados periodicamente na tabela
+`metrics` do SQLite por uma task asyncio, em uma única transação. A memória é
+limitada: cada histograma guarda as últimas `MAX_SAMPLES` amostras, o número
+de séries é limitado a `MAX_SERIES` e a fila de eventos a `MAX_EVENTS`
+(excedentes são descartados e contados em `metrics_dropped`).
+
+Uso:
+    from workspace.storage.metrics import metrics
+
+    metrics.incr("tool_calls", tool="web_search")
+    with metrics.timer("tool_latency_ms", tool="web_search"):
+        ...
+    metrics.percentiles("tool_latency_ms", tool="web_search")  # p50/p95/p99
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Amostras mantidas por histograma (janela deslizante para os percentis)
+MAX_SAMPLES = 1024
+# Séries distintas (nome + labels) por tipo
+MAX_SERIES = 500
+# Eventos aguardando flush
+MAX_EVENTS = 5000
+# Intervalo entre flushes para o SQLite
+FLUSH_INTERVAL_SECONDS = 30.0
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Percentil por nearest-rank sobre uma lista já ordenada"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class _Histogram:
+    __slots__ = ("samples", "count", "total", "pending")
+
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.pending = 0  # amostras desde o último flush
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.pending += 1
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": round(_percentile(ordered, 50), 3),
+            "p95": round(_percentile(ordered, 95), 3),
+            "p99": round(_percentile(ordered, 99), 3),
+        }
+
+
+class MetricsBuffer:
+    """Acumula métricas em memória; `flush` drena para o SQLite em lote"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[SeriesKey, int] = {}
+        self._pending_counters: Dict[SeriesKey, int] = {}
+        self._histograms: Dict[SeriesKey, _Histogram] = {}
+        self._events: Deque[Tuple[str, Optional[Dict]]] = deque()
+        self._dropped = 0
+        self._task: Optional[asyncio.Task] = None
+        self._store = None
+
+    # -- caminho quente (sem I/O) ------------------------------------------
+
+    def incr(self, name: str, value: int = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            if key not in self._counters and len(self._counters) >= MAX_SERIES:
+                self._dropped += 1
+                return
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._pending_counters[key] = self._pending_counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                if len(self._histograms) >= MAX_SERIES:
+                    self._dropped += 1
+                    return
+                hist = self._histograms[key] = _Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Mede a duração do bloco em ms (funciona também dentro de corrotinas)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, **labels)
+
+    def event(self, name: str, data: Optional[Dict] = None) -> None:
+        with self._lock:
+            if len(self._events) >= MAX_EVENTS:
+                self._dropped += 1
+                return
+            self._events.append((name, data))
+
+    # -- leitura ----------------------------------------------------------
+
+    def counter(self, name: str, **labels: Any) -> int:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def percentiles(self, name: str, **labels: Any) -> Dict[str, float]:
+        """p50/p95/p99 (e count/avg) de um histograma; vazio se não existir"""
+        with self._lock:
+            hist = self._histograms.get(_key(name, labels))
+            return hist.summary() if hist else {}
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Any]:
+        """Estado atual: contadores e resumo dos histogramas, por série"""
+        with self._lock:
+            counters = {
+                self._label(key): value
+                for key, value in self._counters.items()
+                if key[0].startswith(prefix)
+            }
+            histograms = {
+                self._label(key): hist.summary()
+                for key, hist in self._histograms.items()
+                if key[0].startswith(prefix)
+            }
+            return {"counters": counters, "histograms": histograms, "dropped": self._dropped}
+
+    @staticmethod
+    def _label(key: SeriesKey) -> str:
+        name, labels = key
+        if not labels:
+            return name
+        return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+    # -- flush ------------------------------------------------------------
+
+    def drain(self) -> List[Tuple[str, Optional[Dict]]]:
+        """Retira tudo que está pendente como linhas (event, data) da tabela metrics"""
+        with self._lock:
+            rows: List[Tuple[str, Optional[Dict]]] = list(self._events)
+            self._events.clear()
+            for (name, labels), value in self._pending_counters.items():
+                rows.append(("counter", {"name": name, "labels": dict(labels), "value": value}))
+            self._pending_counters.clear()
+            for (name, labels), hist in self._histograms.items():
+                if hist.pending:
+                    summary = hist.summary()
+                    summary["window"] = hist.pending
+                    rows.append(("histogram", {"name": name, "labels": dict(labels), **summary}))
+                    hist.pending = 0
+            if self._dropped:
+                rows.append(("metrics_dropped", {"value": self._dropped}))
+                self._dropped = 0
+        return rows
+
+    async def flush(self, store=None) -> int:
+        """Grava as métricas pendentes no store (AsyncSQLiteStore) em um único commit"""
+        store = store or self._store
+        if store is None:
+            return 0
+        rows = self.drain()
+        if rows:
+            try:
+                await store.log_metrics(rows)
+            except Exception as e:
+                logger.warning("metrics_flush_falhou linhas=%s error=%s", len(rows), e)
+                return 0
+        return len(rows)
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, store, interval: float = FLUSH_INTERVAL_SECONDS) -> None:
+        """Inicia o flush periódico (chamar com o event loop rodando)"""
+        self._store = store
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop(interval))
+
+    async def stop(self) -> None:
+        """Para o flush periódico e grava o que restou no buffer"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Instância global (compartilhada por handlers, tools e agent)
+metrics = MetricsBuffer()
+
+
+__all__ = ["MetricsBuffer", "metrics"]
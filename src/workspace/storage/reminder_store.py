@@ -0,0 +1,238 @@
+"""Armazenamento durável de lembretes (SQLite)
+
+Substitui o `reminders.json` reescrito inteiro a cada criação/envio (e que
+podia ser sobrescrito por duas escritas concorrentes). Cada operação é uma
+transação curta:
+
+- `add`: um INSERT (O(log n) no índice);
+- `claim`: marca o lembrete como enviado só se ainda estiver pendente
+  (UPDATE ... WHERE sent_at IS NULL), então dois processos nunca entregam o
+  mesmo lembrete duas vezes;
+- `schedule`: pares (due_at, id) dos pendentes, para montar o heap do
+  agendador na inicialização.
+
+A tabela `outbox` guarda uma entrega por canal (email, Telegram), criada na
+mesma transação do `claim`: se o bot cair entre disparar e entregar, a
+entrega continua pendente e é retomada na próxima inicialização. Cada
+entrega é reservada por um prazo (`lease_due`) antes de ser enviada.
+
+`due_at` é epoch em segundos (UTC). Arquivos `reminders.json` antigos são
+importados uma vez por `import_legacy` e renomeados para `.migrated`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    display TEXT NOT NULL,
+    chat_id INTEGER,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders (due_at) WHERE sent_at IS NULL;
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reminder_id INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    delivered_at REAL,
+    failed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_next ON outbox (next_attempt_at)
+    WHERE delivered_at IS NULL AND failed_at IS NULL;
+"""
+
+_OUTBOX_COLUMNS = "id, reminder_id, channel, payload, due_at, attempts"
+
+_COLUMNS = "id, text, due_at, display, chat_id"
+
+
+def _row(row: Tuple) -> Dict:
+    return dict(zip(("id", "text", "due_at", "display", "chat_id"), row))
+
+
+class ReminderStore:
+    """Lembretes em SQLite (WAL); acesso serializado por lock"""
+
+    def __init__(self, db_path: str):
+        self.db_path = os.path.expanduser(str(db_path))
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def add(self, text: str, due_at: float, display: str, chat_id: Optional[int] = None) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO reminders (text, due_at, display, chat_id) VALUES (?, ?, ?, ?)",
+                (text, due_at, display, chat_id),
+            )
+            return cursor.lastrowid
+
+    def get(self, reminder_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM reminders WHERE id = ? AND sent_at IS NULL", (reminder_id,)
+            ).fetchone()
+        return _row(row) if row else None
+
+    def pending(self, after: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Pendentes em ordem de horário (opcionalmente só os futuros)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM reminders WHERE sent_at IS NULL AND due_at > ? "
+                "ORDER BY due_at LIMIT ?",
+                (after if after is not None else float("-inf"), limit),
+            ).fetchall()
+        return [_row(row) for row in rows]
+
+    def schedule(self) -> List[Tuple[float, int]]:
+        """(due_at, id) de todos os pendentes, para o heap do agendador"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT due_at, id FROM reminders WHERE sent_at IS NULL"
+            ).fetchall()
+
+    def claim(self, reminder_id: int, deliveries: Sequence[Tuple[str, Dict]] = ()) -> bool:
+        """Marca como enviado e enfileira as entregas na outbox (mesma transação)
+
+        False se já tinha sido enviado (outro processo): nada é enfileirado.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE reminders SET sent_at = CURRENT_TIMESTAMP WHERE id = ? AND sent_at IS NULL",
+                (reminder_id,),
+            )
+            if cursor.rowcount != 1:
+                return False
+            if deliveries:
+                (due_at,) = self._conn.execute(
+                    "SELECT due_at FROM reminders WHERE id = ?", (reminder_id,)
+                ).fetchone()
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT INTO outbox (reminder_id, channel, payload, due_at, next_attempt_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (reminder_id, channel, json.dumps(payload, ensure_ascii=False), due_at, now)
+                        for channel, payload in deliveries
+                    ],
+                )
+            return True
+
+    # -- outbox (entregas pendentes por canal) -----------------------------
+
+    def lease_due(self, now: float, limit: int, lease_seconds: float) -> List[Dict]:
+        """Entregas vencidas, reservadas por `lease_seconds` (outro processo não as pega)"""
+        with self._lock, self._conn:
+            # Trava de escrita já no SELECT: dois processos não reservam a mesma entrega
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                f"SELECT {_OUTBOX_COLUMNS} FROM outbox "
+                "WHERE delivered_at IS NULL AND failed_at IS NULL AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + lease_seconds, row[0]) for row in rows],
+            )
+        return [
+            dict(zip(("id", "reminder_id", "channel", "payload", "due_at", "attempts"), row),
+                 payload=json.loads(row[3]))
+            for row in rows
+        ]
+
+    def next_delivery_at(self) -> Optional[float]:
+        with self._lock:
+            (value,) = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE delivered_at IS NULL AND failed_at IS NULL"
+            ).fetchone()
+        return value
+
+    def delivered(self, delivery_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET delivered_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (time.time(), delivery_id),
+            )
+
+    def retry_later(self, delivery_id: int, next_attempt_at: float, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (next_attempt_at, error, delivery_id),
+            )
+
+    def give_up(self, delivery_id: int, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, failed_at = ?, last_error = ? WHERE id = ?",
+                (time.time(), error, delivery_id),
+            )
+
+    def outbox_counts(self) -> Dict[str, int]:
+        """Entregas por estado: pending, delivered, failed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT SUM(delivered_at IS NULL AND failed_at IS NULL), "
+                "SUM(delivered_at IS NOT NULL), SUM(failed_at IS NOT NULL) FROM outbox"
+            ).fetchone()
+        return dict(zip(("pending", "delivered", "failed"), (value or 0 for value in row)))
+
+    def import_legacy(self, paths: Iterable[Path]) -> int:
+        """Importa `reminders.json` antigos (uma vez: o arquivo é renomeado)"""
+        imported = 0
+        for path in paths:
+            path = Path(path)
+            if not path.exists():
+                continue
+            try:
+                reminders = json.loads(path.read_text(encoding="utf-8") or "[]")
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("lembretes_legado_invalido path=%s error=%s", path, e)
+                continue
+            rows = []
+            for reminder in reminders:
+                try:
+                    due = datetime.fromisoformat(reminder["timestamp"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                rows.append((reminder.get("text", ""), due.timestamp(), reminder.get("datetime", "")))
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO reminders (text, due_at, display) VALUES (?, ?, ?)", rows
+                )
+            path.rename(path.with_name(path.name + ".migrated"))
+            imported += len(rows)
+            logger.info("lembretes_legado_importados path=%s total=%d", path, len(rows))
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+__all__ = ["ReminderStore"]
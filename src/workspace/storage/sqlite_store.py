@@ -1,80 +1,372 @@
-"""SQLite Store - Persistência por chat (histórico até limpeza pelo usuário)"""
+"""SQLite Store - Persistência por chat (histórico até limpeza pelo usuário)
+
+Uma única conexão de longa duração (WAL, synchronous=NORMAL, statements em
+cache) protegida por lock. Para uso no event loop, `AsyncSQLiteStore` expõe a
+mesma API como corrotinas executadas numa thread dedicada do banco.
+
+O schema é versionado via `PRAGMA user_version`: cada migração em
+`MIGRATIONS` roda uma única vez, dentro de uma transação. Com
+`retain_per_chat > 0`, as mensagens mais antigas de cada chat são movidas em
+lote para `conversations_archive` (JSON comprimido com zlib).
+"""
+import asyncio
+import functools
 import sqlite3
 import json
 import os
-from typing import List, Dict, Optional
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Quantidade de statements preparados mantidos em cache pela conexão
+STATEMENT_CACHE_SIZE = 128
+
+# Quantas mensagens além do limite de retenção acumulam antes de arquivar
+# (arquiva em lote em vez de a cada turno)
+ARCHIVE_BATCH = 200
+
+
+def _migrate_v1(conn: sqlite3.Connection):
+    """Schema original (bancos criados antes das migrações já o possuem)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event TEXT NOT NULL,
+            data TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    try:
+        conn.execute("ALTER TABLE conversations ADD COLUMN chat_id INTEGER")
+    except sqlite3.OperationalError:
+        pass
+
+
+def _migrate_v2(conn: sqlite3.Connection):
+    """Tipos explícitos (TEXT em vez de DATETIME) e índice (chat_id, id)
+
+    A tabela é recriada porque SQLite não altera tipo de coluna; isso também
+    normaliza a ordem das colunas de bancos que receberam chat_id via ALTER.
+    """
+    conn.execute("""
+        CREATE TABLE conversations_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        INSERT INTO conversations_v2 (id, chat_id, role, content, timestamp)
+        SELECT id, chat_id, role, content, COALESCE(timestamp, CURRENT_TIMESTAMP)
+        FROM conversations
+    """)
+    conn.execute("DROP TABLE conversations")
+    conn.execute("ALTER TABLE conversations_v2 RENAME TO conversations")
+    # get_history: WHERE chat_id = ? ORDER BY id DESC LIMIT ? vira busca no índice
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversations_chat_id_id ON conversations (chat_id, id)"
+    )
+
+
+def _migrate_v3(conn: sqlite3.Connection):
+    """Tabela fria para turnos antigos (retenção por chat)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            message_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archive_chat_id_last_id "
+        "ON conversations_archive (chat_id, last_id)"
+    )
+
+
+# (versão, migração) em ordem crescente; nunca altere uma migração já publicada
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _chat_filter(chat_id: Optional[int]) -> Tuple[str, tuple]:
+    """Cláusula WHERE por chat (chat_id NULL = histórico sem chat)"""
+    if chat_id is not None:
+        return "chat_id = ?", (chat_id,)
+    return "chat_id IS NULL", ()
+
 
 class SQLiteStore:
-    def __init__(self, db_path: str = "~/.moltbot/moltbot.db"):
+    def __init__(self, db_path: str = "~/.moltbot/moltbot.db", retain_per_chat: int = 0):
         self.db_path = os.path.expanduser(db_path)
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self._init_db()
-
-    def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chat_id INTEGER,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event TEXT NOT NULL,
-                data TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        try:
-            conn.execute("ALTER TABLE conversations ADD COLUMN chat_id INTEGER")
-        except sqlite3.OperationalError:
-            pass
-        conn.commit()
-        conn.close()
+        # Mensagens mantidas na tabela quente por chat (<= 0 = sem limite)
+        self.retain_per_chat = retain_per_chat
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._migrate()
 
-    def add_message(self, role: str, content: str, chat_id: Optional[int] = None):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "INSERT INTO conversations (chat_id, role, content) VALUES (?, ?, ?)",
-            (chat_id, role, content),
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,  # acesso serializado por self._lock
+            cached_statements=STATEMENT_CACHE_SIZE,
+            timeout=10.0,
         )
-        conn.commit()
-        conn.close()
+        # WAL: leitores não bloqueiam o escritor; NORMAL: fsync só no checkpoint
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
 
-    def get_history(self, limit: int = 20, chat_id: Optional[int] = None) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        if chat_id is not None:
-            cursor = conn.execute(
-                "SELECT role, content FROM conversations WHERE chat_id = ? ORDER BY id DESC LIMIT ?",
-                (chat_id, limit),
+    @property
+    def schema_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self):
+        """Aplica as migrações pendentes, cada uma em sua própria transação"""
+        with self._lock:
+            current = self.schema_version
+            for version, migration in MIGRATIONS:
+                if version <= current:
+                    continue
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    migration(self._conn)
+                    self._conn.execute(f"PRAGMA user_version = {version}")
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+
+    def add_message(self, role: str, content: str, chat_id: Optional[int] = None):
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "INSERT INTO conversations (chat_id, role, content) VALUES (?, ?, ?)",
+                (chat_id, role, content),
             )
-        else:
-            cursor = conn.execute(
-                "SELECT role, content FROM conversations WHERE chat_id IS NULL ORDER BY id DESC LIMIT ?",
-                (limit,),
+            self._enforce_retention(chat_id)
+
+    def add_turn(
+        self,
+        user_content: str,
+        assistant_content: str,
+        chat_id: Optional[int] = None,
+        event: Optional[str] = None,
+        event_data: Dict = None,
+    ):
+        """Grava pergunta + resposta (e métrica opcional) em um único commit"""
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                "INSERT INTO conversations (chat_id, role, content) VALUES (?, ?, ?)",
+                [
+                    (chat_id, "user", user_content),
+                    (chat_id, "assistant", assistant_content),
+                ],
             )
-        messages = [{"role": row[0], "content": row[1]} for row in cursor.fetchall()]
-        conn.close()
+            if event:
+                conn.execute(
+                    "INSERT INTO metrics (event, data) VALUES (?, ?)",
+                    (event, json.dumps(event_data) if event_data else None),
+                )
+            self._enforce_retention(chat_id)
+
+    def get_history(self, limit: int = 20, chat_id: Optional[int] = None) -> List[Dict]:
+        where, params = _chat_filter(chat_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT role, content FROM conversations WHERE {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        messages = [{"role": row[0], "content": row[1]} for row in rows]
         return list(reversed(messages))
 
     def clear_history(self, chat_id: Optional[int] = None):
-        conn = sqlite3.connect(self.db_path)
-        if chat_id is not None:
-            conn.execute("DELETE FROM conversations WHERE chat_id = ?", (chat_id,))
-        else:
-            conn.execute("DELETE FROM conversations WHERE chat_id IS NULL")
-        conn.commit()
-        conn.close()
+        where, params = _chat_filter(chat_id)
+        with self._lock, self._conn as conn:
+            conn.execute(f"DELETE FROM conversations WHERE {where}", params)
+            conn.execute(f"DELETE FROM conversations_archive WHERE {where}", params)
+
+    def _enforce_retention(self, chat_id: Optional[int]):
+        """Arquiva quando o chat passa de retain_per_chat + ARCHIVE_BATCH mensagens
+
+        Roda dentro da transação da escrita; a checagem é uma busca no índice
+        (chat_id, id), sem contar as linhas do chat.
+        """
+        if self.retain_per_chat <= 0:
+            return
+        where, params = _chat_filter(chat_id)
+        over = self._conn.execute(
+            f"SELECT 1 FROM conversations WHERE {where} ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (*params, self.retain_per_chat + ARCHIVE_BATCH - 1),
+        ).fetchone()
+        if over:
+            self._archive(chat_id, self.retain_per_chat)
+
+    def _archive(self, chat_id: Optional[int], keep: int) -> int:
+        where, params = _chat_filter(chat_id)
+        cutoff = None  # id da mensagem mais antiga que permanece na tabela quente
+        if keep > 0:
+            row = self._conn.execute(
+                f"SELECT id FROM conversations WHERE {where} ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (*params, keep - 1),
+            ).fetchone()
+            if row is None:
+                return 0
+            cutoff = row[0]
+
+        id_clause = " AND id < ?" if cutoff is not None else ""
+        id_params = (cutoff,) if cutoff is not None else ()
+        rows = self._conn.execute(
+            f"SELECT id, role, content, timestamp FROM conversations "
+            f"WHERE {where}{id_clause} ORDER BY id",
+            (*params, *id_params),
+        ).fetchall()
+        if not rows:
+            return 0
+
+        payload = zlib.compress(
+            json.dumps(
+                [{"role": r[1], "content": r[2], "timestamp": r[3]} for r in rows],
+                ensure_ascii=False,
+            ).encode("utf-8")
+        )
+        self._conn.execute(
+            "INSERT INTO conversations_archive (chat_id, first_id, last_id, message_count, payload) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (chat_id, rows[0][0], rows[-1][0], len(rows), payload),
+        )
+        self._conn.execute(
+            f"DELETE FROM conversations WHERE {where}{id_clause}", (*params, *id_params)
+        )
+        return len(rows)
+
+    def archive_old_messages(self, chat_id: Optional[int] = None, keep: Optional[int] = None) -> int:
+        """
+        Move as mensagens antigas do chat para conversations_archive
+
+        Args:
+            chat_id: Chat a arquivar (None = histórico sem chat)
+            keep: Mensagens recentes mantidas (padrão: retain_per_chat; 0 = arquiva todas)
+
+        Returns:
+            Quantidade de mensagens arquivadas
+        """
+        keep = self.retain_per_chat if keep is None else keep
+        with self._lock, self._conn:
+            return self._archive(chat_id, keep)
+
+    def get_archived_history(self, chat_id: Optional[int] = None) -> List[Dict]:
+        """Mensagens arquivadas do chat, da mais antiga para a mais recente"""
+        where, params = _chat_filter(chat_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM conversations_archive WHERE {where} ORDER BY last_id",
+                params,
+            ).fetchall()
+        messages: List[Dict] = []
+        for (payload,) in rows:
+            messages.extend(json.loads(zlib.decompress(payload).decode("utf-8")))
+        return messages
 
     def log_metric(self, event: str, data: Dict = None):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "INSERT INTO metrics (event, data) VALUES (?, ?)",
-            (event, json.dumps(data) if data else None),
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "INSERT INTO metrics (event, data) VALUES (?, ?)",
+                (event, json.dumps(data) if data else None),
+            )
+
+    def log_metrics(self, rows: List[Tuple[str, Optional[Dict]]]):
+        """Grava um lote de métricas (event, data) em um único commit"""
+        with self._lock, self._conn as conn:
+            conn.executemany(
+                "INSERT INTO metrics (event, data) VALUES (?, ?)",
+                [(event, json.dumps(data, ensure_ascii=False) if data else None) for event, data in rows],
+            )
+
+    def close(self):
+        """Fecha a conexão (checkpoint do WAL acontece no close)"""
+        with self._lock:
+            self._conn.close()
+
+
+class AsyncSQLiteStore:
+    """Fachada assíncrona do SQLiteStore
+
+    Todas as operações rodam em uma única thread dedicada ao banco, então o
+    event loop nunca espera por disco e a ordem das escritas é preservada.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        self.store = store or SQLiteStore()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def add_message(self, role: str, content: str, chat_id: Optional[int] = None):
+        return await self._run(self.store.add_message, role, content, chat_id=chat_id)
+
+    async def add_turn(
+        self,
+        user_content: str,
+        assistant_content: str,
+        chat_id: Optional[int] = None,
+        event: Optional[str] = None,
+        event_data: Dict = None,
+    ):
+        return await self._run(
+            self.store.add_turn,
+            user_content,
+            assistant_content,
+            chat_id=chat_id,
+            event=event,
+            event_data=event_data,
         )
-        conn.commit()
-        conn.close()
+
+    async def get_history(self, limit: int = 20, chat_id: Optional[int] = None) -> List[Dict]:
+        return await self._run(self.store.get_history, limit=limit, chat_id=chat_id)
+
+    async def clear_history(self, chat_id: Optional[int] = None):
+        return await self._run(self.store.clear_history, chat_id=chat_id)
+
+    async def log_metric(self, event: str, data: Dict = None):
+        return await self._run(self.store.log_metric, event, data)
+
+    async def log_metrics(self, rows: List[Tuple[str, Optional[Dict]]]):
+        return await self._run(self.store.log_metrics, rows)
+
+    async def archive_old_messages(self, chat_id: Optional[int] = None, keep: Optional[int] = None) -> int:
+        return await self._run(self.store.archive_old_messages, chat_id=chat_id, keep=keep)
+
+    async def get_archived_history(self, chat_id: Optional[int] = None) -> List[Dict]:
+        return await self._run(self.store.get_archived_history, chat_id=chat_id)
+
+    def close(self):
+        """Aguarda as escritas pendentes e fecha a conexão"""
+        self._executor.shutdown(wait=True)
+        self.store.close()
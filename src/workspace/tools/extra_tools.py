@@ -2,11 +2,15 @@
 
 import os
 import io
-import requests
+import asyncio
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
 
+from utils.cpu_pool import cpu_pool
+from utils.http_pool import http_pool
+from workspace.core.tool_cache import CachePolicy, cached
+
 
 def get_data_dir() -> Path:
     """Retorna o diretório de dados persistente"""
@@ -16,14 +20,20 @@ def get_data_dir() -> Path:
 
 
 # 1. OCR - Extrair texto de imagens (import tardio para não quebrar o bot se pytesseract/pandas falharem)
+def _ocr_image(image_path: str) -> str:
+    """Tesseract na imagem (roda no pool de processos)"""
+    from PIL import Image
+    import pytesseract
+
+    with Image.open(image_path) as img:
+        return pytesseract.image_to_string(img, lang="por+eng").strip()
+
+
 async def ocr_extract(image_path: str) -> dict:
     """Extrai texto de imagem usando Tesseract"""
     try:
-        from PIL import Image
-        import pytesseract
-        img = Image.open(image_path)
-        text = pytesseract.image_to_string(img, lang="por+eng")
-        return {"success": True, "text": text.strip()}
+        text = await cpu_pool.run(_ocr_image, image_path)
+        return {"success": True, "text": text}
     except ImportError as e:
         return {"success": False, "error": f"OCR não disponível (dependências): {e}"}
     except Exception as e:
@@ -38,8 +48,11 @@ async def get_weather(city: str) -> dict:
         if not api_key:
             return {"success": False, "error": "API key não configurada"}
 
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric&lang=pt_br"
-        response = requests.get(url, timeout=10)
+        response = await http_pool.get(
+            "https://api.openweathermap.org/data/2.5/weather",
+            params={"q": city, "appid": api_key, "units": "metric", "lang": "pt_br"},
+            timeout=10,
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -66,8 +79,11 @@ async def get_news(topic: str = "brasil", limit: int = 5) -> dict:
         if not api_key:
             return {"success": False, "error": "API key não configurada"}
 
-        url = f"https://newsapi.org/v2/everything?q={topic}&language=pt&pageSize={limit}&apiKey={api_key}"
-        response = requests.get(url, timeout=10)
+        response = await http_pool.get(
+            "https://newsapi.org/v2/everything",
+            params={"q": topic, "language": "pt", "pageSize": limit, "apiKey": api_key},
+            timeout=10,
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -88,14 +104,12 @@ async def get_news(topic: str = "brasil", limit: int = 5) -> dict:
         return {"success": False, "error": str(e)}
 
 
-# 5. Lembretes - Arquivo JSON (sem SQLite)
+# 5. Lembretes - agendador em heap + store SQLite (reminder_notifier)
 async def create_reminder(text: str, datetime_str: str) -> dict:
     """Cria um lembrete"""
     try:
         from datetime import datetime
         import pytz
-        import json
-        import os
 
         # Timezone de Brasília
         tz_brasilia = pytz.timezone("America/Sao_Paulo")
@@ -120,27 +134,11 @@ async def create_reminder(text: str, datetime_str: str) -> dict:
         # Adiciona timezone
         dt = tz_brasilia.localize(dt) if dt.tzinfo is None else dt
 
-        reminder_data = {
-            "text": text,
-            "datetime": dt.strftime("%d/%m/%Y às %H:%M"),
-            "timestamp": dt.isoformat(),
-            "created_at": datetime.now(tz_brasilia).strftime("%d/%m/%Y às %H:%M"),
-        }
-
-        # Salva em arquivo JSON persistente
-        reminders_file = get_data_dir() / "reminders.json"
-        reminders = []
-
-        if reminders_file.exists():
-            with open(reminders_file, "r") as f:
-                reminders = json.load(f)
+        from workspace.tools.reminder_notifier import notifier
 
-        reminders.append(reminder_data)
+        reminder_data = await notifier.add_reminder(text, dt)
+        reminder_data["created_at"] = datetime.now(tz_brasilia).strftime("%d/%m/%Y às %H:%M")
 
-        with open(reminders_file, "w") as f:
-            json.dump(reminders, f, indent=2)
-
-        # NÃO salva no SQLite - retorna direto
         return {
             "success": True,
             "message": f"✅ Lembrete criado para {reminder_data['datetime']}",
@@ -151,21 +149,33 @@ async def create_reminder(text: str, datetime_str: str) -> dict:
 
 
 # 7. Mapas - Calcular distância
+# Coordenadas de cidades não mudam: cache permanente (não encontrada: 1 h)
+@cached(CachePolicy(ttl=None, negative_ttl=3600, max_entries=5000,
+                    is_negative=lambda coords: coords[0] is None))
+async def geocode_city(city: str) -> tuple:
+    """Latitude/longitude de uma cidade via Nominatim (OpenStreetMap)
+
+    (None, None) só quando o Nominatim responde sem resultados; 429, 5xx e
+    erros de rede levantam exceção e não entram no cache.
+    """
+    response = await http_pool.get(
+        "https://nominatim.openstreetmap.org/search",
+        params={"q": city, "format": "json", "limit": 1},
+        timeout=10,
+    )
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None, None
+    return float(results[0]["lat"]), float(results[0]["lon"])
+
+
 async def calculate_distance(city1: str, city2: str) -> dict:
     """Calcula distância entre duas cidades"""
     try:
         # Usa Nominatim (OpenStreetMap) para geocoding
-        def get_coords(city):
-            url = f"https://nominatim.openstreetmap.org/search?q={city}&format=json&limit=1"
-            headers = {"User-Agent": "MoltBot/1.0"}
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200 and response.json():
-                data = response.json()[0]
-                return float(data["lat"]), float(data["lon"])
-            return None, None
-
-        lat1, lon1 = get_coords(city1)
-        lat2, lon2 = get_coords(city2)
+        lat1, lon1 = await geocode_city(city1)
+        lat2, lon2 = await geocode_city(city2)
 
         if not lat1 or not lat2:
             return {"success": False, "error": "Cidade não encontrada"}
@@ -197,6 +207,14 @@ async def calculate_distance(city1: str, city2: str) -> dict:
 # 8. Gráficos Profissionais
 async def create_chart(data: dict, chart_type: str = "bar") -> dict:
     """Cria gráfico profissional a partir de dados"""
+    try:
+        return await cpu_pool.run(_render_chart, data, chart_type)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def _render_chart(data: dict, chart_type: str) -> dict:
+    """Renderiza o gráfico com matplotlib (roda no pool de processos)"""
     try:
         import tempfile
         import numpy as np
@@ -339,25 +357,42 @@ async def create_chart(data: dict, chart_type: str = "bar") -> dict:
 
 
 # 11. Geração de Imagens AI
+REPLICATE_PREDICTIONS_URL = "https://api.replicate.com/v1/predictions"
+SDXL_VERSION = "39ed52f2a78e934b3ba6e2a89f5b1c712de7dfea535525255b1aa35c5565e08b"
+
+
 async def generate_image(prompt: str) -> dict:
-    """Gera imagem usando Stable Diffusion via Replicate"""
+    """Gera imagem usando Stable Diffusion via Replicate (API HTTP)"""
     try:
         api_key = os.getenv("REPLICATE_API_KEY")
         if not api_key:
             return {"success": False, "error": "API key não configurada"}
 
-        import replicate
-
-        output = replicate.run(
-            "stability-ai/sdxl:39ed52f2a78e934b3ba6e2a89f5b1c712de7dfea535525255b1aa35c5565e08b",
-            input={"prompt": prompt},
+        headers = {"Authorization": f"Bearer {api_key}", "Prefer": "wait"}
+        # Sem retry no POST: cada tentativa criaria uma nova predição
+        response = await http_pool.post(
+            REPLICATE_PREDICTIONS_URL,
+            headers=headers,
+            json={"version": SDXL_VERSION, "input": {"prompt": prompt}},
+            retries=1,
+            timeout=90,
         )
+        prediction = response.json()
+
+        # "Prefer: wait" segura até ~60s; se ainda estiver rodando, consulta
+        for _ in range(60):
+            if prediction.get("status") not in ("starting", "processing"):
+                break
+            await asyncio.sleep(2)
+            response = await http_pool.get(prediction["urls"]["get"], headers=headers)
+            prediction = response.json()
 
         # Output é uma lista de URLs
-        if output and len(output) > 0:
+        output = prediction.get("output")
+        if prediction.get("status") == "succeeded" and output:
             return {"success": True, "image_url": output[0]}
         else:
-            return {"success": False, "error": "Nenhuma imagem gerada"}
+            return {"success": False, "error": prediction.get("error") or "Nenhuma imagem gerada"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
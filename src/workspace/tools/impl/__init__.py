@@ -1,13 +1,14 @@
 """
 Web Search usando DuckDuckGo Instant Answer API (Grátis, sem cadastro)
-Módulo refatorado para uso como função Python pura
+Usa o pool HTTP compartilhado (utils.http_pool)
 """
 
-import requests
 import json
 
+from utils.http_pool import http_pool
 
-def search_duckduckgo(query: str) -> dict:
+
+async def search_duckduckgo(query: str) -> dict:
     """
     Busca usando DuckDuckGo Instant Answer API
 
@@ -21,7 +22,7 @@ def search_duckduckgo(query: str) -> dict:
         url = "https://api.duckduckgo.com/"
         params = {"q": query, "format": "json", "no_html": 1, "skip_disambig": 1}
 
-        response = requests.get(url, params=params, timeout=10)
+        response = await http_pool.get(url, params=params, timeout=10)
         data = response.json()
 
         results = []
@@ -72,7 +73,7 @@ async def search_ddg(query: str, max_results: int = 5) -> dict:
         dict no formato {"success": bool, "results": list} ou {"success": bool, "error": str}
     """
     try:
-        result = search_duckduckgo(query)
+        result = await search_duckduckgo(query)
 
         if "error" in result and result["error"]:
             return {"success": False, "error": result["error"]}
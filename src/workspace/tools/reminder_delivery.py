@@ -0,0 +1,133 @@
+"""Entrega de lembretes: outbox persistente, canais em paralelo e retry com backoff
+
+Cada lembrete disparado gera uma entrega por canal na tabela `outbox` do
+`ReminderStore` (mesma transação que marca o lembrete como enviado). O
+`DeliveryQueue` envia as entregas vencidas em paralelo (email e Telegram do
+mesmo lembrete não esperam um pelo outro) e, em falha, reagenda com backoff
+exponencial e jitter até `max_attempts`; depois disso a entrega é marcada
+como falha definitiva. Entregas pendentes sobrevivem a reinícios do bot.
+
+Os canais são corrotinas `sender(payload)` que levantam exceção em falha.
+
+Métricas: `reminder_delivery_ms{channel}`, `reminder_lag_ms{channel}` (do
+horário do lembrete até a entrega), `reminder_delivery_failures{channel}` e
+`reminder_delivery_dead{channel}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from workspace.storage.metrics import metrics
+from workspace.storage.reminder_store import ReminderStore
+
+logger = logging.getLogger(__name__)
+
+Sender = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Entregas simultâneas
+MAX_CONCURRENT = 4
+# Entregas reservadas por rodada
+BATCH_SIZE = 32
+# Tentativas antes de desistir e backoff entre elas (segundos)
+MAX_ATTEMPTS = 6
+BASE_DELAY_SECONDS = 30.0
+MAX_DELAY_SECONDS = 3600.0
+# Tempo máximo de um envio e prazo da reserva (maior que o envio)
+SEND_TIMEOUT_SECONDS = 30.0
+LEASE_SECONDS = 120.0
+# Sono máximo do despachante (segundos)
+MAX_SLEEP_SECONDS = 300.0
+
+
+def backoff_delay(attempt: int, base: float = BASE_DELAY_SECONDS, cap: float = MAX_DELAY_SECONDS) -> float:
+    """Atraso antes da tentativa `attempt + 1` (exponencial, ±20% de jitter)"""
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DeliveryQueue:
+    """Despacha as entregas da outbox pelos canais registrados"""
+
+    def __init__(
+        self,
+        store: ReminderStore,
+        senders: Dict[str, Sender],
+        max_concurrent: int = MAX_CONCURRENT,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_delay: float = BASE_DELAY_SECONDS,
+    ):
+        self.store = store
+        self.senders = senders
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        """Novas entregas na outbox: despacha sem esperar o próximo ciclo"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _send(self, delivery: Dict[str, Any]) -> None:
+        channel = delivery["channel"]
+        attempt = delivery["attempts"] + 1
+        async with self._slots:
+            start = time.perf_counter()
+            try:
+                sender = self.senders.get(channel)
+                if sender is None:
+                    raise LookupError(f"canal desconhecido: {channel}")
+                await asyncio.wait_for(sender(delivery["payload"]), SEND_TIMEOUT_SECONDS)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                metrics.incr("reminder_delivery_failures", channel=channel)
+                if attempt >= self.max_attempts:
+                    metrics.incr("reminder_delivery_dead", channel=channel)
+                    await asyncio.to_thread(self.store.give_up, delivery["id"], error)
+                    logger.error("lembrete_entrega_desistiu id=%s canal=%s tentativas=%d error=%s",
+                                 delivery["id"], channel, attempt, error)
+                else:
+                    delay = backoff_delay(attempt, self.base_delay)
+                    await asyncio.to_thread(self.store.retry_later, delivery["id"], time.time() + delay, error)
+                    logger.warning("lembrete_entrega_falhou id=%s canal=%s tentativa=%d retry_s=%.0f error=%s",
+                                   delivery["id"], channel, attempt, delay, error)
+                return
+            finally:
+                metrics.observe("reminder_delivery_ms", (time.perf_counter() - start) * 1000, channel=channel)
+        await asyncio.to_thread(self.store.delivered, delivery["id"])
+        metrics.observe("reminder_lag_ms", max(0.0, time.time() - delivery["due_at"]) * 1000, channel=channel)
+        logger.info("lembrete_entregue id=%s canal=%s tentativa=%d", delivery["id"], channel, attempt)
+
+    async def run_due(self) -> int:
+        """Envia (em paralelo) as entregas vencidas; devolve quantas foram tentadas"""
+        total = 0
+        while True:
+            batch = await asyncio.to_thread(self.store.lease_due, time.time(), BATCH_SIZE, LEASE_SECONDS)
+            if not batch:
+                return total
+            await asyncio.gather(*[self._send(delivery) for delivery in batch])
+            total += len(batch)
+
+    async def run(self) -> None:
+        """Loop do despachante: dorme até a próxima entrega/retry ou até `wake()`"""
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_due()
+            except Exception as e:
+                logger.error("lembrete_despachante_erro error=%s", e)
+            next_at = await asyncio.to_thread(self.store.next_delivery_at)
+            delay = MAX_SLEEP_SECONDS if next_at is None else min(MAX_SLEEP_SECONDS, max(0.0, next_at - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+__all__ = ["DeliveryQueue", "backoff_delay"]
@@ -1,163 +1,255 @@
-"""Sistema de notificação de lembretes por email e Telegram"""
+"""Sistema de notificação de lembretes por email e Telegram
 
+Agendador em heap (min-heap de (due_at, id)) sobre o `ReminderStore`
+(SQLite): `start_monitoring` dorme até o próximo vencimento e é acordado por
+`add_reminder` quando um lembrete novo passa a ser o próximo. Criar e
+disparar são O(log n); nada de reler e reescrever o arquivo a cada minuto.
+
+O disparo só grava as entregas na outbox; o envio (SMTP assíncrono via
+aiosmtplib, ou smtplib em thread, e Telegram) fica com o `DeliveryQueue`,
+que envia os canais em paralelo e refaz as tentativas com backoff.
+"""
+
+import heapq
 import os
-import json
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+from email.message import EmailMessage
 from datetime import datetime
 import pytz
 import asyncio
 import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from telegram import Bot
 
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
 from config.settings import config
+from workspace.storage.reminder_store import ReminderStore
+from workspace.tools.reminder_delivery import DeliveryQueue, Sender
 
 logger = logging.getLogger(__name__)
 
+# Sono máximo do agendador (segundos)
+MAX_SLEEP_SECONDS = 300.0
+# Timeout da conexão/envio SMTP (segundos)
+SMTP_TIMEOUT_SECONDS = 20
+# A partir deste atraso o lembrete é marcado como atrasado na mensagem
+LATE_AFTER_SECONDS = 120
+
+
+def _legacy_files() -> List[Path]:
+    """reminders.json das versões anteriores (notifier e tool create_reminder)"""
+    return [config.REMINDERS_FILE, Path.home() / ".assistente" / "data" / "reminders.json"]
+
 
 class ReminderNotifier:
-    def __init__(self):
+    def __init__(self, store: Optional[ReminderStore] = None, senders: Optional[Dict[str, Sender]] = None):
         self.email = os.getenv("EMAIL_ADDRESS")
         self.smtp_server = os.getenv("SMTP_SERVER")
         self.smtp_port = int(os.getenv("SMTP_PORT", 587))
         self.password = os.getenv("SMTP_PASSWORD")
+        self.smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() not in ("0", "false", "no")
         self.telegram_token = os.getenv("TELEGRAM_TOKEN")
         self.telegram_chat_id = int(os.getenv("TELEGRAM_CHAT_ID", "6974901522"))
-        # Storage persistente em config.DATA_DIR (config.REMINDERS_FILE)
-        self.reminders_file = str(config.REMINDERS_FILE)
+        # Storage persistente em config.DATA_DIR (config.REMINDERS_DB)
+        self._store = store
+        self._delivery: Optional[DeliveryQueue] = None
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup: Optional[asyncio.Event] = None
         self.tz = pytz.timezone("America/Sao_Paulo")
         self.bot = None
-
-    def send_email(self, subject: str, body: str):
-        """Envia email"""
-        try:
-            msg = MIMEMultipart()
-            msg["From"] = self.email
-            msg["To"] = self.email
-            msg["Subject"] = subject
-
-            msg.attach(MIMEText(body, "plain"))
-
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email, self.password)
+        # canal -> corrotina de envio (padrão: email e Telegram, se configurados)
+        self.senders = senders if senders is not None else self._channels()
+
+    def _channels(self) -> Dict[str, Sender]:
+        """Canais configurados no ambiente"""
+        channels: Dict[str, Sender] = {}
+        if self.email and self.smtp_server:
+            channels["email"] = self.send_email
+        if self.telegram_token:
+            channels["telegram"] = self.send_telegram
+        return channels
+
+    def _email_message(self, payload: Dict) -> EmailMessage:
+        msg = EmailMessage()
+        msg["From"] = self.email
+        msg["To"] = self.email
+        msg["Subject"] = payload["subject"]
+        msg.set_content(payload["body"])
+        return msg
+
+    def _send_email_sync(self, msg: EmailMessage) -> None:
+        """smtplib em thread (quando aiosmtplib não está instalado)"""
+        smtp_class = smtplib.SMTP_SSL if self.smtp_port == 465 else smtplib.SMTP
+        with smtp_class(self.smtp_server, self.smtp_port, timeout=SMTP_TIMEOUT_SECONDS) as server:
+            if self.smtp_starttls and self.smtp_port != 465:
+                server.starttls()
+            if self.password:
+                server.login(self.email, self.password)
             server.send_message(msg)
-            server.quit()
-
-            logger.info(f"Email enviado: {subject}")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao enviar email: {e}")
-            return False
-
-    async def send_telegram(self, message: str):
-        """Envia mensagem no Telegram"""
-        try:
-            if not self.bot:
-                self.bot = Bot(token=self.telegram_token)
-
-            await self.bot.send_message(chat_id=self.telegram_chat_id, text=message)
-            logger.info("Mensagem Telegram enviada")
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao enviar Telegram: {e}")
-            return False
-
-    async def check_reminders(self):
-        """Verifica lembretes pendentes"""
-        try:
-            if not os.path.exists(self.reminders_file):
-                return
-
-            with open(self.reminders_file, "r") as f:
-                reminders = json.load(f)
-
-            now = datetime.now(self.tz)
-            pending_reminders = []
-            sent_reminders = []
-
-            for reminder in reminders:
-                reminder_time = datetime.fromisoformat(reminder["timestamp"])
-
-                # Se o lembrete é para agora (com margem de 1 minuto)
-                diff = (reminder_time - now).total_seconds()
 
-                if -60 <= diff <= 60:  # Dentro de 1 minuto
-                    # Envia email
-                    subject = f"🔔 Lembrete: {reminder['text']}"
-                    body = f"""Olá!
+    async def send_email(self, payload: Dict) -> None:
+        """Envia email sem bloquear o event loop (levanta exceção em falha)"""
+        msg = self._email_message(payload)
+        if aiosmtplib is not None:
+            await aiosmtplib.send(
+                msg,
+                hostname=self.smtp_server,
+                port=self.smtp_port,
+                username=self.email if self.password else None,
+                password=self.password or None,
+                use_tls=self.smtp_port == 465,
+                start_tls=self.smtp_starttls and self.smtp_port != 465,
+                timeout=SMTP_TIMEOUT_SECONDS,
+            )
+        else:
+            await asyncio.to_thread(self._send_email_sync, msg)
+        logger.info(f"Email enviado: {payload['subject']}")
+
+    async def send_telegram(self, payload: Dict) -> None:
+        """Envia mensagem no Telegram (levanta exceção em falha)"""
+        if not self.bot:
+            self.bot = Bot(token=self.telegram_token)
+
+        await self.bot.send_message(chat_id=payload.get("chat_id") or self.telegram_chat_id, text=payload["text"])
+        logger.info("Mensagem Telegram enviada")
+
+    # -- agendamento ------------------------------------------------------
+
+    @property
+    def store(self) -> ReminderStore:
+        """Store criado no primeiro uso (importa o reminders.json legado)"""
+        if self._store is None:
+            self._store = ReminderStore(config.REMINDERS_DB)
+            self._store.import_legacy(_legacy_files())
+        return self._store
+
+    @property
+    def delivery(self) -> DeliveryQueue:
+        """Fila de entrega (outbox no mesmo store)"""
+        if self._delivery is None:
+            self._delivery = DeliveryQueue(self.store, self.senders)
+        return self._delivery
+
+    async def add_reminder(self, text: str, due: datetime, chat_id: Optional[int] = None) -> Dict:
+        """Grava o lembrete e acorda o agendador se ele for o próximo"""
+        display = due.astimezone(self.tz).strftime("%d/%m/%Y às %H:%M")
+        due_at = due.timestamp()
+        reminder_id = await asyncio.to_thread(self.store.add, text, due_at, display, chat_id)
+        heapq.heappush(self._heap, (due_at, reminder_id))
+        if self._heap[0][1] == reminder_id and self._wakeup is not None:
+            self._wakeup.set()
+        return {"id": reminder_id, "text": text, "datetime": display, "timestamp": due.isoformat()}
+
+    def _deliveries(self, reminder: Dict) -> List[Tuple[str, Dict]]:
+        """Uma entrega por canal configurado (payload gravado na outbox)"""
+        late = time.time() - reminder["due_at"] > LATE_AFTER_SECONDS
+        note = " (atrasado)" if late else ""
+        deliveries = []
+        for channel in self.senders:
+            if channel == "email":
+                payload = {
+                    "subject": f"🔔 Lembrete{note}: {reminder['text']}",
+                    "body": f"""Olá!
 
 Este é seu lembrete agendado:
 
 📝 {reminder["text"]}
-🕐 Horário: {reminder["datetime"]}
+🕐 Horário: {reminder["display"]}
 
 ---
 Enviado por Moltbot
-"""
-
-                    # Envia Telegram
-                    telegram_msg = (
-                        f"🔔 **LEMBRETE**\n\n📝 {reminder['text']}\n🕐 {reminder['datetime']}"
-                    )
-
-                    email_sent = self.send_email(subject, body)
-                    telegram_sent = await self.send_telegram(telegram_msg)
-
-                    if email_sent or telegram_sent:
-                        sent_reminders.append(reminder)
-                        logger.info(f"Lembrete enviado: {reminder['text']}")
-                elif diff > 60:
-                    # Lembrete futuro
-                    pending_reminders.append(reminder)
-
-            # Atualiza arquivo removendo lembretes enviados
-            if sent_reminders:
-                with open(self.reminders_file, "w") as f:
-                    json.dump(pending_reminders, f, indent=2)
-
-        except Exception as e:
-            logger.error(f"Erro ao verificar lembretes: {e}")
+""",
+                }
+            else:
+                payload = {
+                    "text": f"🔔 **LEMBRETE**{note}\n\n📝 {reminder['text']}\n🕐 {reminder['display']}",
+                    "chat_id": reminder["chat_id"],
+                }
+            deliveries.append((channel, payload))
+        return deliveries
+
+    async def _fire(self, reminder_id: int) -> None:
+        reminder = await asyncio.to_thread(self.store.get, reminder_id)
+        if reminder is None:
+            return  # já enviado (outro processo) ou removido
+        overdue = time.time() - reminder["due_at"]
+        if overdue > config.REMINDER_CATCHUP_HOURS * 3600:
+            await asyncio.to_thread(self.store.claim, reminder_id)
+            logger.warning("lembrete_expirado id=%s atraso_s=%.0f", reminder_id, overdue)
+            return
+        deliveries = self._deliveries(reminder)
+        if not deliveries:
+            # Sem canal não há como entregar: continua pendente e volta ao
+            # agendador na próxima inicialização (com SMTP ou Telegram configurado)
+            logger.warning("lembrete_sem_canal id=%s (configure SMTP ou TELEGRAM_TOKEN)", reminder_id)
+            return
+        # Disparo e outbox na mesma transação; o envio fica com a fila de entrega
+        if await asyncio.to_thread(self.store.claim, reminder_id, deliveries):
+            self.delivery.wake()
+            logger.info("lembrete_disparado id=%s atraso_s=%.1f canais=%d", reminder_id, overdue, len(deliveries))
+
+    async def run_due(self) -> int:
+        """Dispara todos os lembretes vencidos; devolve quantos saíram do heap"""
+        now = time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        for reminder_id in due:
+            try:
+                await self._fire(reminder_id)
+            except Exception as e:
+                logger.error(f"Erro ao enviar lembrete {reminder_id}: {e}")
+        return len(due)
 
     def list_pending_reminders(self) -> list:
         """Retorna lista de lembretes pendentes ordenados por data/hora."""
         try:
-            if not os.path.exists(self.reminders_file):
-                return []
-
-            with open(self.reminders_file, "r") as f:
-                reminders = json.load(f)
-
-            now = datetime.now(self.tz)
-            pending = []
-
-            for r in reminders:
-                try:
-                    reminder_time = datetime.fromisoformat(r["timestamp"])
-                    if reminder_time > now:
-                        pending.append(
-                            {
-                                "text": r.get("text", ""),
-                                "datetime": r.get("datetime", ""),
-                                "timestamp": r["timestamp"],
-                            }
-                        )
-                except (KeyError, ValueError):
-                    continue
-
-            pending.sort(key=lambda x: x["timestamp"])
-            return pending
+            return [
+                {
+                    "text": r["text"],
+                    "datetime": r["display"],
+                    "timestamp": datetime.fromtimestamp(r["due_at"], self.tz).isoformat(),
+                }
+                for r in self.store.pending(after=time.time())
+            ]
         except Exception as e:
             logger.error(f"Erro ao listar lembretes: {e}")
             return []
 
     async def start_monitoring(self):
-        """Inicia monitoramento de lembretes"""
-        logger.info("Sistema de lembretes iniciado (Email + Telegram)")
-        while True:
-            await self.check_reminders()
-            await asyncio.sleep(60)  # Verifica a cada 1 minuto
+        """Agendador: dorme até o próximo lembrete (acordado por novas inserções)
+
+        Na inicialização o heap é montado com todos os pendentes do store;
+        os que venceram com o bot parado são enviados logo em seguida.
+        """
+        self._wakeup = asyncio.Event()
+        # Entregas pendentes (inclusive de antes de um reinício) saem em paralelo
+        delivery_task = asyncio.create_task(self.delivery.run())
+        loaded = await asyncio.to_thread(self.store.schedule)
+        # Une com o que `add_reminder` empilhou durante a carga (sem duplicar)
+        self._heap = list(set(self._heap).union(loaded))
+        heapq.heapify(self._heap)
+        logger.info("Sistema de lembretes iniciado (Email + Telegram), pendentes=%d", len(self._heap))
+        try:
+            while True:
+                await self.run_due()
+                self._wakeup.clear()
+                # Limite no sono: ajustes do relógio de parede não atrasam o disparo
+                delay = MAX_SLEEP_SECONDS
+                if self._heap:
+                    delay = min(delay, max(0.0, self._heap[0][0] - time.time()))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            delivery_task.cancel()
 
 
 # Instância global
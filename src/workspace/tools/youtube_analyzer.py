@@ -1,21 +1,85 @@
 """YouTube Video Analyzer - Analisa vídeos do YouTube com Groq Vision"""
+import asyncio
+import base64
 import os
+import re
 import tempfile
-import requests
 import logging
-from typing import Optional
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
 
+from config.settings import config
+from utils.http_pool import http_pool
+from utils.image_prep import prepare_for_vision
+from utils.media_pipeline import Keyframe, extract_keyframes, split_on_silence
 from security.sanitizer import sanitize_youtube_url
 from security.executor import SafeSubprocessExecutor
+from workspace.storage.media_cache import media_cache, variant, youtube_key
+from workspace.storage.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Imagens por requisição ao modelo de visão (limite da API) e requisições simultâneas
+VISION_BATCH_SIZE = 5
+MAX_CONCURRENT_VISION = 4
+# Transcrições simultâneas (Whisper) e tamanho máximo de cada bloco resumido
+MAX_CONCURRENT_WHISPER = 4
+SUMMARY_WINDOW_CHARS = 12000
+# Transcrição mais curta que isso (vídeo sem fala) cai na análise de frames
+MIN_TRANSCRIPT_CHARS = 200
+# Idiomas de legenda aceitos, em ordem de preferência
+SUBTITLE_LANGS = ("pt", "en")
+
+# Callback de progresso: (trechos prontos, total, texto do trecho mais recente)
+PartialCallback = Callable[[int, int, str], Awaitable[None]]
+
+_VTT_TIMING = re.compile(r"^\d{2}:\d{2}[:.]\d{2}.*-->")
+_VTT_TAG = re.compile(r"<[^>]+>")
+
+
+def parse_vtt(text: str) -> str:
+    """Texto corrido de uma legenda WebVTT (sem tempos, tags e repetições)
+
+    Legendas automáticas repetem a linha anterior a cada atualização
+    ("rolagem"); linhas idênticas consecutivas são descartadas.
+    """
+    lines: List[str] = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line == "WEBVTT" or line.isdigit() or _VTT_TIMING.match(line):
+            continue
+        if line.startswith(("Kind:", "Language:", "NOTE", "STYLE")):
+            continue
+        line = " ".join(_VTT_TAG.sub("", line).split())
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return " ".join(lines)
+
+
+def _windows(text: str, size: int) -> List[str]:
+    """Blocos de até `size` caracteres, quebrando em espaços"""
+    windows = []
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        cut = cut if cut > size // 2 else size
+        windows.append(text[:cut].strip())
+        text = text[cut:]
+    if text.strip():
+        windows.append(text.strip())
+    return windows
+
+
+def _clock(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes}:{secs:02d}"
+
+
 class YouTubeAnalyzer:
-    """Analisador de vídeos do YouTube usando Groq Vision"""
+    """Analisador de vídeos do YouTube: transcrição primeiro, frames como reserva"""
     
     def __init__(self):
         # GLM removido - agora usa apenas Groq Vision (mais rápido e confiável)
-        pass
+        self._client = None
 
     async def _download_video(self, youtube_url: str, output_path: str) -> bool:
         """Baixa vídeo do YouTube (URL sanitizada, executor seguro)."""
@@ -35,34 +99,50 @@ class YouTubeAnalyzer:
             logger.error(f"Erro ao baixar vídeo: {e}")
             return False
     
-    async def _extract_frames(self, video_path: str, output_dir: str, fps: float = 0.2) -> list:
-        """Extrai frames do vídeo (1 frame a cada 5 segundos por padrão)"""
+    async def _download_subtitles(self, clean_url: str, tmpdir: str) -> Optional[str]:
+        """Legenda (manual ou automática) em pt/en, sem baixar o vídeo"""
+        success, _, err = await SafeSubprocessExecutor.run(
+            [
+                "yt-dlp", "--skip-download", "--write-subs", "--write-auto-subs",
+                "--sub-langs", ",".join(f"{lang}.*" for lang in SUBTITLE_LANGS),
+                "--sub-format", "vtt", "-o", os.path.join(tmpdir, "subs"), clean_url,
+            ],
+            timeout=60,
+        )
+        if not success:
+            logger.info(f"Legendas indisponíveis: {err[-200:]}")
+            return None
+        files = sorted(Path(tmpdir).glob("subs*.vtt"))
+        for lang in SUBTITLE_LANGS:
+            for path in files:
+                if path.name.startswith(f"subs.{lang}"):
+                    return parse_vtt(path.read_text(encoding="utf-8", errors="replace"))
+        return parse_vtt(files[0].read_text(encoding="utf-8", errors="replace")) if files else None
+
+    async def _download_audio(self, clean_url: str, tmpdir: str) -> Optional[Path]:
+        """Baixa só a trilha de áudio (m4a/webm, sem reencode)"""
+        success, _, err = await SafeSubprocessExecutor.run(
+            [
+                "yt-dlp", "-f", "bestaudio[ext=m4a]/bestaudio", "--no-playlist",
+                "-o", os.path.join(tmpdir, "audio.%(ext)s"), clean_url,
+            ],
+            timeout=120,
+        )
+        if not success:
+            logger.error(f"yt-dlp (áudio) falhou: {err[-200:]}")
+            return None
+        files = sorted(Path(tmpdir).glob("audio.*"))
+        return files[0] if files else None
+
+    async def _extract_frames(self, video_path: str) -> List[Keyframe]:
+        """Keyframes de mudança de cena (stdout do ffmpeg, sem arquivos)"""
         try:
-            frame_pattern = os.path.join(output_dir, "frame_%03d.jpg")
-            cmd = [
-                "ffmpeg",
-                "-i", video_path,
-                "-vf", f"fps={fps}",
-                "-q:v", "5",  # Qualidade média
-                frame_pattern
-            ]
-            success, _, _ = await SafeSubprocessExecutor.run(cmd, timeout=60)
-            if not success:
-                logger.error("FFmpeg falhou ao extrair frames")
-                return []
-            
-            # Lista frames gerados
-            frames = sorted([
-                os.path.join(output_dir, f) 
-                for f in os.listdir(output_dir) 
-                if f.startswith("frame_") and f.endswith(".jpg")
-            ])
-            return frames[:20]  # Máximo 20 frames
+            return await extract_keyframes(Path(video_path))
         except Exception as e:
             logger.error(f"Erro ao extrair frames: {e}")
             return []
-    
-    def _upload_frame(self, frame_path: str) -> Optional[str]:
+
+    async def _upload_frame(self, frame_path: str) -> Optional[str]:
         """Upload frame para Imgur (temporário)"""
         imgur_client_id = os.getenv("IMGUR_CLIENT_ID")
         if not imgur_client_id:
@@ -71,91 +151,254 @@ class YouTubeAnalyzer:
         
         try:
             with open(frame_path, 'rb') as f:
-                response = requests.post(
-                    'https://api.imgur.com/3/image',
-                    headers={'Authorization': f'Client-ID {imgur_client_id}'},
-                    files={'image': f},
-                    timeout=10
-                )
+                image = f.read()
+            response = await http_pool.post(
+                'https://api.imgur.com/3/image',
+                headers={'Authorization': f'Client-ID {imgur_client_id}'},
+                files={'image': image},
+                timeout=10
+            )
             if response.status_code == 200:
                 return response.json()['data']['link']
         except Exception as e:
             logger.error(f"Erro ao fazer upload: {e}")
         return None
-    def _analyze_frames_groq(self, frame_paths: list, prompt: str) -> Optional[str]:
-        """Analisa frames com Groq Vision (mais confiável)"""
-        try:
+    def _groq(self):
+        if self._client is None:
             from groq import Groq
-            import base64
-            
-            groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-            
-            # Pega apenas 3 frames (início, meio, fim)
-            selected_frames = []
-            if len(frame_paths) >= 3:
-                selected_frames = [
-                    frame_paths[0],  # Início
-                    frame_paths[len(frame_paths)//2],  # Meio
-                    frame_paths[-1]  # Fim
-                ]
-            else:
-                selected_frames = frame_paths
-            
-            # Converte frames para base64
-            content = [{"type": "text", "text": prompt}]
-            for frame_path in selected_frames:
-                with open(frame_path, 'rb') as f:
-                    img_data = base64.b64encode(f.read()).decode('utf-8')
-                    content.append({
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{img_data}"}
-                    })
-            
-            response = groq_client.chat.completions.create(
-                model="meta-llama/llama-4-scout-17b-16e-instruct",
+
+            self._client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._client
+
+    def _describe_batch(self, frames: List[Keyframe], part: int, total: int) -> str:
+        """Descreve um trecho do vídeo (até VISION_BATCH_SIZE frames) com Groq Vision
+
+        A instrução não inclui o pedido do usuário: as descrições vão para o
+        cache e servem a qualquer pedido posterior (aplicado só no reduce).
+        """
+        stamps = ", ".join(_clock(f.timestamp) for f in frames)
+        content = [{
+            "type": "text",
+            "text": (
+                f"Trecho {part} de {total} de um vídeo (frames em {stamps}). "
+                "Descreva o que acontece neste trecho, em ordem: pessoas, ações, "
+                "objetos, textos na tela e mudanças de cena."
+            ),
+        }]
+        for frame in frames:
+            img_data = base64.b64encode(frame.jpeg).decode("utf-8")
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{img_data}"}
+            })
+        with metrics.timer("vision_latency_ms", source="youtube"):
+            response = self._groq().chat.completions.create(
+                model=config.GROQ_MODEL_VISION,
                 messages=[{"role": "user", "content": content}],
                 temperature=0.5,
-                max_completion_tokens=1024
+                max_completion_tokens=512
             )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"Erro ao analisar frames com Groq: {e}")
+        return response.choices[0].message.content
+
+    def _merge_summaries(
+        self, partials: List[str], prompt: str, label: str = "Descrições dos trechos do vídeo"
+    ) -> str:
+        """Etapa final (reduce): junta os textos dos trechos em um resumo"""
+        sections = "\n\n".join(f"Trecho {i}:\n{text}" for i, text in enumerate(partials, 1))
+        response = self._groq().chat.completions.create(
+            model=config.GROQ_MODEL_CHAT,
+            messages=[{
+                "role": "user",
+                "content": f"{prompt}\n\n{label}, em ordem:\n\n{sections}",
+            }],
+            temperature=0.3,
+            max_completion_tokens=1024
+        )
+        return response.choices[0].message.content
+
+    async def _describe_frames(self, frames: List[Keyframe]) -> List[str]:
+        """Map: lotes de frames descritos em requisições paralelas (sem o pedido)"""
+        jpegs = await prepare_for_vision([f.jpeg for f in frames], source="youtube")
+        frames = [Keyframe(f.timestamp, jpeg) for f, jpeg in zip(frames, jpegs)]
+        batches = [frames[i:i + VISION_BATCH_SIZE] for i in range(0, len(frames), VISION_BATCH_SIZE)]
+        slots = asyncio.Semaphore(MAX_CONCURRENT_VISION)
+
+        async def describe(part: int, batch: List[Keyframe]) -> str:
+            async with slots:
+                return await asyncio.to_thread(self._describe_batch, batch, part, len(batches))
+
+        results = await asyncio.gather(
+            *[describe(i, batch) for i, batch in enumerate(batches, 1)], return_exceptions=True
+        )
+        for error in (r for r in results if isinstance(r, Exception)):
+            logger.warning(f"Lote de frames falhou: {error}")
+        return [r for r in results if isinstance(r, str) and r.strip()]
+
+    async def _reduce_descriptions(self, partials: List[str], prompt: str) -> Optional[str]:
+        """Reduce: responde ao pedido a partir das descrições dos trechos
+
+        Roda mesmo com um único trecho: é a única etapa que vê o pedido.
+        """
+        if not partials:
             return None
-    
-    async def analyze_youtube_video(self, youtube_url: str, user_prompt: str = None) -> str:
-        """Analisa vídeo do YouTube e retorna resumo"""
+        try:
+            return await asyncio.to_thread(self._merge_summaries, partials, prompt)
+        except Exception as e:
+            logger.error(f"Erro ao juntar resumos dos trechos: {e}")
+            return "\n\n".join(partials)
+
+    async def _analyze_frames(self, frames: List[Keyframe], prompt: str) -> Optional[str]:
+        """Map-reduce: lotes de frames em requisições paralelas + resumo final"""
+        return await self._reduce_descriptions(await self._describe_frames(frames), prompt)
+
+    def _transcribe_chunk(self, audio_path: Path) -> str:
+        return self._groq().audio.transcriptions.create(
+            file=(audio_path.name, audio_path.read_bytes()),
+            model=config.WHISPER_MODEL,
+            response_format="text",
+        )
+
+    async def transcribe_chunks(
+        self, chunks: List[Path], on_partial: Optional[PartialCallback] = None
+    ) -> str:
+        """Transcreve os trechos em paralelo; entrega o progresso na ordem do áudio"""
+        slots = asyncio.Semaphore(MAX_CONCURRENT_WHISPER)
+        flush = asyncio.Lock()
+        texts: List[Optional[str]] = [None] * len(chunks)
+        delivered = 0
+
+        async def transcribe(index: int, chunk: Path) -> None:
+            nonlocal delivered
+            async with slots:
+                try:
+                    texts[index] = str(await asyncio.to_thread(self._transcribe_chunk, chunk)).strip()
+                except Exception as e:
+                    logger.warning(f"Transcrição do trecho {index + 1} falhou: {e}")
+                    texts[index] = ""
+            # Trechos terminam fora de ordem: só avança o que já é contíguo
+            async with flush:
+                while delivered < len(texts) and texts[delivered] is not None:
+                    delivered += 1
+                    if on_partial is not None and texts[delivered - 1]:
+                        try:
+                            await on_partial(delivered, len(texts), texts[delivered - 1])
+                        except Exception as e:
+                            logger.debug(f"Callback de progresso falhou: {e}")
+
+        await asyncio.gather(*[transcribe(i, chunk) for i, chunk in enumerate(chunks)])
+        return " ".join(text for text in texts if text)
+
+    async def summarize_transcript(self, transcript: str, prompt: str) -> str:
+        """Resume a transcrição (blocos longos resumidos em paralelo e depois juntados)"""
+        windows = _windows(transcript, SUMMARY_WINDOW_CHARS)
+        if len(windows) == 1:
+            return await asyncio.to_thread(
+                self._merge_summaries, windows, prompt, "Transcrição do vídeo"
+            )
+        results = await asyncio.gather(*[
+            asyncio.to_thread(
+                self._merge_summaries, [window], "Resuma este trecho da transcrição de um vídeo.",
+                "Transcrição",
+            )
+            for window in windows
+        ], return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        for error in errors:
+            logger.warning(f"Resumo de trecho da transcrição falhou: {error}")
+        partials = [r for r in results if isinstance(r, str) and r.strip()]
+        if not partials:
+            # Todos os trechos falharam: propaga o primeiro erro
+            if errors:
+                raise errors[0]
+            return ""
+        return await asyncio.to_thread(
+            self._merge_summaries, partials, prompt, "Resumos dos trechos da transcrição"
+        )
+
+    async def _transcript(
+        self, clean_url: str, tmpdir: str, on_partial: Optional[PartialCallback]
+    ) -> str:
+        """Legenda publicada, senão áudio cortado nos silêncios + Whisper em paralelo"""
+        subtitles = await self._download_subtitles(clean_url, tmpdir)
+        if subtitles and len(subtitles) >= MIN_TRANSCRIPT_CHARS:
+            logger.info(f"Usando legenda ({len(subtitles)} caracteres)")
+            return subtitles
+        audio_path = await self._download_audio(clean_url, tmpdir)
+        if audio_path is None:
+            return ""
+        chunks_dir = Path(tmpdir) / "chunks"
+        chunks_dir.mkdir()
+        chunks = await split_on_silence(audio_path, chunks_dir)
+        logger.info(f"Transcrevendo {len(chunks)} trechos de áudio")
+        return await self.transcribe_chunks(chunks, on_partial)
+
+    async def analyze_youtube_video(
+        self,
+        youtube_url: str,
+        user_prompt: str = None,
+        on_partial: Optional[PartialCallback] = None,
+    ) -> str:
+        """Analisa vídeo do YouTube e retorna resumo
+
+        Vídeos com fala são resumidos pela transcrição (legenda ou Whisper);
+        `on_partial` recebe cada trecho transcrito assim que fica pronto.
+        Sem fala aproveitável, analisa os frames. Transcrição, descrições e
+        resumo (por pedido) ficam no cache de mídia, chaveados pelo ID do vídeo.
+        """
+        # Mesmo vídeo (qualquer formato de URL) e mesmo pedido: resposta imediata
+        cache_key = youtube_key(youtube_url)
+        entry = await media_cache.get(cache_key) or {}
+        summaries = entry.setdefault("summaries", {})
+        wanted = variant(user_prompt)
+        if wanted in summaries:
+            logger.info(f"Resumo em cache para {cache_key}")
+            return f"🎬 **Resumo do Vídeo:**\n\n{summaries[wanted]}"
+
         with tempfile.TemporaryDirectory() as tmpdir:
             try:
-                # 1. Baixa vídeo
-                video_path = os.path.join(tmpdir, "video.mp4")
-                logger.info(f"Baixando vídeo: {youtube_url}")
-                if not await self._download_video(youtube_url, video_path):
-                    return "❌ Erro ao baixar vídeo. Verifique o link."
-                
-                # 2. Extrai frames
-                logger.info("Extraindo frames...")
-                frames_dir = os.path.join(tmpdir, "frames")
-                os.makedirs(frames_dir)
-                frame_paths = await self._extract_frames(video_path, frames_dir)
-                
-                if not frame_paths:
-                    return "❌ Erro ao extrair frames do vídeo."
-                
-                logger.info(f"Extraídos {len(frame_paths)} frames")
-                
-                # 4. Analisa com Groq Vision (sem precisar de upload)
-                prompt = user_prompt or "Analise esta sequência de frames de um vídeo e forneça um resumo detalhado do conteúdo, incluindo: tema principal, eventos importantes, e conclusão."
-                
-                logger.info("Analisando vídeo com Groq Vision...")
-                result = self._analyze_frames_groq(frame_paths, prompt)
-                
-                if result:
-                    return f"🎬 **Resumo do Vídeo:**\n\n{result}"
+                # Transcrição/descrições já em cache: só refaz o resumo para o novo pedido
+                transcript = entry.get("transcript") or ""
+                # "scene_descriptions": descrições sem o pedido (as antigas
+                # "frame_descriptions" embutiam o pedido e não são reaproveitadas)
+                descriptions = entry.get("scene_descriptions") or []
+                ok, clean_url = sanitize_youtube_url(youtube_url.strip())
+                if ok and not transcript and not descriptions:
+                    transcript = await self._transcript(clean_url, tmpdir, on_partial)
+
+                if len(transcript) >= MIN_TRANSCRIPT_CHARS:
+                    entry["transcript"] = transcript
+                    prompt = user_prompt or "Resuma o conteúdo deste vídeo com base na transcrição: tema principal, pontos importantes e conclusão."
+                    result = await self.summarize_transcript(transcript, prompt)
                 else:
+                    prompt = user_prompt or "Analise esta sequência de frames de um vídeo e forneça um resumo detalhado do conteúdo, incluindo: tema principal, eventos importantes, e conclusão."
+                    if not descriptions:
+                        logger.info("Sem transcrição aproveitável; analisando frames")
+                        # 1. Baixa vídeo
+                        video_path = os.path.join(tmpdir, "video.mp4")
+                        logger.info(f"Baixando vídeo: {youtube_url}")
+                        if not await self._download_video(youtube_url, video_path):
+                            return "❌ Erro ao baixar vídeo. Verifique o link."
+
+                        # 2. Extrai frames nas mudanças de cena
+                        logger.info("Extraindo frames...")
+                        frames = await self._extract_frames(video_path)
+                        if not frames:
+                            return "❌ Erro ao extrair frames do vídeo."
+                        logger.info(f"Extraídos {len(frames)} frames")
+
+                        # 3. Descreve trechos em paralelo com Groq Vision
+                        logger.info("Analisando vídeo com Groq Vision...")
+                        descriptions = await self._describe_frames(frames)
+                        if descriptions:
+                            entry["scene_descriptions"] = descriptions
+                    result = await self._reduce_descriptions(descriptions, prompt)
+
+                if not result:
                     return "❌ Erro ao analisar vídeo."
-                
+                summaries[wanted] = result
+                await media_cache.put(cache_key, entry)
+                return f"🎬 **Resumo do Vídeo:**\n\n{result}"
+
             except Exception as e:
                 logger.error(f"Erro geral: {e}")
                 return "❌ Erro ao processar vídeo. Tente novamente."
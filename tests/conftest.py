@@ -0,0 +1,26 @@
+"""Fixtures compartilhadas dos testes"""
+import sys
+from pathlib import Path
+
+import pytest
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+
+@pytest.fixture
+def tmp_data_dir(tmp_path, monkeypatch):
+    """DATA_DIR do bot (llm_usage, memory.json, lembretes) em tmp_path
+
+    `config` é criado na importação, então MOLTBOT_DIR no ambiente do teste não
+    o alcança; a propriedade é trocada na classe durante o teste.
+    """
+    from config.settings import Config
+    from workspace.storage import llm_usage
+
+    data_dir = tmp_path / "dados"
+    monkeypatch.setattr(Config, "DATA_DIR", property(lambda self: data_dir))
+    llm_usage.reset_cache()
+    yield data_dir
+    # Descarta o uso pendente em vez de gravá-lo no atexit
+    llm_usage.reset_cache()
@@ -10,6 +10,8 @@ import os
 from pathlib import Path
 from datetime import datetime, timedelta
 
+import pytest
+
 # Usa src do projeto onde este teste está (evita path fixo de outro diretório)
 _repo_root = Path(__file__).resolve().parent.parent
 _src = _repo_root / "src"
@@ -24,6 +26,9 @@ from workspace.tools.code_tools import search_code, git_status, git_diff
 from workspace.tools.filesystem import read_file, write_file, list_directory
 from workspace.core.tools import ToolRegistry
 
+# save_memory grava memory.json no DATA_DIR: usa um diretório temporário
+pytestmark = pytest.mark.usefixtures("tmp_data_dir")
+
 GREEN = "\033[92m"
 RED = "\033[91m"
 YELLOW = "\033[93m"
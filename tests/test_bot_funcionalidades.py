@@ -10,6 +10,8 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import pytest
+
 # Adiciona o caminho do projeto (raiz do repo ou src/)
 _repo_root = Path(__file__).resolve().parent.parent
 _src = _repo_root / "src"
@@ -31,6 +33,20 @@ from workspace.tools.extra_tools import (
     generate_image,
 )
 from workspace.core.tools import ToolRegistry
+from workspace.storage.reminder_store import ReminderStore
+from workspace.tools.reminder_notifier import notifier
+
+
+@pytest.fixture(autouse=True)
+def _isolated_data(tmp_data_dir, monkeypatch):
+    """Lembretes e memória dos testes num DATA_DIR temporário"""
+    # O notifier global pode já ter aberto o store do DATA_DIR real
+    store = ReminderStore(tmp_data_dir / "reminders.db")
+    monkeypatch.setattr(notifier, "_store", store)
+    monkeypatch.setattr(notifier, "_delivery", None)
+    monkeypatch.setattr(notifier, "_heap", [])
+    yield
+    store.close()
 
 # Cores para output
 GREEN = "\033[92m"
@@ -0,0 +1,107 @@
+"""Testes do pool de processos para CPU pesado (utils.cpu_pool)"""
+import asyncio
+import operator
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from utils.cpu_pool import CpuPool, PoolSaturated
+
+
+def _pool(**kwargs):
+    kwargs.setdefault("max_workers", 1)
+    return CpuPool(warm_modules=(), memory_limit_mb=0, **kwargs)
+
+
+async def test_run_returns_result_and_propagates_errors():
+    pool = _pool()
+    try:
+        await pool.start()
+        assert await pool.run(operator.add, 2, 3) == 5
+        with pytest.raises(ValueError):
+            await pool.run(int, "não é número")
+        stats = pool.stats()
+        assert stats["done"] == 1 and stats["errors"] == 1 and stats["pending"] == 0
+    finally:
+        pool.shutdown()
+
+
+async def test_rejects_when_saturated():
+    pool = _pool(max_pending=1)
+    try:
+        await pool.start()
+        busy = asyncio.create_task(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturated):
+            await pool.run(operator.add, 1, 1)
+        await busy
+        assert pool.stats()["rejected"] == 1
+        assert await pool.run(operator.add, 1, 1) == 2
+    finally:
+        pool.shutdown()
+
+
+async def test_timeout_recycles_workers():
+    pool = _pool()
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 10, timeout=0.5)
+        stats = pool.stats()
+        assert stats["timeouts"] == 1 and stats["recycled"] == 1
+        # Pool novo atende normalmente (o worker travado foi encerrado)
+        assert await pool.run(operator.mul, 6, 7) == 42
+    finally:
+        pool.shutdown()
+
+
+async def test_document_is_removed_when_pool_is_full(tmp_path, monkeypatch):
+    """Pool cheio é esperado sob carga: o arquivo baixado não fica no TEMP_DIR"""
+    from types import SimpleNamespace
+
+    from handlers import document
+
+    class FullPool:
+        async def run(self, *args, **kwargs):
+            raise PoolSaturated("cheio")
+
+    downloaded = []
+    replies = []
+
+    async def download_to_drive(path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_bytes(b"planilha")
+        downloaded.append(Path(path))
+
+    async def get_file():
+        return SimpleNamespace(download_to_drive=download_to_drive)
+
+    async def reply_text(text):
+        replies.append(text)
+
+    async def send_action(action):
+        pass
+
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=42, username="teste", full_name="Teste"),
+        effective_chat=SimpleNamespace(id=42),
+        message=SimpleNamespace(
+            chat=SimpleNamespace(send_action=send_action),
+            reply_text=reply_text,
+            document=SimpleNamespace(
+                file_name="dados.xlsx", mime_type=None, file_id="abc", get_file=get_file
+            ),
+        ),
+    )
+    monkeypatch.setenv("ALLOWED_USERS", "42")
+    monkeypatch.setattr(document, "cpu_pool", FullPool())
+
+    await document.handle_document(update, None, agent=None, store=None)
+
+    assert len(downloaded) == 1 and not downloaded[0].exists()
+    assert replies and replies[-1].startswith("⏳")
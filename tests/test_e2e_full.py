@@ -55,7 +55,7 @@ def agent_mock():
     return agent
 
 @pytest.mark.asyncio
-async def test_e2e_memory_persistence(agent_mock):
+async def test_e2e_memory_persistence(agent_mock, tmp_path):
     """
     Testa se memórias são persistidas e recuperadas (HippocampAI Lite).
     Objetivo: 🧠 Memória persistente de conversas
@@ -65,8 +65,8 @@ async def test_e2e_memory_persistence(agent_mock):
     # No mock, o run do agent não faz persistencia real se não configurado
     # Então testamos a unidade MemoryManager -> Hippocampus diretamente
     
-    # Instancia um MemoryManager real para verificar
-    mm = MemoryManager()
+    # Instancia um MemoryManager real para verificar (fora do workspace do bot)
+    mm = MemoryManager(tmp_path / "memory")
     
     # Se o Hippocampus estiver disponível/instalado
     if mm.hippocampus:
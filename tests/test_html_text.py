@@ -0,0 +1,82 @@
+"""Testes do extrator de texto HTML em passada única (utils.html_text)"""
+import sys
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from utils.html_text import chunk_blocks, html_to_text, iter_html_blocks
+
+SAMPLE = """<html><head><title>NR</title><style>p { color: red }</style></head>
+<body>
+<script>var x = "<p>não é texto</p>";</script>
+<!-- comentário -->
+<h1>NR-35 &ndash; Trabalho em Altura</h1>
+<p>Esta Norma estabelece os <b>requisitos mínimos</b>&nbsp;e as medidas de proteção.</p>
+<ul><li>Planejamento</li><li>Organização &amp; execução</li></ul>
+<table><tr><th>Item</th><th>Descrição</th></tr><tr><td>35.1</td><td>Objetivo</td></tr></table>
+<h2>35.2 Responsabilidades</h2>
+<p>Linha 1<br>Linha 2</p>
+</body></html>"""
+
+
+def test_iter_html_blocks_structure():
+    """Blocos estruturados saem na ordem do documento, sem script/style/comentários"""
+    blocks = list(iter_html_blocks(SAMPLE))
+    kinds = [b.kind for b in blocks]
+    texts = [b.text for b in blocks]
+
+    assert blocks[0].kind == "heading" and blocks[0].level == 1
+    assert blocks[0].text == "NR-35 – Trabalho em Altura"
+    assert "Esta Norma estabelece os requisitos mínimos e as medidas de proteção." in texts
+    assert kinds.count("list_item") == 2
+    assert "Organização & execução" in texts
+    assert "Item | Descrição" in texts
+    assert "35.1 | Objetivo" in texts
+    assert ("heading", "35.2 Responsabilidades") in [(b.kind, b.text) for b in blocks]
+    assert "Linha 1" in texts and "Linha 2" in texts
+    assert not any("não é texto" in t or "color" in t or "comentário" in t for t in texts)
+
+
+def test_iter_html_blocks_streaming_chunks_match_whole_document():
+    """Alimentar em pedaços pequenos (inclusive cortando UTF-8) dá o mesmo resultado"""
+    data = SAMPLE.encode("utf-8")
+    pieces = [data[i:i + 7] for i in range(0, len(data), 7)]
+
+    whole = [(b.kind, b.text) for b in iter_html_blocks(SAMPLE)]
+    streamed = [(b.kind, b.text) for b in iter_html_blocks(iter(pieces))]
+    assert streamed == whole
+
+
+def test_iter_html_blocks_caps_block_size():
+    """Um único bloco gigante é emitido em partes limitadas"""
+    html = "<div>" + ("palavra " * 5000) + "</div>"
+    blocks = list(iter_html_blocks(html, max_block_chars=1000))
+    assert len(blocks) > 1
+    assert all(len(b.text) <= 1100 for b in blocks)
+
+
+def test_unclosed_head_does_not_swallow_body():
+    """Sem </head> o texto do corpo ainda sai; o título da página não"""
+    with_body = "<html><head><title>Título</title><body><p>Conteúdo</p></body></html>"
+    without_body = "<html><head><title>Título</title><meta charset=utf-8><h1>Seção</h1><p>Texto</p>"
+    assert html_to_text(with_body) == "Conteúdo"
+    assert html_to_text(without_body) == "Seção\nTexto"
+
+
+def test_chunk_blocks_groups_by_heading():
+    """Cada título abre um chunk e é propagado como seção"""
+    chunks = list(chunk_blocks(iter_html_blocks(SAMPLE), max_chars=1500))
+    assert chunks[0]["section"] == "NR-35 – Trabalho em Altura"
+    assert "- Planejamento" in chunks[0]["text"]
+    assert chunks[-1]["section"] == "35.2 Responsabilidades"
+    assert "Linha 2" in chunks[-1]["text"]
+
+
+def test_html_to_text():
+    """html_to_text gera uma linha por bloco"""
+    text = html_to_text(SAMPLE)
+    assert text.startswith("NR-35 – Trabalho em Altura")
+    assert "- Planejamento\n- Organização & execução" in text
+    assert "<" not in text
@@ -0,0 +1,82 @@
+"""Testes do pool HTTP assíncrono compartilhado (utils.http_pool)"""
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from utils import http_pool as http_pool_module
+from utils.http_pool import HttpClientPool
+from workspace.storage.metrics import metrics
+
+
+def test_retries_transient_status_and_records_latency(monkeypatch):
+    """503 é repetido com backoff; a latência é registrada por host"""
+    monkeypatch.setattr(http_pool_module, "RETRY_INITIAL_DELAY", 0.01)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True, "q": request.url.params["q"]})
+
+    pool = HttpClientPool(transport=httpx.MockTransport(handler))
+    before = metrics.percentiles("http_latency_ms", host="retry.test").get("count", 0)
+
+    async def scenario():
+        response = await pool.get("https://retry.test/api", params={"q": "nr 35"})
+        await pool.aclose()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.json() == {"ok": True, "q": "nr 35"}
+    assert len(calls) == 3
+    assert metrics.percentiles("http_latency_ms", host="retry.test")["count"] == before + 3
+    assert metrics.counter("http_errors", host="retry.test") >= 2
+
+
+def test_persistent_status_returns_last_response(monkeypatch):
+    """Sem sucesso após as tentativas, devolve a última resposta (sem exceção)"""
+    monkeypatch.setattr(http_pool_module, "RETRY_INITIAL_DELAY", 0.01)
+    pool = HttpClientPool(transport=httpx.MockTransport(lambda r: httpx.Response(429)))
+
+    async def scenario():
+        response = await pool.get("https://limit.test/", retries=2)
+        await pool.aclose()
+        return response
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_per_host_limit_and_shared_client():
+    """Conexões simultâneas por host são limitadas; um cliente por event loop"""
+    active = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return httpx.Response(200)
+
+    pool = HttpClientPool(max_per_host=2, transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        await asyncio.gather(*(pool.get("https://host.test/x") for _ in range(8)))
+        client = pool._get_client()
+        await pool.get("https://host.test/y")
+        assert pool._get_client() is client
+        return client
+
+    first = asyncio.run(scenario())
+    assert active["max"] == 2
+    # Novo event loop: o cliente anterior (preso ao loop antigo) é substituído
+    second = asyncio.run(scenario())
+    assert second is not first
+    asyncio.run(pool.aclose())
@@ -0,0 +1,57 @@
+"""Testes do pré-processamento de imagens para o modelo de visão (utils.image_prep)"""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+from utils import image_prep
+from utils.cpu_pool import PoolSaturated
+from utils.image_prep import prepare_for_vision, prepare_image
+from workspace.storage.metrics import metrics
+
+
+def _jpeg(size, quality=95, exif=None):
+    Image = pytest.importorskip("PIL.Image")
+    img = Image.new("RGB", size)
+    img.putdata([((x * 7) % 256, (x * 13) % 256, (x * 3) % 256) for x in range(size[0] * size[1])])
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=quality, **({"exif": exif} if exif else {}))
+    return out.getvalue()
+
+
+def test_resizes_rotates_and_strips_exif():
+    Image = pytest.importorskip("PIL.Image")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientação: girar 90°
+    original = _jpeg((1600, 1000), exif=exif.tobytes())
+
+    prepared = prepare_image(original, max_side=800, quality=80)
+
+    assert len(prepared) < len(original)
+    with Image.open(io.BytesIO(prepared)) as img:
+        assert img.size == (500, 800)
+        assert "exif" not in img.info
+
+
+def test_keeps_original_when_not_smaller_or_unreadable():
+    assert prepare_image(b"nao e imagem") == b"nao e imagem"
+    small = _jpeg((64, 48), quality=30)
+    assert prepare_image(small, max_side=800, quality=95) == small
+
+
+async def test_falls_back_to_originals_when_pool_is_full(monkeypatch):
+    class FullPool:
+        async def run(self, *args, **kwargs):
+            raise PoolSaturated("cheio")
+
+    monkeypatch.setattr(image_prep, "_HAS_PIL", True)
+    monkeypatch.setattr(image_prep, "cpu_pool", FullPool())
+    before = metrics.percentiles("vision_image_bytes", source="teste", stage="after").get("count", 0)
+
+    frames = [b"\xff\xd8frame1", memoryview(b"\xff\xd8frame-2")]
+    assert await prepare_for_vision(frames, source="teste") == [b"\xff\xd8frame1", b"\xff\xd8frame-2"]
+    assert metrics.percentiles("vision_image_bytes", source="teste", stage="after")["count"] == before + 1
@@ -0,0 +1,121 @@
+"""Testes da inicialização preguiçosa (LazyObject, MemoryManager e import do bot)"""
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+from utils.lazy import LazyObject
+
+
+class Client:
+    def __init__(self):
+        self.name = "real"
+
+    def ping(self):
+        return "pong"
+
+
+def test_lazy_object_builds_once_on_first_use():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return Client()
+
+    client = LazyObject(factory, name="teste")
+    assert not client.loaded
+    assert calls == []
+
+    assert client.ping() == "pong"
+    assert client.name == "real"
+    assert client.loaded
+    assert calls == [1]
+
+    client.name = "alterado"
+    assert client.warm().name == "alterado"
+
+
+def test_lazy_object_concurrent_first_use_builds_once():
+    calls = []
+    gate = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return Client()
+
+    client = LazyObject(factory)
+
+    def use():
+        gate.wait()
+        client.ping()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+
+
+def test_lazy_object_none_is_falsy():
+    assert not LazyObject(lambda: None)
+
+
+def test_memory_manager_defers_hippocampus(tmp_path):
+    from workspace.memory.memory_manager import MemoryManager
+
+    manager = MemoryManager(tmp_path)
+    assert manager._hippocampus_loaded is False
+
+    sentinel = object()
+    manager.hippocampus = sentinel
+    assert manager.hippocampus is sentinel
+
+
+def test_agent_memory_manager_concurrent_first_use_builds_once(monkeypatch):
+    import time
+
+    from workspace.core import agent as agent_module
+
+    calls = []
+
+    class SlowManager:
+        def __init__(self):
+            calls.append(1)
+            time.sleep(0.05)
+
+    monkeypatch.setattr(agent_module, "MemoryManager", SlowManager)
+    agent = agent_module.Agent.__new__(agent_module.Agent)
+    agent._memory_manager = None
+    agent._memory_manager_lock = threading.Lock()
+
+    managers = []
+    threads = [threading.Thread(target=lambda: managers.append(agent.memory_manager)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert all(manager is managers[0] for manager in managers)
+
+
+def test_bot_import_skips_heavy_modules(tmp_path):
+    """Importar o bot e montar o agente não carrega groq, chromadb nem requests"""
+    code = (
+        "import sys, bot_simple\n"
+        "agent, store = bot_simple.build_components()\n"
+        "store.close(); agent.run_manager.close()\n"
+        "heavy = [m for m in ('groq', 'chromadb', 'networkx', 'elevenlabs', 'requests') if m in sys.modules]\n"
+        "print('heavy=' + ','.join(heavy))\n"
+    )
+    env = dict(os.environ, HOME=str(tmp_path), MOLTBOT_DIR=str(tmp_path))
+    env.setdefault("GROQ_API_KEY", "dummy")
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=_src, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().splitlines()[-1] == "heavy="
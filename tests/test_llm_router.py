@@ -8,21 +8,20 @@ from workspace.core.llm_router import LlmRouter
 from workspace.storage import llm_usage
 
 
-def test_has_reached_daily_limit_false_when_zero_limit(tmp_path, monkeypatch):
+def test_has_reached_daily_limit_false_when_zero_limit(tmp_data_dir):
     """Limite 0 deve ser interpretado como 'sem limite'."""
     assert llm_usage.has_reached_daily_limit("groq", 0) is False
     assert llm_usage.has_reached_daily_limit("groq", -1) is False
 
 
-def test_llm_usage_add_and_get(tmp_path, monkeypatch):
+def test_llm_usage_add_and_get(tmp_data_dir):
     """Registrar uso de tokens deve acumular valores para o dia atual."""
-    # Isola arquivo de uso em diretório temporário
-    monkeypatch.setenv("MOLTBOT_DIR", str(tmp_path))
 
     # Limpa estado anterior
     usage_file = config.DATA_DIR / "llm_usage.json"
     if usage_file.exists():
         usage_file.unlink()
+    llm_usage.reset_cache()
 
     llm_usage.add_usage("groq", 100, 50)
     llm_usage.add_usage("groq", 20, 30)
@@ -32,16 +31,52 @@ def test_llm_usage_add_and_get(tmp_path, monkeypatch):
     assert used_out == 80
 
 
-def test_has_reached_daily_limit_true(tmp_path, monkeypatch):
+def test_has_reached_daily_limit_true(tmp_data_dir):
     """Quando uso acumulado >= limite, has_reached_daily_limit deve ser True."""
-    monkeypatch.setenv("MOLTBOT_DIR", str(tmp_path))
 
     # Zera estado
     usage_file = config.DATA_DIR / "llm_usage.json"
     if usage_file.exists():
         usage_file.unlink()
+    llm_usage.reset_cache()
 
     llm_usage.add_usage("groq", 500, 500)
     assert llm_usage.has_reached_daily_limit("groq", 900) is True
     assert llm_usage.has_reached_daily_limit("groq", 1001) is False
 
+
+
+def test_usage_ledger_write_behind_merges_processes(tmp_path):
+    """Ledgers independentes (processos) somam deltas no mesmo arquivo sem perder uso."""
+    path = tmp_path / "llm_usage.json"
+    a = llm_usage.UsageLedger(path)
+    b = llm_usage.UsageLedger(path)
+
+    a.add("groq", 10, 5)
+    b.add("groq", 1, 2)
+    assert not path.exists()  # write-behind: nada em disco ainda
+
+    a.flush()
+    b.flush()
+    assert b.get("groq") == (11, 7)
+
+    c = llm_usage.UsageLedger(path)
+    assert c.get("groq") == (11, 7)
+
+
+def test_usage_rollup_moves_old_days_to_months():
+    """Dias além de RETENTION_DAYS viram totais mensais."""
+    from datetime import date
+
+    data = {
+        "groq": {
+            "2026-01-10": {"input_tokens": 1, "output_tokens": 2},
+            "2026-01-20": {"input_tokens": 3, "output_tokens": 4},
+            "2026-06-01": {"input_tokens": 5, "output_tokens": 6},
+        }
+    }
+    llm_usage._rollup(data, today=date(2026, 6, 2))
+    assert data["groq"] == {
+        "2026-01": {"input_tokens": 4, "output_tokens": 6},
+        "2026-06-01": {"input_tokens": 5, "output_tokens": 6},
+    }
@@ -0,0 +1,53 @@
+"""Testes do monitor de atraso/bloqueio do event loop (utils.loop_monitor)"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from utils.loop_monitor import LoopMonitor
+from workspace.storage.metrics import metrics
+
+
+def _chamada_bloqueante():
+    time.sleep(0.3)
+
+
+def test_blocking_call_is_attributed_to_call_site():
+    """Um time.sleep dentro do loop é flagrado com o local da chamada"""
+    monitor = LoopMonitor()
+
+    async def scenario():
+        monitor.start(threshold_ms=100, interval=0.02)
+        await asyncio.sleep(0.1)
+        _chamada_bloqueante()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    report = monitor.report()
+    assert len(report) == 1
+    site = report[0]
+    assert "_chamada_bloqueante" in site["site"]
+    assert site["count"] == 1
+    assert 200 <= site["max_ms"] < 1000
+    assert metrics.counter("event_loop_blocked", site=site["site"]) >= 1
+    assert "_chamada_bloqueante" in monitor.format_report()
+
+
+def test_no_blocking_no_report():
+    """Loop ocioso: nenhum local registrado e o atraso é medido"""
+    monitor = LoopMonitor()
+
+    async def scenario():
+        monitor.start(threshold_ms=200, interval=0.01)
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.report() == []
+    assert metrics.percentiles("event_loop_lag_ms")["count"] > 0
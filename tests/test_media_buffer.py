@@ -0,0 +1,103 @@
+"""Testes do download de mídia para buffers reaproveitáveis (utils.media_buffer)"""
+import base64
+import hashlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+sys.path.insert(0, str(_repo_root / "scripts"))
+
+from groq import Groq
+from stub_llm_server import StubConfig, StubLLMServer
+from utils import media_buffer
+from utils.http_pool import HttpClientPool
+from utils.media_buffer import BufferPool, MemoryReader, download_media
+
+
+def _serve(monkeypatch, files):
+    """Pool HTTP falso servindo `files` (caminho -> bytes) em pedaços de 1000 bytes"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = files[request.url.path]
+
+        async def chunks():
+            for i in range(0, len(data), 1000):
+                yield data[i:i + 1000]
+
+        return httpx.Response(200, content=chunks())
+
+    monkeypatch.setattr(media_buffer, "http_pool", HttpClientPool(transport=httpx.MockTransport(handler)))
+
+
+def _file(path, size=None):
+    return SimpleNamespace(file_path=f"https://api.telegram.test{path}", file_size=size)
+
+
+async def test_downloads_into_reused_buffer(monkeypatch):
+    photo = bytes(range(256)) * 40
+    _serve(monkeypatch, {"/a.jpg": photo, "/b.jpg": photo[::-1]})
+    pool = BufferPool()
+
+    async with download_media(_file("/a.jpg", len(photo)), kind="photo", pool=pool) as media:
+        assert media.in_memory and media.size == len(photo)
+        assert base64.b64encode(media.data) == base64.b64encode(photo)
+        assert hashlib.sha256(media.data).digest() == hashlib.sha256(photo).digest()
+    assert pool.stats()["in_use_bytes"] == 0
+
+    # Tamanho desconhecido: reaproveita o buffer livre em vez de alocar outro
+    async with download_media(_file("/b.jpg"), kind="photo", pool=pool) as media:
+        assert bytes(media.data) == photo[::-1]
+    assert pool.allocated == 1
+    assert pool.reused == 1
+    assert pool.peak >= len(photo)
+
+
+async def test_large_download_spills_to_temp_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(media_buffer, "config", SimpleNamespace(TEMP_DIR=tmp_path, MEDIA_MEMORY_MAX_MB=10))
+    audio = b"x" * 5500
+    _serve(monkeypatch, {"/long.mp3": audio})
+    pool = BufferPool()
+
+    # file_size ausente: começa em memória e passa para disco ao crescer
+    async with download_media(_file("/long.mp3"), kind="audio", suffix=".mp3",
+                              memory_limit=2048, pool=pool) as media:
+        assert not media.in_memory
+        assert media.path.suffix == ".mp3"
+        assert media.path.read_bytes() == audio
+        with media.open() as f:
+            assert f.read() == audio
+        spilled = media.path
+    assert not spilled.exists()
+    assert pool.in_use == 0
+
+
+def test_memory_reader_streams_multipart_upload():
+    data = memoryview(bytearray(b"audio-bytes" * 10000))
+    reader = MemoryReader(data, "voice.ogg")
+    assert reader.read(5) == b"audio"
+    reader.seek(0)
+
+    request = httpx.Request("POST", "https://upload.test/", files={"file": ("voice.ogg", reader)})
+    body = request.read()
+    assert bytes(data) in body
+    assert b'filename="voice.ogg"' in body
+
+
+async def test_whisper_upload_from_memory(monkeypatch):
+    voice = b"\0" * 4321
+    _serve(monkeypatch, {"/voice.ogg": voice})
+    server = StubLLMServer(StubConfig(latency_ms=0, jitter_ms=0))
+    client = Groq(api_key="stub", base_url=server.start_in_thread())
+    try:
+        async with download_media(_file("/voice.ogg", len(voice)), kind="voice", pool=BufferPool()) as media:
+            text = client.audio.transcriptions.create(
+                file=media.upload("voice.ogg"), model="whisper-large-v3-turbo", response_format="text"
+            )
+    finally:
+        server.stop_thread()
+    assert "voice.ogg (4321 bytes)" in text
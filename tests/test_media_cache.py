@@ -0,0 +1,169 @@
+"""Testes do cache de análises de mídia endereçado por conteúdo"""
+import os
+import sys
+from pathlib import Path
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+from utils.media_pipeline import Keyframe
+from workspace.storage.media_cache import (
+    MediaCache,
+    content_key,
+    file_content_key,
+    variant,
+    youtube_key,
+)
+from workspace.tools import youtube_analyzer
+from workspace.tools.youtube_analyzer import YouTubeAnalyzer
+
+
+def test_youtube_key_normalizes_url_variants():
+    urls = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s&list=PL1",
+        "https://youtu.be/dQw4w9WgXcQ?si=abc",
+        "https://m.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    ]
+    assert {youtube_key(url) for url in urls} == {"yt:dQw4w9WgXcQ"}
+    assert youtube_key("https://example.com/watch?v=dQw4w9WgXcQ") is None
+    assert youtube_key("https://www.youtube.com/watch?v=curto") is None
+
+
+def test_content_keys_and_variants(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"x" * 3000)
+    assert file_content_key(path, block_size=1024) == content_key(b"x" * 3000)
+    assert variant("  Resuma   o vídeo ") == variant("resuma o VÍDEO")
+    assert variant(None) == variant("")
+
+
+async def test_roundtrip_survives_new_instance(tmp_path):
+    cache = MediaCache(tmp_path)
+    assert await cache.get("tg:abc") is None
+    await cache.put("tg:abc", {"summaries": {"v1": "uma foto"}})
+
+    reopened = MediaCache(tmp_path)
+    assert await reopened.get("tg:abc") == {"summaries": {"v1": "uma foto"}}
+    assert reopened.stats()["entries"] == 1
+
+
+def test_evicts_least_recently_used_by_size(tmp_path):
+    value = {"transcript": "a" * 400}
+    cache = MediaCache(tmp_path, max_bytes=1000)
+    cache.put_sync("yt:1", value)
+    cache.put_sync("yt:2", value)
+    cache.get_sync("yt:1")  # yt:1 passa a ser o mais recente
+    cache.put_sync("yt:3", value)
+
+    assert cache.get_sync("yt:2") is None
+    assert cache.get_sync("yt:1") == value
+    assert cache.get_sync("yt:3") == value
+    assert cache.stats()["bytes"] <= 1000
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = MediaCache(tmp_path)
+    cache.put_sync("sha256:ff", {"summaries": {}})
+    (path,) = tmp_path.glob("*.json")
+    path.write_text("{quebrado", encoding="utf-8")
+
+    assert cache.get_sync("sha256:ff") is None
+    assert not path.exists()
+    assert cache.stats() == {"entries": 0, "bytes": 0}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+async def test_cached_youtube_analysis_skips_downloads(tmp_path, monkeypatch):
+    monkeypatch.setattr(youtube_analyzer, "media_cache", MediaCache(tmp_path))
+    analyzer = YouTubeAnalyzer()
+
+    async def subtitles(clean_url, tmpdir):
+        return "fala " * youtube_analyzer.MIN_TRANSCRIPT_CHARS
+
+    async def no_download(*args):
+        raise AssertionError("não deveria baixar nada")
+
+    summaries = []
+
+    def merge(partials, prompt, label=""):
+        summaries.append(prompt)
+        return f"resumo {len(summaries)}"
+
+    analyzer._download_subtitles = subtitles
+    analyzer._download_audio = no_download
+    analyzer._download_video = no_download
+    analyzer._merge_summaries = merge
+
+    first = await analyzer.analyze_youtube_video("https://youtu.be/dQw4w9WgXcQ")
+    assert first.endswith("resumo 1")
+
+    # Outra forma da mesma URL: resposta direto do cache, sem legendas nem LLM
+    analyzer._download_subtitles = no_download
+    again = await analyzer.analyze_youtube_video("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10")
+    assert again == first
+    assert len(summaries) == 1
+
+    # Pedido diferente: reaproveita a transcrição e só resume de novo
+    other = await analyzer.analyze_youtube_video("https://youtu.be/dQw4w9WgXcQ", "quais os tópicos?")
+    assert other.endswith("resumo 2")
+
+
+async def test_cached_frame_descriptions_do_not_depend_on_the_prompt(tmp_path, monkeypatch):
+    """Descrições em cache são neutras; cada pedido só refaz o reduce"""
+    monkeypatch.setattr(youtube_analyzer, "media_cache", MediaCache(tmp_path))
+    analyzer = YouTubeAnalyzer()
+    downloads = []
+
+    async def no_subtitles(clean_url, tmpdir):
+        return ""
+
+    async def no_audio(clean_url, tmpdir):
+        return None
+
+    async def video(url, path):
+        downloads.append(url)
+        return True
+
+    async def frames(video_path):
+        return [Keyframe(0.0, b"\xff\xd8frame")]
+
+    async def describe(frames):
+        return ["uma pessoa apresenta slides"]
+
+    def merge(partials, prompt, label=""):
+        return f"{prompt}: {partials[0]}"
+
+    analyzer._download_subtitles = no_subtitles
+    analyzer._download_audio = no_audio
+    analyzer._download_video = video
+    analyzer._extract_frames = frames
+    analyzer._describe_frames = describe
+    analyzer._merge_summaries = merge
+
+    url = "https://youtu.be/dQw4w9WgXcQ"
+    first = await analyzer.analyze_youtube_video(url, "quem aparece?")
+    second = await analyzer.analyze_youtube_video(url, "quais os tópicos?")
+
+    assert first.endswith("quem aparece?: uma pessoa apresenta slides")
+    assert second.endswith("quais os tópicos?: uma pessoa apresenta slides")
+    assert len(downloads) == 1
+
+
+def test_video_transcribe_failure_is_not_a_cacheable_empty_transcript(tmp_path, monkeypatch):
+    """Whisper falhou: None (tenta de novo depois); sem faixa de áudio: "" """
+    from types import SimpleNamespace
+
+    from handlers import video
+
+    def fail(**kwargs):
+        raise ConnectionError("whisper indisponível")
+
+    client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=fail)))
+    monkeypatch.setattr(video, "groq_client", client)
+    audio = tmp_path / "audio.m4a"
+    audio.write_bytes(b"\x00" * 16)
+
+    assert video._transcribe(audio) is None
+    assert video._transcribe(None) == ""
@@ -0,0 +1,139 @@
+"""Testes da extração de frame + áudio em passada única (utils.media_pipeline)"""
+import json
+import sys
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from security.executor import SafeSubprocessExecutor
+from utils import media_pipeline
+from utils.media_pipeline import (
+    MediaStreams,
+    audio_output,
+    build_demux_command,
+    build_keyframe_command,
+    demux_video,
+    extract_keyframes,
+    parse_duration,
+    parse_frame_times,
+    parse_probe,
+    parse_silences,
+    plan_cuts,
+    split_jpeg_stream,
+)
+
+
+def _probe_json(*streams):
+    return json.dumps({"streams": list(streams)})
+
+
+def test_parse_probe_ignores_cover_art():
+    output = _probe_json(
+        {"codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}},
+        {"codec_type": "audio", "codec_name": "aac"},
+    )
+    streams = parse_probe(output)
+    assert streams.has_video is False
+    assert streams.audio_codec == "aac"
+    assert parse_probe("não é json") == MediaStreams()
+
+
+def test_audio_passthrough_or_wav(tmp_path):
+    path, args = audio_output("aac", tmp_path)
+    assert path.name == "audio.m4a" and args == ["-c:a", "copy"]
+    path, args = audio_output("opus", tmp_path)
+    assert path.suffix == ".ogg" and args == ["-c:a", "copy"]
+    path, args = audio_output("pcm_s24le", tmp_path)
+    assert path.name == "audio.wav" and "pcm_s16le" in args
+
+
+def test_single_command_with_frame_on_stdout(tmp_path):
+    audio_path, args = audio_output("aac", tmp_path)
+    cmd = build_demux_command(Path("v.mp4"), MediaStreams(True, "aac"), audio_path, args)
+    assert cmd.count("-i") == 1
+    assert "pipe:1" in cmd and "-skip_frame" in cmd
+    assert cmd[-1] == str(audio_path)
+    assert "mp3" not in " ".join(cmd)
+    assert SafeSubprocessExecutor.validate_command(cmd) == (True, "OK")
+
+
+async def test_demux_runs_ffmpeg_once(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_run(cmd, timeout=None, cwd=None, env=None):
+        calls.append(cmd[0])
+        return True, _probe_json({"codec_type": "video"}, {"codec_type": "audio", "codec_name": "aac"}), ""
+
+    async def fake_run_bytes(cmd, timeout=None, cwd=None, env=None):
+        calls.append(cmd[0])
+        Path(cmd[-1]).write_bytes(b"\0" * 4096)
+        return True, b"\xff\xd8frame", ""
+
+    monkeypatch.setattr(media_pipeline.SafeSubprocessExecutor, "run", fake_run)
+    monkeypatch.setattr(media_pipeline.SafeSubprocessExecutor, "run_bytes", fake_run_bytes)
+
+    media = await demux_video(tmp_path / "v.mp4", tmp_path)
+
+    assert calls == ["ffprobe", "ffmpeg"]
+    assert media.frame == b"\xff\xd8frame"
+    assert media.audio_path == tmp_path / "audio.m4a"
+
+
+async def test_run_bytes_validates_command():
+    success, out, err = await SafeSubprocessExecutor.run_bytes(["ffmpeg", "-i", "a.mp4;rm"])
+    assert success is False and out == b""
+    assert "suspeito" in err
+
+
+def _jpeg(tag: bytes) -> bytes:
+    return b"\xff\xd8" + tag + b"\xff\xd9"
+
+
+def test_split_jpeg_stream_and_frame_times():
+    data = _jpeg(b"a") + _jpeg(b"b") + _jpeg(b"c")
+    assert split_jpeg_stream(data) == [_jpeg(b"a"), _jpeg(b"b"), _jpeg(b"c")]
+    assert split_jpeg_stream(data + b"\xff\xd8truncado") == [_jpeg(b"a"), _jpeg(b"b"), _jpeg(b"c")]
+    stderr = "[Parsed_showinfo_2] n:0 pts:0 pts_time:0 \n[Parsed_showinfo_2] n:1 pts:9 pts_time:42.5 "
+    assert parse_frame_times(stderr) == [0.0, 42.5]
+
+
+def test_keyframe_command_is_scene_based():
+    cmd = build_keyframe_command(Path("v.mp4"), threshold=0.4, max_gap=20)
+    filters = cmd[cmd.index("-vf") + 1]
+    assert "gt(scene,0.4)" in filters and "prev_selected_t,20" in filters
+    assert cmd[cmd.index("-skip_frame") + 1] == "nokey"
+    assert cmd[-1] == "pipe:1"
+    assert SafeSubprocessExecutor.validate_command(cmd) == (True, "OK")
+
+
+async def test_extract_keyframes_dedupes_and_spreads(monkeypatch):
+    frames = [_jpeg(b"a"), _jpeg(b"a"), *[_jpeg(bytes([65 + i])) for i in range(1, 10)]]
+    stderr = "\n".join(f"pts_time:{i * 10}" for i in range(len(frames)))
+
+    async def fake_run_bytes(cmd, timeout=None, cwd=None, env=None):
+        return True, b"".join(frames), stderr
+
+    monkeypatch.setattr(media_pipeline.SafeSubprocessExecutor, "run_bytes", fake_run_bytes)
+
+    keyframes = await extract_keyframes(Path("v.mp4"), max_frames=4)
+
+    assert len(keyframes) == 4
+    assert keyframes[0].timestamp == 0.0 and keyframes[-1].timestamp == 100.0
+    assert len({k.jpeg for k in keyframes}) == 4
+
+
+def test_silences_duration_and_cut_plan():
+    stderr = """  Duration: 00:10:00.50, start: 0.000000, bitrate: 128 kb/s
+[silencedetect @ 0x1] silence_start: 99.5
+[silencedetect @ 0x1] silence_end: 101.5 | silence_duration: 2
+[silencedetect @ 0x1] silence_start: 250
+[silencedetect @ 0x1] silence_end: 252 | silence_duration: 2
+"""
+    assert parse_duration(stderr) == 600.5
+    silences = parse_silences(stderr)
+    assert silences == [(99.5, 101.5), (250.0, 252.0)]
+    # corta no silêncio mais perto de cada 120 s; sem silêncio, no próprio alvo
+    assert plan_cuts(silences, 600.5, target=120) == [100.5, 251.0, 371.0, 491.0]
+    assert plan_cuts([], 150, target=120) == []
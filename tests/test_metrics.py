@@ -0,0 +1,87 @@
+"""Testes do buffer de métricas em memória (workspace.storage.metrics)"""
+import sys
+from pathlib import Path
+
+import pytest
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.storage import metrics as metrics_module
+from workspace.storage.metrics import MetricsBuffer
+from workspace.storage.sqlite_store import AsyncSQLiteStore, SQLiteStore
+
+
+def test_percentiles_per_label():
+    """Percentis são calculados por série (nome + labels)"""
+    buffer = MetricsBuffer()
+    for value in range(1, 101):
+        buffer.observe("tool_latency_ms", float(value), tool="web_search")
+    buffer.observe("tool_latency_ms", 5.0, tool="calc")
+
+    summary = buffer.percentiles("tool_latency_ms", tool="web_search")
+    assert summary["count"] == 100
+    assert summary["p50"] == 50.0
+    assert summary["p95"] == 95.0
+    assert summary["p99"] == 99.0
+    assert buffer.percentiles("tool_latency_ms", tool="calc")["p99"] == 5.0
+    assert buffer.percentiles("tool_latency_ms", tool="inexistente") == {}
+
+
+def test_bounded_memory(monkeypatch):
+    """Amostras, séries e eventos têm limite; excedentes são contados"""
+    monkeypatch.setattr(metrics_module, "MAX_SAMPLES", 10)
+    monkeypatch.setattr(metrics_module, "MAX_SERIES", 2)
+    monkeypatch.setattr(metrics_module, "MAX_EVENTS", 3)
+    buffer = MetricsBuffer()
+
+    for value in range(100):
+        buffer.observe("lat", float(value), handler="a")
+    assert len(buffer._histograms[("lat", (("handler", "a"),))].samples) == 10
+
+    buffer.incr("c", handler="a")
+    buffer.incr("c", handler="b")
+    buffer.incr("c", handler="c")  # terceira série: descartada
+    for i in range(5):
+        buffer.event("e", {"i": i})
+
+    snapshot = buffer.snapshot()
+    assert "c{handler=c}" not in snapshot["counters"]
+    assert snapshot["dropped"] == 3
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batch_to_sqlite(tmp_path):
+    """flush drena contadores, histogramas e eventos em um único lote"""
+    store = AsyncSQLiteStore(SQLiteStore(db_path=str(tmp_path / "bot.db")))
+    buffer = MetricsBuffer()
+
+    buffer.incr("runs", status="success")
+    buffer.incr("runs", status="success")
+    with buffer.timer("handler_latency_ms", handler="message"):
+        pass
+    buffer.event("message_processed", {"length": 3})
+
+    assert await buffer.flush(store) == 3
+    rows = store.store._conn.execute("SELECT event FROM metrics ORDER BY id").fetchall()
+    assert [r[0] for r in rows] == ["message_processed", "counter", "histogram"]
+
+    # Nada pendente: segundo flush não grava; contadores continuam em memória
+    assert await buffer.flush(store) == 0
+    assert buffer.counter("runs", status="success") == 2
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_remaining(tmp_path):
+    """stop cancela o flush periódico e grava o que restou"""
+    store = AsyncSQLiteStore(SQLiteStore(db_path=str(tmp_path / "bot.db")))
+    buffer = MetricsBuffer()
+    buffer.start(store, interval=3600)
+    buffer.event("shutdown_test")
+    await buffer.stop()
+
+    rows = store.store._conn.execute("SELECT event FROM metrics").fetchall()
+    assert rows == [("shutdown_test",)]
+    store.close()
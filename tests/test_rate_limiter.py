@@ -0,0 +1,163 @@
+"""Testes do rate limiter GCRA (custos, reabastecimento, despejo e backend SQLite)"""
+import sys
+from pathlib import Path
+
+import pytest
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+from config.settings import config
+from security.rate_limiter import (
+    COSTS,
+    MEDIA_COSTS,
+    MemoryBackend,
+    RateLimiter,
+    SQLiteRateLimitBackend,
+    check_rate_limit,
+    media_limiter,
+    message_limiter,
+    youtube_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(max_requests=4, window=60, clock=None, **kw):
+    clock = clock or FakeClock()
+    return RateLimiter(max_requests, window, backend=MemoryBackend(clock=clock, **kw)), clock
+
+
+def test_burst_then_refill_one_interval():
+    limiter, clock = make_limiter(max_requests=4, window=60)
+    assert [limiter.is_allowed(1) for _ in range(5)] == [True, True, True, True, False]
+    assert limiter.get_remaining(1) == 0
+    assert limiter.retry_after(1) == 15.0
+
+    clock.now += 15
+    assert limiter.get_remaining(1) == 1
+    assert limiter.is_allowed(1) is True
+    assert limiter.is_allowed(1) is False
+
+    clock.now += 60
+    assert limiter.get_remaining(1) == 4
+
+
+def test_weighted_cost_consumes_more_of_the_budget():
+    limiter, clock = make_limiter(max_requests=10, window=60)
+    assert limiter.is_allowed(7, cost=8) is True
+    assert limiter.get_remaining(7) == 2
+    # Outra análise pesada não cabe, mas mensagens simples ainda sim
+    assert limiter.is_allowed(7, cost=8) is False
+    assert limiter.is_allowed(7) is True
+    assert limiter.is_allowed(7) is True
+    assert limiter.is_allowed(7) is False
+    # Recusa não consome
+    assert limiter.retry_after(7, cost=8) == 48.0
+
+
+def test_users_are_independent():
+    limiter, _ = make_limiter(max_requests=1)
+    assert limiter.is_allowed(1) is True
+    assert limiter.is_allowed(1) is False
+    assert limiter.is_allowed(2) is True
+
+
+def test_idle_keys_are_evicted_and_memory_is_bounded():
+    clock = FakeClock()
+    backend = MemoryBackend(max_keys=100, clock=clock)
+    limiter = RateLimiter(5, 10, backend=backend)
+    for user in range(50):
+        limiter.is_allowed(user)
+    assert len(backend) == 50
+
+    # Todos reabasteceram: a próxima chamada limpa os ociosos
+    clock.now += 11
+    limiter.is_allowed(999)
+    assert len(backend) == 1
+
+    for user in range(1000):
+        limiter.is_allowed(user)
+    assert len(backend) <= 100
+
+
+def test_check_rate_limit_message():
+    limiter = RateLimiter(10, 60, backend=MemoryBackend(clock=FakeClock()), costs={"youtube": 8})
+    assert check_rate_limit(3, "youtube", limiter) is None
+    message = check_rate_limit(3, "youtube", limiter)
+    assert message.startswith("⏱️")
+    assert f"{8 * 6 - 12}s" in message
+
+
+def test_media_and_youtube_have_their_own_limits():
+    """Mídia e YouTube usam RATE_LIMIT_MEDIA/RATE_LIMIT_YOUTUBE, não o limite de mensagens"""
+    user = "teste-limites-proprios"
+    results = [check_rate_limit(user, "youtube", youtube_limiter) for _ in range(config.RATE_LIMIT_YOUTUBE + 1)]
+    assert results[:-1] == [None] * config.RATE_LIMIT_YOUTUBE
+    assert results[-1] is not None
+    assert youtube_limiter.window == 300
+
+    # Vídeo vale 2 fotos no limite de mídia
+    assert check_rate_limit(user, "video", media_limiter) is None
+    assert media_limiter.get_remaining(user) == config.RATE_LIMIT_MEDIA - 2
+    assert message_limiter.get_remaining(user) == config.RATE_LIMIT_MESSAGES
+
+
+def test_every_cost_table_key_is_charged_by_its_limiter():
+    """Tipos sem tabela própria custam 1; documento pesa como vídeo na mídia"""
+    assert set(COSTS) == {"message"}
+    assert message_limiter.cost("message") == 1
+    assert media_limiter.cost("document") == MEDIA_COSTS["document"] == 2
+    assert youtube_limiter.cost("youtube") == 1
+
+
+def test_cost_above_max_requests_is_clamped():
+    limiter = RateLimiter(4, 60, backend=MemoryBackend(clock=FakeClock()), costs={"youtube": 8, "message": 1})
+    assert limiter.cost("youtube") == 4
+    assert check_rate_limit(5, "youtube", limiter) is None
+    assert check_rate_limit(5, "message", limiter) is not None
+
+
+def test_max_requests_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimiter(0, 60)
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    clock = FakeClock()
+    db = tmp_path / "limits.db"
+    first = RateLimiter(3, 60, name="message", backend=SQLiteRateLimitBackend(db, clock=clock))
+    second = RateLimiter(3, 60, name="message", backend=SQLiteRateLimitBackend(db, clock=clock))
+    other = RateLimiter(3, 60, name="youtube", backend=SQLiteRateLimitBackend(db, clock=clock))
+
+    assert first.is_allowed(42) is True
+    assert second.is_allowed(42) is True
+    assert first.is_allowed(42) is True
+    assert second.is_allowed(42) is False
+    assert first.get_remaining(42) == 0
+    # Nome do limiter separa as chaves
+    assert other.is_allowed(42) is True
+
+    clock.now += 20
+    assert second.is_allowed(42) is True
+    for limiter in (first, second, other):
+        limiter.backend.close()
+
+
+def test_sqlite_backend_clamps_clock_jump(tmp_path):
+    clock = FakeClock(now=10_000.0)
+    limiter = RateLimiter(2, 60, backend=SQLiteRateLimitBackend(tmp_path / "limits.db", clock=clock))
+    assert limiter.is_allowed(1) and limiter.is_allowed(1)
+    # Relógio voltou uma hora: bloqueia no máximo uma janela, não a hora inteira
+    clock.now -= 3600
+    assert limiter.retry_after(1) <= 60
+    assert limiter.is_allowed(1) is False
+    clock.now += 30
+    assert limiter.is_allowed(1) is True
+    limiter.backend.close()
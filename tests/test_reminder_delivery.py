@@ -0,0 +1,150 @@
+"""Testes da entrega de lembretes (outbox, canais em paralelo, SMTP assíncrono)"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+sys.path.insert(0, str(_repo_root / "scripts"))
+
+from stub_smtp_server import StubSMTPServer
+from workspace.storage.metrics import metrics
+from workspace.storage.reminder_store import ReminderStore
+from workspace.tools import reminder_notifier
+from workspace.tools.reminder_delivery import DeliveryQueue, backoff_delay
+from workspace.tools.reminder_notifier import ReminderNotifier
+
+
+def _claimed(store, deliveries, due_at=None):
+    reminder_id = store.add("pagar boleto", due_at or time.time(), "10/10/2030 às 10:00")
+    assert store.claim(reminder_id, deliveries)
+    return reminder_id
+
+
+def _smtp_notifier(store, port):
+    notifier = ReminderNotifier(store=store, senders={})
+    notifier.email = "bot@teste.local"
+    notifier.smtp_server = "127.0.0.1"
+    notifier.smtp_port = port
+    notifier.smtp_starttls = False
+    notifier.password = None
+    notifier.senders = {"email": notifier.send_email}
+    return notifier
+
+
+def test_backoff_grows_exponentially_with_cap():
+    delays = [backoff_delay(attempt, base=10, cap=100) for attempt in (1, 2, 3, 6)]
+    assert 8 <= delays[0] <= 12
+    assert 16 <= delays[1] <= 24
+    assert 32 <= delays[2] <= 48
+    assert 80 <= delays[3] <= 120
+
+
+async def test_reminder_without_channels_stays_pending(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    reminder_id = store.add("pagar boleto", time.time(), "10/10/2030 às 10:00")
+    notifier = ReminderNotifier(store=store, senders={})
+
+    await notifier._fire(reminder_id)
+
+    assert store.get(reminder_id) is not None
+    assert [rid for _, rid in store.schedule()] == [reminder_id]
+    assert store.outbox_counts() == {"pending": 0, "delivered": 0, "failed": 0}
+
+
+async def test_channels_are_dispatched_concurrently(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    sent = []
+
+    async def slow(payload):
+        await asyncio.sleep(0.2)
+        sent.append(payload["canal"])
+
+    _claimed(store, [("email", {"canal": "email"}), ("telegram", {"canal": "telegram"})])
+    queue = DeliveryQueue(store, {"email": slow, "telegram": slow})
+
+    start = time.perf_counter()
+    assert await queue.run_due() == 2
+    assert time.perf_counter() - start < 0.35
+    assert sorted(sent) == ["email", "telegram"]
+    assert store.outbox_counts() == {"pending": 0, "delivered": 2, "failed": 0}
+
+
+async def test_failures_back_off_then_give_up(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    _claimed(store, [("telegram", {"text": "x"})])
+    before = metrics.snapshot()["counters"].get("reminder_delivery_dead{channel=telegram}", 0)
+
+    async def down(payload):
+        raise ConnectionError("fora do ar")
+
+    queue = DeliveryQueue(store, {"telegram": down}, max_attempts=3, base_delay=0.01)
+    attempts = 0
+    while store.outbox_counts()["pending"] and attempts < 10:
+        attempts += await queue.run_due()
+        await asyncio.sleep(0.05)
+
+    assert attempts == 3
+    assert store.outbox_counts() == {"pending": 0, "delivered": 0, "failed": 1}
+    assert metrics.snapshot()["counters"]["reminder_delivery_dead{channel=telegram}"] == before + 1
+
+
+async def test_pending_outbox_survives_restart(tmp_path):
+    db = tmp_path / "r.db"
+    store = ReminderStore(db)
+    _claimed(store, [("telegram", {"text": "x"})])
+    store.close()  # bot caiu entre disparar e entregar
+
+    delivered = []
+
+    async def record(payload):
+        delivered.append(payload)
+
+    reopened = ReminderStore(db)
+    assert await DeliveryQueue(reopened, {"telegram": record}).run_due() == 1
+    assert delivered == [{"text": "x"}]
+
+
+async def test_async_smtp_does_not_block_event_loop(tmp_path):
+    server = StubSMTPServer(latency_ms=50, fail_first=1)
+    port = await server.start()
+    store = ReminderStore(tmp_path / "r.db")
+    notifier = _smtp_notifier(store, port)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    try:
+        reminder_id = store.add("reunião às 15h", time.time(), "10/10/2030 às 15:00")
+        await notifier._fire(reminder_id)
+        queue = DeliveryQueue(store, notifier.senders, base_delay=0.01)
+        assert await queue.run_due() == 1  # 451 do stub: reagenda
+        await asyncio.sleep(0.05)
+        assert await queue.run_due() == 1
+    finally:
+        tick_task.cancel()
+        await server.stop()
+
+    assert store.outbox_counts()["delivered"] == 1
+    assert len(server.messages) == 1
+    assert server.messages[0]["Subject"] == "🔔 Lembrete: reunião às 15h"
+    # O loop continuou rodando durante as conversas SMTP (cada comando leva 50 ms)
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.04
+
+
+async def test_smtplib_fallback_runs_in_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(reminder_notifier, "aiosmtplib", None)
+    server = StubSMTPServer()
+    port = await server.start()
+    notifier = _smtp_notifier(ReminderStore(tmp_path / "r.db"), port)
+    try:
+        await notifier.send_email({"subject": "Lembrete: teste", "body": "corpo"})
+    finally:
+        await server.stop()
+    assert server.messages[0]["Subject"] == "Lembrete: teste"
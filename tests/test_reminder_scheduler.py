@@ -0,0 +1,116 @@
+"""Testes do agendador de lembretes em heap (ReminderNotifier + ReminderStore)"""
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+_src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.storage.reminder_store import ReminderStore
+from workspace.tools.reminder_delivery import DeliveryQueue
+from workspace.tools.reminder_notifier import ReminderNotifier
+
+
+class RecordingNotifier(ReminderNotifier):
+    """Notifier com um canal em memória no lugar de email/Telegram"""
+
+    def __init__(self, store, fail_first=False):
+        super().__init__(store=store, senders={"memoria": self._record})
+        self.delivered = []
+        self.fail_first = fail_first
+        self._delivery = DeliveryQueue(store, self.senders, base_delay=0.05)
+
+    async def _record(self, payload):
+        if self.fail_first:
+            self.fail_first = False
+            raise ConnectionError("canal fora do ar")
+        self.delivered.append((payload["text"].split("📝 ")[1].split("\n")[0], time.time()))
+
+
+def _at(seconds):
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_store_claims_each_reminder_once(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    late = store.add("depois", time.time() + 100, "x")
+    soon = store.add("antes", time.time() + 10, "x")
+
+    assert [r["id"] for r in store.pending()] == [soon, late]
+    assert store.claim(soon) is True
+    assert store.claim(soon) is False
+    assert store.get(soon) is None
+    assert store.schedule() == [(store.get(late)["due_at"], late)]
+
+
+def test_imports_legacy_json_once(tmp_path):
+    legacy = tmp_path / "reminders.json"
+    legacy.write_text(json.dumps([
+        {"text": "reunião", "datetime": "01/01/2030 às 10:00", "timestamp": "2030-01-01T10:00:00-03:00"},
+        {"text": "sem horário"},
+    ]))
+    store = ReminderStore(tmp_path / "r.db")
+
+    assert store.import_legacy([legacy, tmp_path / "inexistente.json"]) == 1
+    assert not legacy.exists() and (tmp_path / "reminders.json.migrated").exists()
+    assert [r["text"] for r in store.pending()] == ["reunião"]
+
+
+async def test_insert_wakes_scheduler_for_earlier_reminder(tmp_path):
+    notifier = RecordingNotifier(ReminderStore(tmp_path / "r.db"))
+    task = asyncio.create_task(notifier.start_monitoring())
+    try:
+        await notifier.add_reminder("amanhã", _at(3600))
+        await asyncio.sleep(0.05)  # agendador dormindo até o lembrete de amanhã
+        start = time.time()
+        await notifier.add_reminder("já", _at(0.1))
+        while not notifier.delivered and time.time() - start < 2:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert [text for text, _ in notifier.delivered] == ["já"]
+    assert notifier.delivered[0][1] - start < 0.5
+    assert [r["text"] for r in notifier.store.pending()] == ["amanhã"]
+
+
+async def test_catches_up_missed_reminders_and_retries_failures(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    store.add("perdido com o bot parado", time.time() - 600, "x")
+    store.add("antigo demais", time.time() - 3 * 86400, "x")
+    notifier = RecordingNotifier(store, fail_first=True)
+
+    task = asyncio.create_task(notifier.start_monitoring())
+    try:
+        start = time.time()
+        while not notifier.delivered and time.time() - start < 2:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+    assert [text for text, _ in notifier.delivered] == ["perdido com o bot parado"]
+    assert store.pending() == []
+    assert store.outbox_counts() == {"pending": 0, "delivered": 1, "failed": 0}
+
+
+async def test_scales_to_many_reminders(tmp_path):
+    store = ReminderStore(tmp_path / "r.db")
+    base = time.time() + 3600
+    for i in range(20000):
+        store.add(f"lembrete {i}", base + (i * 7919) % 20000, "x")
+    notifier = RecordingNotifier(store)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(notifier.start_monitoring())
+    await asyncio.sleep(0)
+    for i in range(1000):
+        await notifier.add_reminder(f"novo {i}", _at(7200 + i))
+    elapsed = time.perf_counter() - start
+    task.cancel()
+
+    assert len(notifier._heap) == 21000
+    assert notifier._heap[0][0] == base
+    assert elapsed < 5
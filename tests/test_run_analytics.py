@@ -0,0 +1,73 @@
+"""Testes do store de analytics de runs (workspace.runs.analytics)"""
+import sys
+from datetime import date
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.runs import RunManager, RunMetrics
+from workspace.runs.analytics import RunAnalytics
+
+TODAY = date(2026, 3, 10)
+
+
+def _record(run_id, day, status, duration_ms, provider="groq", tools=()):
+    return {
+        "run_id": run_id,
+        "input": {"timestamp": f"{day}T120000Z"},
+        "actions": [
+            {"tool": name, "duration_ms": ms, "result": {"success": ok}} for name, ms, ok in tools
+        ],
+        "metrics": {
+            "status": status,
+            "provider": provider,
+            "duration_ms": duration_ms,
+            "tokens_input": 100,
+            "tokens_output": 50,
+        },
+    }
+
+
+def test_aggregations(tmp_path):
+    """p95 por status/dia, tokens por provedor e ranking de tools"""
+    analytics = RunAnalytics(tmp_path / "analytics.db")
+    records = [_record(f"r{i}", "2026-03-09", "success", float(i)) for i in range(1, 101)]
+    records.append(_record("e1", "2026-03-09", "error", 5000.0, provider="nvidia"))
+    records.append(_record("old", "2026-01-01", "success", 99999.0))
+    records.append(_record(
+        "t1", "2026-03-10", "success", 10.0,
+        tools=[("web_search", 800.0, True), ("read_file", 5.0, True), ("web_search", 1200.0, False)],
+    ))
+    analytics.record_batch(records)
+    analytics.record_batch(records[:3])  # reindexação não duplica
+
+    p95 = analytics.duration_percentiles_by_status(days=7, today=TODAY)
+    assert {"day": "2026-03-09", "status": "success", "runs": 100, "p": 95.0} in p95
+    assert {"day": "2026-03-09", "status": "error", "runs": 1, "p": 5000.0} in p95
+    assert all(row["day"] >= "2026-03-04" for row in p95)
+
+    tokens = {row["provider"]: row for row in analytics.tokens_by_provider(days=7, today=TODAY)}
+    assert tokens["groq"]["runs"] == 101
+    assert tokens["nvidia"]["tokens_input"] == 100
+
+    tools = analytics.top_tools_by_latency(days=7, today=TODAY)
+    assert tools[0] == {"tool": "web_search", "calls": 2, "avg_ms": 1000.0, "max_ms": 1200.0, "errors": 1}
+    analytics.close()
+
+
+def test_run_manager_feeds_analytics(tmp_path):
+    """Runs gravados no journal chegam ao analytics; reabertura reindexa se preciso"""
+    manager = RunManager(runs_dir=tmp_path)
+    run_id = manager.create_run("oi")
+    manager.log_action(run_id, "calc", {}, {"success": True}, 1, duration_ms=3.0)
+    manager.save_metrics(run_id, RunMetrics(timestamp="x", duration_ms=20.0, status="success"))
+    manager.journal.flush()
+    assert [r["run_id"] for r in manager.analytics.recent_runs(hours=1)] == [run_id]
+    manager.close()
+
+    (tmp_path / "journal" / "analytics.db").unlink()
+    reopened = RunManager(runs_dir=tmp_path)
+    assert reopened.analytics.count() == 1
+    reopened.close()
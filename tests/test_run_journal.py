@@ -0,0 +1,206 @@
+"""Testes do journal append-only de runs (workspace.runs)"""
+import json
+import sys
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.runs import RunManager, RunMetrics
+from workspace.runs.export import export_run
+from workspace.runs.journal import RunJournal
+
+
+def _finish(manager: RunManager, message: str, status: str = "success") -> str:
+    run_id = manager.create_run(message, user_id=1)
+    manager.log_action(run_id, "web_search", {"query": message}, {"success": True}, 1)
+    manager.save_output(run_id, f"resposta para {message}")
+    manager.save_metrics(
+        run_id, RunMetrics(timestamp="2026-01-01T00:00:00Z", duration_ms=12.5, status=status)
+    )
+    return run_id
+
+
+def test_run_manager_writes_single_journal_record(tmp_path):
+    """Um run vira um registro no journal; nenhum diretório por run é criado"""
+    manager = RunManager(runs_dir=tmp_path)
+    run_id = _finish(manager, "olá")
+    manager.journal.flush()
+
+    assert [p.name for p in tmp_path.iterdir()] == ["journal"]
+    run = manager.get_run(run_id)
+    assert run.input_data["message"] == "olá"
+    assert run.actions[0]["tool"] == "web_search"
+    assert run.output_text == "resposta para olá"
+    assert run.metrics.status == "success"
+    assert manager.get_latest_runs(limit=1) == [run_id]
+    manager.close()
+
+
+def test_journal_rotates_and_reopens_index(tmp_path):
+    """Segmentos rotacionam pelo tamanho e o índice sobrevive à reabertura"""
+    journal = RunJournal(tmp_path, segment_max_bytes=200)
+    for i in range(10):
+        journal.append({"run_id": f"run_{i}", "input": {"timestamp": f"2026-01-0{i}"}, "x": "y" * 100})
+    journal.close()
+    assert len(list(tmp_path.glob("segment-*.log"))) > 1
+
+    reopened = RunJournal(tmp_path, segment_max_bytes=200)
+    assert len(reopened) == 10
+    assert reopened.get("run_7")["input"]["timestamp"] == "2026-01-07"
+    assert reopened.run_ids(since="2026-01-08") == ["run_9", "run_8"]
+    reopened.close()
+
+
+def test_journal_recovers_missing_index_and_truncated_tail(tmp_path):
+    """Índice apagado é reconstruído; registro incompleto no fim é descartado"""
+    journal = RunJournal(tmp_path)
+    journal.append({"run_id": "a", "input": {"timestamp": "1"}})
+    journal.append({"run_id": "b", "input": {"timestamp": "2"}})
+    journal.close()
+
+    (tmp_path / "index.tsv").unlink()
+    with open(tmp_path / "segment-000001.log", "ab") as f:
+        f.write(b"\x00\x00\x01\x00{\"run_id\"")  # escrita interrompida
+
+    reopened = RunJournal(tmp_path)
+    assert reopened.run_ids() == ["b", "a"]
+    reopened.append({"run_id": "c", "input": {"timestamp": "3"}})
+    reopened.flush()
+    assert reopened.get("c")["run_id"] == "c"
+    reopened.close()
+
+
+def test_journal_recovery_skips_corrupt_record(tmp_path):
+    """Registro com JSON inválido no meio é pulado; os seguintes continuam no índice"""
+    from workspace.runs.journal import encode_record
+
+    with open(tmp_path / "segment-000001.log", "wb") as f:
+        f.write(encode_record({"run_id": "a", "input": {"timestamp": "1"}}))
+        f.write(b"\x00\x00\x00\x05{bad}")
+        f.write(encode_record({"run_id": "b", "input": {"timestamp": "2"}}))
+    (tmp_path / "index.tsv").write_text("a\t1\tx\t0\n", encoding="utf-8")
+
+    journal = RunJournal(tmp_path)
+    assert journal.run_ids() == ["b", "a"]
+    assert journal.get("b")["run_id"] == "b"
+    assert [r["run_id"] for r in journal.iter_records()] == ["a", "b"]
+    journal.close()
+
+
+def test_open_runs_are_evicted_as_abandoned(tmp_path, monkeypatch):
+    """Runs que nunca chegam ao save_metrics não acumulam em memória"""
+    import workspace.runs as runs
+
+    monkeypatch.setattr(runs, "MAX_ACTIVE_RUNS", 3)
+    manager = RunManager(runs_dir=tmp_path)
+    run_ids = [manager.create_run(f"msg {i}") for i in range(5)]
+    assert list(manager._active) == run_ids[2:]
+
+    monkeypatch.setattr(runs, "ACTIVE_RUN_MAX_AGE_SECONDS", 0.0)
+    last = manager.create_run("depois")
+    assert list(manager._active) == [last]
+
+    manager.journal.flush()
+    for run_id in run_ids:
+        assert manager.get_run(run_id).metrics.status == "abandoned"
+    manager.close()
+
+
+def test_export_renders_legacy_layout(tmp_path):
+    """O exportador gera input.json, actions.log, output.md e metrics.json"""
+    manager = RunManager(runs_dir=tmp_path / "runs")
+    run_id = _finish(manager, "exportar")
+    manager.journal.flush()
+
+    run_dir = export_run(manager.journal.get(run_id), tmp_path / "export")
+    assert json.loads((run_dir / "input.json").read_text())["message"] == "exportar"
+    assert "### Tool: web_search" in (run_dir / "actions.log").read_text()
+    assert (run_dir / "output.md").read_text() == "# Output\n\nresposta para exportar\n"
+    assert json.loads((run_dir / "metrics.json").read_text())["duration_ms"] == 12.5
+    manager.close()
+
+
+def test_large_results_are_capped_and_compressed(tmp_path):
+    """Resultados grandes ficam limitados no journal; o exportador recupera o original"""
+    from workspace.runs.policy import RunLogPolicy
+
+    manager = RunManager(runs_dir=tmp_path, policy=RunLogPolicy(result_max_chars=100))
+    big = {"success": True, "content": "linha de arquivo\n" * 1000}
+    run_id = manager.create_run("ler arquivo")
+    manager.log_action(run_id, "read_file", {"path": "x"}, big, 1)
+    manager.save_metrics(run_id, RunMetrics(timestamp="t", duration_ms=1.0))
+    manager.journal.flush()
+
+    stored = manager.journal.get(run_id)["actions"][0]["result"]
+    assert stored["_truncated"] is True
+    assert len(stored["preview"]) == 100
+    assert stored["size"] > 17000
+
+    run_dir = export_run(manager.journal.get(run_id), tmp_path / "export")
+    assert (run_dir / "actions.log").read_text().count("linha de arquivo") == 1000
+    manager.close()
+
+
+def test_action_logging_modes(tmp_path):
+    """Modo off não grava ações; sob carga o modo full passa a amostrar"""
+    from workspace.runs.policy import RunLogPolicy
+
+    policy = RunLogPolicy(mode="off")
+    assert policy.keep_action(backlog=0.0) is False
+
+    policy = RunLogPolicy(mode="full", sample_rate=0.0, high_water=0.5)
+    assert policy.keep_action(backlog=0.1) is True
+    assert policy.keep_action(backlog=0.9) is False
+
+    manager = RunManager(runs_dir=tmp_path, policy=RunLogPolicy(mode="off"))
+    run_id = manager.create_run("oi")
+    manager.log_action(run_id, "calc", {}, {"success": True}, 1)
+    manager.save_metrics(run_id, RunMetrics(timestamp="t", duration_ms=1.0))
+    manager.journal.flush()
+    record = manager.journal.get(run_id)
+    assert record["actions"] == [] and record["actions_skipped"] == 1
+    manager.close()
+
+
+def test_full_queue_sheds_actions_then_drops_at_hard_cap(tmp_path):
+    """Fila cheia: primeiro descarta só as ações; no limite rígido, o registro"""
+    import threading
+
+    gate = threading.Event()
+    busy = threading.Event()
+
+    def prepare(record):
+        busy.set()
+        gate.wait()
+        return record
+
+    def record(i):
+        return {
+            "run_id": f"r{i}",
+            "input": {},
+            "actions": [{"tool": "calc"}, {"tool": "web"}],
+            "metrics": {"status": "success"},
+        }
+
+    journal = RunJournal(tmp_path, queue_max=2, prepare=prepare)
+    assert journal.append(record(0))
+    busy.wait(timeout=5)  # escritor parado no primeiro lote; a fila está vazia
+    results = [journal.append(record(i)) for i in range(1, 7)]
+    assert results == [True, True, False, False, False, False]
+    assert journal.shed == 4
+    assert journal.dropped == 2  # limite rígido: 2 * queue_max na fila
+    gate.set()
+    journal.flush()
+
+    assert len(journal) == 5
+    assert "r5" not in journal and "r6" not in journal
+    for i in range(5):
+        stored = journal.get(f"r{i}")
+        assert stored["metrics"] == {"status": "success"}
+        if i < 3:
+            assert len(stored["actions"]) == 2
+        else:
+            assert stored["actions"] == [] and stored["actions_skipped"] == 2
+    journal.close()
@@ -0,0 +1,116 @@
+"""Testes da coalescência de chamadas simultâneas (workspace.core.single_flight)"""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.core.single_flight import SingleFlight, ThreadSingleFlight
+from workspace.core.tools import ToolRegistry
+from workspace.storage.metrics import metrics
+
+
+def test_registry_coalesces_identical_concurrent_calls():
+    """Mesma tool e argumentos normalizados iguais: uma execução para todos"""
+    calls = []
+
+    async def nr_lookup(query: str) -> dict:
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return {"success": True, "norma": query}
+
+    registry = ToolRegistry()
+    registry.register("nr_lookup", nr_lookup, {}, coalesce=True)
+    before = metrics.counter("coalesced_calls", scope="tool", target="nr_lookup")
+
+    async def scenario():
+        same = [registry.execute("nr_lookup", {"query": q}) for q in ("NR-35", "nr-35 ", "Nr-35")]
+        other = registry.execute("nr_lookup", {"query": "NR-10"})
+        return await asyncio.gather(*same, other)
+
+    results = asyncio.run(scenario())
+    assert calls == ["NR-35", "NR-10"]
+    assert results[0] is results[1] is results[2]
+    assert metrics.counter("coalesced_calls", scope="tool", target="nr_lookup") == before + 2
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    """Cancelar quem iniciou a chamada não afeta quem está aguardando"""
+    flight = SingleFlight("tool")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("k", "slow", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", "slow", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == 42
+    assert flight.coalesced == 1
+
+
+def test_window_shares_recent_result_then_expires():
+    """Dentro da janela o resultado recente é reaproveitado; depois, nova chamada"""
+    flight = SingleFlight("tool", window=0.05)
+    calls = {"n": 0}
+
+    async def fetch():
+        calls["n"] += 1
+        return calls["n"]
+
+    async def scenario():
+        first = await flight.do("k", "fetch", fetch)
+        second = await flight.do("k", "fetch", fetch)
+        await asyncio.sleep(0.1)
+        third = await flight.do("k", "fetch", fetch)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+
+
+def test_thread_single_flight_shares_result_and_errors():
+    """Threads concorrentes compartilham resultado e exceção da mesma chamada"""
+    flight = ThreadSingleFlight("llm")
+    calls = {"n": 0}
+    started = threading.Event()
+
+    def call():
+        calls["n"] += 1
+        started.set()
+        time.sleep(0.1)
+        return "resposta"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "k", "groq", call)
+        started.wait()
+        followers = [pool.submit(flight.do, "k", "groq", call) for _ in range(3)]
+        results = [leader.result()] + [f.result() for f in followers]
+    assert results == ["resposta"] * 4
+    assert calls["n"] == 1
+    assert flight.coalesced == 3
+
+    def fail():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("429")
+
+    started.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "e", "groq", fail)
+        started.wait()
+        follower = pool.submit(flight.do, "e", "groq", fail)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
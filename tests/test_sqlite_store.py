@@ -0,0 +1,108 @@
+"""Testes do SQLiteStore (conexão persistente, WAL) e da fachada assíncrona"""
+import sys
+from pathlib import Path
+
+import pytest
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.storage import sqlite_store
+from workspace.storage.sqlite_store import SCHEMA_VERSION, AsyncSQLiteStore, SQLiteStore
+
+
+def test_sqlite_store_uses_wal(tmp_path):
+    """Conexão de longa duração em WAL com synchronous=NORMAL"""
+    store = SQLiteStore(db_path=str(tmp_path / "bot.db"))
+    journal = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = store._conn.execute("PRAGMA synchronous").fetchone()[0]
+    assert journal == "wal"
+    assert synchronous == 1  # NORMAL
+    store.close()
+
+
+def test_add_turn_single_commit(tmp_path):
+    """add_turn grava pergunta, resposta e métrica juntas"""
+    store = SQLiteStore(db_path=str(tmp_path / "bot.db"))
+    store.add_turn("Oi", "Olá!", chat_id=42, event="message_processed", event_data={"length": 2})
+
+    history = store.get_history(limit=10, chat_id=42)
+    assert history == [
+        {"role": "user", "content": "Oi"},
+        {"role": "assistant", "content": "Olá!"},
+    ]
+    events = store._conn.execute("SELECT event, data FROM metrics").fetchall()
+    assert events == [("message_processed", '{"length": 2}')]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_async_store_roundtrip(tmp_path):
+    """AsyncSQLiteStore expõe a mesma API como corrotinas"""
+    store = AsyncSQLiteStore(SQLiteStore(db_path=str(tmp_path / "bot.db")))
+
+    await store.add_message("user", "primeira", chat_id=1)
+    await store.add_turn("segunda", "resposta", chat_id=1)
+    await store.add_message("user", "outro chat", chat_id=2)
+
+    history = await store.get_history(limit=2, chat_id=1)
+    assert [m["content"] for m in history] == ["segunda", "resposta"]
+
+    await store.clear_history(chat_id=1)
+    assert await store.get_history(chat_id=1) == []
+    assert len(await store.get_history(chat_id=2)) == 1
+    store.close()
+
+
+def test_migrates_legacy_database(tmp_path):
+    """Banco anterior às migrações ganha tipos, índice e tabela de arquivo"""
+    import sqlite3
+
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, role TEXT NOT NULL, "
+        "content TEXT NOT NULL, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute("INSERT INTO conversations (role, content) VALUES ('user', 'antiga')")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteStore(db_path=str(db_path))
+    assert store.schema_version == SCHEMA_VERSION
+    assert store.get_history() == [{"role": "user", "content": "antiga"}]
+
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT role, content FROM conversations "
+        "WHERE chat_id = ? ORDER BY id DESC LIMIT ?",
+        (1, 10),
+    ).fetchall()
+    assert any("idx_conversations_chat_id_id" in row[-1] for row in plan)
+    store.close()
+
+    # Reabrir não reaplica migrações
+    assert SQLiteStore(db_path=str(db_path)).get_history() == [{"role": "user", "content": "antiga"}]
+
+
+def test_retention_archives_old_turns(tmp_path, monkeypatch):
+    """Acima de retain_per_chat + ARCHIVE_BATCH, os turnos antigos vão para o arquivo"""
+    monkeypatch.setattr(sqlite_store, "ARCHIVE_BATCH", 4)
+    store = SQLiteStore(db_path=str(tmp_path / "bot.db"), retain_per_chat=6)
+
+    for i in range(5):
+        store.add_turn(f"pergunta {i}", f"resposta {i}", chat_id=7)
+    store.add_message("user", "outro chat", chat_id=8)
+
+    hot = store.get_history(limit=100, chat_id=7)
+    archived = store.get_archived_history(chat_id=7)
+    assert len(hot) == 6
+    assert hot[0]["content"] == "pergunta 2"
+    assert [m["content"] for m in archived] == [
+        "pergunta 0", "resposta 0", "pergunta 1", "resposta 1",
+    ]
+    assert store.get_history(chat_id=8) == [{"role": "user", "content": "outro chat"}]
+
+    store.clear_history(chat_id=7)
+    assert store.get_archived_history(chat_id=7) == []
+    store.close()
@@ -0,0 +1,82 @@
+"""Testes do perfil de planilhas em uma passada (utils.table_profiler)"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from utils.table_profiler import format_profile, profile_table
+
+
+def _column(profile, name):
+    return next(c for c in profile["columns"] if c["name"] == name)
+
+
+def test_csv_in_chunks_matches_pandas(tmp_path):
+    rng = np.random.default_rng(7)
+    n = 5000
+    frame = pd.DataFrame({
+        "valor": rng.normal(100, 15, n),
+        "qtd": rng.integers(0, 50, n),
+        "categoria": rng.choice(["a", "b", "c"], n, p=[0.6, 0.3, 0.1]),
+    })
+    frame.loc[::10, "valor"] = np.nan
+    path = tmp_path / "dados.csv"
+    frame.to_csv(path, index=False)
+
+    profile = profile_table(str(path), chunk_rows=700)
+
+    assert profile["rows"] == n
+    valor = _column(profile, "valor")
+    expected = frame["valor"].dropna()
+    assert valor["kind"] == "numeric"
+    assert valor["count"] == len(expected)
+    assert valor["nulls"] == n - len(expected)
+    assert abs(valor["mean"] - expected.mean()) < 1e-6
+    assert abs(valor["std"] - expected.std()) < 1e-6
+    assert valor["min"] == expected.min() and valor["max"] == expected.max()
+    assert abs(valor["quantiles"][0.5] - expected.median()) < 2.0
+
+    categoria = _column(profile, "categoria")
+    assert categoria["kind"] == "text"
+    assert categoria["distinct"] == 3
+    assert categoria["top"][0][0] == "a"
+    assert len(profile["preview"]) == 8
+
+
+def test_semicolon_and_empty_rows_columns(tmp_path):
+    path = tmp_path / "br.csv"
+    path.write_text("nome;vazia;total\nAna;;10\n;;\nBia;;20\n", encoding="utf-8")
+
+    profile = profile_table(str(path))
+
+    assert profile["rows"] == 2
+    assert [c["name"] for c in profile["columns"]] == ["nome", "total"]
+    assert _column(profile, "total")["mean"] == 15.0
+    summary = format_profile(profile, "br.csv", "ARQUIVO CSV")
+    assert "ANÁLISE DE ARQUIVO CSV" in summary
+    assert "2 linhas × 2 colunas" in summary
+    assert "| Ana | 10" in summary
+
+
+def test_xlsx_streaming(tmp_path):
+    frame = pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=30, freq="D"),
+        "setor": ["obra", "escritório", "obra"] * 10,
+        "horas": range(30),
+    })
+    path = tmp_path / "planilha.xlsx"
+    frame.to_excel(path, index=False)
+
+    profile = profile_table(str(path), chunk_rows=7)
+
+    assert profile["rows"] == 30
+    assert _column(profile, "data")["kind"] == "date"
+    assert _column(profile, "setor")["top"][0] == ("obra", 20)
+    assert _column(profile, "horas")["max"] == 29
+    summary = format_profile(profile, "planilha.xlsx", "PLANILHA EXCEL")
+    assert "Colunas de data: data" in summary
@@ -0,0 +1,136 @@
+"""Testes do cache por tool (workspace.core.tool_cache)"""
+import asyncio
+import sys
+from pathlib import Path
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+
+from workspace.core import tool_cache as tool_cache_module
+from workspace.core.tool_cache import CachePolicy, cached
+from workspace.core.tools import ToolRegistry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _fake_time(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(tool_cache_module.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def test_registry_cache_normalizes_arguments(monkeypatch):
+    """Mesma cidade com caixa/espaços diferentes é um hit; TTL vencido vira miss"""
+    clock = _fake_time(monkeypatch)
+    calls = []
+
+    async def get_weather(city: str) -> dict:
+        calls.append(city)
+        return {"success": True, "weather": city}
+
+    registry = ToolRegistry()
+    registry.register("get_weather", get_weather, {}, cache=CachePolicy(ttl=60))
+
+    async def scenario():
+        first = await registry.execute("get_weather", {"city": "São Paulo"})
+        second = await registry.execute("get_weather", {"city": "  são   PAULO "})
+        clock.now += 61
+        await registry.execute("get_weather", {"city": "são paulo"})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {"success": True, "weather": "São Paulo"}
+    assert calls == ["São Paulo", "são paulo"]
+    stats = registry.cache_stats()["get_weather"]
+    assert (stats["hit"], stats["miss"]) == (1, 2)
+
+
+def test_stale_while_revalidate(monkeypatch):
+    """Na janela stale devolve o valor antigo e atualiza em segundo plano"""
+    clock = _fake_time(monkeypatch)
+    version = {"n": 0}
+
+    @cached(CachePolicy(ttl=10, stale_ttl=100))
+    async def news(topic: str) -> dict:
+        version["n"] += 1
+        return {"success": True, "v": version["n"]}
+
+    async def scenario():
+        assert (await news("nr"))["v"] == 1
+        clock.now += 20
+        stale = await news("nr")
+        await asyncio.sleep(0)  # deixa o refresh rodar
+        fresh = await news("nr")
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale["v"] == 1
+    assert fresh["v"] == 2
+    assert news.tool_cache.stats()["stale"] == 1
+
+
+def test_negative_results_have_short_ttl(monkeypatch):
+    """Erros ficam em cache só por `negative_ttl`; exceções não são cacheadas"""
+    clock = _fake_time(monkeypatch)
+    calls = {"n": 0}
+
+    @cached(CachePolicy(ttl=None, negative_ttl=5))
+    async def geocode(city: str) -> dict:
+        calls["n"] += 1
+        if city == "boom":
+            raise RuntimeError("falha de rede")
+        return {"success": False, "error": "Cidade não encontrada"}
+
+    async def scenario():
+        await geocode("Atlântida")
+        await geocode("atlântida")
+        clock.now += 6
+        await geocode("Atlântida")
+        for _ in range(2):
+            try:
+                await geocode("boom")
+            except RuntimeError:
+                pass
+
+    asyncio.run(scenario())
+    assert calls["n"] == 4
+    assert geocode.tool_cache.stats()["negative"] == 1
+
+
+def test_geocode_upstream_error_is_not_cached_as_not_found(monkeypatch):
+    """429 do Nominatim não vira "cidade não encontrada" por uma hora"""
+    import httpx
+
+    from workspace.tools import extra_tools
+
+    request = httpx.Request("GET", "https://nominatim.openstreetmap.org/search")
+    responses = [
+        httpx.Response(429, request=request),
+        httpx.Response(200, json=[{"lat": "-23.5", "lon": "-46.6"}], request=request),
+        httpx.Response(200, json=[], request=request),
+    ]
+
+    class FakePool:
+        async def get(self, url, **kwargs):
+            return responses.pop(0)
+
+    monkeypatch.setattr(extra_tools, "http_pool", FakePool())
+    extra_tools.geocode_city.tool_cache.clear()
+
+    async def scenario():
+        failed = await extra_tools.calculate_distance("São Paulo", "São Paulo")
+        assert failed["success"] is False and "429" in failed["error"]
+        assert await extra_tools.geocode_city("São Paulo") == (-23.5, -46.6)
+        assert await extra_tools.geocode_city("Atlântida") == (None, None)
+        assert await extra_tools.geocode_city("Atlântida") == (None, None)
+
+    asyncio.run(scenario())
+    assert responses == []
+    extra_tools.geocode_city.tool_cache.clear()
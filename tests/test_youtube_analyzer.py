@@ -0,0 +1,230 @@
+"""Testes da análise de frames em lotes paralelos (YouTubeAnalyzer)"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+_repo_root = Path(__file__).resolve().parent.parent
+_src = _repo_root / "src"
+sys.path.insert(0, str(_src))
+sys.path.insert(0, str(_repo_root / "scripts"))
+
+from groq import Groq
+from stub_llm_server import StubConfig, StubLLMServer
+from utils.media_pipeline import Keyframe
+from workspace.storage.media_cache import MediaCache
+from workspace.tools import youtube_analyzer
+from workspace.tools.youtube_analyzer import (
+    MIN_TRANSCRIPT_CHARS,
+    SUMMARY_WINDOW_CHARS,
+    VISION_BATCH_SIZE,
+    YouTubeAnalyzer,
+    parse_vtt,
+)
+
+
+def _frames(n):
+    return [Keyframe(float(i * 10), bytes([i])) for i in range(n)]
+
+
+async def test_batches_run_concurrently_and_are_merged():
+    analyzer = YouTubeAnalyzer()
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    batches = []
+
+    def describe(frames, part, total):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            batches.append((part, total, len(frames)))
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return f"parte {part}"
+
+    merged = []
+
+    def merge(partials, prompt):
+        merged.append(partials)
+        return "resumo final"
+
+    analyzer._describe_batch = describe
+    analyzer._merge_summaries = merge
+
+    result = await analyzer._analyze_frames(_frames(2 * VISION_BATCH_SIZE + 1), "resuma")
+
+    assert result == "resumo final"
+    assert sorted(batches) == [(1, 3, VISION_BATCH_SIZE), (2, 3, VISION_BATCH_SIZE), (3, 3, 1)]
+    assert active["max"] > 1
+    assert merged == [["parte 1", "parte 2", "parte 3"]]
+
+
+async def test_failed_batches_are_skipped_and_single_part_still_gets_the_prompt():
+    analyzer = YouTubeAnalyzer()
+
+    def describe(frames, part, total):
+        if part == 1:
+            raise RuntimeError("429")
+        return "só o segundo trecho"
+
+    merged = []
+
+    def merge(partials, prompt):
+        merged.append((partials, prompt))
+        return "resposta ao pedido"
+
+    analyzer._describe_batch = describe
+    analyzer._merge_summaries = merge
+
+    result = await analyzer._analyze_frames(_frames(VISION_BATCH_SIZE + 2), "resuma")
+    assert result == "resposta ao pedido"
+    assert merged == [(["só o segundo trecho"], "resuma")]
+
+
+def test_parse_vtt_drops_timings_tags_and_rolling_repeats():
+    vtt = """WEBVTT
+Kind: captions
+Language: pt
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+olá<00:00:00.500><c> pessoal</c>
+
+00:00:02.000 --> 00:00:04.000
+olá pessoal
+hoje vamos falar de NR-35
+"""
+    assert parse_vtt(vtt) == "olá pessoal hoje vamos falar de NR-35"
+
+
+def _chunks(tmp_path, n):
+    chunks = []
+    for i in range(n):
+        path = tmp_path / f"chunk_{i:03d}.m4a"
+        path.write_bytes(b"\0" * (100 * (i + 1)))
+        chunks.append(path)
+    return chunks
+
+
+async def test_transcribe_chunks_against_stub_server(tmp_path):
+    server = StubLLMServer(StubConfig(latency_ms=100, jitter_ms=0))
+    analyzer = YouTubeAnalyzer()
+    analyzer._client = Groq(api_key="stub", base_url=server.start_in_thread())
+    progress = []
+
+    async def on_partial(done, total, text):
+        progress.append((done, total, text))
+
+    try:
+        start = time.perf_counter()
+        transcript = await analyzer.transcribe_chunks(_chunks(tmp_path, 6), on_partial)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop_thread()
+
+    assert server.stats.transcriptions == 6
+    assert transcript.startswith("Transcrição sintética de chunk_000.m4a (100 bytes).")
+    assert [p[0] for p in progress] == [1, 2, 3, 4, 5, 6]
+    assert "chunk_005.m4a" in progress[-1][2]
+    assert elapsed < 6 * 0.1  # em paralelo, não em série
+
+
+async def test_partials_are_delivered_in_audio_order(tmp_path):
+    analyzer = YouTubeAnalyzer()
+    delays = [0.15, 0.0, 0.05]
+
+    def transcribe(path):
+        index = int(path.stem.split("_")[1])
+        time.sleep(delays[index])
+        if index == 2:
+            raise RuntimeError("falha no trecho")
+        return f"texto {index}"
+
+    analyzer._transcribe_chunk = transcribe
+    progress = []
+
+    async def on_partial(done, total, text):
+        progress.append((done, text))
+
+    transcript = await analyzer.transcribe_chunks(_chunks(tmp_path, 3), on_partial)
+
+    assert transcript == "texto 0 texto 1"
+    assert progress == [(1, "texto 0"), (2, "texto 1")]
+
+
+async def test_long_transcript_is_summarized_in_windows():
+    analyzer = YouTubeAnalyzer()
+    calls = []
+
+    def merge(partials, prompt, label="x"):
+        calls.append((len(partials), label))
+        return f"resumo {len(calls)}"
+
+    analyzer._merge_summaries = merge
+    transcript = " ".join(["palavra"] * (SUMMARY_WINDOW_CHARS // 4))
+
+    result = await analyzer.summarize_transcript(transcript, "resuma")
+
+    windows = [c for c in calls if c[1] == "Transcrição"]
+    assert len(windows) >= 2
+    assert calls[-1] == (len(windows), "Resumos dos trechos da transcrição")
+    assert result == f"resumo {len(calls)}"
+
+
+async def test_failed_transcript_windows_are_dropped():
+    analyzer = YouTubeAnalyzer()
+    calls = []
+    lock = threading.Lock()
+
+    def merge(partials, prompt, label="x"):
+        with lock:
+            calls.append((list(partials), label))
+            first = len(calls) == 1
+        if first:
+            raise RuntimeError("429")
+        return f"resumo {len(calls)}"
+
+    analyzer._merge_summaries = merge
+    transcript = " ".join(["palavra"] * (SUMMARY_WINDOW_CHARS // 4))
+
+    result = await analyzer.summarize_transcript(transcript, "resuma")
+
+    windows = [c for c in calls if c[1] == "Transcrição"]
+    final_partials, label = calls[-1]
+    assert label == "Resumos dos trechos da transcrição"
+    assert len(final_partials) == len(windows) - 1
+    assert result == f"resumo {len(calls)}"
+
+
+async def test_all_transcript_windows_failing_raises():
+    analyzer = YouTubeAnalyzer()
+
+    def merge(partials, prompt, label="x"):
+        raise RuntimeError("groq fora do ar")
+
+    analyzer._merge_summaries = merge
+    transcript = " ".join(["palavra"] * (SUMMARY_WINDOW_CHARS // 4))
+
+    with pytest.raises(RuntimeError, match="groq fora do ar"):
+        await analyzer.summarize_transcript(transcript, "resuma")
+
+
+async def test_subtitles_skip_video_download(tmp_path, monkeypatch):
+    monkeypatch.setattr(youtube_analyzer, "media_cache", MediaCache(tmp_path))
+    analyzer = YouTubeAnalyzer()
+
+    async def subtitles(clean_url, tmpdir):
+        return "fala " * MIN_TRANSCRIPT_CHARS
+
+    async def no_download(*args):
+        raise AssertionError("não deveria baixar áudio/vídeo")
+
+    analyzer._download_subtitles = subtitles
+    analyzer._download_audio = no_download
+    analyzer._download_video = no_download
+    analyzer._merge_summaries = lambda partials, prompt, label="": "resumo da fala"
+
+    result = await analyzer.analyze_youtube_video("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert result.endswith("resumo da fala")
@@ -193,13 +193,15 @@ def diagnostico_completo():
     try:
         from config import config
 
-        reminders_file = str(config.REMINDERS_FILE)
-        if os.path.exists(reminders_file):
-            with open(reminders_file, "r") as f:
-                reminders = json.load(f)
-            print(f"  ✅ Arquivo existe: {len(reminders)} lembretes")
+        reminders_db = str(config.REMINDERS_DB)
+        if os.path.exists(reminders_db):
+            from workspace.storage.reminder_store import ReminderStore
+
+            store = ReminderStore(reminders_db)
+            print(f"  ✅ Banco existe: {len(store.schedule())} lembretes pendentes")
+            store.close()
         else:
-            print(f"  ⚠️ Arquivo não existe ainda (será criado no primeiro lembrete)")
+            print(f"  ⚠️ Banco não existe ainda (será criado no primeiro lembrete)")
     except Exception as e:
         print(f"  ❌ Erro ao verificar lembretes: {e}")
 